@@ -0,0 +1,260 @@
+"""
+Módulo com a execução de uma coleta em lote (sem interface).
+
+BatchRunner liga as peças da coleta: registra os jobs (nicho, cidade) na
+tabela de jobs, pula os já concluídos, distribui o restante no pool de
+navegadores e grava cada resultado no arquivo incremental assim que chega.
+Com um índice de deduplicação, as empresas do job entram no índice na mesma
+gravação: um job que falha ou é refeito não deixa lugares marcados como
+coletados sem estarem no arquivo.
+É usado pela interface gráfica e pela linha de comando (cli.py), por isso
+não importa tkinter.
+
+Jobs que esgotaram as novas tentativas do pool vão para a lista de
+descartados, e lugares que não abriram para a lista de lugares descartados;
+dead_letter_pairs e run_failed_places reprocessam só essas unidades.
+"""
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from dedup_index import DedupIndex
+from job_store import JobStore, JobKey, DONE
+from metrics import Metrics
+from pool import ScrapingPool
+from results_sink import ResultsSink
+from retry import RetriesExhaustedError
+
+JobPair = Tuple[str, Dict]
+
+
+def job_key(nicho: str, municipio: Dict) -> Tuple[str, str, str]:
+    """Chave do job na tabela de jobs: (nicho, cidade, UF)."""
+    return (nicho, municipio['nome'], municipio.get('uf') or '')
+
+
+class BatchRunner:
+    """Executa os jobs pendentes de uma coleta e grava os resultados."""
+
+    def __init__(self, pool: ScrapingPool, job_store: JobStore, results_sink: ResultsSink,
+                 metrics: Optional[Metrics] = None, dedup_index: Optional[DedupIndex] = None):
+        """
+        Args:
+            pool: Pool de navegadores que executa as buscas
+            job_store: Tabela de jobs da coleta
+            results_sink: Arquivo incremental onde os resultados são gravados
+            metrics: Métricas da coleta (as mesmas passadas aos scrapers)
+            dedup_index: Índice de empresas já coletadas (o mesmo passado aos
+                scrapers); registros de empresas já gravadas são descartados
+        """
+        self.pool = pool
+        self.job_store = job_store
+        self.results_sink = results_sink
+        self.metrics = metrics or Metrics()
+        self.dedup_index = dedup_index
+        self.failed = 0
+
+    def pending_pairs(self, nichos: Iterable[str], cidades: Iterable[Dict]) -> List[JobPair]:
+        """
+        Registra todos os jobs e retorna os que ainda não foram concluídos.
+
+        Args:
+            nichos: Nichos de mercado
+            cidades: Municípios ({'nome', 'uf', 'id'}); nomes repetidos em
+                estados diferentes viram buscas diferentes
+
+        Returns:
+            Pares (nicho, município) pendentes, na ordem nicho x cidade
+        """
+        pairs = self._all_pairs(nichos, cidades)
+        keys = [job_key(nicho, municipio) for nicho, municipio in pairs]
+        self.job_store.add_jobs(keys)
+        pending = set(self.job_store.pending_keys(keys))
+        return [pair for pair, key in zip(pairs, keys) if key in pending]
+
+    def dead_letter_pairs(self, nichos: Iterable[str], cidades: Iterable[Dict]) -> List[JobPair]:
+        """
+        Volta os jobs descartados para a fila e retorna os pares correspondentes.
+
+        Args:
+            nichos: Nichos da coleta (os mesmos de pending_pairs)
+            cidades: Municípios da coleta
+
+        Returns:
+            Pares (nicho, município) que estavam descartados
+        """
+        dead = self.job_store.dead_letter_keys()
+        if not dead:
+            return []
+        self.job_store.requeue_dead_letter()
+        return [pair for pair in self._all_pairs(nichos, cidades) if job_key(*pair) in dead]
+
+    @staticmethod
+    def _all_pairs(nichos: Iterable[str], cidades: Iterable[Dict]) -> List[JobPair]:
+        cidades = list(cidades)
+        return [(nicho, municipio) for nicho in nichos for municipio in cidades]
+
+    def run(
+        self,
+        pairs: List[JobPair],
+        on_progress: Optional[Callable[[int, int, str, Dict, Optional[Exception]], None]] = None,
+        on_job_start: Optional[Callable[[str, Dict], None]] = None
+    ) -> int:
+        """
+        Processa os pares e bloqueia até terminar ou o pool ser parado.
+
+        Args:
+            pairs: Pares (nicho, município), normalmente de pending_pairs
+            on_progress: Callback (concluídos, total, nicho, município, erro)
+                chamado depois de cada job, na thread que chamou run()
+            on_job_start: Callback (nicho, município) chamado na thread do
+                worker quando ele começa um job; precisa ser thread-safe
+
+        Returns:
+            Número de jobs processados
+        """
+        def save(key, results, failed_places, error):
+            if isinstance(error, RetriesExhaustedError):
+                # Tentativas esgotadas: só volta com dead_letter_pairs
+                self.job_store.mark_dead_letter(key, str(error))
+                return 'descartado'
+            if error:
+                self.job_store.mark_failed(key, str(error))
+                return 'falhou'
+            results = self._persist(results)
+            self.job_store.mark_done(key, len(results))
+            self.job_store.add_failed_places(key, failed_places)
+            return 'concluido'
+
+        def scrape(scraper, nicho, municipio):
+            # Descarta sobras de uma tentativa interrompida por bloqueio (o job é refeito inteiro)
+            scraper.take_failed_places()
+            return scraper.scrape_nicho_cidade(nicho, municipio), scraper.take_failed_places()
+
+        def job_started(nicho, municipio):
+            self.job_store.mark_running(job_key(nicho, municipio))
+            if on_job_start:
+                on_job_start(nicho, municipio)
+
+        return self._run(pairs, scrape, save, on_progress, on_job_start=job_started)
+
+    def run_failed_places(
+        self,
+        nichos: Iterable[str],
+        cidades: Iterable[Dict],
+        on_progress: Optional[Callable[[int, int, str, Dict, Optional[Exception]], None]] = None
+    ) -> int:
+        """
+        Extrai de novo os lugares descartados, sem refazer as buscas.
+
+        Cada job com lugares descartados vira uma tarefa do pool; os lugares
+        que voltarem a falhar continuam na lista.
+
+        Args:
+            nichos: Nichos da coleta (para reconstruir os municípios dos jobs)
+            cidades: Municípios da coleta
+            on_progress: Mesmo callback de run()
+
+        Returns:
+            Número de jobs processados
+        """
+        places = self.job_store.failed_places()
+        pairs = [pair for pair in self._all_pairs(nichos, cidades) if job_key(*pair) in places]
+        if not pairs:
+            return 0
+        print(f"↻ Reprocessando {sum(len(places[job_key(*pair)]) for pair in pairs)} lugar(es) descartado(s)")
+
+        def save(key, results, failed_places, error):
+            if error:
+                return 'falhou'
+            self._persist(results)
+            self.job_store.remove_failed_places(places[key])
+            self.job_store.add_failed_places(key, failed_places)
+            return 'concluido'
+
+        def scrape(scraper, nicho, municipio):
+            scraper.take_failed_places()
+            urls = places[job_key(nicho, municipio)]
+            return scraper.scrape_places(urls, nicho, municipio), scraper.take_failed_places()
+
+        return self._run(pairs, scrape, save, on_progress)
+
+    def _persist(self, results: List[Dict]) -> List[Dict]:
+        """Grava os registros do job e os registra no índice na mesma transação."""
+        if not self.dedup_index:
+            self.results_sink.append(results)
+            return results
+
+        def write(records):
+            # fsync antes do commit do índice: empresa no índice está no disco
+            self.results_sink.append(records)
+            self.results_sink.flush()
+
+        return self.dedup_index.commit(results, write)
+
+    def _run(
+        self,
+        pairs: List[JobPair],
+        task: Callable,
+        save: Callable[[JobKey, List[Dict], List[str], Optional[Exception]], str],
+        on_progress: Optional[Callable[[int, int, str, Dict, Optional[Exception]], None]],
+        on_job_start: Optional[Callable[[str, Dict], None]] = None
+    ) -> int:
+        total = len(pairs)
+        current = 0
+
+        def on_job_done(nicho, municipio, results, error):
+            nonlocal current
+            # Executado sempre nesta thread: é a única que grava os arquivos
+            records, failed_places = results if not error else ([], [])
+            with self.metrics.timer('gravacao'):
+                status = save(job_key(nicho, municipio), records, failed_places, error)
+            if error:
+                self.failed += 1
+            self.metrics.incr('jobs', status=status)
+
+            current += 1
+            if on_progress:
+                on_progress(current, total, nicho, municipio, error)
+
+        return self.pool.run(pairs, on_job_done, on_job_start=on_job_start, task=task)
+
+    def stop(self):
+        """Pede para os workers pararem após a busca atual."""
+        self.pool.stop()
+
+    def all_done(self) -> bool:
+        """Indica se todos os jobs registrados terminaram com sucesso, sem lugares descartados."""
+        return set(self.job_store.summary()) <= {DONE} and not self.job_store.failed_places()
+
+    def print_stats(self):
+        """Imprime as estatísticas de sessão dos navegadores."""
+        stats = self.pool.get_session_stats()
+        print(
+            f"⏱️ Sessão: {stats['buscas']} buscas, {stats['inicializacoes']} inicialização(ões) do navegador, "
+            f"~{stats['tempo_economizado']:.0f}s economizados em relação a um navegador por busca"
+        )
+        print(
+            f"⏱️ Tempo esperando a página: {stats['tempo_espera']:.0f}s | "
+            f"pausas anti-bloqueio: {stats['tempo_throttle']:.0f}s | "
+            f"tráfego: {stats['bytes_transferidos'] / 1024 / 1024:.1f} MB"
+        )
+        estados = ', '.join(f"{estado}: {n}" for estado, n in sorted(stats['estados_pagina'].items()))
+        print(
+            f"🚫 Bloqueios/CAPTCHA: {stats['bloqueios']} ({stats['taxa_bloqueio']:.1%} das buscas), "
+            f"{stats['jobs_reenfileirados']} job(s) reenfileirado(s)" + (f" | páginas: {estados}" if estados else "")
+        )
+        print(
+            f"↻ Novas tentativas: {stats['retentativas']} de jobs, "
+            f"{self.metrics.get_counter('retentativas', nivel='resultado'):.0f} de lugares | "
+            f"descartados: {len(self.job_store.dead_letter_keys())} job(s), "
+            f"{sum(len(urls) for urls in self.job_store.failed_places().values())} lugar(es)"
+        )
+        # Onde o tempo foi gasto: etapas ordenadas pelo tempo total
+        timers = self.metrics.snapshot()['timers']
+        for name, timer in sorted(timers.items(), key=lambda item: -item[1]['total_s'])[:8]:
+            print(f"⏱️ {name}: {timer['contagem']}x, total {timer['total_s']:.1f}s, "
+                  f"p50 {timer['p50_s']:.2f}s, p95 {timer['p95_s']:.2f}s")
+
+    def close(self):
+        """Fecha os navegadores e grava o que falta do arquivo de resultados."""
+        self.pool.close()
+        self.results_sink.flush()
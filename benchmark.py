@@ -0,0 +1,417 @@
+"""
+Benchmark offline do caminho crítico do scraper.
+
+Sobe um servidor HTTP local que serve uma réplica do DOM do Maps
+(benchmark_fixtures/maps.html com os lugares de places.json) e roda o
+GoogleMapsScraper de verdade contra ele, sem acessar o Google. Mede:
+
+- latência por etapa (p50 / p95): search, get_results_links (coleta da lista),
+  extract_business_data e scrape_nicho_cidade (busca completa)
+- comandos WebDriver (idas e voltas ao navegador) por empresa; com --motor cdp,
+  comandos do DevTools enviados pelo websocket
+- registros por minuto
+- pico de memória (Python e, com psutil instalado, navegador)
+
+E um micro-benchmark, só em Python, da classificação dos textos do painel
+(_classify_info_texts), que roda mesmo sem Chrome. Exemplos:
+
+    python -m benchmark --iteracoes 5 --salvar output/bench_base.json
+    python -m benchmark --comparar output/bench_base.json
+    python -m benchmark --motor cdp --comparar output/bench_base.json
+    python -m benchmark --somente-micro
+
+Com --comparar, sai com código 1 se alguma etapa ficou mais lenta que a
+referência além da tolerância.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import threading
+import time
+import timeit
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+from pacing import PacingPolicy
+from cdp_engine import CDPMapsScraper
+from scraper import SCRAPER_ENGINES, GoogleMapsScraper
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_fixtures")
+
+# Etapas medidas (métodos do scraper); get_results_links mede _harvest_feed,
+# usado tanto por get_results_links quanto por get_results_urls e pelo modo clique
+STAGES = {
+    'search': 'search',
+    'get_results_links': '_harvest_feed',
+    'extract_business_data': 'extract_business_data',
+    'scrape_nicho_cidade': 'scrape_nicho_cidade',
+}
+
+
+def load_places(fixtures_dir: str = FIXTURES_DIR) -> List[Dict]:
+    """Lugares sintéticos usados pela réplica e pelo micro-benchmark."""
+    with open(os.path.join(fixtures_dir, "places.json"), 'r', encoding='utf-8') as f:
+        return json.load(f)['lugares']
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Percentil p (0-100) por interpolação linear."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * p / 100
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+class ReplayServer:
+    """Servidor HTTP local que serve a réplica do Maps em qualquer caminho /maps..."""
+
+    def __init__(self, places: List[Dict], fixtures_dir: str = FIXTURES_DIR,
+                 latency: float = 0.0, feed_delay_ms: int = 50):
+        """
+        Args:
+            places: Lugares exibidos na lista de resultados
+            fixtures_dir: Pasta com maps.html
+            latency: Atraso (segundos) em cada resposta, simulando a rede
+            feed_delay_ms: Atraso para carregar mais itens ao rolar a lista
+        """
+        with open(os.path.join(fixtures_dir, "maps.html"), 'r', encoding='utf-8') as f:
+            template = f.read()
+        self.page = (
+            template
+            .replace('/*LUGARES*/[]', json.dumps(places, ensure_ascii=False))
+            .replace('/*ATRASO_LISTA_MS*/0', str(int(feed_delay_ms)))
+            .encode('utf-8')
+        )
+        self.latency = latency
+        self.requests = 0
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                if not self.path.startswith('/maps'):
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(server.page)))
+                self.end_headers()
+                self.wfile.write(server.page)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/maps"
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class InstrumentedScraper(GoogleMapsScraper):
+    """GoogleMapsScraper apontado para a réplica, contando tempo e comandos WebDriver por etapa."""
+
+    def __init__(self, maps_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.MAPS_URL = maps_url
+        self.commands = 0
+        self.timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        self.stage_commands: Dict[str, List[int]] = {stage: [] for stage in STAGES}
+        for stage, method in STAGES.items():
+            setattr(self, method, self._timed(stage, getattr(self, method)))
+
+    def _init_driver(self):
+        super()._init_driver()
+        # Todos os comandos (do driver e dos elementos) passam por driver.execute
+        execute = self.driver.execute
+
+        def counted_execute(*args, **kwargs):
+            self.commands += 1
+            return execute(*args, **kwargs)
+
+        self.driver.execute = counted_execute
+
+    def _timed(self, stage: str, method: Callable) -> Callable:
+        def wrapper(*args, **kwargs):
+            commands = self.commands
+            inicio = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.timings[stage].append(time.perf_counter() - inicio)
+                self.stage_commands[stage].append(self.commands - commands)
+        return wrapper
+
+    def browser_rss(self) -> int:
+        """Memória (RSS, bytes) do chromedriver e dos processos do Chrome; 0 sem psutil."""
+        if not psutil or not self.driver:
+            return 0
+        try:
+            process = psutil.Process(self.driver.service.process.pid)
+            return sum(p.memory_info().rss for p in [process] + process.children(recursive=True))
+        except (psutil.Error, AttributeError):
+            return 0
+
+
+class InstrumentedCDPScraper(CDPMapsScraper):
+    """CDPMapsScraper apontado para a réplica, medindo as corrotinas do motor e os comandos CDP por etapa."""
+
+    def __init__(self, maps_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.engine.MAPS_URL = maps_url
+        self.timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        self.stage_commands: Dict[str, List[int]] = {stage: [] for stage in STAGES}
+        for stage, method in STAGES.items():
+            setattr(self.engine, method, self._timed(stage, getattr(self.engine, method)))
+
+    def _timed(self, stage: str, method: Callable) -> Callable:
+        async def wrapper(*args, **kwargs):
+            commands = self.commands
+            inicio = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                self.timings[stage].append(time.perf_counter() - inicio)
+                self.stage_commands[stage].append(self.commands - commands)
+        return wrapper
+
+    def browser_rss(self) -> int:
+        """Memória (RSS, bytes) dos processos do Chrome; 0 sem psutil."""
+        pid = self.browser_pid()
+        if not psutil or not pid:
+            return 0
+        try:
+            process = psutil.Process(pid)
+            return sum(p.memory_info().rss for p in [process] + process.children(recursive=True))
+        except psutil.Error:
+            return 0
+
+
+def run_replay(iterations: int, max_results: int, detail_mode: str, latency: float,
+               feed_delay_ms: int, headless: bool = True, engine: str = 'selenium', tabs: int = 1) -> Dict:
+    """
+    Roda buscas completas contra a réplica local.
+
+    Args:
+        engine: 'selenium' ou 'cdp' (o mesmo roteiro nos dois motores)
+        tabs: Máximo de abas de detalhes simultâneas (só no motor cdp)
+
+    Returns:
+        Relatório com as etapas (p50/p95 em ms e comandos por chamada),
+        comandos por empresa, registros por minuto e pico de memória
+    """
+    places = load_places()
+    server = ReplayServer(places, latency=latency, feed_delay_ms=feed_delay_ms)
+    server.start()
+    options = {'detail_tabs': tabs} if engine == 'cdp' else {}
+    scraper_class = InstrumentedCDPScraper if engine == 'cdp' else InstrumentedScraper
+    scraper = scraper_class(
+        server.url,
+        headless=headless,
+        pacing=PacingPolicy(),
+        max_results=max_results,
+        detail_mode=detail_mode,
+        **options
+    )
+
+    tracemalloc.start()
+    records = 0
+    browser_peak = 0
+    try:
+        # Primeira busca só aquece o navegador (fora das medições)
+        scraper.scrape_nicho_cidade("aquecimento", "Cambé")
+        for timings in scraper.timings.values():
+            timings.clear()
+        for counts in scraper.stage_commands.values():
+            counts.clear()
+        commands_start = scraper.commands
+
+        for i in range(iterations):
+            records += len(scraper.scrape_nicho_cidade(f"nicho {i}", "Cambé"))
+            browser_peak = max(browser_peak, scraper.browser_rss())
+        commands = scraper.commands - commands_start
+    finally:
+        _, python_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        scraper.close()
+        server.stop()
+
+    total_seconds = sum(scraper.timings['scrape_nicho_cidade'])
+    stages = {}
+    for stage, timings in scraper.timings.items():
+        counts = scraper.stage_commands[stage]
+        stages[stage] = {
+            'chamadas': len(timings),
+            'p50_ms': round(percentile(timings, 50) * 1000, 2),
+            'p95_ms': round(percentile(timings, 95) * 1000, 2),
+            'comandos_por_chamada': round(statistics.mean(counts), 1) if counts else 0
+        }
+    return {
+        'motor': engine,
+        'abas': tabs if engine == 'cdp' else 1,
+        'modo': detail_mode,
+        'iteracoes': iterations,
+        'registros': records,
+        'etapas': stages,
+        'comandos_por_empresa': round(commands / records, 1) if records else 0,
+        'registros_por_minuto': round(records / total_seconds * 60, 1) if total_seconds else 0,
+        'pico_memoria_python_mb': round(python_peak / 1024 / 1024, 1),
+        'pico_rss_processo_mb': round(_max_rss_bytes() / 1024 / 1024, 1),
+        'pico_memoria_navegador_mb': round(browser_peak / 1024 / 1024, 1) if browser_peak else None,
+        'requisicoes_servidor': server.requests
+    }
+
+
+def _max_rss_bytes() -> int:
+    """Pico de RSS deste processo (ru_maxrss vem em KB no Linux e em bytes no macOS)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if platform.system() == 'Darwin' else rss * 1024
+
+
+def run_classify_micro(repeat: int = 5, number: int = 2000) -> Dict:
+    """
+    Micro-benchmark da classificação dos textos do painel, sem navegador.
+
+    Returns:
+        Tempo por painel (µs, melhor de repeat rodadas) e painéis por segundo
+    """
+    panels = [place['info'] for place in load_places()]
+    scraper = GoogleMapsScraper()
+
+    def classify_all():
+        for info_texts in panels:
+            scraper._classify_info_texts(info_texts, {'endereco': 'Não informado', 'telefone': 'Não informado'})
+
+    best = min(timeit.repeat(classify_all, repeat=repeat, number=number))
+    per_panel = best / (number * len(panels))
+    return {
+        'paineis': len(panels),
+        'us_por_painel': round(per_panel * 1e6, 3),
+        'paineis_por_segundo': round(1 / per_panel)
+    }
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Compara o relatório com uma referência salva.
+
+    Returns:
+        Descrição das métricas que pioraram além da tolerância
+    """
+    regressions = []
+
+    def check(nome: str, atual: Optional[float], referencia: Optional[float]):
+        if atual is None or not referencia:
+            return
+        if atual > referencia * (1 + tolerance):
+            regressions.append(f"{nome}: {atual} (referência {referencia}, +{(atual / referencia - 1) * 100:.0f}%)")
+
+    for stage, stats in report.get('replay', {}).get('etapas', {}).items():
+        ref = baseline.get('replay', {}).get('etapas', {}).get(stage, {})
+        check(f"{stage} p50_ms", stats['p50_ms'], ref.get('p50_ms'))
+        check(f"{stage} p95_ms", stats['p95_ms'], ref.get('p95_ms'))
+    if 'replay' in report and 'replay' in baseline:
+        check("comandos_por_empresa", report['replay']['comandos_por_empresa'], baseline['replay']['comandos_por_empresa'])
+    if 'classificacao' in report and 'classificacao' in baseline:
+        check("classificacao us_por_painel", report['classificacao']['us_por_painel'],
+              baseline['classificacao']['us_por_painel'])
+    return regressions
+
+
+def print_report(report: Dict):
+    """Imprime o relatório em formato de tabela."""
+    replay = report.get('replay')
+    if replay:
+        print(f"\n📊 Replay ({replay.get('motor', 'selenium')}, {replay['modo']}, {replay.get('abas', 1)} aba(s), "
+              f"{replay['iteracoes']} buscas, {replay['registros']} registros)")
+        print(f"  {'etapa':<24}{'chamadas':>9}{'p50 ms':>10}{'p95 ms':>10}{'cmds/chamada':>14}")
+        for stage, stats in replay['etapas'].items():
+            print(f"  {stage:<24}{stats['chamadas']:>9}{stats['p50_ms']:>10}{stats['p95_ms']:>10}"
+                  f"{stats['comandos_por_chamada']:>14}")
+        tipo = 'CDP' if replay.get('motor') == 'cdp' else 'WebDriver'
+        print(f"  Comandos {tipo} por empresa: {replay['comandos_por_empresa']}")
+        print(f"  Registros por minuto: {replay['registros_por_minuto']}")
+        navegador = replay['pico_memoria_navegador_mb']
+        print(f"  Pico de memória: Python {replay['pico_memoria_python_mb']} MB | "
+              f"processo {replay['pico_rss_processo_mb']} MB | "
+              f"navegador {navegador if navegador is not None else 'n/d (instale psutil)'} MB")
+    micro = report.get('classificacao')
+    if micro:
+        print(f"\n📊 Classificação dos textos ({micro['paineis']} painéis)")
+        print(f"  {micro['us_por_painel']} µs por painel | {micro['paineis_por_segundo']} painéis/s")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmark", description="Benchmark offline do scraper.")
+    parser.add_argument("--iteracoes", type=int, default=5, help="Buscas medidas (padrão: 5)")
+    parser.add_argument("--resultados", type=int, default=30, help="Resultados por busca (padrão: 30)")
+    parser.add_argument("--motor", choices=list(SCRAPER_ENGINES), default="selenium",
+                        help="Motor medido (padrão: selenium)")
+    parser.add_argument("--abas", type=int, default=1, help="Abas de detalhes simultâneas (só com --motor cdp)")
+    parser.add_argument("--modo-detalhes", choices=list(GoogleMapsScraper.DETAIL_MODES), default="url")
+    parser.add_argument("--latencia", type=float, default=0.0, help="Atraso por requisição, em segundos")
+    parser.add_argument("--atraso-lista", type=int, default=50, help="Atraso ao carregar mais itens (ms)")
+    parser.add_argument("--com-janela", action="store_true", help="Mostra o navegador")
+    parser.add_argument("--somente-micro", action="store_true", help="Roda só o micro-benchmark (sem Chrome)")
+    parser.add_argument("--salvar", help="Grava o relatório em JSON (para usar como referência)")
+    parser.add_argument("--comparar", help="Relatório JSON de referência")
+    parser.add_argument("--tolerancia", type=float, default=0.15, help="Piora aceita em relação à referência (padrão: 0.15)")
+    args = parser.parse_args(argv)
+
+    report = {'gerado_em': time.strftime('%Y-%m-%d %H:%M:%S'), 'python': platform.python_version()}
+    if not args.somente_micro:
+        report['replay'] = run_replay(
+            args.iteracoes, args.resultados, args.modo_detalhes,
+            args.latencia, args.atraso_lista, headless=not args.com_janela, engine=args.motor,
+            tabs=max(args.abas, 1)
+        )
+    report['classificacao'] = run_classify_micro()
+    print_report(report)
+
+    if args.salvar:
+        os.makedirs(os.path.dirname(os.path.abspath(args.salvar)), exist_ok=True)
+        with open(args.salvar, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Relatório salvo em {args.salvar}")
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.tolerancia)
+        if regressions:
+            print("\n❌ Regressões em relação à referência:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print("\n✅ Sem regressões em relação à referência")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1335 @@
+"""
+Módulo com o motor de coleta assíncrono, que controla o Chrome direto pelo
+protocolo do DevTools (CDP), sem Selenium nem chromedriver.
+
+No GoogleMapsScraper cada interação é uma requisição HTTP bloqueante ao
+chromedriver, que por sua vez fala CDP com o navegador, e cada navegador
+precisa de uma thread só para ele. Aqui o Python fala CDP direto com o
+Chrome por um websocket, com asyncio: cada comando é uma mensagem no
+websocket já aberto, e um único laço de eventos controla vários navegadores
+e abas ao mesmo tempo.
+
+- ChromeBrowser: o processo do Chrome (porta do DevTools e perfil temporário)
+  e a conexão CDP; cada aba é uma sessão do mesmo websocket
+- CDPTab: uma aba; evaluate roda os mesmos scripts do Selenium
+  (arguments[0]...), além de navegação, digitação e esperas por condição
+- AsyncMapsScraper: busca, lista e detalhes em corrotinas, com os mesmos
+  scripts, seletores, classificação de página, deduplicação e normalização
+  do GoogleMapsScraper; com detail_tabs > 1, os lugares de uma busca são
+  abertos em várias abas do mesmo navegador ao mesmo tempo, e o número de
+  abas se ajusta à latência e aos bloqueios (pacing.AdaptiveConcurrency)
+- CDPMapsScraper: fachada síncrona com a interface do GoogleMapsScraper
+  (search, get_results_links, extract_business_data, scrape_nicho_cidade...),
+  usada pelo ScrapingPool, pela linha de comando e pelo benchmark
+
+O motor é escolhido por configuração (scraper.create_scraper, --motor cdp).
+O websocket usa só a biblioteca padrão. O Chrome é procurado em CHROME_PATH
+e no PATH.
+"""
+import asyncio
+import base64
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+from dedup_index import DedupIndex, place_key
+from metrics import Metrics
+from normalization import classify_info_texts, normalize_record
+from pacing import AdaptiveConcurrency, JitterPacing, PacingPolicy
+from retry import RESULT_RETRY, RetryPolicy
+from scraper import GoogleMapsScraper, SessionBlockedError
+
+# Nomes do executável do Chrome procurados no PATH (CHROME_PATH tem prioridade)
+CHROME_BINARIES = ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome')
+CHROME_DEFAULT_PATHS = (
+    r'C:\Program Files\Google\Chrome\Application\chrome.exe',
+    r'C:\Program Files (x86)\Google\Chrome\Application\chrome.exe',
+    '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome',
+)
+
+# Tempo máximo para o Chrome abrir a porta do DevTools (segundos)
+LAUNCH_TIMEOUT = 20.0
+
+# Tempo máximo de resposta a um comando CDP (segundos)
+COMMAND_TIMEOUT = 30.0
+
+# Intervalo entre as verificações das esperas por condição (segundos)
+POLL_INTERVAL = 0.1
+
+_WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+class CDPError(Exception):
+    """Erro retornado pelo navegador para um comando, ou conexão perdida."""
+
+
+def find_chrome() -> str:
+    """
+    Localiza o executável do Chrome/Chromium.
+
+    Returns:
+        Caminho do executável
+
+    Raises:
+        FileNotFoundError: Se o Chrome não foi encontrado
+    """
+    configured = os.environ.get('CHROME_PATH')
+    if configured:
+        return configured
+    for name in CHROME_BINARIES:
+        path = shutil.which(name)
+        if path:
+            return path
+    for path in CHROME_DEFAULT_PATHS:
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError("Chrome não encontrado; instale o Chrome ou defina CHROME_PATH")
+
+
+def _apply_mask(data: bytes, mask: bytes) -> bytes:
+    """XOR do payload com a máscara de 4 bytes (de uma vez, como inteiros)."""
+    if not data:
+        return data
+    key = (mask * (len(data) // 4 + 1))[:len(data)]
+    return (int.from_bytes(data, 'little') ^ int.from_bytes(key, 'little')).to_bytes(len(data), 'little')
+
+
+class _WebSocket:
+    """Cliente websocket mínimo (RFC 6455): mensagens de texto, ping/pong e fechamento."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+
+    @classmethod
+    async def connect(cls, url: str) -> '_WebSocket':
+        """Abre a conexão e faz o handshake HTTP de upgrade."""
+        parts = urlsplit(url)
+        # Respostas do DevTools (ex: um DOM grande) podem passar de 64 KB
+        reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80, limit=2 ** 24)
+        key = base64.b64encode(os.urandom(16)).decode()
+        path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode()
+        )
+        await writer.drain()
+
+        lines = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+        status = lines[0].split()
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        accept = base64.b64encode(hashlib.sha1((key + _WEBSOCKET_GUID).encode()).digest()).decode()
+        if len(status) < 2 or status[1] != '101' or headers.get('sec-websocket-accept') != accept:
+            writer.close()
+            raise ConnectionError(f"Handshake do websocket recusado: {lines[0]}")
+        return cls(reader, writer)
+
+    def _frame(self, opcode: int, payload: bytes) -> bytes:
+        # Quadros do cliente são sempre mascarados
+        header = bytearray([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header.append(0x80 | length)
+        elif length < 2 ** 16:
+            header.append(0x80 | 126)
+            header += struct.pack('!H', length)
+        else:
+            header.append(0x80 | 127)
+            header += struct.pack('!Q', length)
+        mask = os.urandom(4)
+        return bytes(header) + mask + _apply_mask(payload, mask)
+
+    async def send(self, text: str):
+        """Envia uma mensagem de texto (um único write, seguro entre corrotinas)."""
+        self._writer.write(self._frame(0x1, text.encode('utf-8')))
+        await self._writer.drain()
+
+    async def recv(self) -> str:
+        """
+        Recebe a próxima mensagem de texto, juntando os quadros de continuação.
+
+        Raises:
+            ConnectionError: Se o navegador fechou a conexão
+        """
+        message = bytearray()
+        while True:
+            first, second = await self._reader.readexactly(2)
+            opcode = first & 0x0F
+            length = second & 0x7F
+            if length == 126:
+                length, = struct.unpack('!H', await self._reader.readexactly(2))
+            elif length == 127:
+                length, = struct.unpack('!Q', await self._reader.readexactly(8))
+            mask = await self._reader.readexactly(4) if second & 0x80 else None
+            payload = await self._reader.readexactly(length) if length else b''
+            if mask:
+                payload = _apply_mask(payload, mask)
+
+            if opcode == 0x8:
+                raise ConnectionError("Websocket fechado pelo navegador")
+            if opcode == 0x9:
+                self._writer.write(self._frame(0xA, payload))
+                continue
+            if opcode == 0xA:
+                continue
+            message += payload
+            if first & 0x80:
+                return message.decode('utf-8')
+
+    async def close(self):
+        """Envia o quadro de fechamento e encerra o socket."""
+        try:
+            self._writer.write(self._frame(0x8, struct.pack('!H', 1000)))
+            await self._writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+
+class CDPConnection:
+    """Conexão CDP com o navegador; os comandos de todas as abas passam pelo mesmo websocket."""
+
+    def __init__(self, websocket: _WebSocket):
+        self._websocket = websocket
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._listeners: Dict[tuple, List[Callable[[Dict], None]]] = {}
+        self.closed = False
+        # Comandos enviados (o equivalente às idas e voltas ao chromedriver)
+        self.commands = 0
+        self._reader_task = asyncio.ensure_future(self._read_loop())
+
+    @classmethod
+    async def connect(cls, url: str) -> 'CDPConnection':
+        return cls(await _WebSocket.connect(url))
+
+    async def send(self, method: str, params: Optional[Dict] = None, session_id: Optional[str] = None,
+                   timeout: float = COMMAND_TIMEOUT) -> Dict:
+        """
+        Envia um comando e espera a resposta.
+
+        Args:
+            method: Comando do protocolo (ex: 'Runtime.evaluate')
+            params: Parâmetros do comando
+            session_id: Sessão da aba (None = comando do navegador)
+            timeout: Tempo máximo de resposta (segundos)
+
+        Returns:
+            Campo 'result' da resposta
+
+        Raises:
+            CDPError: Erro do navegador, conexão perdida ou sem resposta no prazo
+        """
+        if self.closed:
+            raise CDPError("Conexão com o navegador fechada")
+        command_id = next(self._ids)
+        message = {'id': command_id, 'method': method, 'params': params or {}}
+        if session_id:
+            message['sessionId'] = session_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[command_id] = future
+        self.commands += 1
+        try:
+            await self._websocket.send(json.dumps(message))
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise CDPError(f"Sem resposta do navegador para {method}")
+        except (ConnectionError, OSError) as e:
+            raise CDPError(f"Conexão com o navegador perdida: {e}")
+        finally:
+            self._pending.pop(command_id, None)
+
+    def on(self, method: str, callback: Callable[[Dict], None], session_id: Optional[str] = None):
+        """Registra um callback para um evento (ex: 'Network.loadingFinished') da sessão."""
+        self._listeners.setdefault((method, session_id), []).append(callback)
+
+    def off(self, session_id: str):
+        """Remove os callbacks de uma sessão (aba fechada)."""
+        for key in [key for key in self._listeners if key[1] == session_id]:
+            del self._listeners[key]
+
+    async def _read_loop(self):
+        error = CDPError("Conexão com o navegador fechada")
+        try:
+            while True:
+                message = json.loads(await self._websocket.recv())
+                if 'id' in message:
+                    future = self._pending.get(message['id'])
+                    if future is None or future.done():
+                        continue
+                    if 'error' in message:
+                        future.set_exception(CDPError(message['error'].get('message', str(message['error']))))
+                    else:
+                        future.set_result(message.get('result', {}))
+                    continue
+                for callback in self._listeners.get((message.get('method'), message.get('sessionId')), ()):
+                    callback(message.get('params', {}))
+        except (ConnectionError, OSError, asyncio.IncompleteReadError, ValueError) as e:
+            error = CDPError(f"Conexão com o navegador perdida: {e}")
+        finally:
+            self.closed = True
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+
+    async def close(self):
+        self.closed = True
+        await self._websocket.close()
+        self._reader_task.cancel()
+        try:
+            await self._reader_task
+        except (asyncio.CancelledError, CDPError):
+            pass
+
+
+class CDPTab:
+    """Uma aba do navegador (sessão CDP do alvo)."""
+
+    # Foca o campo de busca e seleciona o texto (a digitação substitui a busca anterior)
+    FOCUS_JS = """
+        const box = document.querySelector(arguments[0]);
+        if (!box) { return false; }
+        box.focus();
+        box.select();
+        return true;
+    """
+
+    # Marca o documento atual antes de navegar: o documento novo não tem a marca
+    MARK_DOCUMENT_JS = "window.__documentoAnterior = true; return true;"
+    NEW_DOCUMENT_JS = "return !window.__documentoAnterior && document.readyState !== 'loading';"
+
+    def __init__(self, connection: CDPConnection, target_id: str, session_id: str):
+        self.connection = connection
+        self.target_id = target_id
+        self.session_id = session_id
+
+    async def send(self, method: str, **params) -> Dict:
+        """Envia um comando para esta aba."""
+        return await self.connection.send(method, params, self.session_id)
+
+    def on(self, method: str, callback: Callable[[Dict], None]):
+        """Registra um callback para um evento desta aba."""
+        self.connection.on(method, callback, self.session_id)
+
+    async def evaluate(self, script: str, *args) -> Any:
+        """
+        Executa um script no formato do execute_script do Selenium.
+
+        O corpo é envolvido em uma função chamada com os argumentos (JSON),
+        então 'arguments[0]' e 'return' funcionam como no Selenium.
+
+        Returns:
+            O valor retornado, serializado em JSON (elementos viram {})
+
+        Raises:
+            CDPError: Exceção no script ou página indisponível
+        """
+        expression = f"(function() {{{script}\n}}).apply(null, {json.dumps(list(args))})"
+        result = await self.send('Runtime.evaluate', expression=expression, returnByValue=True)
+        if 'exceptionDetails' in result:
+            details = result['exceptionDetails']
+            raise CDPError(details.get('exception', {}).get('description') or details.get('text', 'Erro no script'))
+        return result.get('result', {}).get('value')
+
+    async def wait_for(self, script: str, *args, timeout: float = 10.0) -> Any:
+        """
+        Repete o script até ele retornar um valor verdadeiro.
+
+        Erros do script contam como falso (a página pode estar trocando).
+
+        Returns:
+            O valor retornado pelo script
+
+        Raises:
+            asyncio.TimeoutError: Se a condição não for satisfeita no prazo
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            try:
+                value = await self.evaluate(script, *args)
+            except CDPError:
+                if self.connection.closed:
+                    raise
+                value = None
+            if value:
+                return value
+            if loop.time() >= deadline:
+                raise asyncio.TimeoutError
+            await asyncio.sleep(POLL_INTERVAL)
+
+    async def navigate(self, url: str):
+        """
+        Abre a URL na aba (não espera a página carregar).
+
+        O documento anterior é marcado, então wait_for(NEW_DOCUMENT_JS) só
+        aceita a página nova, mesmo se a navegação demorar a começar.
+        """
+        try:
+            await self.evaluate(self.MARK_DOCUMENT_JS)
+        except CDPError:
+            pass
+        result = await self.send('Page.navigate', url=url)
+        if result.get('errorText'):
+            raise CDPError(f"Erro ao abrir {url}: {result['errorText']}")
+
+    async def current_url(self) -> str:
+        return await self.evaluate("return location.href;")
+
+    async def type_and_submit(self, selector: str, text: str):
+        """Substitui o texto do campo e pressiona Enter, como um usuário."""
+        if not await self.evaluate(self.FOCUS_JS, selector):
+            raise CDPError(f"Campo não encontrado: {selector}")
+        await self.send('Input.insertText', text=text)
+        key = {'key': 'Enter', 'code': 'Enter', 'windowsVirtualKeyCode': 13, 'nativeVirtualKeyCode': 13}
+        await self.send('Input.dispatchKeyEvent', type='keyDown', text='\r', **key)
+        await self.send('Input.dispatchKeyEvent', type='keyUp', **key)
+
+    async def close(self):
+        self.connection.off(self.session_id)
+        await self.connection.send('Target.closeTarget', {'targetId': self.target_id})
+
+
+class ChromeBrowser:
+    """Processo do Chrome com a porta do DevTools aberta e um perfil temporário."""
+
+    def __init__(self, headless: bool = True, lean_profile: bool = False, user_agent: Optional[str] = None,
+                 binary: Optional[str] = None):
+        """
+        Args:
+            headless: Se True, executa sem janela
+            lean_profile: Se True, desliga imagens e usa uma janela pequena
+            user_agent: User-agent das páginas (padrão: o do GoogleMapsScraper)
+            binary: Executável do Chrome (padrão: find_chrome())
+        """
+        self.headless = headless
+        self.lean_profile = lean_profile
+        self.user_agent = user_agent or GoogleMapsScraper.USER_AGENT
+        self.binary = binary
+        self.process: Optional[subprocess.Popen] = None
+        self.connection: Optional[CDPConnection] = None
+        self._profile_dir = None
+
+    def _arguments(self) -> List[str]:
+        arguments = [
+            self.binary or find_chrome(),
+            '--remote-debugging-port=0',
+            f'--user-data-dir={self._profile_dir}',
+            '--no-first-run',
+            '--no-default-browser-check',
+            '--no-sandbox',
+            '--disable-dev-shm-usage',
+            '--disable-blink-features=AutomationControlled',
+            '--disable-background-networking',
+            # Abas em segundo plano continuam rodando timers e renderizando
+            '--disable-background-timer-throttling',
+            '--disable-backgrounding-occluded-windows',
+            '--disable-renderer-backgrounding',
+            f'--user-agent={self.user_agent}',
+        ]
+        if self.headless:
+            arguments.append('--headless=new')
+        if self.lean_profile:
+            arguments.append('--blink-settings=imagesEnabled=false')
+            arguments.append('--window-size={},{}'.format(*GoogleMapsScraper.LEAN_WINDOW_SIZE))
+        elif self.headless:
+            arguments.append('--window-size=1920,1080')
+        else:
+            arguments.append('--start-maximized')
+        arguments.append('about:blank')
+        return arguments
+
+    async def start(self) -> CDPConnection:
+        """
+        Inicia o Chrome e conecta ao DevTools.
+
+        A porta é escolhida pelo Chrome (--remote-debugging-port=0) e lida do
+        arquivo DevToolsActivePort do perfil, então vários navegadores podem
+        rodar ao mesmo tempo sem conflito.
+
+        Raises:
+            CDPError: Se o Chrome não abriu a porta no prazo
+        """
+        self._profile_dir = tempfile.mkdtemp(prefix='maps_cdp_')
+        creationflags = subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+        self.process = subprocess.Popen(
+            self._arguments(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, creationflags=creationflags
+        )
+        self.connection = await CDPConnection.connect(await self._devtools_url())
+        return self.connection
+
+    async def _devtools_url(self) -> str:
+        port_file = os.path.join(self._profile_dir, 'DevToolsActivePort')
+        deadline = time.monotonic() + LAUNCH_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise CDPError(f"O Chrome encerrou ao iniciar (código {self.process.returncode})")
+            try:
+                with open(port_file, 'r', encoding='utf-8') as f:
+                    lines = f.read().split()
+                if len(lines) >= 2:
+                    return f"ws://127.0.0.1:{lines[0]}{lines[1]}"
+            except OSError:
+                pass
+            await asyncio.sleep(POLL_INTERVAL)
+        raise CDPError(f"O Chrome não abriu a porta do DevTools em {LAUNCH_TIMEOUT:.0f}s")
+
+    async def new_tab(self, url: str = 'about:blank') -> CDPTab:
+        """Abre uma aba nova e a conecta como uma sessão do websocket do navegador."""
+        target = await self.connection.send('Target.createTarget', {'url': url})
+        session = await self.connection.send('Target.attachToTarget', {'targetId': target['targetId'], 'flatten': True})
+        return CDPTab(self.connection, target['targetId'], session['sessionId'])
+
+    def is_running(self) -> bool:
+        return bool(self.process and self.process.poll() is None and self.connection and not self.connection.closed)
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid if self.process else None
+
+    async def close(self):
+        """Fecha o navegador (à força, se ele não responder) e apaga o perfil temporário."""
+        if self.connection:
+            try:
+                await self.connection.send('Browser.close', timeout=5)
+            except CDPError:
+                pass
+            await self.connection.close()
+            self.connection = None
+        if self.process:
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self.process.wait, 5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            self.process = None
+        if self._profile_dir:
+            shutil.rmtree(self._profile_dir, ignore_errors=True)
+            self._profile_dir = None
+
+
+class AsyncMapsScraper:
+    """
+    Coleta do Google Maps em corrotinas, controlando o Chrome pelo CDP.
+
+    Usa os scripts, seletores e regras do GoogleMapsScraper; cada espera é
+    um script repetido a cada POLL_INTERVAL, sem threads.
+    """
+
+    MAPS_URL = GoogleMapsScraper.MAPS_URL
+
+    # Condições das esperas (scripts no formato do execute_script)
+    SEARCHBOX_JS = "return !!document.getElementById('searchboxinput');"
+    RESULTS_LOADED_JS = """
+        const [previousUrl, feedSelector, detailSelector] = arguments;
+        return location.href !== previousUrl
+            && !!(document.querySelector(feedSelector) || document.querySelector(detailSelector));
+    """
+    DETAIL_LOADED_JS = """
+        const [selector, previousName] = arguments;
+        for (const el of document.querySelectorAll(selector)) {
+            const text = el.getClientRects().length ? (el.innerText || '').trim() : '';
+            if (text && text !== previousName) { return text; }
+        }
+        return false;
+    """
+    MORE_RESULTS_JS = "return document.querySelectorAll(arguments[0]).length > arguments[1];"
+
+    def __init__(
+        self,
+        headless: bool = False,
+        wait_time: int = 10,
+        max_searches_per_session: int = 0,
+        pacing: Optional[PacingPolicy] = None,
+        max_results: int = 120,
+        max_idle_scrolls: int = 3,
+        lean_profile: bool = False,
+        log_transfer: bool = False,
+        dedup_index: Optional[DedupIndex] = None,
+        metrics: Optional[Metrics] = None,
+        block_cooldown: float = 60.0,
+        result_retry: Optional[RetryPolicy] = None,
+        detail_tabs: int = 1
+    ):
+        """
+        Inicializa o scraper (o navegador só abre na primeira busca).
+
+        Os parâmetros têm o mesmo significado que no GoogleMapsScraper, mais:
+
+        Args:
+            detail_tabs: Máximo de abas que abrem lugares ao mesmo tempo no
+                mesmo navegador (1 = um lugar por vez, na aba da busca)
+        """
+        self.wait_time = wait_time
+        self.headless = headless
+        self.max_searches_per_session = max_searches_per_session
+        self.pacing = pacing or JitterPacing()
+        self.max_results = max_results
+        self.max_idle_scrolls = max_idle_scrolls
+        self.lean_profile = lean_profile
+        self.log_transfer = log_transfer
+        self.dedup_index = dedup_index
+        self.metrics = metrics or Metrics()
+        self.block_cooldown = block_cooldown
+        self.result_retry = result_retry or RESULT_RETRY
+        self.detail_tabs = max(1, detail_tabs)
+        # Abas em uso começam em 1 e crescem enquanto a latência se mantém
+        self.tab_limit = AdaptiveConcurrency(max_limit=self.detail_tabs)
+
+        self.browser: Optional[ChromeBrowser] = None
+        self.tab: Optional[CDPTab] = None
+        # Abas de detalhes (a aba da busca fica só com a lista)
+        self._detail_tabs: List[CDPTab] = []
+        # Comandos CDP das sessões já encerradas (ver commands)
+        self._closed_commands = 0
+
+        self.failed_places = []
+        self.page_states = {}
+        self.consecutive_blocks = 0
+        # Sinalizado por close() (de qualquer thread): interrompe a pausa após bloqueio
+        self._closed = threading.Event()
+
+        self.search_bytes = 0
+        self.total_bytes = 0
+        self.wait_seconds = 0.0
+        self.searches_in_session = 0
+        self.total_searches = 0
+        self.session_starts = 0
+        self.session_start_seconds = 0.0
+        self.restart_reasons = {}
+
+    @property
+    def commands(self) -> int:
+        """Comandos CDP enviados desde a criação (todas as sessões)."""
+        current = self.browser.connection.commands if self.browser and self.browser.connection else 0
+        return self._closed_commands + current
+
+    async def _open_tab(self) -> CDPTab:
+        """Abre uma aba com o bloqueio de recursos do perfil leve e a contagem de bytes."""
+        tab = await self.browser.new_tab()
+        if self.lean_profile or self.log_transfer:
+            await tab.send('Network.enable')
+        if self.lean_profile:
+            await tab.send('Network.setBlockedURLs', urls=GoogleMapsScraper.LEAN_BLOCKED_URLS)
+        if self.log_transfer:
+            tab.on('Network.loadingFinished', self._count_bytes)
+        return tab
+
+    def _count_bytes(self, params: Dict):
+        self.search_bytes += int(params.get('encodedDataLength', 0))
+
+    async def open_maps(self):
+        """Abre o navegador (se preciso) e o Google Maps."""
+        if not self.browser:
+            with self.metrics.timer('inicio_navegador'):
+                browser = ChromeBrowser(self.headless, self.lean_profile)
+                try:
+                    await browser.start()
+                except Exception:
+                    await browser.close()
+                    raise
+                self.browser = browser
+                self.tab = await self._open_tab()
+        with self.metrics.timer('carregamento_pagina', pagina='inicial'):
+            await self.tab.navigate(self.MAPS_URL)
+            await self._wait_for(self.SEARCHBOX_JS)
+
+    async def _wait_for(self, script: str, *args, timeout: Optional[float] = None,
+                        tab: Optional[CDPTab] = None) -> Any:
+        """
+        Espera o script retornar um valor verdadeiro, contabilizando o tempo de espera.
+
+        Args:
+            tab: Aba onde o script roda (padrão: a aba da busca)
+
+        Raises:
+            asyncio.TimeoutError: Se a condição não for satisfeita no prazo
+        """
+        inicio = time.monotonic()
+        try:
+            return await (tab or self.tab).wait_for(script, *args, timeout=timeout or self.wait_time)
+        except asyncio.TimeoutError:
+            self.metrics.incr('timeouts')
+            raise
+        finally:
+            self.wait_seconds += time.monotonic() - inicio
+
+    async def _sleep_unless_closed(self, seconds: float) -> bool:
+        """Espera seconds; retorna True se close() foi chamado antes."""
+        deadline = time.monotonic() + seconds
+        while not self._closed.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(remaining, 0.5))
+        return True
+
+    async def _start_session(self):
+        self._closed.clear()
+        inicio = time.monotonic()
+        await self.open_maps()
+        self.session_start_seconds += time.monotonic() - inicio
+        self.session_starts += 1
+        self.searches_in_session = 0
+
+    async def is_alive(self) -> bool:
+        """Verifica se o navegador ainda responde."""
+        if not self.browser or not self.browser.is_running():
+            return False
+        try:
+            await self.tab.current_url()
+            return True
+        except CDPError:
+            return False
+
+    async def detect_page_state(self, tab: Optional[CDPTab] = None) -> str:
+        """Classifica a página atual da aba (ver GoogleMapsScraper.detect_page_state)."""
+        try:
+            page = await (tab or self.tab).evaluate(
+                GoogleMapsScraper.PAGE_STATE_JS, GoogleMapsScraper.FEED_SELECTOR,
+                GoogleMapsScraper.DETAIL_TITLE_SELECTOR, GoogleMapsScraper.RESULT_LINK_SELECTOR
+            ) or {}
+        except CDPError:
+            return GoogleMapsScraper.PAGE_EMPTY
+        return GoogleMapsScraper.classify_page_state(page)
+
+    def _record_page_state(self, state: str):
+        self.page_states[state] = self.page_states.get(state, 0) + 1
+        self.metrics.incr('estado_pagina', estado=state)
+
+    async def _accept_consent(self) -> bool:
+        try:
+            if not await self.tab.evaluate(GoogleMapsScraper.ACCEPT_CONSENT_JS):
+                return False
+            await self._wait_for(self.SEARCHBOX_JS)
+            return True
+        except (asyncio.TimeoutError, CDPError):
+            return False
+
+    async def _handle_block(self, state: str, query: str):
+        """
+        Reage a um CAPTCHA/bloqueio: desacelera, espera e abre uma sessão nova.
+
+        A sessão nova usa outro perfil temporário, sem os cookies da bloqueada.
+
+        Raises:
+            SessionBlockedError: Sempre, para o job voltar para a fila
+        """
+        self.consecutive_blocks += 1
+        self.pacing.on_block()
+        previous_tabs = self.tab_limit.limit
+        if self.tab_limit.on_block() != previous_tabs:
+            print(f"🗂️ Abas de detalhes: {previous_tabs} → {self.tab_limit.limit} (bloqueio)")
+        cooldown = min(self.block_cooldown * 2 ** (self.consecutive_blocks - 1), GoogleMapsScraper.MAX_BLOCK_COOLDOWN)
+        print(f"🚫 Página de {state} em: {query} — aguardando {cooldown:.0f}s antes de abrir uma sessão nova")
+
+        await self._close_browser()
+        if not await self._sleep_unless_closed(cooldown):
+            await self.restart_session(state)
+        raise SessionBlockedError(state, query)
+
+    async def _check_page_state(self, query: str) -> bool:
+        """
+        Confere a página depois da busca (ver GoogleMapsScraper._check_page_state).
+
+        Raises:
+            SessionBlockedError: CAPTCHA, bloqueio ou consentimento que não pôde ser aceito
+        """
+        state = await self.detect_page_state()
+        if state == GoogleMapsScraper.PAGE_CONSENT:
+            self._record_page_state(state)
+            if not await self._accept_consent():
+                await self._handle_block(state, query)
+            await self.search(query)
+            state = await self.detect_page_state()
+            if state == GoogleMapsScraper.PAGE_CONSENT:
+                await self._handle_block(state, query)
+
+        self._record_page_state(state)
+        if state in (GoogleMapsScraper.PAGE_CAPTCHA, GoogleMapsScraper.PAGE_BLOCKED):
+            await self._handle_block(state, query)
+        self.consecutive_blocks = 0
+        return state == GoogleMapsScraper.PAGE_OK
+
+    async def restart_session(self, reason: str):
+        """Fecha e reabre o navegador."""
+        print(f"🔄 Reiniciando navegador ({reason})")
+        self.restart_reasons[reason] = self.restart_reasons.get(reason, 0) + 1
+        self.metrics.incr('reinicios', motivo=reason)
+        await self._close_browser()
+        await self._start_session()
+
+    async def ensure_session(self):
+        """Garante uma sessão utilizável antes de uma nova busca (mesmas regras do GoogleMapsScraper)."""
+        if not self.browser:
+            await self._start_session()
+        elif not await self.is_alive():
+            await self.restart_session('falha')
+        elif await self.detect_page_state() in (GoogleMapsScraper.PAGE_CAPTCHA, GoogleMapsScraper.PAGE_BLOCKED):
+            self.metrics.incr('bloqueios_suspeitos')
+            self.pacing.on_block()
+            await self.restart_session('bloqueio')
+        elif self.max_searches_per_session and self.searches_in_session >= self.max_searches_per_session:
+            await self.restart_session('limite')
+
+    def get_session_stats(self) -> Dict[str, float]:
+        """Estatísticas da sessão, no formato de GoogleMapsScraper.get_session_stats."""
+        media = self.session_start_seconds / self.session_starts if self.session_starts else 0.0
+        evitadas = max(self.total_searches - self.session_starts, 0)
+        bloqueios = sum(self.page_states.get(state, 0)
+                        for state in (GoogleMapsScraper.PAGE_CAPTCHA, GoogleMapsScraper.PAGE_BLOCKED))
+        return {
+            'buscas': self.total_searches,
+            'inicializacoes': self.session_starts,
+            'reinicios': dict(self.restart_reasons),
+            'tempo_medio_inicializacao': round(media, 2),
+            'tempo_economizado': round(media * evitadas, 2),
+            'tempo_espera': round(self.wait_seconds, 2),
+            'tempo_throttle': self.pacing.get_stats()['tempo_throttle'],
+            'bytes_transferidos': self.total_bytes,
+            'estados_pagina': dict(self.page_states),
+            'bloqueios': bloqueios,
+            'taxa_bloqueio': round(bloqueios / self.total_searches, 3) if self.total_searches else 0.0,
+            'abas_detalhes': self.tab_limit.get_stats()
+        }
+
+    async def search(self, query: str) -> bool:
+        """
+        Realiza uma busca no Google Maps (abre o navegador se preciso).
+
+        Returns:
+            True se a busca foi realizada com sucesso
+        """
+        with self.metrics.timer('busca'):
+            try:
+                if not self.tab:
+                    await self.ensure_session()
+                await self._wait_for(self.SEARCHBOX_JS)
+                await self.pacing.throttle_async()
+                previous_url = await self.tab.current_url()
+                await self.tab.type_and_submit('#searchboxinput', query)
+                try:
+                    await self._wait_for(
+                        self.RESULTS_LOADED_JS, previous_url,
+                        GoogleMapsScraper.FEED_SELECTOR, GoogleMapsScraper.DETAIL_TITLE_SELECTOR
+                    )
+                except asyncio.TimeoutError:
+                    print(f"⚠️ Resultados não carregaram a tempo para: {query}")
+                return True
+            except asyncio.TimeoutError:
+                print(f"Timeout ao buscar: {query}")
+                return False
+            except CDPError as e:
+                print(f"Erro ao realizar busca '{query}': {e}")
+                return False
+
+    async def _harvest_feed(self, max_results: Optional[int] = None,
+                            max_idle_scrolls: Optional[int] = None) -> List[str]:
+        """Rola a lista e coleta as URLs novas (ver GoogleMapsScraper._harvest_feed)."""
+        if max_results is None:
+            max_results = self.max_results
+        if max_idle_scrolls is None:
+            max_idle_scrolls = self.max_idle_scrolls
+
+        with self.metrics.timer('coleta_lista'):
+            try:
+                # Primeiro resultado (busca sem resultados cai no timeout)
+                await self._wait_for(self.MORE_RESULTS_JS, GoogleMapsScraper.RESULT_LINK_SELECTOR, 0)
+            except asyncio.TimeoutError:
+                return []
+
+            urls = []
+            seen_urls = set()
+            idle_scrolls = 0
+            while True:
+                harvest = await self.tab.evaluate(
+                    GoogleMapsScraper.HARVEST_FEED_JS, GoogleMapsScraper.FEED_SELECTOR,
+                    GoogleMapsScraper.RESULT_LINK_SELECTOR
+                )
+                novos = 0
+                for _, url in harvest['links']:
+                    if url in seen_urls:
+                        continue
+                    seen_urls.add(url)
+                    urls.append(url)
+                    novos += 1
+
+                if max_results and len(urls) >= max_results:
+                    return urls[:max_results]
+                if harvest['end'] or not harvest['hasFeed']:
+                    break
+                idle_scrolls = 0 if novos else idle_scrolls + 1
+                if idle_scrolls >= max_idle_scrolls:
+                    break
+                try:
+                    await self._wait_for(self.MORE_RESULTS_JS, GoogleMapsScraper.RESULT_LINK_SELECTOR,
+                                         len(harvest['links']), timeout=3)
+                except asyncio.TimeoutError:
+                    pass
+            return urls
+
+    async def get_results_urls(self, max_results: Optional[int] = None,
+                               max_idle_scrolls: Optional[int] = None) -> List[str]:
+        """URLs (/maps/place/...) dos resultados da busca atual, sem repetição."""
+        try:
+            return await self._harvest_feed(max_results, max_idle_scrolls)
+        except CDPError as e:
+            print(f"Erro ao obter URLs de resultados: {e}")
+            return []
+
+    async def scrape_place(self, url: str, tab: Optional[CDPTab] = None) -> Optional[Dict[str, str]]:
+        """
+        Abre a página de um lugar pela URL e extrai os dados do negócio.
+
+        Args:
+            url: URL do lugar
+            tab: Aba usada (padrão: a aba da busca)
+        """
+        tab = tab or self.tab
+        try:
+            with self.metrics.timer('carregamento_pagina', pagina='lugar'):
+                await tab.navigate(url)
+                await self._wait_for(CDPTab.NEW_DOCUMENT_JS, tab=tab)
+        except (CDPError, asyncio.TimeoutError) as e:
+            print(f"Erro ao abrir {url}: {e or 'timeout'}")
+            return None
+        data = await self.extract_business_data(tab=tab)
+        if data:
+            data['url'] = url
+        return data
+
+    async def scrape_places(self, urls: List[str], nicho: str, cidade: Union[str, Dict]) -> List[Dict[str, str]]:
+        """Extrai os dados de uma lista de lugares já coletada (ver GoogleMapsScraper.scrape_places)."""
+        if not self.tab:
+            await self.ensure_session()
+        return await self._scrape_places(urls, GoogleMapsScraper.job_tags(nicho, cidade))
+
+    def _already_scraped(self, url: str, tags: Dict) -> bool:
+        if self.dedup_index and self.dedup_index.tag_if_known(place_key(url), tags):
+            self.metrics.incr('ja_coletados')
+            print("    ↷ Já coletado em outra busca")
+            return True
+        return False
+
+    def _is_new_place(self, record: Dict, tags: Dict) -> bool:
+        if self.dedup_index and self.dedup_index.tag_record_if_known(record, tags):
+            self.metrics.incr('ja_coletados')
+            print(f"    ↷ {record['nome']} já coletado em outra busca")
+            return False
+        return True
+
+    async def _scrape_places(self, urls: List[str], tags: Dict) -> List[Dict[str, str]]:
+        if self.detail_tabs > 1:
+            return await self._scrape_places_in_tabs(urls, tags)
+        results_data = []
+        for idx, url in enumerate(urls, 1):
+            print(f"  [{idx}/{len(urls)}] Processando resultado...")
+            if self._already_scraped(url, tags):
+                continue
+
+            business_data = await self._scrape_place_with_retry(url)
+            if business_data:
+                business_data.update(tags)
+                if self._is_new_place(business_data, tags):
+                    results_data.append(business_data)
+                    print(f"    ✓ {business_data['nome']}")
+                self.pacing.on_success()
+            else:
+                print(f"    ✗ Erro ao processar resultado {idx}")
+
+            await self.pacing.throttle_async()
+        return results_data
+
+    async def _scrape_places_in_tabs(self, urls: List[str], tags: Dict) -> List[Dict[str, str]]:
+        """
+        Abre os lugares em várias abas do mesmo navegador ao mesmo tempo.
+
+        Até tab_limit.limit lugares ficam em andamento, cada um na sua aba;
+        quando um termina, a aba pega a próxima URL. A pausa anti-bloqueio
+        continua valendo antes de abrir cada lugar. Um CAPTCHA ou bloqueio em
+        qualquer aba interrompe o job inteiro, como na busca; os lugares das
+        outras abas não entram no índice de empresas (isso só acontece quando o
+        job é gravado), então o job refeito extrai todos de novo.
+
+        Returns:
+            Registros na ordem da lista de resultados
+        """
+        pending = deque((idx, url) for idx, url in enumerate(urls, 1) if not self._already_scraped(url, tags))
+        idle_tabs = list(self._detail_tabs)
+        running: Dict[asyncio.Future, Tuple[int, str, CDPTab]] = {}
+        results_data = []
+        blocked_state = None
+        try:
+            while (pending and blocked_state is None) or running:
+                while pending and blocked_state is None and len(running) < self.tab_limit.limit:
+                    tab = idle_tabs.pop() if idle_tabs else await self._open_detail_tab()
+                    await self.pacing.throttle_async()
+                    idx, url = pending.popleft()
+                    print(f"  [{idx}/{len(urls)}] Processando resultado...")
+                    running[asyncio.ensure_future(self._scrape_place_in_tab(url, tab))] = (idx, url, tab)
+
+                finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    idx, url, tab = running.pop(task)
+                    idle_tabs.append(tab)
+                    business_data, seconds, state = task.result()
+                    if state in (GoogleMapsScraper.PAGE_CAPTCHA, GoogleMapsScraper.PAGE_BLOCKED):
+                        self._record_page_state(state)
+                        blocked_state = state
+                    elif business_data:
+                        business_data.update(tags)
+                        if self._is_new_place(business_data, tags):
+                            results_data.append((idx, business_data))
+                            print(f"    ✓ {business_data['nome']}")
+                        self.pacing.on_success()
+                        self._adjust_tabs(seconds)
+                    else:
+                        print(f"    ✗ Erro ao processar resultado {idx}")
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        if blocked_state:
+            await self._handle_block(blocked_state, GoogleMapsScraper.build_query(tags['nicho'], tags['cidade'], tags['uf']))
+        await self._trim_detail_tabs()
+        return [record for _, record in sorted(results_data, key=lambda item: item[0])]
+
+    async def _scrape_place_in_tab(self, url: str, tab: CDPTab) -> Tuple[Optional[Dict[str, str]], float, str]:
+        """Extrai um lugar em uma aba de detalhes; retorna (dados, duração, estado da página)."""
+        inicio = time.monotonic()
+        data = await self._scrape_place_with_retry(url, tab)
+        state = GoogleMapsScraper.PAGE_OK
+        if not data or data['nome'] == 'Não informado':
+            # Painel vazio: pode ser uma página de bloqueio no lugar do Maps
+            state = await self.detect_page_state(tab)
+        return data, time.monotonic() - inicio, state
+
+    def _adjust_tabs(self, seconds: float):
+        """Informa a latência de um lugar ao limite de abas e registra a mudança."""
+        previous = self.tab_limit.limit
+        limit = self.tab_limit.on_success(seconds)
+        if limit != previous:
+            self.metrics.incr('ajustes_abas', direcao='mais' if limit > previous else 'menos')
+            print(f"🗂️ Abas de detalhes: {previous} → {limit} (latência média {seconds:.2f}s)")
+
+    async def _open_detail_tab(self) -> CDPTab:
+        tab = await self._open_tab()
+        self._detail_tabs.append(tab)
+        self.metrics.incr('abas_abertas')
+        return tab
+
+    async def _trim_detail_tabs(self):
+        """Fecha as abas acima do limite atual (libera a memória do renderizador)."""
+        while len(self._detail_tabs) > self.tab_limit.limit:
+            try:
+                await self._detail_tabs.pop().close()
+            except CDPError:
+                pass
+
+    async def _scrape_place_with_retry(self, url: str, tab: Optional[CDPTab] = None) -> Optional[Dict[str, str]]:
+        attempt = 1
+        while True:
+            data = await self.scrape_place(url, tab)
+            if data:
+                return data
+            if not self.result_retry.can_retry(attempt) or self._closed.is_set():
+                break
+            delay = self.result_retry.delay(attempt)
+            self.metrics.incr('retentativas', nivel='resultado')
+            print(f"    ↻ Nova tentativa em {delay:.1f}s ({attempt + 1}/{self.result_retry.max_attempts})")
+            if await self._sleep_unless_closed(delay):
+                break
+            attempt += 1
+        self.failed_places.append(url)
+        self.metrics.incr('descartados', nivel='resultado')
+        return None
+
+    def take_failed_places(self) -> List[str]:
+        """Retorna e esvazia a lista de lugares descartados desde a última chamada."""
+        failed, self.failed_places = self.failed_places, []
+        return failed
+
+    async def extract_business_data(self, previous_name: Optional[str] = None,
+                                    tab: Optional[CDPTab] = None) -> Optional[Dict[str, str]]:
+        """
+        Extrai os dados do negócio do painel de detalhes (um único Runtime.evaluate).
+
+        Args:
+            previous_name: Nome exibido antes; a extração espera o painel mudar
+            tab: Aba lida (padrão: a aba da busca)
+
+        Returns:
+            Dicionário no formato de GoogleMapsScraper.extract_business_data, ou None se houver erro
+        """
+        with self.metrics.timer('extracao'):
+            try:
+                data = {
+                    'nome': 'Não informado',
+                    'endereco': 'Não informado',
+                    'telefone': 'Não informado',
+                    'avaliacao': 'Não informado',
+                    'num_avaliacoes': 'Não informado'
+                }
+                tab = tab or self.tab
+                try:
+                    await self._wait_for(self.DETAIL_LOADED_JS, GoogleMapsScraper.DETAIL_TITLE_SELECTOR, previous_name,
+                                         tab=tab)
+                except asyncio.TimeoutError:
+                    print("    ⚠️ Painel de detalhes não atualizou a tempo")
+
+                panel = await tab.evaluate(
+                    GoogleMapsScraper.EXTRACT_DETAIL_JS,
+                    GoogleMapsScraper.NAME_SELECTORS,
+                    GoogleMapsScraper.INFO_SELECTORS,
+                    GoogleMapsScraper.RATING_SELECTORS,
+                    GoogleMapsScraper.REVIEW_COUNT_SELECTORS
+                ) or {}
+
+                for campo in ('nome', 'avaliacao', 'num_avaliacoes'):
+                    if panel.get(campo):
+                        data[campo] = panel[campo]
+                endereco, telefone = classify_info_texts(panel.get('info_texts') or [])
+                if endereco:
+                    data['endereco'] = endereco
+                if telefone:
+                    data['telefone'] = telefone
+
+                for campo, valor in data.items():
+                    if valor == 'Não informado':
+                        self.metrics.incr('campos_nao_informados', campo=campo)
+                return normalize_record(data)
+            except CDPError as e:
+                print(f"Erro ao extrair dados do negócio: {e}")
+                return None
+
+    async def scrape_nicho_cidade(self, nicho: str, cidade: Union[str, Dict]) -> List[Dict[str, str]]:
+        """
+        Realiza scraping de um nicho em uma cidade (ver GoogleMapsScraper.scrape_nicho_cidade).
+
+        Returns:
+            Lista de dicionários com os dados coletados
+        """
+        tags = GoogleMapsScraper.job_tags(nicho, cidade)
+        query = GoogleMapsScraper.build_query(nicho, tags['cidade'], tags['uf'])
+        print(f"🔍 Buscando: {query}")
+
+        await self.ensure_session()
+        self.searches_in_session += 1
+        self.total_searches += 1
+        self.search_bytes = 0
+
+        try:
+            with self.metrics.timer('consulta'):
+                records = await self._scrape_query(query, tags)
+            self.metrics.incr('consultas')
+            self.metrics.incr('registros', len(records))
+            return records
+        finally:
+            if self.log_transfer:
+                self.total_bytes += self.search_bytes
+                print(f"📶 {self.search_bytes / 1024:.0f} KB transferidos em: {query}")
+
+    async def _scrape_query(self, query: str, tags: Dict) -> List[Dict[str, str]]:
+        searched = await self.search(query)
+        if not await self._check_page_state(query) or not searched:
+            print(f"⚠️ Nenhum resultado encontrado para: {query}")
+            return []
+
+        results_urls = await self.get_results_urls()
+        if not results_urls:
+            print(f"⚠️ Nenhum resultado encontrado para: {query}")
+            return []
+        print(f"📊 Encontrados {len(results_urls)} resultados")
+        return await self._scrape_places(results_urls, tags)
+
+    async def _close_browser(self):
+        if self.browser:
+            browser, self.browser, self.tab = self.browser, None, None
+            self._detail_tabs = []
+            if browser.connection:
+                self._closed_commands += browser.connection.commands
+            await browser.close()
+
+    async def close(self):
+        """Fecha o navegador (e interrompe uma pausa após bloqueio em andamento)."""
+        self._closed.set()
+        await self._close_browser()
+
+
+class _EventLoopThread:
+    """Laço de eventos em uma thread de fundo, compartilhado pelos CDPMapsScraper do processo."""
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='cdp-loop', daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def shared(cls) -> '_EventLoopThread':
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def run(self, coroutine) -> Any:
+        """Executa a corrotina no laço e bloqueia a thread atual até o resultado."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+
+class CDPMapsScraper:
+    """
+    Fachada síncrona do AsyncMapsScraper, com a interface do GoogleMapsScraper.
+
+    Cada instância tem o seu navegador, mas todas rodam no mesmo laço de
+    eventos: N workers do pool são N navegadores controlados por uma única
+    thread de E/S. A thread que chama um método só espera o resultado.
+    """
+
+    # Só o modo URL: as páginas dos lugares abrem pelo link
+    DETAIL_MODES = ('url',)
+
+    def __init__(
+        self,
+        headless: bool = False,
+        wait_time: int = 10,
+        max_searches_per_session: int = 0,
+        pacing: Optional[PacingPolicy] = None,
+        max_results: int = 120,
+        max_idle_scrolls: int = 3,
+        detail_mode: str = 'url',
+        capture_network: bool = False,
+        capture_dir: Optional[str] = None,
+        lean_profile: bool = False,
+        log_transfer: bool = False,
+        dedup_index: Optional[DedupIndex] = None,
+        metrics: Optional[Metrics] = None,
+        block_cooldown: float = 60.0,
+        result_retry: Optional[RetryPolicy] = None,
+        detail_tabs: int = 1
+    ):
+        """
+        Inicializa o scraper; aceita os mesmos parâmetros do GoogleMapsScraper,
+        mais detail_tabs (ver AsyncMapsScraper).
+
+        detail_mode='clique' e capture_network não existem neste motor: os
+        lugares são sempre abertos pela URL (um aviso é impresso).
+        """
+        if detail_mode not in GoogleMapsScraper.DETAIL_MODES:
+            raise ValueError(f"Modo de detalhes desconhecido: {detail_mode} "
+                             f"(opções: {', '.join(GoogleMapsScraper.DETAIL_MODES)})")
+        if detail_mode not in self.DETAIL_MODES or capture_network:
+            print("⚠️ Motor CDP: modo clique e leitura da rede não são suportados; os lugares serão abertos pela URL")
+        self.engine = AsyncMapsScraper(
+            headless=headless,
+            wait_time=wait_time,
+            max_searches_per_session=max_searches_per_session,
+            pacing=pacing,
+            max_results=max_results,
+            max_idle_scrolls=max_idle_scrolls,
+            lean_profile=lean_profile,
+            log_transfer=log_transfer,
+            dedup_index=dedup_index,
+            metrics=metrics,
+            block_cooldown=block_cooldown,
+            result_retry=result_retry,
+            detail_tabs=detail_tabs
+        )
+        self._loop = _EventLoopThread.shared()
+
+    job_tags = staticmethod(GoogleMapsScraper.job_tags)
+    build_query = staticmethod(GoogleMapsScraper.build_query)
+
+    @property
+    def metrics(self) -> Metrics:
+        return self.engine.metrics
+
+    @property
+    def pacing(self) -> PacingPolicy:
+        return self.engine.pacing
+
+    @property
+    def commands(self) -> int:
+        """Comandos CDP enviados (para comparar com os comandos WebDriver do Selenium)."""
+        return self.engine.commands
+
+    def open_maps(self):
+        """Abre o navegador e o Google Maps."""
+        self._loop.run(self.engine.ensure_session())
+
+    def is_alive(self) -> bool:
+        return self._loop.run(self.engine.is_alive())
+
+    def detect_page_state(self) -> str:
+        return self._loop.run(self.engine.detect_page_state())
+
+    def restart_session(self, reason: str):
+        self._loop.run(self.engine.restart_session(reason))
+
+    def search(self, query: str) -> bool:
+        """Realiza uma busca no Google Maps (abre o navegador se preciso)."""
+        return self._loop.run(self.engine.search(query))
+
+    def get_results_links(self, max_results: Optional[int] = None, max_idle_scrolls: Optional[int] = None) -> List[str]:
+        """
+        Resultados da busca atual.
+
+        Sem WebDriver não há referências a elementos: retorna as URLs dos
+        lugares, como get_results_urls.
+        """
+        return self.get_results_urls(max_results, max_idle_scrolls)
+
+    def get_results_urls(self, max_results: Optional[int] = None, max_idle_scrolls: Optional[int] = None) -> List[str]:
+        """URLs (/maps/place/...) dos resultados da busca atual, sem repetição."""
+        return self._loop.run(self.engine.get_results_urls(max_results, max_idle_scrolls))
+
+    def extract_business_data(self, previous_name: Optional[str] = None) -> Optional[Dict[str, str]]:
+        """Extrai os dados do negócio do painel de detalhes aberto."""
+        return self._loop.run(self.engine.extract_business_data(previous_name))
+
+    def scrape_place(self, url: str) -> Optional[Dict[str, str]]:
+        return self._loop.run(self.engine.scrape_place(url))
+
+    def scrape_places(self, urls: List[str], nicho: str, cidade: Union[str, Dict]) -> List[Dict[str, str]]:
+        return self._loop.run(self.engine.scrape_places(urls, nicho, cidade))
+
+    def scrape_nicho_cidade(self, nicho: str, cidade: Union[str, Dict]) -> List[Dict[str, str]]:
+        """Realiza scraping de um nicho em uma cidade específica."""
+        return self._loop.run(self.engine.scrape_nicho_cidade(nicho, cidade))
+
+    def take_failed_places(self) -> List[str]:
+        return self.engine.take_failed_places()
+
+    def get_session_stats(self) -> Dict[str, float]:
+        return self.engine.get_session_stats()
+
+    def browser_pid(self) -> Optional[int]:
+        """PID do processo do Chrome (None se fechado)."""
+        return self.engine.browser.pid if self.engine.browser else None
+
+    def close(self):
+        """Fecha o navegador (e interrompe uma pausa após bloqueio em andamento)."""
+        # Sinaliza antes de entrar no laço, que pode estar ocupado com a pausa
+        self.engine._closed.set()
+        self._loop.run(self.engine.close())
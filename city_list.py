@@ -0,0 +1,211 @@
+"""
+Módulo com a lista de cidades selecionadas (modelo e componente visual).
+
+CitySelection guarda as cidades em um conjunto ordenado indexado pelo código
+IBGE, separado da interface: adicionar, deduplicar e remover milhares de
+cidades custa O(n) no total. VirtualCityList mostra esse modelo desenhando só
+as linhas visíveis, então o tamanho da lista não pesa na interface.
+"""
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional
+
+
+class CitySelection:
+    """Conjunto ordenado de municípios, indexado pelo código IBGE."""
+
+    def __init__(self):
+        self._cidades: Dict[Hashable, Dict] = {}
+        self._keys: Optional[List[Hashable]] = None
+
+    @staticmethod
+    def key_for(municipio: Dict) -> Hashable:
+        """
+        Chave do município: o código IBGE, ou o nome se ele não tiver código
+        (cidade digitada à mão).
+        """
+        return municipio.get('id') or municipio['nome']
+
+    @staticmethod
+    def label_for(municipio: Dict) -> str:
+        """Texto exibido na lista (nome e UF, quando conhecida)."""
+        if municipio.get('uf'):
+            return f"{municipio['nome']} - {municipio['uf']}"
+        return municipio['nome']
+
+    def __len__(self) -> int:
+        return len(self._cidades)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self._cidades.values())
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._cidades
+
+    def keys(self) -> List[Hashable]:
+        """Chaves na ordem de inserção (lista mantida em cache até a próxima alteração)."""
+        if self._keys is None:
+            self._keys = list(self._cidades)
+        return self._keys
+
+    def at(self, index: int) -> Dict:
+        """Município na posição index."""
+        return self._cidades[self.keys()[index]]
+
+    def add_many(self, municipios: Iterable[Dict]) -> int:
+        """
+        Acrescenta municípios, ignorando os que já estão na lista.
+
+        Returns:
+            Quantidade de municípios novos
+        """
+        antes = len(self._cidades)
+        for municipio in municipios:
+            self._cidades.setdefault(self.key_for(municipio), municipio)
+        if len(self._cidades) != antes:
+            self._keys = None
+        return len(self._cidades) - antes
+
+    def replace(self, municipios: Iterable[Dict]):
+        """Troca todo o conteúdo da lista de uma vez."""
+        self._cidades = {}
+        self._keys = None
+        self.add_many(municipios)
+
+    def remove_keys(self, keys: Iterable[Hashable]) -> int:
+        """
+        Remove municípios pelas chaves.
+
+        Returns:
+            Quantidade removida
+        """
+        antes = len(self._cidades)
+        for key in keys:
+            self._cidades.pop(key, None)
+        if len(self._cidades) != antes:
+            self._keys = None
+        return antes - len(self._cidades)
+
+    def remove_where(self, predicate: Callable[[Dict], bool]) -> int:
+        """
+        Remove, em uma única passada, os municípios para os quais predicate é verdadeiro.
+
+        Returns:
+            Quantidade removida
+        """
+        antes = len(self._cidades)
+        self._cidades = {key: m for key, m in self._cidades.items() if not predicate(m)}
+        if len(self._cidades) != antes:
+            self._keys = None
+        return antes - len(self._cidades)
+
+    def clear(self):
+        """Esvazia a lista."""
+        self._cidades = {}
+        self._keys = None
+
+
+class VirtualCityList(tk.Frame):
+    """
+    Lista rolável de um CitySelection que só desenha as linhas visíveis.
+
+    A seleção é guardada pelas chaves dos municípios, então continua valendo
+    ao rolar a lista (Ctrl para selecionar várias; Shift para intervalos
+    dentro da área visível).
+    """
+
+    def __init__(self, master, model: CitySelection, height: int = 8, **listbox_options):
+        """
+        Args:
+            master: Widget pai
+            model: Conjunto de cidades exibido
+            height: Número de linhas visíveis
+            **listbox_options: Opções de cor repassadas ao tk.Listbox
+        """
+        super().__init__(master, bg=listbox_options.get('bg'))
+        self.model = model
+        self.rows = height
+        self.offset = 0
+        self.selected = set()
+
+        self.listbox = tk.Listbox(
+            self,
+            height=height,
+            selectmode=tk.EXTENDED,
+            exportselection=False,
+            activestyle='none',
+            **listbox_options
+        )
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.listbox.pack(side="left", fill="both", expand=True)
+
+        self.listbox.bind("<<ListboxSelect>>", self._on_select)
+        # Clique simples começa uma seleção nova, inclusive fora da área visível
+        self.listbox.bind("<Button-1>", lambda e: self.selected.clear())
+        self.listbox.bind("<Control-Button-1>", lambda e: None)
+        self.listbox.bind("<Shift-Button-1>", lambda e: None)
+        self.listbox.bind("<MouseWheel>", lambda e: self._scroll_by(-1 if e.delta > 0 else 1))
+        self.listbox.bind("<Button-4>", lambda e: self._scroll_by(-1))
+        self.listbox.bind("<Button-5>", lambda e: self._scroll_by(1))
+        self.listbox.bind("<Up>", lambda e: self._scroll_by(-1) if self._at_edge(0) else None)
+        self.listbox.bind("<Down>", lambda e: self._scroll_by(1) if self._at_edge(self.rows - 1) else None)
+
+    def _at_edge(self, row: int) -> bool:
+        return self.listbox.index(tk.ACTIVE) == row
+
+    def _max_offset(self) -> int:
+        return max(len(self.model) - self.rows, 0)
+
+    def _scroll_by(self, linhas: int):
+        self._scroll_to(self.offset + linhas)
+        return "break"
+
+    def _scroll_to(self, offset: int):
+        offset = min(max(offset, 0), self._max_offset())
+        if offset != self.offset:
+            self.offset = offset
+            self.refresh()
+
+    def _on_scrollbar(self, action: str, value: str, unit: Optional[str] = None):
+        """Traduz os comandos da barra de rolagem em deslocamento da janela visível."""
+        if action == "moveto":
+            self._scroll_to(round(float(value) * len(self.model)))
+        elif action == "scroll":
+            passo = self.rows if unit == "pages" else 1
+            self._scroll_to(self.offset + int(value) * passo)
+
+    def _on_select(self, _event=None):
+        """Sincroniza a seleção das linhas visíveis com o conjunto de chaves selecionadas."""
+        keys = self.model.keys()
+        visiveis = keys[self.offset:self.offset + self.rows]
+        marcadas = set(self.listbox.curselection())
+        for row, key in enumerate(visiveis):
+            if row in marcadas:
+                self.selected.add(key)
+            else:
+                self.selected.discard(key)
+
+    def refresh(self):
+        """Redesenha as linhas visíveis (chamar após alterar o modelo)."""
+        self.offset = min(self.offset, self._max_offset())
+        self.selected.intersection_update(self.model.keys())
+
+        keys = self.model.keys()
+        visiveis = keys[self.offset:self.offset + self.rows]
+        self.listbox.delete(0, tk.END)
+        if visiveis:
+            self.listbox.insert(tk.END, *(CitySelection.label_for(self.model.at(self.offset + i)) for i in range(len(visiveis))))
+        for row, key in enumerate(visiveis):
+            if key in self.selected:
+                self.listbox.selection_set(row)
+
+        total = len(self.model)
+        if total:
+            self.scrollbar.set(self.offset / total, (self.offset + len(visiveis)) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def selected_keys(self) -> List:
+        """Chaves dos municípios selecionados, na ordem da lista."""
+        return [key for key in self.model.keys() if key in self.selected]
@@ -0,0 +1,312 @@
+"""
+Coleta em lote pela linha de comando, sem interface gráfica.
+
+Roda o navegador em modo headless e não importa tkinter/customtkinter, então
+pode ser agendada (cron, systemd) em servidores sem tela. Exemplos:
+
+    python -m cli --nicho "Auto Peças" --nicho "Oficina" --uf PR --workers 2
+    python -m cli --nichos-arquivo output/nichos.json --cidade "Cambé - PR" --saida output/cambe.jsonl
+    python -m cli --nicho "Auto Peças" --uf PR --saida output/pr.jsonl --continuar
+    python -m cli --nicho "Auto Peças" --uf PR --saida output/pr.jsonl --descartados
+    python -m cli --nicho "Auto Peças" --cidade "Cambé - PR" --motor cdp --workers 4
+    python -m cli --nicho "Auto Peças" --uf PR --motor cdp --abas 4
+
+Códigos de saída: 0 = todos os jobs concluídos, 1 = jobs com falha (ficam
+pendentes para o próximo --continuar) ou descartados após todas as
+tentativas (reprocessados com --descartados), 2 = argumentos inválidos,
+130 = interrompido (Ctrl+C / SIGTERM).
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from batch import BatchRunner
+from dedup_index import DedupIndex
+from ibge_api import IBGEAPI
+from job_store import JobStore
+from metrics import Metrics
+from pacing import PACING_POLICIES, create_pacing
+from pool import ScrapingPool
+from results_sink import ResultsSink
+from retry import RetryPolicy
+from scraper import SCRAPER_ENGINES, GoogleMapsScraper, create_scraper
+
+EXIT_OK = 0
+EXIT_FAILED_JOBS = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+
+def _read_list_file(path: str) -> List[str]:
+    """Lê uma lista de um arquivo JSON (como output/nichos.json) ou de texto, um item por linha."""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    try:
+        items = json.loads(content)
+    except ValueError:
+        items = content.splitlines()
+    if not isinstance(items, list):
+        raise ValueError(f"{path}: o arquivo deve conter uma lista")
+    return [item.strip() for item in items if isinstance(item, str) and item.strip()]
+
+
+def _unique(items: List[str]) -> List[str]:
+    """Remove repetidos mantendo a ordem."""
+    return list(dict.fromkeys(items))
+
+
+def _split_uf(texto: str) -> Tuple[str, str]:
+    """Separa 'Cambé - PR' ou 'Cambé/PR' em ('Cambé', 'PR'); sem UF retorna ('Cambé', '')."""
+    for separador in (' - ', '/', ','):
+        nome, _, uf = texto.rpartition(separador)
+        if nome and len(uf.strip()) == 2:
+            return nome.strip(), uf.strip().upper()
+    return texto.strip(), ''
+
+
+def resolve_cidades(nomes: List[str], uf: Optional[str]) -> List[Dict]:
+    """
+    Converte os nomes informados em municípios do IBGE.
+
+    Args:
+        nomes: Cidades ('Cambé - PR', 'Cambé/PR' ou só 'Cambé'); vazio = todas as da UF
+        uf: UF padrão para nomes sem UF
+
+    Returns:
+        Municípios ({'id', 'nome', 'uf'}); cidades não encontradas no IBGE
+        são buscadas só pelo nome
+    """
+    if not nomes:
+        return IBGEAPI.get_municipios_por_estado(uf)
+
+    municipios_por_uf = {}
+    cidades = []
+    for texto in nomes:
+        nome, cidade_uf = _split_uf(texto)
+        cidade_uf = cidade_uf or (uf or '')
+        municipio = None
+        if cidade_uf:
+            if cidade_uf not in municipios_por_uf:
+                municipios_por_uf[cidade_uf] = {
+                    m['nome'].lower(): m for m in IBGEAPI.get_municipios_por_estado(cidade_uf)
+                }
+            municipio = municipios_por_uf[cidade_uf].get(nome.lower())
+        if not municipio:
+            print(f"⚠️ {texto} não encontrada no IBGE; a busca usará só o nome")
+            municipio = {'nome': nome, 'uf': cidade_uf}
+        cidades.append(municipio)
+    return cidades
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(
+        prog="python -m cli",
+        description="Coleta em lote de estabelecimentos do Google Maps (sem interface gráfica)."
+    )
+    nichos = parser.add_argument_group("nichos")
+    nichos.add_argument("--nicho", action="append", default=[], help="Nicho de mercado (pode repetir)")
+    nichos.add_argument("--nichos-arquivo", help="Arquivo com os nichos (JSON como output/nichos.json, ou um por linha)")
+
+    cidades = parser.add_argument_group("cidades")
+    cidades.add_argument("--uf", help="Sigla do estado; sem --cidade, busca em todos os municípios da UF")
+    cidades.add_argument("--cidade", action="append", default=[], help="Cidade ('Cambé - PR'; pode repetir)")
+    cidades.add_argument("--cidades-arquivo", help="Arquivo com as cidades (JSON ou uma por linha)")
+
+    execucao = parser.add_argument_group("execução")
+    execucao.add_argument("--workers", type=int, default=1, help="Navegadores em paralelo (padrão: 1)")
+    execucao.add_argument("--saida", default=os.path.join("output", "resultados.jsonl"),
+                          help="Arquivo de resultados .jsonl (padrão: output/resultados.jsonl)")
+    execucao.add_argument("--exportar", help="Ao final, exporta também para este arquivo (.xlsx, .csv, .parquet ou .arrow)")
+    execucao.add_argument("--jobs", help="Tabela de jobs (padrão: ao lado da saída, .jobs.sqlite)")
+    execucao.add_argument("--continuar", action="store_true",
+                          help="Retoma a coleta da mesma saída, pulando os jobs já concluídos")
+    execucao.add_argument("--descartados", action="store_true",
+                          help="Reprocessa só os jobs e lugares descartados da mesma saída (mesmos nichos/cidades)")
+    execucao.add_argument("--tentativas", type=int, default=3,
+                          help="Tentativas de cada job antes de descartá-lo (padrão: 3)")
+    execucao.add_argument("--espera-tentativa", type=float, default=30.0,
+                          help="Espera (s) antes da 2ª tentativa de um job; dobra a cada tentativa (padrão: 30)")
+    execucao.add_argument("--tentativas-lugar", type=int, default=2,
+                          help="Tentativas de abrir cada lugar antes de descartá-lo (padrão: 2)")
+    execucao.add_argument("--sem-dedup", action="store_true", help="Não ignora empresas já coletadas")
+    execucao.add_argument("--dedup-arquivo",
+                          help="Índice de empresas já coletadas (padrão: ao lado da saída, .dedup.sqlite); "
+                               "o mesmo arquivo em várias saídas evita repetir empresas entre elas")
+
+    metricas = parser.add_argument_group("métricas")
+    metricas.add_argument("--metricas", help="Resumo JSON das métricas (padrão: ao lado da saída, .metricas.json)")
+    metricas.add_argument("--metricas-prometheus", help="Arquivo no formato do Prometheus regravado durante a coleta")
+    metricas.add_argument("--metricas-porta", type=int, help="Serve as métricas em http://HOST:PORTA/metrics")
+    metricas.add_argument("--metricas-host", default="127.0.0.1",
+                          help="Endereço de escuta das métricas (padrão: 127.0.0.1; 0.0.0.0 expõe na rede, sem autenticação)")
+
+    navegador = parser.add_argument_group("navegador")
+    navegador.add_argument("--motor", choices=list(SCRAPER_ENGINES), default="selenium",
+                           help="selenium (chromedriver) ou cdp (DevTools direto, asyncio; só modo url)")
+    navegador.add_argument("--abas", type=int, default=1,
+                           help="Máximo de abas abrindo lugares ao mesmo tempo em cada navegador; "
+                                "o número se ajusta à latência e aos bloqueios (só com --motor cdp; padrão: 1)")
+    navegador.add_argument("--max-buscas", type=int, default=50,
+                           help="Buscas antes de reiniciar o navegador (0 = nunca; padrão: 50)")
+    navegador.add_argument("--ritmo", choices=list(PACING_POLICIES), default="aleatorio",
+                           help="Política de pausas anti-bloqueio")
+    navegador.add_argument("--pausa-bloqueio", type=float, default=60.0,
+                           help="Pausa (s) após CAPTCHA/bloqueio antes de abrir uma sessão nova; dobra a cada bloqueio seguido")
+    navegador.add_argument("--tentativas-bloqueio", type=int, default=3,
+                           help="Vezes que um job bloqueado volta para a fila (padrão: 3)")
+    navegador.add_argument("--max-resultados", type=int, default=120, help="Resultados por busca (padrão: 120)")
+    navegador.add_argument("--modo-detalhes", choices=list(GoogleMapsScraper.DETAIL_MODES), default="url",
+                           help="Como abrir cada resultado")
+    navegador.add_argument("--ler-rede", action="store_true", help="Lê os dados das respostas de rede do Maps")
+    navegador.add_argument("--perfil-leve", action="store_true", help="Bloqueia imagens, fontes e blocos do mapa")
+    navegador.add_argument("--com-janela", action="store_true", help="Mostra o navegador (desliga o headless)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Executa a coleta; retorna o código de saída."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        nichos = list(args.nicho)
+        if args.nichos_arquivo:
+            nichos += _read_list_file(args.nichos_arquivo)
+        nomes_cidades = list(args.cidade)
+        if args.cidades_arquivo:
+            nomes_cidades += _read_list_file(args.cidades_arquivo)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    nichos = _unique(nichos)
+    uf = args.uf.upper() if args.uf else None
+
+    if not nichos:
+        parser.error("informe pelo menos um nicho (--nicho ou --nichos-arquivo)")
+    if not nomes_cidades and not uf:
+        parser.error("informe --uf ou pelo menos uma cidade (--cidade ou --cidades-arquivo)")
+    if args.abas > 1 and args.motor != 'cdp':
+        parser.error("--abas exige --motor cdp")
+
+    sink_path = args.saida if args.saida.endswith('.jsonl') else ResultsSink.path_for(args.saida)
+    jobs_path = args.jobs or os.path.splitext(sink_path)[0] + '.jobs.sqlite'
+    dedup_path = args.dedup_arquivo or os.path.splitext(sink_path)[0] + '.dedup.sqlite'
+    os.makedirs(os.path.dirname(os.path.abspath(sink_path)), exist_ok=True)
+
+    job_store = JobStore(jobs_path)
+    if args.continuar or args.descartados:
+        job_store.reset_running()
+    elif job_store.summary() or (os.path.exists(sink_path) and os.path.getsize(sink_path)):
+        # Não mistura uma coleta nova com os resultados de outra
+        job_store.close()
+        parser.error(f"{sink_path} já tem uma coleta; use --continuar ou outra --saida")
+
+    cidades = resolve_cidades(_unique(nomes_cidades), uf)
+    if not cidades:
+        job_store.close()
+        print(f"❌ Nenhum município encontrado para a UF {uf}")
+        return EXIT_USAGE
+
+    dedup_index = None if args.sem_dedup else DedupIndex(dedup_path)
+    metrics = Metrics()
+    metrics_path = args.metricas or os.path.splitext(sink_path)[0] + '.metricas.json'
+    pool = ScrapingPool(
+        num_workers=max(args.workers, 1),
+        scraper_factory=lambda: create_scraper(
+            args.motor,
+            headless=not args.com_janela,
+            max_searches_per_session=max(args.max_buscas, 0),
+            pacing=create_pacing(args.ritmo),
+            max_results=args.max_resultados,
+            detail_mode=args.modo_detalhes,
+            capture_network=args.ler_rede,
+            lean_profile=args.perfil_leve,
+            log_transfer=True,
+            dedup_index=dedup_index,
+            metrics=metrics,
+            block_cooldown=max(args.pausa_bloqueio, 0),
+            result_retry=RetryPolicy(max_attempts=args.tentativas_lugar, base_delay=2.0, max_delay=10.0),
+            detail_tabs=max(args.abas, 1)
+        ),
+        max_block_retries=max(args.tentativas_bloqueio, 0),
+        retry_policy=RetryPolicy(max_attempts=args.tentativas, base_delay=max(args.espera_tentativa, 0))
+    )
+    results_sink = ResultsSink(sink_path)
+    runner = BatchRunner(pool, job_store, results_sink, metrics, dedup_index)
+
+    interrupted = False
+
+    def on_signal(signum, _frame):
+        nonlocal interrupted
+        interrupted = True
+        print("⏸️ Interrompendo após as buscas em andamento...")
+        runner.stop()
+
+    signal.signal(signal.SIGINT, on_signal)
+    signal.signal(signal.SIGTERM, on_signal)
+
+    def on_progress(current, total, nicho, municipio, error):
+        busca = GoogleMapsScraper.build_query(nicho, municipio['nome'], municipio.get('uf') or '')
+        if error:
+            print(f"❌ [{current}/{total}] {busca}: {error}")
+        else:
+            print(f"✅ [{current}/{total}] {busca} | {results_sink.count} resultados no total")
+
+    metrics.start_exporter(args.metricas_prometheus, args.metricas_porta, host=args.metricas_host)
+    try:
+        previous_count = results_sink.count
+        if previous_count:
+            print(f"📂 Continuando coleta: {previous_count} resultados anteriores em {sink_path}")
+        if args.descartados:
+            # Só as unidades que esgotaram as tentativas: jobs inteiros e lugares avulsos
+            pairs = runner.dead_letter_pairs(nichos, cidades)
+            print(f"🔍 {len(pairs)} busca(s) descartada(s) para reprocessar com {pool.num_workers} navegador(es)")
+            runner.run(pairs, on_progress)
+            if pool.is_running:
+                runner.run_failed_places(nichos, cidades, on_progress)
+        else:
+            pairs = runner.pending_pairs(nichos, cidades)
+            print(f"🔍 {len(pairs)} buscas pendentes ({len(nichos)} nicho(s) x {len(cidades)} cidade(s)) "
+                  f"com {pool.num_workers} navegador(es)")
+            runner.run(pairs, on_progress)
+    finally:
+        runner.print_stats()
+        if dedup_index:
+            print(f"♻️ Empresas já coletadas ignoradas: {dedup_index.skipped}")
+        runner.close()
+        results_sink.close()
+        metrics.stop_exporter()
+        metrics.to_json(metrics_path)
+        print(f"📈 Métricas salvas em {metrics_path}")
+
+    if args.exportar and results_sink.count:
+        total = results_sink.export(args.exportar, dedup_index.tags_label if dedup_index else None)
+        print(f"💾 Arquivo exportado: {args.exportar} ({total} registros)")
+    if dedup_index:
+        dedup_index.close()
+
+    if interrupted:
+        job_store.close()
+        return EXIT_INTERRUPTED
+    if runner.failed or not runner.all_done():
+        dead_jobs = len(job_store.dead_letter_keys())
+        dead_places = sum(len(urls) for urls in job_store.failed_places().values())
+        print(f"⚠️ {runner.failed} busca(s) com falha; rode de novo com --continuar para tentar outra vez")
+        if dead_jobs or dead_places:
+            print(f"⚠️ Descartados: {dead_jobs} busca(s) e {dead_places} lugar(es); "
+                  f"reprocesse só esses com --descartados")
+        job_store.close()
+        return EXIT_FAILED_JOBS
+
+    # Tudo concluído: a próxima execução com --continuar recomeça a coleta
+    job_store.clear()
+    job_store.close()
+    print(f"✅ Coleta concluída: {results_sink.count} resultados em {sink_path}")
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
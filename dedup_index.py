@@ -0,0 +1,292 @@
+"""
+Módulo com o índice de empresas já coletadas (deduplicação entre buscas).
+
+A mesma empresa costuma aparecer em buscas de cidades vizinhas e de nichos
+parecidos. O índice guarda uma chave por lugar (place id ou URL do Maps) e uma
+chave de conteúdo (telefone + nome + endereço normalizados). Antes de abrir um
+resultado o scraper consulta o índice: se o lugar já é conhecido, só registra
+a busca (nicho, cidade, UF) como mais uma marcação da empresa existente.
+
+Uma empresa só entra no índice junto com a gravação do registro no arquivo de
+resultados (commit), nunca durante a extração: se o job falhar ou for refeito,
+os lugares dele continuam fora do índice e são extraídos de novo.
+
+O índice fica em SQLite e vale entre execuções da mesma coleta.
+"""
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Callable, Dict, List, Optional
+
+# Trechos da URL do Maps que identificam o lugar
+_PLACE_ID_PATTERN = re.compile(r'!19s(ChIJ[\w-]+)')
+_FEATURE_ID_PATTERN = re.compile(r'!1s(0x[0-9a-f]+:0x[0-9a-f]+)')
+
+NOT_INFORMED = 'Não informado'
+
+
+def _normalize_text(text: str) -> str:
+    """Minúsculas, sem acentos e só com letras e números."""
+    if not text or text == NOT_INFORMED:
+        return ''
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return re.sub(r'[^a-z0-9]+', ' ', text.lower()).strip()
+
+
+def place_key(url: Optional[str] = None, place_id: Optional[str] = None) -> Optional[str]:
+    """
+    Chave do lugar a partir do place id ou da URL do Maps.
+
+    Args:
+        url: URL /maps/place/... do resultado
+        place_id: Place id (ChIJ...) lido das respostas de rede
+
+    Returns:
+        Chave no formato 'pid:...', 'ftid:...' ou 'url:...', ou None
+    """
+    if place_id:
+        return f"pid:{place_id}"
+    if not url:
+        return None
+    match = _PLACE_ID_PATTERN.search(url)
+    if match:
+        return f"pid:{match.group(1)}"
+    match = _FEATURE_ID_PATTERN.search(url)
+    if match:
+        return f"ftid:{match.group(1)}"
+    return f"url:{url.split('?')[0]}"
+
+
+def content_key(record: Dict) -> Optional[str]:
+    """
+    Chave de conteúdo: telefone (só dígitos) + nome + endereço normalizados.
+
+    Returns:
+        Chave, ou None se o registro não tiver nome
+    """
+    nome = _normalize_text(record.get('nome', ''))
+    if not nome:
+        return None
+    telefone = re.sub(r'\D', '', record.get('telefone') or '')
+    endereco = _normalize_text(record.get('endereco', ''))
+    return f"{telefone}|{nome}|{endereco}"
+
+
+class DedupIndex:
+    """Índice persistente de empresas, seguro para uso entre threads."""
+
+    def __init__(self, path: str):
+        """
+        Abre (ou cria) o índice.
+
+        Args:
+            path: Caminho do arquivo SQLite
+        """
+        self.path = path
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS empresas (
+                chave TEXT PRIMARY KEY,
+                chave_conteudo TEXT,
+                nome TEXT,
+                criado_em REAL
+            );
+            CREATE INDEX IF NOT EXISTS empresas_conteudo ON empresas (chave_conteudo);
+            CREATE TABLE IF NOT EXISTS apelidos (
+                chave TEXT PRIMARY KEY,
+                empresa TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS marcacoes (
+                empresa TEXT NOT NULL,
+                nicho TEXT NOT NULL,
+                cidade TEXT NOT NULL,
+                uf TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (empresa, nicho, cidade, uf)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def _resolve(self, key: str) -> Optional[str]:
+        """Chave canônica da empresa para uma chave de lugar (chamado com o lock)."""
+        row = self._conn.execute("SELECT chave FROM empresas WHERE chave = ?", (key,)).fetchone()
+        if row:
+            return row[0]
+        row = self._conn.execute("SELECT empresa FROM apelidos WHERE chave = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _tag(self, empresa: str, tags: Dict):
+        """Registra a busca como marcação da empresa (chamado com o lock)."""
+        self._conn.execute(
+            "INSERT OR IGNORE INTO marcacoes (empresa, nicho, cidade, uf) VALUES (?, ?, ?, ?)",
+            (empresa, tags.get('nicho', ''), tags.get('cidade', ''), tags.get('uf') or '')
+        )
+
+    def tag_if_known(self, key: Optional[str], tags: Dict) -> bool:
+        """
+        Se o lugar já está no índice, só acrescenta a marcação da busca.
+
+        Args:
+            key: Chave do lugar (place_key)
+            tags: Campos da busca (nicho, cidade, uf)
+
+        Returns:
+            True se o lugar já era conhecido (não precisa extrair de novo)
+        """
+        if not key:
+            return False
+        with self._lock:
+            empresa = self._resolve(key)
+            if not empresa:
+                return False
+            self._tag(empresa, tags)
+            self._conn.commit()
+            self.skipped += 1
+            return True
+
+    def _find(self, key: Optional[str], conteudo: Optional[str]) -> Optional[str]:
+        """Empresa já registrada com a chave do lugar ou de conteúdo (chamado com o lock)."""
+        empresa = self._resolve(key) if key else None
+        if not empresa and conteudo:
+            row = self._conn.execute(
+                "SELECT chave FROM empresas WHERE chave_conteudo = ?", (conteudo,)
+            ).fetchone()
+            if row:
+                empresa = row[0]
+                # Mesmo lugar com outra URL: guarda a URL como apelido
+                if key:
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO apelidos (chave, empresa) VALUES (?, ?)", (key, empresa)
+                    )
+        return empresa
+
+    def tag_record_if_known(self, record: Dict, tags: Dict) -> bool:
+        """
+        Se o registro extraído é de uma empresa já gravada, só acrescenta a marcação.
+
+        Não registra empresas novas: isso fica para commit(), quando o
+        registro é gravado.
+
+        Args:
+            record: Registro extraído (com 'url' ou 'place_id', se houver)
+            tags: Campos da busca (nicho, cidade, uf)
+
+        Returns:
+            True se a empresa já estava no índice
+        """
+        key = place_key(record.get('url'), record.get('place_id'))
+        conteudo = content_key(record)
+        if not key and not conteudo:
+            return False
+        with self._lock:
+            empresa = self._find(key, conteudo)
+            if not empresa:
+                return False
+            self._tag(empresa, tags)
+            self._conn.commit()
+            self.skipped += 1
+        record['chave_empresa'] = empresa
+        return True
+
+    def _add(self, record: Dict, tags: Dict) -> bool:
+        """Registra ou marca a empresa sem fazer o commit (chamado com o lock)."""
+        key = place_key(record.get('url'), record.get('place_id'))
+        conteudo = content_key(record)
+        if not key and not conteudo:
+            return True
+
+        empresa = self._find(key, conteudo)
+        is_new = empresa is None
+        if is_new:
+            empresa = key or f"conteudo:{conteudo}"
+            self._conn.execute(
+                "INSERT INTO empresas (chave, chave_conteudo, nome, criado_em) VALUES (?, ?, ?, ?)",
+                (empresa, conteudo, record.get('nome'), time.time())
+            )
+        else:
+            self.skipped += 1
+        self._tag(empresa, tags)
+        record['chave_empresa'] = empresa
+        return is_new
+
+    def add(self, record: Dict, tags: Dict) -> bool:
+        """
+        Registra uma empresa, ou marca a existente se for repetida.
+
+        Grava a chave usada no campo 'chave_empresa' do registro.
+
+        Args:
+            record: Registro (com 'url' ou 'place_id', se houver)
+            tags: Campos da busca (nicho, cidade, uf)
+
+        Returns:
+            True se a empresa é nova; False se já estava no índice
+        """
+        with self._lock:
+            is_new = self._add(record, tags)
+            self._conn.commit()
+        return is_new
+
+    def commit(self, records: List[Dict], persist: Callable[[List[Dict]], None]) -> List[Dict]:
+        """
+        Registra os registros de um job e grava os novos em uma transação só.
+
+        As chaves só ficam no índice se persist terminar sem erro; se ele
+        levantar exceção, o índice volta ao estado anterior e a exceção segue.
+        Registros de empresas já conhecidas (de outro job ou repetidos no
+        mesmo job) ficam de fora e só ganham a marcação da busca.
+
+        Args:
+            records: Registros extraídos, com os campos nicho, cidade e uf
+            persist: Função que grava a lista de registros novos
+
+        Returns:
+            Registros novos, na mesma ordem
+        """
+        with self._lock:
+            try:
+                new_records = [
+                    record for record in records
+                    if self._add(record, {field: record.get(field, '') for field in ('nicho', 'cidade', 'uf')})
+                ]
+                persist(new_records)
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._conn.commit()
+        return new_records
+
+    def tags_for(self, empresa: str) -> List[Dict[str, str]]:
+        """
+        Lista as buscas em que a empresa apareceu.
+
+        Returns:
+            Lista de dicionários com nicho, cidade e uf
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT nicho, cidade, uf FROM marcacoes WHERE empresa = ? ORDER BY rowid", (empresa,)
+            ).fetchall()
+        return [{'nicho': nicho, 'cidade': cidade, 'uf': uf} for nicho, cidade, uf in rows]
+
+    def tags_label(self, empresa: Optional[str]) -> str:
+        """Texto com todas as buscas da empresa (para a planilha)."""
+        if not empresa:
+            return ''
+        return '; '.join(
+            f"{tag['nicho']} em {tag['cidade']}" + (f" - {tag['uf']}" if tag['uf'] else '')
+            for tag in self.tags_for(empresa)
+        )
+
+    def close(self):
+        """Fecha a conexão com o índice."""
+        with self._lock:
+            self._conn.close()
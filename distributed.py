@@ -0,0 +1,1070 @@
+"""
+Módulo com a coleta distribuída: uma campanha dividida entre várias máquinas.
+
+Uma campanha (nichos x municípios, até todos os do Brasil) é expandida em
+jobs (nicho, município) gravados em uma fila compartilhada (CampaignQueue,
+SQLite). Workers sem interface, em um ou vários hosts, pegam jobs por
+empréstimo (lease): cada job emprestado tem um token e um prazo, renovado por
+heartbeats enquanto o worker está vivo. Se o worker cai, o prazo vence e o
+job volta para a fila (conta como uma tentativa com falha).
+
+Os registros voltam para a fila junto com a conclusão do job e são mesclados
+com deduplicação: a mesma empresa vinda de buscas ou workers diferentes fica
+uma vez só, com todas as buscas em que apareceu (chaves de dedup_index).
+
+A fila pode ser usada de dois jeitos:
+
+- arquivo: todos os processos abrem o mesmo .sqlite (mesma máquina; o SQLite
+  em disco de rede não tem travas confiáveis)
+- coordenador: um processo serve a fila por HTTP (CoordinatorServer) e os
+  workers de outros hosts usam RemoteQueue, com os mesmos métodos
+
+Exemplos:
+
+    python -m distributed campanha --fila output/campanha.sqlite --nicho "Auto Peças" --brasil
+    python -m distributed servir --fila output/campanha.sqlite --host 0.0.0.0 --porta 8765 --chave segredo
+    python -m distributed worker --coordenador http://10.0.0.5:8765 --chave segredo --workers 2
+    python -m distributed worker --fila output/campanha.sqlite --motor cdp --abas 4
+    python -m distributed status --fila output/campanha.sqlite
+    python -m distributed exportar --fila output/campanha.sqlite --saida output/campanha.xlsx
+"""
+import argparse
+import ipaddress
+import json
+import os
+import signal
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+
+from dedup_index import content_key, place_key
+from job_store import DEAD_LETTER, DONE, FAILED, PENDING, RUNNING
+from metrics import Metrics
+from retry import RetryPolicy
+from scraper import SessionBlockedError
+
+# Prazo padrão de um empréstimo (segundos); os heartbeats renovam a cada terço do prazo
+DEFAULT_LEASE_SECONDS = 300.0
+
+# Cabeçalho com a chave compartilhada do coordenador
+KEY_HEADER = 'X-Chave-Campanha'
+
+# Chamadas ao coordenador: tentativas quando a rede falha
+REMOTE_RETRY = RetryPolicy(max_attempts=5, base_delay=2.0, max_delay=30.0)
+
+# Configuração da campanha guardada na tabela meta (nome: (tipo, padrão))
+_SETTINGS = {
+    'tentativas': (int, 3),
+    'espera_tentativa': (float, 30.0),
+    'tentativas_bloqueio': (int, 3),
+    'lease_segundos': (float, DEFAULT_LEASE_SECONDS),
+}
+
+
+class CampaignQueue:
+    """Fila de jobs e resultados mesclados de uma campanha, em SQLite."""
+
+    def __init__(self, path: str):
+        """
+        Abre (ou cria) a fila.
+
+        Args:
+            path: Caminho do arquivo SQLite compartilhado pelos processos
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # Transações controladas à mão (BEGIN IMMEDIATE) para o lease ser atômico entre processos
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                nicho TEXT NOT NULL,
+                cidade TEXT NOT NULL,
+                uf TEXT NOT NULL DEFAULT '',
+                municipio TEXT NOT NULL,
+                status TEXT NOT NULL,
+                tentativas INTEGER NOT NULL DEFAULT 0,
+                falhas INTEGER NOT NULL DEFAULT 0,
+                bloqueios INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                token TEXT,
+                lease_ate REAL,
+                disponivel_em REAL NOT NULL DEFAULT 0,
+                inicio REAL,
+                fim REAL,
+                resultados INTEGER NOT NULL DEFAULT 0,
+                novos INTEGER NOT NULL DEFAULT 0,
+                erro TEXT,
+                UNIQUE (nicho, cidade, uf)
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, disponivel_em);
+            CREATE TABLE IF NOT EXISTS empresas (
+                chave TEXT PRIMARY KEY,
+                chave_conteudo TEXT,
+                registro TEXT NOT NULL,
+                worker TEXT,
+                inclusao REAL
+            );
+            CREATE INDEX IF NOT EXISTS empresas_conteudo ON empresas (chave_conteudo);
+            CREATE TABLE IF NOT EXISTS apelidos (
+                chave TEXT PRIMARY KEY,
+                empresa TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS marcacoes (
+                empresa TEXT NOT NULL,
+                nicho TEXT NOT NULL,
+                cidade TEXT NOT NULL,
+                uf TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (empresa, nicho, cidade, uf)
+            );
+            CREATE TABLE IF NOT EXISTS lugares_descartados (
+                url TEXT PRIMARY KEY,
+                job INTEGER NOT NULL,
+                inclusao REAL
+            );
+            CREATE TABLE IF NOT EXISTS workers (
+                worker TEXT PRIMARY KEY,
+                ultimo_contato REAL,
+                concluidos INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                chave TEXT PRIMARY KEY,
+                valor TEXT
+            );
+            """
+        )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Transação com trava de escrita (outros processos esperam até timeout)."""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def configure(self, **settings):
+        """
+        Grava a configuração da campanha, usada por todos os workers.
+
+        Args:
+            settings: tentativas, espera_tentativa, tentativas_bloqueio e/ou
+                lease_segundos
+        """
+        unknown = set(settings) - set(_SETTINGS)
+        if unknown:
+            raise ValueError(f"Configuração desconhecida: {', '.join(sorted(unknown))}")
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO meta (chave, valor) VALUES (?, ?)",
+                [(name, str(value)) for name, value in settings.items()]
+            )
+
+    def settings(self) -> Dict:
+        """Configuração da campanha (valores padrão para o que não foi gravado)."""
+        with self._lock:
+            stored = dict(self._conn.execute("SELECT chave, valor FROM meta").fetchall())
+        return {
+            name: kind(stored[name]) if name in stored else default
+            for name, (kind, default) in _SETTINGS.items()
+        }
+
+    def _retry_policy(self, settings: Dict) -> RetryPolicy:
+        return RetryPolicy(max_attempts=settings['tentativas'], base_delay=settings['espera_tentativa'])
+
+    def add_jobs(self, pairs: Iterable[Tuple[str, Dict]]) -> int:
+        """
+        Registra jobs pendentes (jobs já existentes não são alterados).
+
+        Args:
+            pairs: Pares (nicho, município {'id', 'nome', 'uf'})
+
+        Returns:
+            Número de jobs novos
+        """
+        rows = [
+            (nicho, municipio['nome'], municipio.get('uf') or '', json.dumps(municipio, ensure_ascii=False), PENDING)
+            for nicho, municipio in pairs
+        ]
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (nicho, cidade, uf, municipio, status) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            return conn.total_changes - before
+
+    def _reclaim_expired(self, conn: sqlite3.Connection, now: float, settings: Dict) -> int:
+        """Devolve para a fila os jobs com empréstimo vencido (chamado dentro de uma transação)."""
+        expired = conn.execute(
+            "SELECT id, falhas, worker FROM jobs WHERE status = ? AND lease_ate < ?", (RUNNING, now)
+        ).fetchall()
+        policy = self._retry_policy(settings)
+        for job_id, falhas, worker in expired:
+            falhas += 1
+            erro = f"empréstimo vencido (worker {worker} sem heartbeat)"
+            status = FAILED if policy.can_retry(falhas) else DEAD_LETTER
+            conn.execute(
+                "UPDATE jobs SET status = ?, falhas = ?, erro = ?, token = NULL, lease_ate = NULL, "
+                "disponivel_em = ?, fim = ? WHERE id = ?",
+                (status, falhas, erro, now, now, job_id)
+            )
+            print(f"⏰ Job {job_id}: {erro}" + (" — descartado" if status == DEAD_LETTER else " — de volta à fila"))
+        return len(expired)
+
+    def reclaim_expired(self) -> int:
+        """
+        Devolve para a fila os jobs cujo empréstimo venceu sem heartbeat.
+
+        Returns:
+            Número de jobs recuperados
+        """
+        settings = self.settings()
+        with self._transaction() as conn:
+            return self._reclaim_expired(conn, time.time(), settings)
+
+    def lease(self, worker: str) -> Optional[Dict]:
+        """
+        Empresta o próximo job disponível.
+
+        Antes, recupera os jobs com empréstimo vencido.
+
+        Args:
+            worker: Identificador do worker
+
+        Returns:
+            {'id', 'nicho', 'municipio', 'token', 'lease_segundos'}, ou None se
+            não há job disponível agora
+        """
+        settings = self.settings()
+        now = time.time()
+        with self._transaction() as conn:
+            self._reclaim_expired(conn, now, settings)
+            row = conn.execute(
+                "SELECT id, nicho, municipio FROM jobs WHERE status IN (?, ?) AND disponivel_em <= ? "
+                "ORDER BY id LIMIT 1",
+                (PENDING, FAILED, now)
+            ).fetchone()
+            self._touch_worker(conn, worker, now)
+            if not row:
+                return None
+            job_id, nicho, municipio = row
+            token = uuid.uuid4().hex
+            conn.execute(
+                "UPDATE jobs SET status = ?, tentativas = tentativas + 1, worker = ?, token = ?, lease_ate = ?, "
+                "inicio = ?, fim = NULL WHERE id = ?",
+                (RUNNING, worker, token, now + settings['lease_segundos'], now, job_id)
+            )
+        return {
+            'id': job_id,
+            'nicho': nicho,
+            'municipio': json.loads(municipio),
+            'token': token,
+            'lease_segundos': settings['lease_segundos'],
+        }
+
+    @staticmethod
+    def _touch_worker(conn: sqlite3.Connection, worker: str, now: float, concluidos: int = 0):
+        conn.execute(
+            "INSERT INTO workers (worker, ultimo_contato, concluidos) VALUES (?, ?, ?) "
+            "ON CONFLICT (worker) DO UPDATE SET ultimo_contato = excluded.ultimo_contato, "
+            "concluidos = concluidos + excluded.concluidos",
+            (worker, now, concluidos)
+        )
+
+    def heartbeat(self, worker: str, tokens: List[str]) -> List[str]:
+        """
+        Renova os empréstimos do worker.
+
+        Args:
+            worker: Identificador do worker
+            tokens: Tokens dos jobs em andamento
+
+        Returns:
+            Tokens que não valem mais (empréstimo vencido e recuperado)
+        """
+        settings = self.settings()
+        now = time.time()
+        lost = []
+        with self._transaction() as conn:
+            self._touch_worker(conn, worker, now)
+            for token in tokens:
+                cursor = conn.execute(
+                    "UPDATE jobs SET lease_ate = ? WHERE token = ? AND status = ?",
+                    (now + settings['lease_segundos'], token, RUNNING)
+                )
+                if not cursor.rowcount:
+                    lost.append(token)
+        return lost
+
+    def complete(self, job_id: int, token: str, records: List[Dict], failed_places: List[str],
+                 worker: str) -> int:
+        """
+        Conclui o job e mescla os registros com os já coletados.
+
+        Os registros são mesclados mesmo se o empréstimo já venceu; o status
+        só muda se o job não foi emprestado de novo para outro worker.
+
+        Args:
+            job_id: Id do job (de lease)
+            token: Token do empréstimo
+            records: Registros extraídos
+            failed_places: URLs que não abriram depois de todas as tentativas
+            worker: Identificador do worker
+
+        Returns:
+            Número de empresas novas na campanha
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT nicho, cidade, uf, status, token FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if not row:
+                raise ValueError(f"Job {job_id} não existe")
+            nicho, cidade, uf, status, current_token = row
+            novos = self._merge(conn, records, (nicho, cidade, uf), worker, now)
+            conn.executemany(
+                "INSERT OR IGNORE INTO lugares_descartados (url, job, inclusao) VALUES (?, ?, ?)",
+                [(url, job_id, now) for url in failed_places]
+            )
+            if token == current_token or status not in (RUNNING, DONE):
+                conn.execute(
+                    "UPDATE jobs SET status = ?, token = NULL, lease_ate = NULL, fim = ?, resultados = ?, "
+                    "novos = ?, erro = NULL WHERE id = ?",
+                    (DONE, now, len(records), novos, job_id)
+                )
+            self._touch_worker(conn, worker, now, concluidos=1)
+        return novos
+
+    def _merge(self, conn: sqlite3.Connection, records: List[Dict], job: Tuple[str, str, str],
+               worker: str, now: float) -> int:
+        """Grava os registros, juntando empresas repetidas (chamado dentro de uma transação)."""
+        novos = 0
+        for record in records:
+            key = place_key(record.get('url'), record.get('place_id'))
+            conteudo = content_key(record)
+            empresa = None
+            if key:
+                row = conn.execute("SELECT chave FROM empresas WHERE chave = ?", (key,)).fetchone()
+                row = row or conn.execute("SELECT empresa FROM apelidos WHERE chave = ?", (key,)).fetchone()
+                empresa = row[0] if row else None
+            if not empresa and conteudo:
+                row = conn.execute("SELECT chave FROM empresas WHERE chave_conteudo = ?", (conteudo,)).fetchone()
+                if row:
+                    empresa = row[0]
+                    # Mesmo lugar com outra URL: guarda a URL como apelido
+                    if key:
+                        conn.execute("INSERT OR IGNORE INTO apelidos (chave, empresa) VALUES (?, ?)", (key, empresa))
+
+            if not empresa:
+                empresa = key or (f"conteudo:{conteudo}" if conteudo else f"sem-chave:{uuid.uuid4().hex}")
+                record = dict(record, chave_empresa=empresa)
+                conn.execute(
+                    "INSERT INTO empresas (chave, chave_conteudo, registro, worker, inclusao) VALUES (?, ?, ?, ?, ?)",
+                    (empresa, conteudo, json.dumps(record, ensure_ascii=False), worker, now)
+                )
+                novos += 1
+            conn.execute(
+                "INSERT OR IGNORE INTO marcacoes (empresa, nicho, cidade, uf) VALUES (?, ?, ?, ?)", (empresa, *job)
+            )
+        return novos
+
+    def fail(self, job_id: int, token: str, error: str, blocked: bool = False) -> str:
+        """
+        Registra a falha do job e decide se ele volta para a fila.
+
+        Falhas comuns voltam depois da espera exponencial da campanha;
+        bloqueios (CAPTCHA) voltam na hora, para outro worker ou sessão.
+        Esgotadas as tentativas, o job vai para os descartados.
+
+        Args:
+            job_id: Id do job (de lease)
+            token: Token do empréstimo
+            error: Mensagem de erro
+            blocked: Se a sessão foi bloqueada pelo Google
+
+        Returns:
+            Novo status do job ('falhou', 'descartado'), ou o status atual se
+            o empréstimo não vale mais
+        """
+        settings = self.settings()
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT status, token, falhas, bloqueios FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if not row:
+                raise ValueError(f"Job {job_id} não existe")
+            status, current_token, falhas, bloqueios = row
+            if token != current_token:
+                return status
+
+            if blocked:
+                bloqueios += 1
+                status = FAILED if bloqueios <= settings['tentativas_bloqueio'] else DEAD_LETTER
+                available = now
+            else:
+                falhas += 1
+                policy = self._retry_policy(settings)
+                status = FAILED if policy.can_retry(falhas) else DEAD_LETTER
+                available = now + policy.delay(falhas) if status == FAILED else now
+            conn.execute(
+                "UPDATE jobs SET status = ?, falhas = ?, bloqueios = ?, erro = ?, token = NULL, lease_ate = NULL, "
+                "disponivel_em = ?, fim = ? WHERE id = ?",
+                (status, falhas, bloqueios, error, available, now, job_id)
+            )
+        return status
+
+    def release(self, job_id: int, token: str):
+        """Devolve o job para a fila sem contar tentativa (worker parado antes de terminar)."""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, tentativas = MAX(tentativas - 1, 0), token = NULL, lease_ate = NULL "
+                "WHERE id = ? AND token = ?",
+                (PENDING, job_id, token)
+            )
+
+    def has_open_jobs(self) -> bool:
+        """Indica se ainda há jobs pendentes, em andamento ou aguardando nova tentativa."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?, ?)", (PENDING, RUNNING, FAILED)
+            ).fetchone()
+        return row[0] > 0
+
+    def requeue_dead_letter(self) -> int:
+        """
+        Volta os jobs descartados para a fila, com as tentativas zeradas.
+
+        Returns:
+            Número de jobs recolocados na fila
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, falhas = 0, bloqueios = 0, disponivel_em = 0 WHERE status = ?",
+                (PENDING, DEAD_LETTER)
+            )
+            return cursor.rowcount
+
+    def summary(self) -> Dict:
+        """
+        Resumo da campanha.
+
+        Returns:
+            {'jobs': {status: quantidade}, 'empresas', 'marcacoes',
+            'lugares_descartados', 'workers': [{'worker', 'ultimo_contato', 'concluidos'}]}
+        """
+        with self._lock:
+            jobs = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            empresas = self._conn.execute("SELECT COUNT(*) FROM empresas").fetchone()[0]
+            marcacoes = self._conn.execute("SELECT COUNT(*) FROM marcacoes").fetchone()[0]
+            descartados = self._conn.execute("SELECT COUNT(*) FROM lugares_descartados").fetchone()[0]
+            workers = self._conn.execute(
+                "SELECT worker, ultimo_contato, concluidos FROM workers ORDER BY ultimo_contato DESC"
+            ).fetchall()
+        return {
+            'jobs': jobs,
+            'empresas': empresas,
+            'marcacoes': marcacoes,
+            'lugares_descartados': descartados,
+            'workers': [
+                {'worker': worker, 'ultimo_contato': contato, 'concluidos': concluidos}
+                for worker, contato, concluidos in workers
+            ],
+        }
+
+    def records(self) -> List[Dict]:
+        """Registros mesclados (uma linha por empresa), na ordem em que chegaram."""
+        with self._lock:
+            rows = self._conn.execute("SELECT registro FROM empresas ORDER BY rowid").fetchall()
+        return [json.loads(registro) for registro, in rows]
+
+    def tags_label(self, empresa: Optional[str]) -> str:
+        """Texto com todas as buscas em que a empresa apareceu (para a planilha)."""
+        if not empresa:
+            return ''
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT nicho, cidade, uf FROM marcacoes WHERE empresa = ? ORDER BY rowid", (empresa,)
+            ).fetchall()
+        return '; '.join(f"{nicho} em {cidade}" + (f" - {uf}" if uf else '') for nicho, cidade, uf in rows)
+
+    def close(self):
+        """Fecha a conexão com a fila."""
+        with self._lock:
+            self._conn.close()
+
+
+# Métodos da fila que o coordenador expõe por HTTP
+REMOTE_METHODS = ('settings', 'lease', 'heartbeat', 'complete', 'fail', 'release', 'has_open_jobs', 'summary')
+
+
+def is_loopback(host: str) -> bool:
+    """Indica se o endereço de escuta só aceita conexões da própria máquina."""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class CoordinatorServer:
+    """Serve uma CampaignQueue por HTTP (POST /<método> com os argumentos em JSON)."""
+
+    def __init__(self, campaign_queue: CampaignQueue, host: str = '127.0.0.1', port: int = 8765,
+                 key: Optional[str] = None):
+        """
+        Args:
+            campaign_queue: Fila da campanha (só este processo abre o arquivo)
+            host: Endereço de escuta (padrão: só a máquina local); um endereço
+                acessível por outros hosts exige key
+            port: Porta (0 = escolhida pelo sistema)
+            key: Chave compartilhada exigida no cabeçalho X-Chave-Campanha
+
+        Raises:
+            ValueError: Endereço fora da máquina local sem key
+        """
+        if not key and not is_loopback(host):
+            raise ValueError(f"o coordenador em {host} precisa de uma chave: sem ela qualquer host "
+                             f"da rede pode pegar e concluir jobs")
+        queue_ = campaign_queue
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                method = self.path.strip('/').split('?')[0]
+                if key and self.headers.get(KEY_HEADER) != key:
+                    self._reply(403, {'erro': 'chave inválida'})
+                    return
+                if method not in REMOTE_METHODS:
+                    self._reply(404, {'erro': f'método desconhecido: {method}'})
+                    return
+                try:
+                    length = int(self.headers.get('Content-Length') or 0)
+                    kwargs = json.loads(self.rfile.read(length) or b'{}')
+                    result = getattr(queue_, method)(**kwargs)
+                except (TypeError, ValueError) as e:
+                    self._reply(400, {'erro': str(e)})
+                    return
+                except sqlite3.Error as e:
+                    self._reply(503, {'erro': str(e)})
+                    return
+                self._reply(200, {'resultado': result})
+
+            def _reply(self, status: int, payload: Dict):
+                body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self.port = self._httpd.server_address[1]
+
+    def serve_forever(self):
+        """Atende os workers até shutdown()."""
+        self._httpd.serve_forever()
+
+    def start(self):
+        """Atende os workers em uma thread em segundo plano."""
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def shutdown(self):
+        """Para o servidor."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class RemoteQueue:
+    """Cliente do CoordinatorServer com a mesma interface de CampaignQueue (lado do worker)."""
+
+    def __init__(self, url: str, key: Optional[str] = None, timeout: float = 60.0):
+        """
+        Args:
+            url: Endereço do coordenador (ex: http://10.0.0.5:8765)
+            key: Chave compartilhada do coordenador
+            timeout: Timeout de cada chamada (segundos)
+        """
+        self.url = url.rstrip('/')
+        self.headers = {KEY_HEADER: key} if key else {}
+        self.timeout = timeout
+
+    def _call(self, method: str, **kwargs):
+        response = requests.post(f"{self.url}/{method}", json=kwargs, headers=self.headers, timeout=self.timeout)
+        if response.status_code != 200:
+            try:
+                message = response.json().get('erro')
+            except ValueError:
+                message = response.text
+            raise ValueError(f"Coordenador respondeu {response.status_code} em {method}: {message}")
+        return response.json()['resultado']
+
+    def settings(self) -> Dict:
+        return self._call('settings')
+
+    def lease(self, worker: str) -> Optional[Dict]:
+        return self._call('lease', worker=worker)
+
+    def heartbeat(self, worker: str, tokens: List[str]) -> List[str]:
+        return self._call('heartbeat', worker=worker, tokens=tokens)
+
+    def complete(self, job_id: int, token: str, records: List[Dict], failed_places: List[str], worker: str) -> int:
+        return self._call('complete', job_id=job_id, token=token, records=records,
+                          failed_places=failed_places, worker=worker)
+
+    def fail(self, job_id: int, token: str, error: str, blocked: bool = False) -> str:
+        return self._call('fail', job_id=job_id, token=token, error=error, blocked=blocked)
+
+    def release(self, job_id: int, token: str):
+        return self._call('release', job_id=job_id, token=token)
+
+    def has_open_jobs(self) -> bool:
+        return self._call('has_open_jobs')
+
+    def summary(self) -> Dict:
+        return self._call('summary')
+
+    def close(self):
+        pass
+
+
+class CampaignWorker:
+    """N navegadores de um host consumindo jobs da fila da campanha."""
+
+    def __init__(self, campaign_queue, scraper_factory: Callable, num_workers: int = 1,
+                 worker_id: Optional[str] = None, poll_interval: float = 15.0,
+                 metrics: Optional[Metrics] = None):
+        """
+        Args:
+            campaign_queue: CampaignQueue (arquivo) ou RemoteQueue (coordenador)
+            scraper_factory: Função que cria um scraper para cada navegador
+            num_workers: Navegadores em paralelo neste host
+            worker_id: Identificador do host/processo (padrão: host-pid)
+            poll_interval: Espera (s) entre consultas quando a fila não tem job
+                disponível mas a campanha ainda não terminou
+            metrics: Métricas da coleta (as mesmas passadas aos scrapers)
+        """
+        self.queue = campaign_queue
+        self.scraper_factory = scraper_factory
+        self.num_workers = max(1, num_workers)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.poll_interval = poll_interval
+        self.metrics = metrics or Metrics()
+        self.completed = 0
+        self.failed = 0
+        self.scrapers: List = []
+        self._leases: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        # Acorda o heartbeat antes da hora (parada ou prazo de empréstimo menor)
+        self._heartbeat_wakeup = threading.Event()
+        self._heartbeat_interval = DEFAULT_LEASE_SECONDS / 3
+
+    @property
+    def is_running(self) -> bool:
+        """Indica se o worker ainda não recebeu pedido de parada."""
+        return not self._stop_event.is_set()
+
+    def stop(self):
+        """Pede para os navegadores pararem após a busca atual."""
+        self._stop_event.set()
+        self._heartbeat_wakeup.set()
+
+    def _set_lease_seconds(self, seconds: float):
+        """Renova os empréstimos a cada terço do prazo (acorda o heartbeat se o intervalo diminuiu)."""
+        interval = seconds / 3
+        if interval < self._heartbeat_interval:
+            self._heartbeat_interval = interval
+            self._heartbeat_wakeup.set()
+
+    def _call(self, method: Callable, *args):
+        """Chama a fila, tentando de novo se a rede com o coordenador falhar."""
+        attempt = 1
+        while True:
+            try:
+                return method(*args)
+            except (requests.RequestException, sqlite3.OperationalError) as e:
+                if not REMOTE_RETRY.can_retry(attempt):
+                    raise
+                delay = REMOTE_RETRY.delay(attempt)
+                print(f"⚠️ Fila indisponível ({e}); nova tentativa em {delay:.0f}s")
+                time.sleep(delay)
+                attempt += 1
+
+    def _heartbeat_loop(self):
+        """Renova os empréstimos em andamento enquanto o worker roda."""
+        while True:
+            self._heartbeat_wakeup.wait(self._heartbeat_interval)
+            self._heartbeat_wakeup.clear()
+            if self._stop_event.is_set():
+                break
+            with self._lock:
+                tokens = list(self._leases)
+            try:
+                lost = self._call(self.queue.heartbeat, self.worker_id, tokens)
+            except Exception as e:
+                print(f"⚠️ Heartbeat falhou: {e}")
+                continue
+            for token in lost:
+                print(f"⏰ Empréstimo do job {self._leases.get(token)} venceu; o resultado ainda será enviado")
+
+    def _run_job(self, scraper, job: Dict, label: str):
+        """Executa um job emprestado e reporta o resultado para a fila."""
+        busca = scraper.build_query(job['nicho'], job['municipio']['nome'], job['municipio'].get('uf') or '')
+        # Descarta sobras de uma tentativa interrompida (o job é refeito inteiro)
+        scraper.take_failed_places()
+        try:
+            records = scraper.scrape_nicho_cidade(job['nicho'], job['municipio'])
+        except SessionBlockedError as e:
+            status = self._call(self.queue.fail, job['id'], job['token'], str(e), True)
+            self.metrics.incr('jobs', status=status)
+            print(f"🔁 [{label}] {busca}: {e.state} — job devolvido à fila ({status})")
+            return
+        except Exception as e:
+            if self._stop_event.is_set():
+                self._call(self.queue.release, job['id'], job['token'])
+                return
+            status = self._call(self.queue.fail, job['id'], job['token'], str(e), False)
+            self.metrics.incr('jobs', status=status)
+            with self._lock:
+                self.failed += 1
+            print(f"❌ [{label}] {busca}: {e} ({status})")
+            return
+
+        failed_places = scraper.take_failed_places()
+        with self.metrics.timer('envio'):
+            novos = self._call(self.queue.complete, job['id'], job['token'], records, failed_places, self.worker_id)
+        self.metrics.incr('jobs', status=DONE)
+        with self._lock:
+            self.completed += 1
+        print(f"✅ [{label}] {busca}: {len(records)} resultados, {novos} empresa(s) nova(s) na campanha")
+
+    def _worker(self, index: int):
+        """Loop de um navegador: pega jobs emprestados até a campanha acabar ou o worker parar."""
+        label = f"{self.worker_id}/{index}"
+        scraper = None
+        try:
+            while not self._stop_event.is_set():
+                job = self._call(self.queue.lease, self.worker_id)
+                if job is None:
+                    if not self._call(self.queue.has_open_jobs):
+                        break
+                    # Jobs em andamento em outros hosts ou aguardando nova tentativa
+                    self._stop_event.wait(self.poll_interval)
+                    continue
+
+                self._set_lease_seconds(job['lease_segundos'])
+                with self._lock:
+                    self._leases[job['token']] = job['id']
+                try:
+                    if scraper is None:
+                        scraper = self.scraper_factory()
+                        with self._lock:
+                            self.scrapers.append(scraper)
+                    self._run_job(scraper, job, label)
+                except Exception as e:
+                    # Fila fora do ar mesmo após as tentativas: o empréstimo vence e o job volta sozinho
+                    print(f"❌ [{label}] Não foi possível reportar o job {job['id']}: {e}")
+                finally:
+                    with self._lock:
+                        self._leases.pop(job['token'], None)
+        finally:
+            if scraper:
+                try:
+                    scraper.close()
+                except Exception:
+                    pass
+
+    def run(self) -> int:
+        """
+        Processa jobs até a campanha terminar ou stop() ser chamado.
+
+        Returns:
+            Número de jobs concluídos por este host
+        """
+        # O intervalo do heartbeat precisa valer antes do primeiro empréstimo
+        self._set_lease_seconds(self._call(self.queue.settings)['lease_segundos'])
+        heartbeat = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        heartbeat.start()
+        threads = [threading.Thread(target=self._worker, args=(i + 1,), daemon=True) for i in range(self.num_workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(0.5)
+        self.stop()
+        return self.completed
+
+    def close(self):
+        """Para os navegadores e fecha os que estiverem abertos."""
+        self.stop()
+        with self._lock:
+            scrapers = list(self.scrapers)
+        for scraper in scrapers:
+            try:
+                scraper.close()
+            except Exception:
+                pass
+
+
+def _open_queue(args):
+    """Fila local (--fila) ou do coordenador (--coordenador)."""
+    if getattr(args, 'coordenador', None):
+        return RemoteQueue(args.coordenador, args.chave)
+    return CampaignQueue(args.fila)
+
+
+def print_summary(summary: Dict):
+    """Imprime o resumo da campanha."""
+    jobs = summary['jobs']
+    total = sum(jobs.values())
+    estados = ', '.join(f"{estado}: {n}" for estado, n in sorted(jobs.items()))
+    print(f"📋 {total} job(s) — {estados or 'nenhum'}")
+    print(f"🏢 {summary['empresas']} empresa(s) únicas, {summary['marcacoes']} marcação(ões) de busca, "
+          f"{summary['lugares_descartados']} lugar(es) descartado(s)")
+    now = time.time()
+    for worker in summary['workers']:
+        print(f"🖥️ {worker['worker']}: {worker['concluidos']} job(s), "
+              f"último contato há {now - worker['ultimo_contato']:.0f}s")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Argumentos da linha de comando."""
+    from pacing import PACING_POLICIES
+    from scraper import SCRAPER_ENGINES, GoogleMapsScraper
+
+    parser = argparse.ArgumentParser(
+        prog="python -m distributed",
+        description="Campanha de coleta dividida entre vários hosts (fila compartilhada com empréstimo de jobs)."
+    )
+    commands = parser.add_subparsers(dest="comando", required=True)
+
+    def add_queue_args(command, remote: bool = True):
+        if remote:
+            where = command.add_mutually_exclusive_group(required=True)
+            where.add_argument("--fila", help="Arquivo SQLite da campanha (processos na mesma máquina)")
+            where.add_argument("--coordenador", help="Endereço do coordenador (python -m distributed servir)")
+            command.add_argument("--chave", help="Chave compartilhada do coordenador")
+        else:
+            command.add_argument("--fila", required=True, help="Arquivo SQLite da campanha")
+
+    campanha = commands.add_parser("campanha", help="Cria (ou amplia) a campanha: um job por nicho x município")
+    add_queue_args(campanha, remote=False)
+    campanha.add_argument("--nicho", action="append", default=[], help="Nicho de mercado (pode repetir)")
+    campanha.add_argument("--nichos-arquivo", help="Arquivo com os nichos (JSON ou um por linha)")
+    campanha.add_argument("--uf", help="Sigla do estado; sem --cidade, todos os municípios da UF")
+    campanha.add_argument("--cidade", action="append", default=[], help="Cidade ('Cambé - PR'; pode repetir)")
+    campanha.add_argument("--cidades-arquivo", help="Arquivo com as cidades (JSON ou uma por linha)")
+    campanha.add_argument("--brasil", action="store_true", help="Todos os municípios do Brasil (IBGE)")
+    campanha.add_argument("--tentativas", type=int, help="Tentativas de cada job antes de descartá-lo (padrão: 3)")
+    campanha.add_argument("--espera-tentativa", type=float,
+                          help="Espera (s) antes da 2ª tentativa de um job; dobra a cada tentativa (padrão: 30)")
+    campanha.add_argument("--tentativas-bloqueio", type=int,
+                          help="Vezes que um job bloqueado volta para a fila (padrão: 3)")
+    campanha.add_argument("--lease", type=float,
+                          help=f"Prazo (s) do empréstimo sem heartbeat antes do job voltar para a fila "
+                               f"(padrão: {DEFAULT_LEASE_SECONDS:.0f})")
+
+    servir = commands.add_parser("servir", help="Serve a fila por HTTP para workers de outros hosts")
+    add_queue_args(servir, remote=False)
+    servir.add_argument("--host", default="127.0.0.1",
+                        help="Endereço de escuta (padrão: 127.0.0.1; para outros hosts use 0.0.0.0 com --chave)")
+    servir.add_argument("--porta", type=int, default=8765, help="Porta (padrão: 8765)")
+    servir.add_argument("--chave", help="Chave exigida dos workers (cabeçalho X-Chave-Campanha)")
+
+    worker = commands.add_parser("worker", help="Consome jobs da campanha neste host (headless)")
+    add_queue_args(worker)
+    worker.add_argument("--id", help="Identificador deste worker (padrão: host-pid)")
+    worker.add_argument("--workers", type=int, default=1, help="Navegadores em paralelo (padrão: 1)")
+    worker.add_argument("--espera-fila", type=float, default=15.0,
+                        help="Espera (s) entre consultas quando não há job disponível (padrão: 15)")
+    worker.add_argument("--metricas", help="Resumo JSON das métricas deste worker")
+    worker.add_argument("--motor", choices=list(SCRAPER_ENGINES), default="selenium",
+                        help="selenium (chromedriver) ou cdp (DevTools direto, asyncio; só modo url)")
+    worker.add_argument("--abas", type=int, default=1, help="Máximo de abas por navegador (só com --motor cdp)")
+    worker.add_argument("--max-buscas", type=int, default=50,
+                        help="Buscas antes de reiniciar o navegador (0 = nunca; padrão: 50)")
+    worker.add_argument("--ritmo", choices=list(PACING_POLICIES), default="aleatorio",
+                        help="Política de pausas anti-bloqueio")
+    worker.add_argument("--pausa-bloqueio", type=float, default=60.0,
+                        help="Pausa (s) após CAPTCHA/bloqueio antes de abrir uma sessão nova")
+    worker.add_argument("--tentativas-lugar", type=int, default=2,
+                        help="Tentativas de abrir cada lugar antes de descartá-lo (padrão: 2)")
+    worker.add_argument("--max-resultados", type=int, default=120, help="Resultados por busca (padrão: 120)")
+    worker.add_argument("--modo-detalhes", choices=list(GoogleMapsScraper.DETAIL_MODES), default="url",
+                        help="Como abrir cada resultado")
+    worker.add_argument("--perfil-leve", action="store_true", help="Bloqueia imagens, fontes e blocos do mapa")
+
+    status = commands.add_parser("status", help="Mostra o andamento da campanha")
+    add_queue_args(status)
+
+    exportar = commands.add_parser("exportar", help="Exporta os registros mesclados (sem repetidos)")
+    add_queue_args(exportar, remote=False)
+    exportar.add_argument("--saida", required=True, help="Arquivo (.xlsx, .csv, .parquet ou .arrow)")
+
+    descartados = commands.add_parser("descartados", help="Volta os jobs descartados para a fila")
+    add_queue_args(descartados, remote=False)
+    return parser
+
+
+def _create_campaign(args, parser) -> int:
+    from cli import _read_list_file, _unique, resolve_cidades
+    from ibge_api import IBGEAPI
+
+    try:
+        nichos = list(args.nicho) + (_read_list_file(args.nichos_arquivo) if args.nichos_arquivo else [])
+        nomes_cidades = list(args.cidade) + (_read_list_file(args.cidades_arquivo) if args.cidades_arquivo else [])
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    nichos = _unique(nichos)
+    uf = args.uf.upper() if args.uf else None
+    if not nichos:
+        parser.error("informe pelo menos um nicho (--nicho ou --nichos-arquivo)")
+    if not (args.brasil or uf or nomes_cidades):
+        parser.error("informe --brasil, --uf ou pelo menos uma cidade")
+
+    cidades = IBGEAPI.get_todas_cidades_brasil() if args.brasil else resolve_cidades(_unique(nomes_cidades), uf)
+    if not cidades:
+        print("❌ Nenhum município encontrado")
+        return 2
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.fila)), exist_ok=True)
+    campaign_queue = CampaignQueue(args.fila)
+    try:
+        settings = {
+            'tentativas': args.tentativas,
+            'espera_tentativa': args.espera_tentativa,
+            'tentativas_bloqueio': args.tentativas_bloqueio,
+            'lease_segundos': args.lease,
+        }
+        settings = {name: value for name, value in settings.items() if value is not None}
+        if settings:
+            campaign_queue.configure(**settings)
+        added = campaign_queue.add_jobs((nicho, municipio) for nicho in nichos for municipio in cidades)
+        print(f"📋 {added} job(s) novo(s) ({len(nichos)} nicho(s) x {len(cidades)} município(s)) em {args.fila}")
+        print_summary(campaign_queue.summary())
+    finally:
+        campaign_queue.close()
+    return 0
+
+
+def _serve(args) -> int:
+    if not args.chave and not is_loopback(args.host):
+        print(f"❌ --host {args.host} exige --chave: sem ela qualquer host da rede pode pegar e concluir jobs")
+        return 2
+    campaign_queue = CampaignQueue(args.fila)
+    server = CoordinatorServer(campaign_queue, args.host, args.porta, args.chave)
+    print(f"🛰️ Coordenador em http://{args.host}:{server.port} (Ctrl+C para parar)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        campaign_queue.close()
+    return 0
+
+
+def _run_worker(args) -> int:
+    from pacing import create_pacing
+    from scraper import create_scraper
+
+    if args.abas > 1 and args.motor != 'cdp':
+        print("❌ --abas exige --motor cdp")
+        return 2
+
+    campaign_queue = _open_queue(args)
+    metrics = Metrics()
+    # Sem índice local de deduplicação: a fila mescla os repetidos de todos os hosts
+    worker = CampaignWorker(
+        campaign_queue,
+        scraper_factory=lambda: create_scraper(
+            args.motor,
+            headless=True,
+            max_searches_per_session=max(args.max_buscas, 0),
+            pacing=create_pacing(args.ritmo),
+            max_results=args.max_resultados,
+            detail_mode=args.modo_detalhes,
+            lean_profile=args.perfil_leve,
+            metrics=metrics,
+            block_cooldown=max(args.pausa_bloqueio, 0),
+            result_retry=RetryPolicy(max_attempts=args.tentativas_lugar, base_delay=2.0, max_delay=10.0),
+            detail_tabs=max(args.abas, 1)
+        ),
+        num_workers=args.workers,
+        worker_id=args.id,
+        poll_interval=max(args.espera_fila, 1.0),
+        metrics=metrics
+    )
+
+    interrupted = False
+
+    def on_signal(signum, _frame):
+        nonlocal interrupted
+        interrupted = True
+        print("⏸️ Interrompendo após as buscas em andamento...")
+        worker.stop()
+
+    signal.signal(signal.SIGINT, on_signal)
+    signal.signal(signal.SIGTERM, on_signal)
+
+    print(f"🖥️ Worker {worker.worker_id} com {worker.num_workers} navegador(es)")
+    try:
+        worker.run()
+    finally:
+        worker.close()
+        print(f"📊 {worker.completed} job(s) concluído(s), {worker.failed} com falha neste worker")
+        if args.metricas:
+            metrics.to_json(args.metricas)
+        campaign_queue.close()
+    return 130 if interrupted else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Executa o comando; retorna o código de saída."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.comando == 'campanha':
+        return _create_campaign(args, parser)
+    if args.comando == 'servir':
+        return _serve(args)
+    if args.comando == 'worker':
+        return _run_worker(args)
+
+    campaign_queue = _open_queue(args)
+    try:
+        if args.comando == 'status':
+            print_summary(campaign_queue.summary())
+        elif args.comando == 'exportar':
+            from results_sink import export_records
+
+            records = campaign_queue.records()
+            if not records:
+                print("⚠️ A campanha ainda não tem registros")
+                return 1
+            total = export_records(records, args.saida, campaign_queue.tags_label)
+            print(f"💾 Arquivo exportado: {args.saida} ({total} empresas)")
+        elif args.comando == 'descartados':
+            print(f"↻ {campaign_queue.requeue_dead_letter()} job(s) descartado(s) de volta à fila")
+    finally:
+        campaign_queue.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Módulo com o canal de eventos entre a coleta e a interface gráfica.
+
+As threads da coleta (workers do pool e a thread que chama BatchRunner.run)
+nunca tocam nos widgets do Tk: elas publicam eventos tipados em um EventBus,
+uma fila thread-safe. A interface esvazia a fila em um único after periódico
+e aplica só o resumo do lote (coalesce): o último progresso, o último status
+e as contagens. Assim, muitas atualizações por segundo viram no máximo uma
+atualização de tela por intervalo.
+
+Não importa tkinter, então pode ser usado sem tela.
+"""
+import queue
+from typing import Dict, List, NamedTuple
+
+# Tipos de evento
+JOB_STARTED = 'job_iniciado'      # nicho, cidade
+RECORDS_FOUND = 'registros'       # quantidade
+JOB_DONE = 'job_concluido'        # atual, total, nicho, cidade, erro
+ERROR = 'erro'                    # mensagem, fatal
+METRICS = 'metricas'              # resultados, falhas, taxa_bloqueio
+STATUS = 'status'                 # texto
+FINISHED = 'fim'                  # texto, exportar
+
+
+class Event(NamedTuple):
+    """Evento publicado pela coleta."""
+    kind: str
+    data: Dict
+
+
+class EventBatch:
+    """Resumo de um lote de eventos."""
+
+    def __init__(self):
+        # Último evento de cada tipo; a ordem das chaves é a ordem do último evento
+        self.latest: Dict[str, Dict] = {}
+        self.counts: Dict[str, int] = {}
+        self.records = 0
+        self.errors: List[Dict] = []
+
+    def last_of(self, *kinds: str) -> Event:
+        """Entre os tipos informados, o que chegou por último (ou None)."""
+        last = None
+        for kind, data in self.latest.items():
+            if kind in kinds:
+                last = Event(kind, data)
+        return last
+
+
+def coalesce(events: List[Event]) -> EventBatch:
+    """
+    Consolida um lote de eventos.
+
+    Args:
+        events: Eventos na ordem em que foram publicados
+
+    Returns:
+        EventBatch com o último evento de cada tipo, a contagem por tipo, o
+        total de registros encontrados e todos os erros
+    """
+    batch = EventBatch()
+    for event in events:
+        batch.latest.pop(event.kind, None)
+        batch.latest[event.kind] = event.data
+        batch.counts[event.kind] = batch.counts.get(event.kind, 0) + 1
+        if event.kind == RECORDS_FOUND:
+            batch.records += event.data.get('quantidade', 0)
+        elif event.kind == ERROR:
+            batch.errors.append(event.data)
+    return batch
+
+
+class EventBus:
+    """Fila de eventos thread-safe: várias threads publicam, a interface consome."""
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+
+    def post(self, kind: str, **data):
+        """Publica um evento (pode ser chamado de qualquer thread)."""
+        self._queue.put(Event(kind, data))
+
+    def drain(self, max_events: int = 10000) -> List[Event]:
+        """
+        Retira os eventos pendentes.
+
+        Args:
+            max_events: Máximo de eventos retirados por chamada (o resto fica
+                para a próxima, para não travar a interface)
+
+        Returns:
+            Eventos na ordem em que foram publicados
+        """
+        events = []
+        while len(events) < max_events:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return events
@@ -1,100 +1,303 @@
 """
 Módulo para interagir com a API do IBGE e obter estados e municípios.
+
+As respostas ficam em cache no disco (output/cache_ibge) com validade (TTL).
+Depois de vencidas, continuam sendo usadas enquanto uma revalidação com
+ETag / If-Modified-Since roda em segundo plano. Sem cache, usa-se o snapshot
+distribuído com o projeto (ibge_snapshot.json), então a interface abre na
+hora e funciona sem internet. Para atualizar o snapshot:
+
+    python ibge_api.py
 """
+import json
+import os
+import sys
+import threading
+import time
 import requests
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
+
+
+class IBGECache:
+    """Cache em disco das respostas do IBGE, com validade e dados de revalidação."""
+
+    def __init__(self, cache_dir: str, ttl: float):
+        """
+        Args:
+            cache_dir: Pasta onde os arquivos de cache são gravados
+            ttl: Validade de cada entrada (segundos)
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def load(self, key: str) -> Optional[Dict]:
+        """
+        Lê uma entrada do cache.
+
+        Returns:
+            Dicionário com 'data', 'fetched_at', 'etag' e 'last_modified', ou None
+        """
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, entry: Dict) -> bool:
+        """Indica se a entrada ainda está dentro da validade."""
+        return time.time() - entry.get('fetched_at', 0) < self.ttl
+
+    def save(self, key: str, data: List[Dict], etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Grava uma entrada (troca o arquivo de uma vez, sem deixar arquivo pela metade)."""
+        entry = {
+            'fetched_at': time.time(),
+            'etag': etag,
+            'last_modified': last_modified,
+            'data': data
+        }
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = self._path(key) + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
 
 
 class IBGEAPI:
     """Classe para buscar dados de estados e municípios da API do IBGE."""
-    
+
     BASE_URL = "https://servicodados.ibge.gov.br/api/v1/localidades"
-    
+
+    # Os dados de localidades quase nunca mudam
+    CACHE_DIR = os.path.join("output", "cache_ibge")
+    CACHE_TTL = 30 * 24 * 3600
+    SNAPSHOT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ibge_snapshot.json")
+
+    # Sessão compartilhada (reaproveita a conexão entre requisições)
+    _session = requests.Session()
+    _cache = IBGECache(CACHE_DIR, CACHE_TTL)
+    _snapshot = None
+    _refreshing = set()
+    _refresh_lock = threading.Lock()
+
+    @staticmethod
+    def _normalize_estados(estados: List[Dict]) -> List[Dict[str, str]]:
+        """Ordena por nome e mantém 'id', 'sigla' e 'nome'."""
+        return [
+            {
+                'id': estado['id'],
+                'sigla': estado['sigla'],
+                'nome': estado['nome']
+            }
+            for estado in sorted(estados, key=lambda x: x['nome'])
+        ]
+
+    @staticmethod
+    def _uf_do_municipio(municipio: Dict) -> str:
+        """Sigla da UF de um município no formato da API (pela micro ou pela região imediata)."""
+        try:
+            return municipio['microrregiao']['mesorregiao']['UF']['sigla']
+        except (KeyError, TypeError):
+            pass
+        try:
+            return municipio['regiao-imediata']['regiao-intermediaria']['UF']['sigla']
+        except (KeyError, TypeError):
+            return ''
+
+    @staticmethod
+    def _normalize_municipios(municipios: List[Dict]) -> List[Dict[str, str]]:
+        """Ordena por nome e mantém 'id', 'nome' e 'uf'."""
+        return [
+            {
+                'id': municipio['id'],
+                'nome': municipio['nome'],
+                'uf': IBGEAPI._uf_do_municipio(municipio)
+            }
+            for municipio in sorted(municipios, key=lambda x: x['nome'])
+        ]
+
+    @staticmethod
+    def _load_snapshot() -> Dict:
+        """Carrega (uma vez) o snapshot distribuído com o projeto."""
+        if IBGEAPI._snapshot is None:
+            try:
+                with open(IBGEAPI.SNAPSHOT_FILE, 'r', encoding='utf-8') as f:
+                    IBGEAPI._snapshot = json.load(f)
+            except (OSError, ValueError):
+                IBGEAPI._snapshot = {}
+        return IBGEAPI._snapshot
+
+    @staticmethod
+    def _fetch(key: str, path: str, normalize: Callable, timeout: float, entry: Optional[Dict] = None) -> List[Dict]:
+        """
+        Busca na API e grava no cache, revalidando a entrada anterior se houver.
+
+        Raises:
+            requests.RequestException: Se a requisição falhar
+        """
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = IBGEAPI._session.get(f"{IBGEAPI.BASE_URL}/{path}", headers=headers, timeout=timeout)
+        if response.status_code == 304 and entry:
+            # Não mudou: só renova a validade
+            data = entry['data']
+        else:
+            response.raise_for_status()
+            data = normalize(response.json())
+
+        IBGEAPI._cache.save(key, data, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return data
+
+    @staticmethod
+    def _refresh_in_background(key: str, path: str, normalize: Callable, timeout: float, entry: Optional[Dict]):
+        """Revalida uma entrada em segundo plano (uma revalidação por chave de cada vez)."""
+        with IBGEAPI._refresh_lock:
+            if key in IBGEAPI._refreshing:
+                return
+            IBGEAPI._refreshing.add(key)
+
+        def refresh():
+            try:
+                IBGEAPI._fetch(key, path, normalize, timeout, entry)
+            except requests.RequestException as e:
+                print(f"Não foi possível atualizar o cache do IBGE ({key}): {e}")
+            finally:
+                with IBGEAPI._refresh_lock:
+                    IBGEAPI._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    @staticmethod
+    def _get_cached(key: str, path: str, normalize: Callable, timeout: float,
+                    fallback: Callable[[], List[Dict]]) -> List[Dict]:
+        """
+        Retorna os dados do cache, do snapshot ou da API, nessa ordem.
+
+        Args:
+            key: Nome da entrada no cache
+            path: Caminho na API (relativo a BASE_URL)
+            normalize: Converte a resposta da API no formato retornado
+            timeout: Tempo máximo da requisição (segundos)
+            fallback: Dados locais (snapshot) usados quando não há cache
+
+        Raises:
+            requests.RequestException: Se não houver dados locais e a API falhar
+        """
+        entry = IBGEAPI._cache.load(key)
+        if entry:
+            if not IBGEAPI._cache.is_fresh(entry):
+                IBGEAPI._refresh_in_background(key, path, normalize, timeout, entry)
+            return entry['data']
+
+        data = fallback()
+        if data:
+            IBGEAPI._refresh_in_background(key, path, normalize, timeout, None)
+            return data
+
+        return IBGEAPI._fetch(key, path, normalize, timeout)
+
+    @staticmethod
+    def _municipios_locais(uf: Optional[str] = None) -> List[Dict[str, str]]:
+        """Municípios já disponíveis localmente (cache nacional ou snapshot), filtrados pela UF."""
+        entry = IBGEAPI._cache.load('municipios')
+        municipios = entry['data'] if entry else IBGEAPI._load_snapshot().get('municipios', [])
+        if uf is None:
+            return municipios
+        return [municipio for municipio in municipios if municipio.get('uf') == uf]
+
     @staticmethod
     def get_estados() -> List[Dict[str, str]]:
         """
         Retorna lista de todos os estados brasileiros.
-        
+
         Returns:
             Lista de dicionários com 'id', 'sigla' e 'nome' do estado.
         """
         try:
-            url = f"{IBGEAPI.BASE_URL}/estados"
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            
-            estados = response.json()
-            # Ordena por nome
-            estados_ordenados = sorted(estados, key=lambda x: x['nome'])
-            
-            return [
-                {
-                    'id': estado['id'],
-                    'sigla': estado['sigla'],
-                    'nome': estado['nome']
-                }
-                for estado in estados_ordenados
-            ]
+            return IBGEAPI._get_cached(
+                'estados', 'estados', IBGEAPI._normalize_estados, 10,
+                lambda: IBGEAPI._load_snapshot().get('estados', [])
+            )
         except requests.RequestException as e:
             print(f"Erro ao buscar estados: {e}")
             return []
-    
+
     @staticmethod
     def get_municipios_por_estado(uf: str) -> List[Dict[str, str]]:
         """
         Retorna lista de municípios de um estado específico.
-        
+
         Args:
             uf: Sigla do estado (ex: 'PR', 'SP')
-            
+
         Returns:
-            Lista de dicionários com 'id' e 'nome' do município.
+            Lista de dicionários com 'id', 'nome' e 'uf' do município.
         """
         try:
-            url = f"{IBGEAPI.BASE_URL}/estados/{uf}/municipios"
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            
-            municipios = response.json()
-            # Ordena por nome
-            municipios_ordenados = sorted(municipios, key=lambda x: x['nome'])
-            
-            return [
-                {
-                    'id': municipio['id'],
-                    'nome': municipio['nome']
-                }
-                for municipio in municipios_ordenados
-            ]
+            return IBGEAPI._get_cached(
+                f'municipios_{uf}', f'estados/{uf}/municipios', IBGEAPI._normalize_municipios, 10,
+                lambda: IBGEAPI._municipios_locais(uf)
+            )
         except requests.RequestException as e:
             print(f"Erro ao buscar municípios do estado {uf}: {e}")
             return []
-    
+
     @staticmethod
     def get_todas_cidades_brasil() -> List[Dict[str, str]]:
         """
         Retorna lista de todos os municípios do Brasil.
-        
+
         Returns:
-            Lista de dicionários com 'id' e 'nome' do município.
+            Lista de dicionários com 'id', 'nome' e 'uf' do município.
         """
         try:
-            url = f"{IBGEAPI.BASE_URL}/municipios"
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            
-            municipios = response.json()
-            # Ordena por nome
-            municipios_ordenados = sorted(municipios, key=lambda x: x['nome'])
-            
-            return [
-                {
-                    'id': municipio['id'],
-                    'nome': municipio['nome']
-                }
-                for municipio in municipios_ordenados
-            ]
+            return IBGEAPI._get_cached(
+                'municipios', 'municipios', IBGEAPI._normalize_municipios, 30,
+                lambda: IBGEAPI._load_snapshot().get('municipios', [])
+            )
         except requests.RequestException as e:
             print(f"Erro ao buscar todos os municípios do Brasil: {e}")
             return []
 
+    @staticmethod
+    def build_snapshot(path: Optional[str] = None) -> int:
+        """
+        Baixa estados e municípios da API e grava o snapshot offline.
+
+        Args:
+            path: Arquivo de saída (padrão: SNAPSHOT_FILE)
+
+        Returns:
+            Número de municípios gravados
+
+        Raises:
+            requests.RequestException: Se a API não responder
+        """
+        estados = IBGEAPI._fetch('estados', 'estados', IBGEAPI._normalize_estados, 10)
+        municipios = IBGEAPI._fetch('municipios', 'municipios', IBGEAPI._normalize_municipios, 30)
+        snapshot = {
+            'gerado_em': time.strftime('%Y-%m-%d'),
+            'estados': estados,
+            'municipios': municipios
+        }
+        with open(path or IBGEAPI.SNAPSHOT_FILE, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, separators=(',', ':'))
+        return len(municipios)
+
+
+if __name__ == "__main__":
+    try:
+        total = IBGEAPI.build_snapshot()
+    except requests.RequestException as e:
+        print(f"Erro ao gerar o snapshot: {e}")
+        sys.exit(1)
+    print(f"Snapshot atualizado: {total} municípios em {IBGEAPI.SNAPSHOT_FILE}")
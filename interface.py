@@ -9,20 +9,33 @@ import threading
 import os
 import time
 import json
-import glob
 from datetime import datetime
 
 from ibge_api import IBGEAPI
-from scraper import GoogleMapsScraper
+from scraper import SCRAPER_ENGINES, GoogleMapsScraper, create_scraper
+from pool import ScrapingPool
+from pacing import PACING_POLICIES, create_pacing
+from results_sink import ResultsSink
+from city_list import CitySelection, VirtualCityList
+from job_store import JobStore, DEAD_LETTER, DONE, FAILED, PENDING, RUNNING
+from dedup_index import DedupIndex
+from batch import BatchRunner, job_key
+from metrics import Metrics
+import events
+from events import EventBus
 
 
 class GoogleMapsScraperGUI:
     """Interface gráfica para o scraper do Google Maps."""
     
+    # Intervalo (ms) entre duas leituras da fila de eventos da coleta
+    EVENT_INTERVAL_MS = 100
+    
     def __init__(self, root):
         self.root = root
         self.root.title("🗺️ Automação de Pesquisa - Google Maps")
-        self.root.geometry("900x700")
+        self.root.geometry("900x780")
+        self.root.minsize(900, 700)
         
         # Configuração do CustomTkinter
         ctk.set_appearance_mode("dark")
@@ -31,19 +44,33 @@ class GoogleMapsScraperGUI:
         # Variáveis
         self.estados = []
         self.municipios = []
+        self.municipios_por_nome = {}
+        self.cidades = CitySelection()  # Cidades selecionadas (indexadas pelo código IBGE)
         self.nichos = []
-        self.scraper = None
+        self.runner = None  # Coleta em andamento (BatchRunner)
         self.is_running = False
-        self.all_results = []
+        self.results_sink = None  # Arquivo incremental (JSONL) da sessão atual
         self.current_save_file = None  # Arquivo de salvamento da sessão atual
-        self.progress_file = os.path.join("output", "progresso.json")  # Arquivo de progresso
+        
+        # Eventos publicados pela coleta; só a thread do Tk mexe nos widgets
+        self.events = EventBus()
+        self.jobs_in_progress = 0
+        self.records_found = 0
+        self.last_metrics = {}
         
         # Garante que a pasta output existe
         self._ensure_output_dir()
         
+        # Tabela de jobs (nicho, cidade, UF) para retomar a coleta
+        self.job_store = JobStore(os.path.join("output", "jobs.sqlite"))
+        
+        # Empresas já coletadas na coleta atual (aberto junto com o arquivo de resultados)
+        self.dedup_index = None
+        
         self._create_widgets()
         self._load_estados()
         self._load_nichos_auto()  # Tenta carregar nichos salvos automaticamente
+        self.root.after(self.EVENT_INTERVAL_MS, self._poll_events)
     
     def _create_widgets(self):
         """Cria os widgets da interface."""
@@ -124,14 +151,14 @@ class GoogleMapsScraperGUI:
         # Lista de cidades selecionadas
         ctk.CTkLabel(location_frame, text="Cidades Selecionadas:", font=ctk.CTkFont(size=12)).pack(anchor="w", padx=10, pady=(10, 5))
         
-        # Listbox com seleção múltipla (Shift para intervalo, Ctrl para múltiplas)
-        self.cidades_listbox = tk.Listbox(
-            location_frame, 
-            height=8, 
-            bg="#2b2b2b", 
-            fg="white", 
-            selectbackground="#1f6aa5",
-            selectmode=tk.EXTENDED  # Permite seleção múltipla
+        # Lista virtual (desenha só as linhas visíveis) com seleção múltipla
+        self.cidades_listbox = VirtualCityList(
+            location_frame,
+            self.cidades,
+            height=8,
+            bg="#2b2b2b",
+            fg="white",
+            selectbackground="#1f6aa5"
         )
         self.cidades_listbox.pack(fill="x", padx=10, pady=(0, 10))
         
@@ -147,6 +174,60 @@ class GoogleMapsScraperGUI:
         remove_processed_btn = ctk.CTkButton(cidades_buttons_frame, text="🗑️ Remover Processadas", command=self._remove_processed_cities, fg_color="#ffc107", hover_color="#e0a800")
         remove_processed_btn.pack(side="left", padx=5)
         
+        # Frame de opções da coleta: uma linha por grupo (grid), para caber na janela
+        options_frame = ctk.CTkFrame(main_frame)
+        options_frame.pack(fill="x", padx=10, pady=5)
+        
+        def add_option(row, column, text, widget):
+            ctk.CTkLabel(options_frame, text=text).grid(
+                row=row, column=2 * column, sticky="w", padx=(10 if column == 0 else 20, 5), pady=3
+            )
+            widget.grid(row=row, column=2 * column + 1, sticky="w", padx=5, pady=3)
+        
+        # Navegadores
+        self.workers_entry = ctk.CTkEntry(options_frame, width=50)
+        self.workers_entry.insert(0, "1")
+        add_option(0, 0, "Navegadores em paralelo:", self.workers_entry)
+        
+        self.engine_combo = ctk.CTkComboBox(options_frame, values=list(SCRAPER_ENGINES), width=100)
+        self.engine_combo.set("selenium")
+        add_option(0, 1, "Motor:", self.engine_combo)
+        
+        self.detail_tabs_entry = ctk.CTkEntry(options_frame, width=50)
+        self.detail_tabs_entry.insert(0, "1")
+        add_option(0, 2, "Abas por navegador (cdp):", self.detail_tabs_entry)
+        
+        # Sessão e ritmo
+        self.max_searches_entry = ctk.CTkEntry(options_frame, width=60)
+        self.max_searches_entry.insert(0, "50")
+        add_option(1, 0, "Reiniciar a cada (buscas, 0 = nunca):", self.max_searches_entry)
+        
+        self.pacing_combo = ctk.CTkComboBox(options_frame, values=list(PACING_POLICIES), width=130)
+        self.pacing_combo.set("aleatorio")
+        add_option(1, 1, "Ritmo:", self.pacing_combo)
+        
+        # Resultados
+        self.max_results_entry = ctk.CTkEntry(options_frame, width=60)
+        self.max_results_entry.insert(0, "120")
+        add_option(2, 0, "Máx. resultados (0 = todos):", self.max_results_entry)
+        
+        self.detail_mode_combo = ctk.CTkComboBox(options_frame, values=list(GoogleMapsScraper.DETAIL_MODES), width=90)
+        self.detail_mode_combo.set("url")
+        add_option(2, 1, "Abrir detalhes por:", self.detail_mode_combo)
+        
+        # Opções liga/desliga
+        checks_frame = ctk.CTkFrame(options_frame, fg_color="transparent")
+        checks_frame.grid(row=3, column=0, columnspan=6, sticky="w", padx=5, pady=(3, 6))
+        
+        self.capture_network_var = tk.BooleanVar(value=False)
+        ctk.CTkCheckBox(checks_frame, text="Ler dados da rede", variable=self.capture_network_var).pack(side="left", padx=5)
+        
+        self.lean_profile_var = tk.BooleanVar(value=False)
+        ctk.CTkCheckBox(checks_frame, text="Perfil leve (sem imagens)", variable=self.lean_profile_var).pack(side="left", padx=(15, 5))
+        
+        self.dedup_var = tk.BooleanVar(value=True)
+        ctk.CTkCheckBox(checks_frame, text="Ignorar empresas já coletadas", variable=self.dedup_var).pack(side="left", padx=(15, 5))
+        
         # Frame de controle
         control_frame = ctk.CTkFrame(main_frame)
         control_frame.pack(fill="x", padx=10, pady=5)
@@ -216,6 +297,7 @@ class GoogleMapsScraperGUI:
         self.root.update()
         
         self.municipios = IBGEAPI.get_municipios_por_estado(sigla)
+        self.municipios_por_nome = {municipio['nome']: municipio for municipio in self.municipios}
         cidade_values = [municipio['nome'] for municipio in self.municipios]
         self.cidade_combo.configure(values=cidade_values)
         
@@ -349,20 +431,19 @@ class GoogleMapsScraperGUI:
     def _add_cidade(self):
         """Adiciona uma cidade à lista."""
         cidade = self.cidade_combo.get().strip()
-        if cidade and cidade not in self.cidades_listbox.get(0, tk.END):
-            self.cidades_listbox.insert(tk.END, cidade)
+        if cidade:
+            # Cidade digitada à mão (fora da lista do estado) fica sem código IBGE
+            municipio = self.municipios_por_nome.get(cidade, {'nome': cidade})
+            if self.cidades.add_many([municipio]):
+                self.cidades_listbox.refresh()
     
     def _remove_cidade(self):
         """Remove as cidades selecionadas (suporta seleção múltipla)."""
-        selection = self.cidades_listbox.curselection()
+        selection = self.cidades_listbox.selected_keys()
         if selection:
-            # Remove de trás para frente para evitar problemas com índices
-            # Ordena os índices em ordem decrescente
-            indices_ordenados = sorted(selection, reverse=True)
-            for idx in indices_ordenados:
-                self.cidades_listbox.delete(idx)
+            total = self.cidades.remove_keys(selection)
+            self.cidades_listbox.refresh()
             
-            total = len(selection)
             if total > 1:
                 self.status_label.configure(text=f"✅ {total} cidade(s) removida(s)")
         else:
@@ -370,7 +451,7 @@ class GoogleMapsScraperGUI:
     
     def _remove_all_cidades(self):
         """Remove todas as cidades selecionadas."""
-        total = self.cidades_listbox.size()
+        total = len(self.cidades)
         if total == 0:
             messagebox.showinfo("Info", "Não há cidades para remover.")
             return
@@ -382,115 +463,34 @@ class GoogleMapsScraperGUI:
         )
         
         if resposta:
-            self.cidades_listbox.delete(0, tk.END)
+            self.cidades.clear()
+            self.cidades_listbox.refresh()
             self.status_label.configure(text="✅ Todas as cidades foram removidas")
     
-    def _save_progress(self, nicho: str, cidade: str):
-        """Salva o progresso atual (última cidade processada)."""
-        try:
-            self._ensure_output_dir()
-            progress_data = {
-                'ultimo_nicho': nicho,
-                'ultima_cidade': cidade,
-                'timestamp': datetime.now().isoformat(),
-                'cidades_processadas': self._get_processed_cities()
-            }
-            
-            with open(self.progress_file, 'w', encoding='utf-8') as f:
-                json.dump(progress_data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Erro ao salvar progresso: {e}")
-    
     def _load_progress(self) -> dict:
-        """Carrega o progresso salvo."""
+        """Retorna a contagem de jobs por status da coleta não concluída (ou None)."""
         try:
-            if os.path.exists(self.progress_file):
-                with open(self.progress_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+            summary = self.job_store.summary()
         except Exception as e:
             print(f"Erro ao carregar progresso: {e}")
-        return None
+            return None
+        return summary or None
     
     def _clear_progress(self):
-        """Limpa o arquivo de progresso."""
+        """Limpa a tabela de jobs."""
         try:
-            if os.path.exists(self.progress_file):
-                os.remove(self.progress_file)
+            self.job_store.clear()
         except Exception as e:
             print(f"Erro ao limpar progresso: {e}")
     
-    def _load_previous_results(self) -> List[Dict]:
-        """Carrega resultados anteriores do arquivo Excel mais recente."""
-        try:
-            import pandas as pd
-            import glob
-            
-            output_dir = os.path.abspath("output")
-            # Busca todos os arquivos de resultados
-            pattern = os.path.join(output_dir, "resultados_*.xlsx")
-            files = glob.glob(pattern)
-            
-            if not files:
-                return []
-            
-            # Pega o arquivo mais recente
-            latest_file = max(files, key=os.path.getmtime)
-            
-            # Lê o arquivo Excel
-            df = pd.read_excel(latest_file, engine='openpyxl')
-            
-            # Converte de volta para o formato de dicionário
-            # Renomeia as colunas de volta para o formato interno
-            df.columns = df.columns.str.strip()
-            column_mapping = {
-                'Nicho': 'nicho',
-                'Cidade': 'cidade',
-                'Nome da Empresa': 'nome',
-                'Endereço': 'endereco',
-                'Telefone': 'telefone',
-                'Avaliação': 'avaliacao',
-                'Nº de Avaliações': 'num_avaliacoes'
-            }
-            
-            # Renomeia colunas se necessário
-            df = df.rename(columns=column_mapping)
-            
-            # Converte para lista de dicionários
-            results = df.to_dict('records')
-            
-            print(f"📂 Carregados {len(results)} resultados anteriores de: {latest_file}")
-            return results
-            
-        except Exception as e:
-            print(f"⚠️ Erro ao carregar resultados anteriores: {e}")
-            return []
-    
-    def _get_processed_cities(self) -> List[str]:
-        """Retorna lista de cidades já processadas baseado no progresso."""
-        progress_data = self._load_progress()
-        if not progress_data:
-            return []
-        
-        processed = []
-        ultimo_nicho = progress_data.get('ultimo_nicho')
-        ultima_cidade = progress_data.get('ultima_cidade')
-        
-        if ultimo_nicho and ultima_cidade:
-            # Pega todas as cidades até a última processada para cada nicho
-            nichos = self.nichos.copy()
-            cidades = list(self.cidades_listbox.get(0, tk.END))
-            
-            for nicho in nichos:
-                for cidade in cidades:
-                    # Se chegou no último processado, para
-                    if nicho == ultimo_nicho and cidade == ultima_cidade:
-                        processed.append(cidade)
-                        return processed
-                    # Adiciona cidades anteriores
-                    if cidade not in processed:
-                        processed.append(cidade)
-        
-        return processed
+    def _format_progress(self, progress_data: dict) -> str:
+        """Resumo dos jobs para os diálogos de continuação."""
+        return (
+            f"  Concluídos: {progress_data.get(DONE, 0)}\n"
+            f"  Com falha: {progress_data.get(FAILED, 0)}\n"
+            f"  Descartados (tentativas esgotadas): {progress_data.get(DEAD_LETTER, 0)}\n"
+            f"  Pendentes: {progress_data.get(PENDING, 0) + progress_data.get(RUNNING, 0)}"
+        )
     
     def _remove_processed_cities(self):
         """Remove cidades já processadas da lista."""
@@ -499,88 +499,36 @@ class GoogleMapsScraperGUI:
             messagebox.showinfo("Info", "Não há progresso salvo. Nenhuma cidade foi processada anteriormente.")
             return
         
-        ultimo_nicho = progress_data.get('ultimo_nicho', 'N/A')
-        ultima_cidade = progress_data.get('ultima_cidade', 'N/A')
-        timestamp = progress_data.get('timestamp', 'N/A')
-        
         resposta = messagebox.askyesno(
             "Remover Cidades Processadas",
             f"Último processamento:\n"
-            f"  Nicho: {ultimo_nicho}\n"
-            f"  Cidade: {ultima_cidade}\n"
-            f"  Data: {timestamp}\n\n"
+            f"{self._format_progress(progress_data)}\n\n"
             f"Deseja remover as cidades já processadas da lista?",
             icon="question"
         )
         
         if resposta:
-            self._remove_processed_cities_silent(progress_data, show_message=True)
+            self._remove_processed_cities_silent(show_message=True)
     
-    def _remove_processed_cities_silent(self, progress_data: dict, show_message: bool = False):
-        """Remove cidades processadas sem mostrar diálogo."""
-        ultimo_nicho = progress_data.get('ultimo_nicho')
-        ultima_cidade = progress_data.get('ultima_cidade')
-        cidades_processadas = progress_data.get('cidades_processadas', [])
-        
-        if not ultimo_nicho or not ultima_cidade:
+    def _remove_processed_cities_silent(self, show_message: bool = False):
+        """Remove, sem diálogo, as cidades já concluídas para todos os nichos."""
+        if not self.nichos:
             return
         
-        cidades_atual = list(self.cidades_listbox.get(0, tk.END))
-        nichos = self.nichos.copy()
-        
-        cidades_para_remover = set()
+        done = self.job_store.done_keys()
+        removidas = self.cidades.remove_where(
+            lambda municipio: all(job_key(nicho, municipio) in done for nicho in self.nichos)
+        )
         
-        # Se temos o array cidades_processadas, usa ele (mais preciso)
-        if cidades_processadas and isinstance(cidades_processadas, list):
-            # Remove apenas as cidades que estão no array cidades_processadas
-            for cidade in cidades_atual:
-                if cidade in cidades_processadas:
-                    cidades_para_remover.add(cidade)
-        else:
-            # Fallback: usa a lógica antiga baseada em ultimo_nicho e ultima_cidade
-            encontrou_ultima = False
-            
-            # Identifica quais cidades devem ser removidas
-            # Lógica: Para o último nicho processado, remove todas as cidades até e incluindo a última
-            # Para nichos anteriores ao último, remove todas as cidades
-            for nicho in nichos:
-                if encontrou_ultima:
-                    break
-                    
-                # Se é o último nicho processado
-                if nicho == ultimo_nicho:
-                    for cidade in cidades_atual:
-                        # Se chegou no último processado, marca e para
-                        if cidade == ultima_cidade:
-                            encontrou_ultima = True
-                            # Inclui a última também (vai reprocessar para garantir)
-                            cidades_para_remover.add(cidade)
-                            break
-                        # Marca cidades anteriores à última processada
-                        cidades_para_remover.add(cidade)
-                else:
-                    # Para nichos anteriores ao último, todas as cidades já foram processadas
-                    for cidade in cidades_atual:
-                        cidades_para_remover.add(cidade)
-        
-        # Remove as cidades identificadas (de trás para frente para evitar problemas de índice)
-        cidades_removidas = []
-        cidades_lista = list(self.cidades_listbox.get(0, tk.END))
-        
-        for i in range(len(cidades_lista) - 1, -1, -1):
-            cidade = cidades_lista[i]
-            if cidade in cidades_para_remover:
-                self.cidades_listbox.delete(i)
-                cidades_removidas.append(cidade)
-        
-        if cidades_removidas:
+        if removidas:
+            self.cidades_listbox.refresh()
             self.status_label.configure(
-                text=f"✅ {len(cidades_removidas)} cidade(s) já processada(s) foram removidas"
+                text=f"✅ {removidas} cidade(s) já processada(s) foram removidas"
             )
             if show_message:
                 messagebox.showinfo(
                     "Cidades Removidas",
-                    f"{len(cidades_removidas)} cidade(s) já processada(s) foram removidas da lista.\n\n"
+                    f"{removidas} cidade(s) já processada(s) foram removidas da lista.\n\n"
                     f"Você pode continuar o processamento das cidades restantes."
                 )
         else:
@@ -593,16 +541,11 @@ class GoogleMapsScraperGUI:
             messagebox.showwarning("Aviso", "Nenhuma cidade disponível! Selecione um estado primeiro.")
             return
         
-        # Limpa a lista atual
-        self.cidades_listbox.delete(0, tk.END)
+        # Troca a lista atual pelas cidades do estado
+        self.cidades.replace(self.municipios)
+        self.cidades_listbox.refresh()
         
-        # Adiciona todas as cidades
-        for municipio in self.municipios:
-            cidade = municipio['nome']
-            if cidade not in self.cidades_listbox.get(0, tk.END):
-                self.cidades_listbox.insert(tk.END, cidade)
-        
-        self.status_label.configure(text=f"✅ {len(self.municipios)} cidades selecionadas")
+        self.status_label.configure(text=f"✅ {len(self.cidades)} cidades selecionadas")
     
     def _select_all_brasil(self):
         """Seleciona todas as cidades do Brasil."""
@@ -610,7 +553,6 @@ class GoogleMapsScraperGUI:
         resposta = messagebox.askyesno(
             "Confirmar Seleção",
             "Isso irá selecionar TODAS as cidades do Brasil (~5.500+ cidades).\n\n"
-            "Isso pode demorar alguns segundos para carregar.\n\n"
             "Deseja continuar?",
             icon="question"
         )
@@ -636,26 +578,15 @@ class GoogleMapsScraperGUI:
                 self.status_label.configure(text="❌ Erro ao carregar cidades")
                 return
             
-            # Limpa a lista atual
-            self.cidades_listbox.delete(0, tk.END)
-            
-            # Atualiza status durante a inserção
-            self.status_label.configure(text=f"⏳ Adicionando {len(todas_cidades)} cidades...")
-            self.root.update()
+            # Troca a lista atual de uma vez (só as linhas visíveis são desenhadas)
+            self.cidades.replace(todas_cidades)
+            self.cidades_listbox.refresh()
             
-            # Adiciona todas as cidades
-            for municipio in todas_cidades:
-                cidade = municipio['nome']
-                self.cidades_listbox.insert(tk.END, cidade)
-                # Atualiza a cada 100 cidades para não travar a interface
-                if self.cidades_listbox.size() % 100 == 0:
-                    self.root.update()
-            
-            self.status_label.configure(text=f"✅ {len(todas_cidades)} cidades do Brasil selecionadas")
+            self.status_label.configure(text=f"✅ {len(self.cidades)} cidades do Brasil selecionadas")
             messagebox.showinfo(
                 "Sucesso",
                 f"Todas as cidades do Brasil foram selecionadas!\n\n"
-                f"Total: {len(todas_cidades)} cidades"
+                f"Total: {len(self.cidades)} cidades"
             )
             
         except Exception as e:
@@ -673,12 +604,19 @@ class GoogleMapsScraperGUI:
             messagebox.showwarning("Aviso", "Adicione pelo menos um nicho de mercado!")
             return False
         
-        if not self.cidades_listbox.get(0, tk.END):
+        if not len(self.cidades):
             messagebox.showwarning("Aviso", "Adicione pelo menos uma cidade!")
             return False
         
         return True
     
+    def _get_int_option(self, entry, default: int, minimum: int = 0) -> int:
+        """Lê um valor inteiro de um campo de opção, usando o padrão se inválido."""
+        try:
+            return max(int(entry.get().strip()), minimum)
+        except ValueError:
+            return default
+    
     def _start_scraping(self):
         """Inicia o processo de scraping em uma thread separada."""
         if not self._validate_inputs():
@@ -690,9 +628,7 @@ class GoogleMapsScraperGUI:
             resposta = messagebox.askyesno(
                 "Continuar Processamento",
                 f"Foi detectado um processamento anterior que não foi concluído.\n\n"
-                f"Último processado:\n"
-                f"  Nicho: {progress_data.get('ultimo_nicho', 'N/A')}\n"
-                f"  Cidade: {progress_data.get('ultima_cidade', 'N/A')}\n\n"
+                f"{self._format_progress(progress_data)}\n\n"
                 f"Deseja continuar de onde parou?\n\n"
                 f"Sim = Continuar\n"
                 f"Não = Começar do zero",
@@ -700,29 +636,17 @@ class GoogleMapsScraperGUI:
             )
             
             if resposta:
-                # Continua de onde parou - remove cidades já processadas
-                self._remove_processed_cities_silent(progress_data, show_message=False)
-                # Carrega resultados anteriores
-                previous_results = self._load_previous_results()
-                self.all_results = previous_results
-                # Tenta encontrar o arquivo mais recente para continuar salvando nele
-                output_dir = os.path.abspath("output")
-                pattern = os.path.join(output_dir, "resultados_*.xlsx")
-                files = glob.glob(pattern)
-                if files:
-                    # Usa o arquivo mais recente
-                    self.current_save_file = max(files, key=os.path.getmtime)
-                    self.status_label.configure(
-                        text=f"📂 Continuando processamento. {len(previous_results)} resultados anteriores carregados."
-                    )
+                # Continua de onde parou: jobs interrompidos voltam para a fila
+                self.job_store.reset_running()
+                self._remove_processed_cities_silent(show_message=False)
+                # Continua acrescentando no arquivo de resultados da coleta
+                self.current_save_file = self.job_store.get_meta('arquivo_resultados')
             else:
                 # Limpa o progresso e começa do zero
                 self._clear_progress()
-                self.all_results = []
                 self.current_save_file = None
         else:
             # Não há progresso salvo, começa do zero
-            self.all_results = []
             self.current_save_file = None
         
         self.is_running = True
@@ -736,149 +660,227 @@ class GoogleMapsScraperGUI:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             self.current_save_file = os.path.join(output_dir, f"resultados_{timestamp}.xlsx")
         
+        self.job_store.set_meta('arquivo_resultados', self.current_save_file)
+        previous_count = self._open_results_sink()
+        if previous_count:
+            self.status_label.configure(
+                text=f"📂 Continuando processamento. {previous_count} resultados anteriores mantidos."
+            )
+        
         self.start_btn.configure(state="disabled")
         self.stop_btn.configure(state="normal")
         self.export_btn.configure(state="disabled")
+        self.jobs_in_progress = 0
+        self.records_found = 0
+        self.last_metrics = {}
         
-        # Inicia em thread separada
-        thread = threading.Thread(target=self._scraping_worker, daemon=True)
+        # Inicia em thread separada (as opções são lidas aqui, na thread do Tk)
+        thread = threading.Thread(target=self._scraping_worker, args=(self._collect_options(),), daemon=True)
         thread.start()
     
-    def _scraping_worker(self):
-        """Worker que executa o scraping em thread separada."""
+    def _collect_options(self) -> Dict:
+        """Lê as opções da coleta dos widgets (a thread da coleta não acessa o Tk)."""
+        return {
+            'nichos': self.nichos.copy(),
+            'cidades': list(self.cidades),
+            'workers': self._get_int_option(self.workers_entry, 1, minimum=1),
+            'max_searches': self._get_int_option(self.max_searches_entry, 50),
+            'pacing': self.pacing_combo.get(),
+            'max_results': self._get_int_option(self.max_results_entry, 120),
+            'engine': self.engine_combo.get(),
+            'detail_tabs': self._get_int_option(self.detail_tabs_entry, 1, minimum=1),
+            'detail_mode': self.detail_mode_combo.get(),
+            'capture_network': self.capture_network_var.get(),
+            'lean_profile': self.lean_profile_var.get(),
+            'dedup': self.dedup_var.get()
+        }
+    
+    def _poll_events(self):
+        """Aplica os eventos acumulados da coleta e agenda a próxima leitura."""
+        pending = self.events.drain()
+        if pending:
+            self._apply_events(events.coalesce(pending))
+        self.root.after(self.EVENT_INTERVAL_MS, self._poll_events)
+    
+    def _apply_events(self, batch: events.EventBatch):
+        """Atualiza os widgets uma única vez com o resumo de um lote de eventos."""
+        self.jobs_in_progress = max(
+            self.jobs_in_progress + batch.counts.get(events.JOB_STARTED, 0) - batch.counts.get(events.JOB_DONE, 0), 0
+        )
+        self.records_found += batch.records
+        if events.METRICS in batch.latest:
+            self.last_metrics = batch.latest[events.METRICS]
+        
+        done = batch.latest.get(events.JOB_DONE)
+        if done:
+            self.progress.set(done['atual'] / done['total'] if done['total'] else 0)
+        
+        for error in batch.errors:
+            if error.get('fatal'):
+                messagebox.showerror("Erro", f"Erro durante o scraping: {error['mensagem']}")
+        
+        last = batch.last_of(events.STATUS, events.JOB_DONE, events.FINISHED)
+        if last is None:
+            return
+        if last.kind == events.FINISHED:
+            self.status_label.configure(text=last.data['texto'])
+            self.start_btn.configure(state="normal")
+            self.stop_btn.configure(state="disabled")
+            if last.data.get('exportar'):
+                self.export_btn.configure(state="normal")
+        elif last.kind == events.STATUS:
+            self.status_label.configure(text=last.data['texto'])
+        else:
+            texto = f"🔍 [{last.data['atual']}/{last.data['total']}] Concluído: {last.data['nicho']} em {last.data['cidade']}"
+            if self.jobs_in_progress:
+                texto += f" | {self.jobs_in_progress} em andamento"
+            if self.last_metrics:
+                texto += (f" | {self.last_metrics['resultados']} resultados (+{self.records_found} nesta execução)"
+                          f" | bloqueios: {self.last_metrics['taxa_bloqueio']:.0%}")
+            self.status_label.configure(text=texto)
+    
+    def _scraping_worker(self, options: Dict):
+        """Worker que executa o scraping em thread separada (publica eventos, não toca no Tk)."""
+        post = self.events.post
+        dedup_index = self.dedup_index if options['dedup'] else None
+        tags_lookup = self.dedup_index.tags_label if options['dedup'] else None
         try:
-            nichos = self.nichos.copy()
-            cidades = list(self.cidades_listbox.get(0, tk.END))
-            
-            total = len(nichos) * len(cidades)
-            current = 0
-            
-            for nicho in nichos:
-                if not self.is_running:
-                    break
-                
-                for cidade in cidades:
-                    if not self.is_running:
-                        break
-                    
-                    # Abre o navegador para esta busca
-                    self.scraper = GoogleMapsScraper(headless=False)
-                    self.scraper.open_maps()
-                    
-                    self.root.after(0, lambda n=nicho, c=cidade: 
-                        self.status_label.configure(text=f"🔍 Buscando: {n} em {c}"))
-                    
-                    try:
-                        results = self.scraper.scrape_nicho_cidade(nicho, cidade)
-                        self.all_results.extend(results)
-                        
-                        # Salva progresso após processar cidade com sucesso
-                        self._save_progress(nicho, cidade)
-                        
-                    except Exception as e:
-                        print(f"Erro ao buscar {nicho} em {cidade}: {e}")
-                        # Salva progresso mesmo em caso de erro parcial
-                        self._save_progress(nicho, cidade)
-                    
-                    # Fecha o navegador após cada busca
-                    if self.scraper:
-                        self.scraper.close()
-                        self.scraper = None
-                    
-                    # Salva após cada cidade processada
-                    self._auto_save_results()
-                    
-                    current += 1
-                    progress = current / total if total > 0 else 0
-                    self.root.after(0, lambda p=progress: self.progress.set(p))
-                    
-                    # Pequena pausa entre buscas para não sobrecarregar
-                    time.sleep(2)
+            # Cada worker do pool mantém um único navegador para toda a execução
+            metrics = Metrics()
+            # Durante a coleta, output/metricas.prom mostra os números parciais
+            metrics.start_exporter(prometheus_file=os.path.join("output", "metricas.prom"))
+            pool = ScrapingPool(
+                num_workers=options['workers'],
+                scraper_factory=lambda: create_scraper(
+                    options['engine'],
+                    headless=False,
+                    max_searches_per_session=options['max_searches'],
+                    pacing=create_pacing(options['pacing']),
+                    max_results=options['max_results'],
+                    detail_mode=options['detail_mode'],
+                    capture_network=options['capture_network'],
+                    lean_profile=options['lean_profile'],
+                    log_transfer=True,
+                    dedup_index=dedup_index,
+                    metrics=metrics,
+                    detail_tabs=options['detail_tabs']
+                )
+            )
+            self.runner = BatchRunner(pool, self.job_store, self.results_sink, metrics, dedup_index)
+            
+            # Registra todos os jobs e processa só os que ainda não foram concluídos;
+            # uma nova execução dá outra chance aos jobs descartados da anterior
+            nichos = options['nichos']
+            cidades = options['cidades']
+            pairs = self.runner.dead_letter_pairs(nichos, cidades) + self.runner.pending_pairs(nichos, cidades)
+            total = len(pairs)
+            saved = self.results_sink.count
+            
+            def on_job_start(nicho, municipio):
+                # Chamado nas threads do pool
+                post(events.JOB_STARTED, nicho=nicho, cidade=CitySelection.label_for(municipio))
+            
+            def on_progress(current, total, nicho, municipio, error):
+                nonlocal saved
+                cidade = CitySelection.label_for(municipio)
+                if self.results_sink.count > saved:
+                    post(events.RECORDS_FOUND, quantidade=self.results_sink.count - saved)
+                    saved = self.results_sink.count
+                if error:
+                    print(f"Erro ao buscar {nicho} em {cidade}: {error}")
+                    post(events.ERROR, mensagem=f"{nicho} em {cidade}: {error}", fatal=False)
+                post(events.JOB_DONE, atual=current, total=total, nicho=nicho, cidade=cidade,
+                     erro=str(error) if error else None)
+                post(events.METRICS, resultados=self.results_sink.count, falhas=self.runner.failed,
+                     taxa_bloqueio=pool.get_session_stats()['taxa_bloqueio'])
+            
+            post(events.STATUS, texto=f"🔍 Iniciando {total} buscas com {pool.num_workers} navegador(es)...")
+            self.runner.run(pairs, on_progress, on_job_start)
+            if self.is_running:
+                # Lugares que não abriram em nenhuma tentativa, sem refazer as buscas
+                self.runner.run_failed_places(nichos, cidades, on_progress)
             
             if self.is_running:
-                # Salva uma última vez ao final (caso tenha algo pendente)
-                self._auto_save_results()
+                # Monta a planilha a partir do arquivo incremental
+                self._auto_save_results(tags_lookup)
                 
-                # Limpa o progresso quando termina com sucesso
-                self._clear_progress()
+                # Limpa o progresso quando todos os jobs terminaram com sucesso
+                # (jobs com falha ficam na tabela para a próxima execução)
+                if self.runner.all_done():
+                    self._clear_progress()
                 
-                self.root.after(0, lambda: self.status_label.configure(
-                    text=f"✅ Coleta concluída! {len(self.all_results)} resultados encontrados. Arquivo salvo: {self.current_save_file}"
-                ))
-                self.root.after(0, lambda: self.export_btn.configure(state="normal"))
+                post(events.FINISHED, exportar=True,
+                     texto=f"✅ Coleta concluída! {self.results_sink.count} resultados encontrados. Arquivo salvo: {self.current_save_file}")
             else:
                 # Se foi parado, salva o que tem (mas mantém o progresso)
-                self._auto_save_results()
-                self.root.after(0, lambda: self.status_label.configure(
-                    text=f"⏸️ Processo interrompido. {len(self.all_results)} resultados salvos em: {self.current_save_file}"
-                ))
+                self._auto_save_results(tags_lookup)
+                post(events.FINISHED, exportar=False,
+                     texto=f"⏸️ Processo interrompido. {self.results_sink.count} resultados salvos em: {self.current_save_file}")
             
         except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror("Erro", f"Erro durante o scraping: {e}"))
-            self.root.after(0, lambda: self.status_label.configure(text="❌ Erro durante a coleta"))
+            post(events.ERROR, mensagem=str(e), fatal=True)
+            post(events.FINISHED, exportar=False, texto="❌ Erro durante a coleta")
         finally:
-            # Garante que o navegador está fechado
-            if self.scraper:
-                try:
-                    self.scraper.close()
-                except:
-                    pass
-                self.scraper = None
+            # Garante que os navegadores estão fechados
+            if self.runner:
+                self.runner.print_stats()
+                if dedup_index:
+                    print(f"♻️ Empresas já coletadas ignoradas: {dedup_index.skipped}")
+                self.runner.close()
+                self._save_metrics(self.runner.metrics)
+                self.runner = None
             
             self.is_running = False
-            self.root.after(0, lambda: self.start_btn.configure(state="normal"))
-            self.root.after(0, lambda: self.stop_btn.configure(state="disabled"))
+    
+    def _save_metrics(self, metrics: Metrics):
+        """Grava o resumo das métricas da coleta ao lado da planilha."""
+        metrics.stop_exporter()
+        path = os.path.splitext(self.current_save_file)[0] + '.metricas.json'
+        try:
+            metrics.to_json(path)
+            print(f"📈 Métricas salvas em {path}")
+        except OSError as e:
+            print(f"Erro ao salvar métricas: {e}")
     
     def _stop_scraping(self):
         """Para o processo de scraping."""
         self.is_running = False
         
-        if self.scraper:
-            try:
-                self.scraper.close()
-            except:
-                pass
-            self.scraper = None
+        # Os workers terminam a busca atual e fecham seus navegadores
+        if self.runner:
+            self.runner.stop()
         
-        self.root.after(0, lambda: self.status_label.configure(text="⏸️ Processo interrompido pelo usuário"))
+        self.status_label.configure(text="⏸️ Processo interrompido pelo usuário")
+    
+    def _open_results_sink(self) -> int:
+        """
+        Abre o arquivo incremental da sessão atual e o índice de empresas
+        ao lado dele (começar do zero cria outro arquivo, e com ele outro índice).
+        
+        Returns:
+            Número de resultados que já estavam salvos
+        """
+        if self.results_sink:
+            self.results_sink.close()
+        
+        self.results_sink = ResultsSink(ResultsSink.path_for(self.current_save_file))
+        if self.dedup_index:
+            self.dedup_index.close()
+        self.dedup_index = DedupIndex(os.path.splitext(self.current_save_file)[0] + '.dedup.sqlite')
+        return self.results_sink.count
+    
+    def _tags_lookup(self):
+        """Função que lista as buscas de cada empresa (coluna 'Buscas' da planilha)."""
+        return self.dedup_index.tags_label if self.dedup_index and self.dedup_var.get() else None
     
-    def _auto_save_results(self):
-        """Salva automaticamente os resultados na pasta output/ (incremental)."""
-        if not self.all_results:
+    def _auto_save_results(self, tags_lookup=None):
+        """Monta a planilha da sessão (output/) a partir do arquivo incremental."""
+        if not self.results_sink or not self.results_sink.count:
             return  # Não salva se não houver resultados
         
         try:
-            import pandas as pd
-            
-            # Usa o arquivo da sessão atual
-            if not self.current_save_file:
-                # Garante que a pasta output existe
-                self._ensure_output_dir()
-                
-                # Cria arquivo se não existir
-                output_dir = os.path.abspath("output")
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                self.current_save_file = os.path.join(output_dir, f"resultados_{timestamp}.xlsx")
-            
-            df = pd.DataFrame(self.all_results)
-            
-            # Verifica se todas as colunas existem
-            columns_order = ['nicho', 'cidade', 'nome', 'endereco', 'telefone', 'avaliacao', 'num_avaliacoes']
-            missing_cols = [col for col in columns_order if col not in df.columns]
-            if missing_cols:
-                # Adiciona colunas faltantes com valores vazios
-                for col in missing_cols:
-                    df[col] = 'Não informado'
-            
-            # Reordena colunas
-            df = df[columns_order]
-            
-            # Renomeia colunas
-            df.columns = ['Nicho', 'Cidade', 'Nome da Empresa', 'Endereço', 'Telefone', 'Avaliação', 'Nº de Avaliações']
-            
-            # Salva no arquivo da sessão (sobrescreve com todos os dados acumulados)
-            df.to_excel(self.current_save_file, index=False, engine='openpyxl')
-            print(f"💾 Arquivo atualizado: {self.current_save_file} ({len(df)} registros)")
+            total = self.results_sink.export(self.current_save_file, tags_lookup)
+            print(f"💾 Arquivo atualizado: {self.current_save_file} ({total} registros)")
             
         except Exception as e:
             import traceback
@@ -887,7 +889,7 @@ class GoogleMapsScraperGUI:
     
     def _export_results(self):
         """Exporta os resultados para Excel ou CSV (com opção de escolher local)."""
-        if not self.all_results:
+        if not self.results_sink or not self.results_sink.count:
             messagebox.showwarning("Aviso", "Nenhum resultado para exportar!")
             return
         
@@ -906,36 +908,17 @@ class GoogleMapsScraperGUI:
             initialdir=initial_dir,
             initialfile=default_filename,
             defaultextension=".xlsx",
-            filetypes=[("Excel files", "*.xlsx"), ("CSV files", "*.csv")]
+            filetypes=[("Excel files", "*.xlsx"), ("CSV files", "*.csv"),
+                       ("Parquet files", "*.parquet"), ("Arrow files", "*.arrow")]
         )
         
         if not file_path:
             return
         
         try:
-            import pandas as pd
-            
-            df = pd.DataFrame(self.all_results)
-            
-            # Reordena colunas
-            columns_order = ['nicho', 'cidade', 'nome', 'endereco', 'telefone', 'avaliacao', 'num_avaliacoes']
-            missing_cols = [col for col in columns_order if col not in df.columns]
-            if missing_cols:
-                # Adiciona colunas faltantes com valores vazios
-                for col in missing_cols:
-                    df[col] = 'Não informado'
-            
-            df = df[columns_order]
-            
-            # Renomeia colunas
-            df.columns = ['Nicho', 'Cidade', 'Nome da Empresa', 'Endereço', 'Telefone', 'Avaliação', 'Nº de Avaliações']
-            
-            if file_path.endswith('.xlsx'):
-                df.to_excel(file_path, index=False, engine='openpyxl')
-            else:
-                df.to_csv(file_path, index=False, encoding='utf-8-sig')
+            total = self.results_sink.export(file_path, self._tags_lookup())
             
-            messagebox.showinfo("Sucesso", f"Resultados exportados com sucesso!\n{len(self.all_results)} registros salvos em:\n{file_path}")
+            messagebox.showinfo("Sucesso", f"Resultados exportados com sucesso!\n{total} registros salvos em:\n{file_path}")
             
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao exportar resultados: {e}")
@@ -0,0 +1,242 @@
+"""
+Módulo com a tabela de jobs da coleta (SQLite).
+
+Cada par (nicho, cidade, UF) é uma linha com o status do job (pendente,
+executando, concluído, falhou ou descartado), o número de tentativas, os
+horários e a quantidade de resultados. Assim a coleta pode ser retomada
+exatamente de onde parou, consultando só a própria tabela, mesmo com vários
+workers em paralelo.
+
+Jobs descartados esgotaram as novas tentativas (retry.py) e não são
+retomados automaticamente: ficam na lista de descartados até serem
+reprocessados (requeue_dead_letter). Lugares que não abriram depois de todas
+as tentativas ficam em uma segunda lista, com o job de origem, para serem
+extraídos de novo sem refazer a busca.
+"""
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+PENDING = 'pendente'
+RUNNING = 'executando'
+DONE = 'concluido'
+FAILED = 'falhou'
+DEAD_LETTER = 'descartado'
+
+JobKey = Tuple[str, str, str]
+
+
+class JobStore:
+    """Tabela de jobs persistida em SQLite, segura para uso entre threads."""
+
+    def __init__(self, path: str):
+        """
+        Abre (ou cria) o banco de jobs.
+
+        Args:
+            path: Caminho do arquivo SQLite
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                nicho TEXT NOT NULL,
+                cidade TEXT NOT NULL,
+                uf TEXT NOT NULL DEFAULT '',
+                status TEXT NOT NULL,
+                tentativas INTEGER NOT NULL DEFAULT 0,
+                inicio REAL,
+                fim REAL,
+                duracao REAL,
+                resultados INTEGER NOT NULL DEFAULT 0,
+                erro TEXT,
+                PRIMARY KEY (nicho, cidade, uf)
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status);
+            CREATE TABLE IF NOT EXISTS lugares_descartados (
+                url TEXT PRIMARY KEY,
+                nicho TEXT NOT NULL,
+                cidade TEXT NOT NULL,
+                uf TEXT NOT NULL DEFAULT '',
+                inclusao REAL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                chave TEXT PRIMARY KEY,
+                valor TEXT
+            );
+            """
+        )
+        self._conn.commit()
+
+    def add_jobs(self, keys: Iterable[JobKey]):
+        """
+        Registra jobs como pendentes (jobs já existentes não são alterados).
+
+        Args:
+            keys: Chaves (nicho, cidade, uf)
+        """
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO jobs (nicho, cidade, uf, status) VALUES (?, ?, ?, ?)",
+                [(nicho, cidade, uf, PENDING) for nicho, cidade, uf in keys]
+            )
+            self._conn.commit()
+
+    def mark_running(self, key: JobKey):
+        """Marca o job como em execução e conta mais uma tentativa."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, tentativas = tentativas + 1, inicio = ?, fim = NULL, erro = NULL "
+                "WHERE nicho = ? AND cidade = ? AND uf = ?",
+                (RUNNING, time.time(), *key)
+            )
+            self._conn.commit()
+
+    def mark_done(self, key: JobKey, result_count: int):
+        """Marca o job como concluído com a quantidade de resultados."""
+        self._finish(key, DONE, result_count, None)
+
+    def mark_failed(self, key: JobKey, error: str):
+        """Marca o job como falho (retomado na próxima execução), guardando a mensagem de erro."""
+        self._finish(key, FAILED, 0, error)
+
+    def mark_dead_letter(self, key: JobKey, error: str):
+        """Move o job para a lista de descartados (tentativas esgotadas)."""
+        self._finish(key, DEAD_LETTER, 0, error)
+
+    def _finish(self, key: JobKey, status: str, result_count: int, error: Optional[str]):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, fim = ?, duracao = ? - COALESCE(inicio, ?), resultados = ?, erro = ? "
+                "WHERE nicho = ? AND cidade = ? AND uf = ?",
+                (status, now, now, now, result_count, error, *key)
+            )
+            self._conn.commit()
+
+    def reset_running(self) -> int:
+        """
+        Volta para pendente os jobs que ficaram 'executando' (coleta interrompida).
+
+        Returns:
+            Número de jobs recolocados na fila
+        """
+        with self._lock:
+            cursor = self._conn.execute("UPDATE jobs SET status = ? WHERE status = ?", (PENDING, RUNNING))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def done_keys(self) -> Set[JobKey]:
+        """Retorna as chaves dos jobs já concluídos."""
+        return self._keys_with_status(DONE)
+
+    def dead_letter_keys(self) -> Set[JobKey]:
+        """Retorna as chaves dos jobs descartados."""
+        return self._keys_with_status(DEAD_LETTER)
+
+    def _keys_with_status(self, status: str) -> Set[JobKey]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT nicho, cidade, uf FROM jobs WHERE status = ?", (status,)
+            ).fetchall()
+        return set(rows)
+
+    def pending_keys(self, keys: Iterable[JobKey]) -> List[JobKey]:
+        """
+        Filtra as chaves que ainda precisam ser processadas.
+
+        Args:
+            keys: Chaves na ordem desejada
+
+        Returns:
+            Chaves que não estão concluídas nem descartadas, na mesma ordem
+        """
+        finished = self.done_keys() | self.dead_letter_keys()
+        return [key for key in keys if key not in finished]
+
+    def requeue_dead_letter(self) -> int:
+        """
+        Volta os jobs descartados para pendente, zerando as tentativas.
+
+        Returns:
+            Número de jobs recolocados na fila
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, tentativas = 0 WHERE status = ?", (PENDING, DEAD_LETTER)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def add_failed_places(self, key: JobKey, urls: Iterable[str]):
+        """Guarda as URLs de lugares que não abriram, com o job de origem."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO lugares_descartados (url, nicho, cidade, uf, inclusao) VALUES (?, ?, ?, ?, ?)",
+                [(url, *key, now) for url in urls]
+            )
+            self._conn.commit()
+
+    def failed_places(self) -> Dict[JobKey, List[str]]:
+        """
+        Lista os lugares descartados.
+
+        Returns:
+            Dicionário {chave do job: [URLs]}
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT nicho, cidade, uf, url FROM lugares_descartados ORDER BY inclusao"
+            ).fetchall()
+        places: Dict[JobKey, List[str]] = {}
+        for nicho, cidade, uf, url in rows:
+            places.setdefault((nicho, cidade, uf), []).append(url)
+        return places
+
+    def remove_failed_places(self, urls: Iterable[str]):
+        """Tira lugares da lista de descartados (ex: extraídos com sucesso)."""
+        with self._lock:
+            self._conn.executemany("DELETE FROM lugares_descartados WHERE url = ?", [(url,) for url in urls])
+            self._conn.commit()
+
+    def summary(self) -> Dict[str, int]:
+        """
+        Conta os jobs por status.
+
+        Returns:
+            Dicionário {status: quantidade}
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    def get_meta(self, chave: str) -> Optional[str]:
+        """Lê um valor auxiliar da coleta (ex: arquivo de resultados)."""
+        with self._lock:
+            row = self._conn.execute("SELECT valor FROM meta WHERE chave = ?", (chave,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, chave: str, valor: str):
+        """Grava um valor auxiliar da coleta."""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (chave, valor) VALUES (?, ?)", (chave, valor))
+            self._conn.commit()
+
+    def clear(self):
+        """Apaga todos os jobs, lugares descartados e valores auxiliares (começar do zero)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs")
+            self._conn.execute("DELETE FROM lugares_descartados")
+            self._conn.execute("DELETE FROM meta")
+            self._conn.commit()
+
+    def close(self):
+        """Fecha a conexão com o banco."""
+        with self._lock:
+            self._conn.close()
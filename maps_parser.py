@@ -0,0 +1,198 @@
+"""
+Módulo para interpretar as respostas de rede do Google Maps.
+
+Ao buscar, o Maps recebe os lugares já estruturados (nome, endereço, telefone,
+avaliação, coordenadas e place id) em respostas JSON. As funções abaixo
+transformam essas respostas nos mesmos registros que
+GoogleMapsScraper.extract_business_data monta a partir do HTML, sem depender
+das classes CSS da página.
+
+Os índices dos campos seguem o formato atual das respostas e podem mudar se o
+Google alterar o formato; campos ausentes ficam como 'Não informado'.
+
+Para desenvolver sem navegador, salve respostas com
+GoogleMapsScraper(capture_network=True, capture_dir=...) e rode:
+
+    python maps_parser.py resposta.json
+
+Respostas de exemplo (reduzidas e anonimizadas) ficam em
+tests/fixtures/maps_responses e são verificadas por python -m pytest tests.
+"""
+import json
+import sys
+from typing import Any, Dict, Iterator, List
+
+# Prefixo anti-XSSI que o Google coloca antes do JSON
+XSSI_PREFIX = ")]}'"
+
+# Trechos de URL das respostas que trazem lugares
+PLACE_RESPONSE_MARKERS = [
+    '/search?tbm=map',
+    '/maps/preview/place',
+]
+
+NOT_INFORMED = 'Não informado'
+
+
+def is_place_response(url: str) -> bool:
+    """
+    Verifica se a URL de uma resposta de rede costuma trazer lugares.
+
+    Args:
+        url: URL da requisição
+
+    Returns:
+        True se a resposta deve ser capturada
+    """
+    return any(marker in url for marker in PLACE_RESPONSE_MARKERS)
+
+
+def load_response(body: str) -> Any:
+    """
+    Decodifica o corpo de uma resposta do Maps.
+
+    Remove o prefixo anti-XSSI e o sufixo /*""*/, e abre o envelope
+    {"d": "..."} quando a resposta vem dentro dele.
+
+    Args:
+        body: Corpo da resposta como texto
+
+    Returns:
+        Estrutura JSON decodificada, ou None se o corpo não for JSON
+    """
+    text = body.strip()
+    if text.endswith('/*""*/'):
+        text = text[:-len('/*""*/')].rstrip()
+    if text.startswith(XSSI_PREFIX):
+        text = text[len(XSSI_PREFIX):].lstrip()
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    if isinstance(data, dict) and isinstance(data.get('d'), str):
+        return load_response(data['d'])
+    return data
+
+
+def _get(data: Any, *path: int) -> Any:
+    """Acessa data[i][j]... e devolve None se algum nível não existir."""
+    for index in path:
+        if not isinstance(data, list) or index >= len(data):
+            return None
+        data = data[index]
+    return data
+
+
+def _is_place_info(info: Any) -> bool:
+    """Um bloco de lugar é uma lista longa com o nome (texto) no índice 11."""
+    return isinstance(info, list) and len(info) > 11 and isinstance(info[11], str)
+
+
+def _iter_place_infos(data: Any) -> Iterator[list]:
+    """Percorre os blocos de lugar de uma resposta de busca ou de lugar."""
+    # Resposta de busca: data[0][1] é a lista de resultados, cada um com o lugar em [14]
+    entries = _get(data, 0, 1)
+    if isinstance(entries, list):
+        for entry in entries:
+            info = _get(entry, 14)
+            if _is_place_info(info):
+                yield info
+
+    # Resposta de um lugar: o bloco fica em data[6]
+    info = _get(data, 6)
+    if _is_place_info(info):
+        yield info
+
+
+def _format_rating(value: Any) -> str:
+    """Formata a nota com vírgula, como no registro extraído do HTML."""
+    if isinstance(value, (int, float)):
+        return f"{value:.1f}".replace('.', ',')
+    return NOT_INFORMED
+
+
+def parse_place(info: list) -> Dict[str, str]:
+    """
+    Converte um bloco de lugar em registro.
+
+    Args:
+        info: Bloco de lugar de uma resposta do Maps
+
+    Returns:
+        Dicionário com as chaves de extract_business_data, mais latitude,
+        longitude e place_id
+    """
+    endereco = _get(info, 39)
+    if not endereco:
+        linhas = _get(info, 2)
+        if isinstance(linhas, list):
+            endereco = ', '.join(linha for linha in linhas if isinstance(linha, str))
+
+    telefone = _get(info, 178, 0, 0)
+    num_avaliacoes = _get(info, 4, 8)
+    latitude = _get(info, 9, 2)
+    longitude = _get(info, 9, 3)
+
+    return {
+        'nome': info[11].strip() or NOT_INFORMED,
+        'endereco': endereco if isinstance(endereco, str) and endereco else NOT_INFORMED,
+        'telefone': telefone if isinstance(telefone, str) and telefone else NOT_INFORMED,
+        'avaliacao': _format_rating(_get(info, 4, 7)),
+        'num_avaliacoes': str(num_avaliacoes) if isinstance(num_avaliacoes, int) else NOT_INFORMED,
+        'latitude': latitude if isinstance(latitude, (int, float)) else None,
+        'longitude': longitude if isinstance(longitude, (int, float)) else None,
+        'place_id': _get(info, 78) if isinstance(_get(info, 78), str) else None
+    }
+
+
+def parse_response(body: str) -> List[Dict[str, str]]:
+    """
+    Extrai todos os lugares de uma resposta do Maps.
+
+    Args:
+        body: Corpo da resposta como texto
+
+    Returns:
+        Lista de registros (vazia se a resposta não tiver lugares)
+    """
+    data = load_response(body)
+    if data is None:
+        return []
+    return [parse_place(info) for info in _iter_place_infos(data)]
+
+
+def parse_responses(bodies: List[str]) -> List[Dict[str, str]]:
+    """
+    Extrai os lugares de várias respostas, sem repetir lugares.
+
+    Args:
+        bodies: Corpos das respostas na ordem em que chegaram
+
+    Returns:
+        Lista de registros, deduplicada pelo place_id (ou nome + endereço)
+    """
+    records = []
+    seen = set()
+    for body in bodies:
+        for record in parse_response(body):
+            key = record['place_id'] or (record['nome'], record['endereco'])
+            if key in seen:
+                continue
+            seen.add(key)
+            records.append(record)
+    return records
+
+
+def main(paths: List[str]) -> int:
+    """Imprime os registros extraídos de respostas salvas em arquivo."""
+    bodies = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            bodies.append(f.read())
+    for record in parse_responses(bodies):
+        print(json.dumps(record, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
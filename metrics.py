@@ -0,0 +1,273 @@
+"""
+Módulo com as métricas da coleta (tempos por etapa e contadores).
+
+Um único Metrics é compartilhado pelos scrapers do pool e pela execução em
+lote. Ele guarda:
+
+- timers: duração de cada etapa (início do navegador, carregamento de página,
+  busca, coleta da lista, clique, extração, gravação...), com contagem, soma,
+  mínimo, máximo e percentis das últimas amostras
+- contadores: reinícios, elementos obsoletos, timeouts, campos 'Não informado',
+  bloqueios suspeitos etc., opcionalmente com rótulos (ex: motivo, campo)
+
+Ao final da execução o resumo vai para um JSON (to_json). Durante execuções
+longas, o texto no formato do Prometheus pode ser gravado periodicamente em
+arquivo e/ou servido em http://host:porta/metrics (start_exporter).
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+# Prefixo dos nomes no formato do Prometheus
+PROMETHEUS_PREFIX = 'maps_scraper'
+
+# Amostras guardadas por timer para os percentis
+SAMPLES_PER_TIMER = 1000
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _percentile(ordered, p: float) -> float:
+    """Percentil p (0-100) de uma lista já ordenada (interpolação linear)."""
+    if not ordered:
+        return 0.0
+    pos = (len(ordered) - 1) * p / 100
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+def timed(name: str) -> Callable:
+    """
+    Decorador de métodos: mede cada chamada no timer name de self.metrics.
+
+    Exemplo:
+        @timed('busca')
+        def search(self, query): ...
+    """
+    def decorator(method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.timer(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class _Timer:
+    """Estatísticas de uma etapa."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.samples = deque(maxlen=SAMPLES_PER_TIMER)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+
+    def summary(self) -> Dict[str, float]:
+        ordered = sorted(self.samples)
+        return {
+            'contagem': self.count,
+            'total_s': round(self.total, 3),
+            'media_s': round(self.total / self.count, 3) if self.count else 0.0,
+            'min_s': round(self.min or 0.0, 3),
+            'max_s': round(self.max, 3),
+            'p50_s': round(_percentile(ordered, 50), 3),
+            'p95_s': round(_percentile(ordered, 95), 3)
+        }
+
+
+class Metrics:
+    """Timers e contadores thread-safe, exportáveis em JSON e no formato do Prometheus."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._timers: Dict[Tuple[str, LabelKey], _Timer] = {}
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._exporter_stop = threading.Event()
+        self._exporter_thread = None
+        self._httpd = None
+
+    def observe(self, name: str, seconds: float, **labels: str):
+        """Registra a duração de uma etapa."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            timer = self._timers.get(key)
+            if timer is None:
+                timer = self._timers[key] = _Timer()
+            timer.observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        """
+        Mede o bloco como uma etapa (a duração é registrada mesmo se houver exceção).
+
+        Exemplo:
+            with metrics.timer('extracao'):
+                ...
+        """
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - inicio, **labels)
+
+    def incr(self, name: str, amount: float = 1, **labels: str):
+        """Soma amount ao contador."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def get_counter(self, name: str, **labels: str) -> float:
+        """Valor atual de um contador (0 se nunca incrementado)."""
+        with self._lock:
+            return self._counters.get((name, _label_key(labels)), 0)
+
+    @staticmethod
+    def _display_name(name: str, labels: LabelKey) -> str:
+        if not labels:
+            return name
+        return name + '{' + ','.join(f'{k}={v}' for k, v in labels) + '}'
+
+    def snapshot(self) -> Dict:
+        """
+        Resumo atual das métricas.
+
+        Returns:
+            Dicionário com 'duracao_s', 'timers' e 'contadores'
+        """
+        with self._lock:
+            timers = {self._display_name(n, l): t.summary() for (n, l), t in sorted(self._timers.items())}
+            counters = {self._display_name(n, l): v for (n, l), v in sorted(self._counters.items())}
+        return {
+            'inicio': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started_at)),
+            'duracao_s': round(time.time() - self.started_at, 1),
+            'timers': timers,
+            'contadores': counters
+        }
+
+    def to_json(self, path: str):
+        """Grava o resumo em JSON (troca o arquivo de uma vez)."""
+        self._write_atomic(path, json.dumps(self.snapshot(), ensure_ascii=False, indent=2))
+
+    @staticmethod
+    def _prometheus_labels(labels: LabelKey, extra: Optional[Dict[str, str]] = None) -> str:
+        items = list(labels) + list((extra or {}).items())
+        if not items:
+            return ''
+        escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in items)
+        return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + '}'
+
+    def to_prometheus(self) -> str:
+        """Métricas no formato de texto do Prometheus (timers como summary em segundos)."""
+        with self._lock:
+            timers = {key: (t.count, t.total, sorted(t.samples)) for key, t in self._timers.items()}
+            counters = dict(self._counters)
+
+        lines = []
+        typed = set()
+        for (name, labels), value in sorted(counters.items()):
+            metric = f"{PROMETHEUS_PREFIX}_{name}_total"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{self._prometheus_labels(labels)} {value:g}")
+        for (name, labels), (count, total, ordered) in sorted(timers.items()):
+            metric = f"{PROMETHEUS_PREFIX}_{name}_seconds"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} summary")
+            for quantile in (0.5, 0.95):
+                value = _percentile(ordered, quantile * 100)
+                lines.append(f"{metric}{self._prometheus_labels(labels, {'quantile': str(quantile)})} {value:.6f}")
+            lines.append(f"{metric}_sum{self._prometheus_labels(labels)} {total:.6f}")
+            lines.append(f"{metric}_count{self._prometheus_labels(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _write_atomic(path: str, content: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def start_exporter(self, prometheus_file: Optional[str] = None, port: Optional[int] = None,
+                       interval: float = 15.0, host: str = '127.0.0.1'):
+        """
+        Exporta as métricas durante a execução.
+
+        Args:
+            prometheus_file: Arquivo regravado a cada interval segundos (ex: para
+                o textfile collector do node_exporter)
+            port: Porta de um endpoint HTTP local com /metrics
+            interval: Intervalo entre gravações do arquivo (segundos)
+            host: Endereço de escuta do endpoint HTTP (padrão: só a máquina
+                local; '0.0.0.0' expõe as métricas, sem autenticação, na rede)
+        """
+        if port:
+            metrics = self
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split('?')[0] != '/metrics':
+                        self.send_error(404)
+                        return
+                    body = metrics.to_prometheus().encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args):
+                    pass
+
+            self._httpd = ThreadingHTTPServer((host, port), Handler)
+            threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+            print(f"📈 Métricas em http://{host}:{port}/metrics")
+
+        if prometheus_file:
+            def write_periodically():
+                while not self._exporter_stop.wait(interval):
+                    self._write_prometheus_file(prometheus_file)
+                self._write_prometheus_file(prometheus_file)
+
+            self._exporter_thread = threading.Thread(target=write_periodically, daemon=True)
+            self._exporter_thread.start()
+
+    def _write_prometheus_file(self, path: str):
+        try:
+            self._write_atomic(path, self.to_prometheus())
+        except OSError as e:
+            print(f"Erro ao gravar métricas em {path}: {e}")
+
+    def stop_exporter(self):
+        """Para o endpoint HTTP e grava o arquivo uma última vez."""
+        self._exporter_stop.set()
+        if self._exporter_thread:
+            self._exporter_thread.join()
+            self._exporter_thread = None
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
@@ -0,0 +1,267 @@
+"""
+Módulo de classificação e normalização dos campos extraídos.
+
+Os padrões são compilados uma única vez no carregamento do módulo:
+
+- ADDRESS_PATTERN: uma única expressão regular (alternância) com os
+  marcadores de endereço como palavras inteiras (rua, av., rodovia...),
+  o sufixo de UF ("- PR") e o CEP. Ao contrário da busca por substring,
+  "av" não casa dentro de "lavacar.com.br" ou "Avaliações".
+- PHONE_PATTERN: telefones brasileiros (fixo, celular, com ou sem +55).
+
+Além de classificar os textos do painel, converte os campos para tipos
+úteis: telefone em E.164 (+5543...), avaliação em float e número de
+avaliações em int. normalize_dataframe faz o mesmo (e corrige a
+classificação de endereço/telefone) em um DataFrame inteiro de uma vez,
+com operações vetorizadas, para limpar resultados antigos sem coletar de
+novo:
+
+    python normalization.py output/resultados_X.jsonl -o output/resultados_X_limpo.xlsx
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+NOT_INFORMED = 'Não informado'
+
+UFS = (
+    'ac', 'al', 'ap', 'am', 'ba', 'ce', 'df', 'es', 'go', 'ma', 'mt', 'ms', 'mg', 'pa',
+    'pb', 'pr', 'pe', 'pi', 'rj', 'rn', 'rs', 'ro', 'rr', 'sc', 'sp', 'se', 'to'
+)
+
+# Marcadores de logradouro/localidade (palavras inteiras; abreviações com ponto opcional)
+ADDRESS_WORDS = (
+    'rua', r'r\.', 'av', 'avenida', 'estrada', r'estr?\.', 'rodovia', r'rod\.', 'praça', r'pça\.?',
+    'alameda', r'al\.', 'travessa', r'tv\.', 'largo', 'bairro', 'centro', 'distrito', 'vila',
+    'jardim', r'jd\.', 'parque', 'quadra', r'qd\.', 'lote', 'km'
+)
+
+ADDRESS_PATTERN = re.compile(
+    r'(?:^|(?<=[\s,(]))(?:' + '|'.join(ADDRESS_WORDS) + r')(?=[\s,.]|$)'  # marcador como palavra inteira
+    r'|\s-\s?(?:' + '|'.join(UFS) + r')\b'                                  # "Cambé - PR"
+    r'|\b\d{5}-?\d{3}\b',                                                   # CEP
+    re.IGNORECASE
+)
+
+# Site (sem espaços, com domínio): 'parque.com.br' não é endereço, mesmo começando por 'parque'
+WEBSITE_PATTERN = re.compile(r'^\s*(?:https?://)?(?:[\w-]+\.)+[a-z]{2,}(?:[/?#]\S*)?\s*$', re.IGNORECASE)
+
+PHONE_PATTERN = re.compile(r'(?:\+?55\s?)?\(?\d{2}\)?\s?9?\s?\d{4}[-.\s]?\d{4}|\b0[3589]00[\s-]?\d{3}[\s-]?\d{4}\b')
+
+# Telefones são curtos; textos longos com números (endereços, horários) não são telefone
+MAX_PHONE_TEXT = 20
+
+_NON_DIGITS = re.compile(r'\D')
+_REVIEW_COUNT_PATTERN = re.compile(r'(\d+(?:[.,]\d+)?)\s*(mil)?', re.IGNORECASE)
+
+
+def is_phone(text: str) -> bool:
+    """Indica se o texto do painel é um telefone."""
+    return len(text) <= MAX_PHONE_TEXT and PHONE_PATTERN.search(text) is not None
+
+
+def is_address(text: str) -> bool:
+    """Indica se o texto do painel é um endereço."""
+    return ADDRESS_PATTERN.search(text) is not None and not WEBSITE_PATTERN.match(text)
+
+
+def classify_info_texts(info_texts: Iterable[str]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Escolhe o endereço e o telefone entre os textos de informação do painel.
+
+    Args:
+        info_texts: Textos na ordem em que aparecem no painel
+
+    Returns:
+        (endereço, telefone); o primeiro texto de cada tipo, ou None
+    """
+    endereco = telefone = None
+    for text in info_texts:
+        if is_phone(text):
+            if telefone is None:
+                telefone = text
+        elif endereco is None and is_address(text):
+            endereco = text
+        if endereco is not None and telefone is not None:
+            break
+    return endereco, telefone
+
+
+def phone_to_e164(text: Optional[str]) -> Optional[str]:
+    """
+    Converte um telefone brasileiro para E.164.
+
+    Exemplos: '(43) 3254-5910' -> '+554332545910', '043 99999-0000' -> '+5543999990000'.
+    Números 0800/0300 não têm formato E.164 e retornam None.
+
+    Returns:
+        Telefone em E.164, ou None se não for um número válido
+    """
+    if not text or text == NOT_INFORMED:
+        return None
+    digits = _NON_DIGITS.sub('', text)
+    if text.lstrip().startswith('+') or (len(digits) in (12, 13) and digits.startswith('55')):
+        digits = digits[2:] if digits.startswith('55') else ''
+    elif len(digits) in (11, 12) and digits.startswith('0') and not digits.startswith(('0300', '0500', '0800', '0900')):
+        # Zero de discagem interurbana
+        digits = digits[1:]
+    if len(digits) == 11 and digits[2] != '9':
+        return None
+    if len(digits) not in (10, 11) or digits[0] == '0':
+        return None
+    return '+55' + digits
+
+
+def parse_rating(text: Optional[str]) -> Optional[float]:
+    """Converte a avaliação ('4,6') em float (None se ausente ou fora de 0-5)."""
+    if text is None or text == NOT_INFORMED:
+        return None
+    try:
+        value = float(str(text).strip().replace(',', '.'))
+    except ValueError:
+        return None
+    return value if 0 <= value <= 5 else None
+
+
+def parse_review_count(text: Optional[str]) -> Optional[int]:
+    """Converte o número de avaliações ('1.234', '(57)', '1,2 mil') em int."""
+    if text is None or text == NOT_INFORMED:
+        return None
+    if isinstance(text, int):
+        return text
+    match = _REVIEW_COUNT_PATTERN.search(str(text))
+    if not match:
+        return None
+    number, mil = match.groups()
+    if mil:
+        return int(round(float(number.replace('.', '').replace(',', '.')) * 1000))
+    return int(number.replace('.', '').replace(',', ''))
+
+
+def normalize_record(record: Dict) -> Dict:
+    """
+    Acrescenta ao registro os campos tipados (os textos originais são mantidos).
+
+    Campos: 'telefone_e164' (str), 'avaliacao_valor' (float) e
+    'num_avaliacoes_valor' (int); None quando ausentes.
+
+    Returns:
+        O próprio registro
+    """
+    record['telefone_e164'] = phone_to_e164(record.get('telefone'))
+    record['avaliacao_valor'] = parse_rating(record.get('avaliacao'))
+    record['num_avaliacoes_valor'] = parse_review_count(record.get('num_avaliacoes'))
+    return record
+
+
+def normalize_dataframe(df):
+    """
+    Reclassifica e normaliza um DataFrame de resultados inteiro de uma vez.
+
+    - endereço que não parece endereço (ex: site) vira 'Não informado'
+    - telefone guardado na coluna de endereço volta para 'telefone', se ela estiver vazia
+    - preenche telefone_e164, avaliacao_valor e num_avaliacoes_valor
+
+    Args:
+        df: DataFrame com as colunas 'endereco', 'telefone', 'avaliacao' e
+            'num_avaliacoes' (colunas ausentes são tratadas como 'Não informado')
+
+    Returns:
+        Novo DataFrame normalizado
+    """
+    import numpy as np
+    import pandas as pd
+
+    df = df.copy()
+    for col in ('endereco', 'telefone', 'avaliacao', 'num_avaliacoes'):
+        if col not in df.columns:
+            df[col] = NOT_INFORMED
+        df[col] = df[col].fillna(NOT_INFORMED).astype(str)
+
+    endereco = df['endereco']
+    telefone = df['telefone']
+    informado = endereco != NOT_INFORMED
+
+    endereco_e_telefone = informado & (endereco.str.len() <= MAX_PHONE_TEXT) & endereco.str.contains(PHONE_PATTERN)
+    move = endereco_e_telefone & (telefone == NOT_INFORMED)
+    df['telefone'] = telefone.where(~move, endereco)
+    nao_endereco = informado & (
+        endereco_e_telefone | ~endereco.str.contains(ADDRESS_PATTERN) | endereco.str.match(WEBSITE_PATTERN)
+    )
+    df['endereco'] = endereco.where(~nao_endereco, NOT_INFORMED)
+
+    # Telefone -> E.164 (mesmas regras de phone_to_e164, em colunas)
+    texto = df['telefone']
+    digits = texto.str.replace(r'\D', '', regex=True)
+    internacional = texto.str.lstrip().str.startswith('+') | (digits.str.len().isin([12, 13]) & digits.str.startswith('55'))
+    digits = digits.where(~internacional, digits.str.slice(2).where(digits.str.startswith('55'), ''))
+    tronco = (
+        ~internacional & digits.str.len().isin([11, 12]) & digits.str.startswith('0')
+        & ~digits.str.match(r'0[3589]00')
+    )
+    digits = digits.where(~tronco, digits.str.slice(1))
+    tamanho = digits.str.len()
+    valido = (
+        (texto != NOT_INFORMED)
+        & tamanho.isin([10, 11])
+        & ~digits.str.startswith('0')
+        & ((tamanho == 10) | (digits.str.slice(2, 3) == '9'))
+    )
+    df['telefone_e164'] = np.where(valido, '+55' + digits, None)
+
+    rating = pd.to_numeric(df['avaliacao'].str.strip().str.replace(',', '.', regex=False), errors='coerce')
+    df['avaliacao_valor'] = rating.where(rating.between(0, 5))
+
+    contagem = df['num_avaliacoes'].str.extract(r'(\d+(?:[.,]\d+)?)\s*(mil)?', flags=re.IGNORECASE)
+    inteiro = pd.to_numeric(contagem[0].str.replace(r'[.,]', '', regex=True), errors='coerce')
+    milhares = pd.to_numeric(contagem[0].str.replace('.', '', regex=False).str.replace(',', '.', regex=False),
+                             errors='coerce') * 1000
+    df['num_avaliacoes_valor'] = milhares.round().where(contagem[1].notna(), inteiro).astype('Int64')
+    return df
+
+
+def _load_records(path: str) -> List[Dict]:
+    """Lê registros de um .jsonl, .xlsx ou .csv exportado."""
+    if path.endswith('.jsonl'):
+        with open(path, 'r', encoding='utf-8') as f:
+            records = []
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+            return records
+
+    import pandas as pd
+    from results_sink import EXPORT_COLUMNS, EXPORT_LABELS
+
+    df = pd.read_excel(path, dtype=str) if path.endswith('.xlsx') else pd.read_csv(path, dtype=str)
+    # Planilha exportada: volta os títulos para os nomes dos campos
+    df = df.rename(columns=dict(zip(EXPORT_LABELS, EXPORT_COLUMNS)))
+    return df.to_dict('records')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from results_sink import export_records
+
+    parser = argparse.ArgumentParser(description="Reclassifica e normaliza resultados já coletados.")
+    parser.add_argument("entrada", help="Arquivo de resultados (.jsonl, .xlsx ou .csv)")
+    parser.add_argument("-o", "--saida", help="Planilha de saída (padrão: <entrada>_normalizado.xlsx)")
+    args = parser.parse_args(argv)
+
+    try:
+        records = _load_records(args.entrada)
+    except (OSError, ValueError) as e:
+        print(f"Erro ao ler {args.entrada}: {e}")
+        return 1
+    saida = args.saida or os.path.splitext(args.entrada)[0] + '_normalizado.xlsx'
+    total = export_records(records, saida)
+    print(f"{total} registros normalizados em {saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+"""
+Módulo com as políticas de ritmo (pausas anti-bloqueio) do scraper.
+
+As esperas por elementos da página ficam no GoogleMapsScraper e terminam assim
+que a condição é satisfeita. As políticas abaixo controlam apenas as pausas
+propositais entre ações, e se adaptam: desaceleram quando um bloqueio é
+detectado e aceleram aos poucos enquanto as buscas correm bem.
+
+AdaptiveConcurrency aplica a mesma ideia ao número de ações simultâneas
+(abas de detalhes de um navegador, no motor CDP).
+"""
+import asyncio
+import random
+import threading
+import time
+from typing import Dict
+
+
+class PacingPolicy:
+    """Política base: pausa fixa multiplicada por um fator adaptativo."""
+
+    def __init__(
+        self,
+        min_multiplier: float = 0.5,
+        max_multiplier: float = 8.0,
+        backoff_factor: float = 2.0,
+        speedup_factor: float = 0.9,
+        successes_to_speedup: int = 10
+    ):
+        """
+        Inicializa a política.
+
+        Args:
+            min_multiplier: Menor fator aplicado às pausas (mais rápido)
+            max_multiplier: Maior fator aplicado às pausas (mais lento)
+            backoff_factor: Quanto o fator cresce a cada bloqueio
+            speedup_factor: Quanto o fator diminui após uma sequência de sucessos
+            successes_to_speedup: Sucessos seguidos necessários para acelerar
+        """
+        self.min_multiplier = min_multiplier
+        self.max_multiplier = max_multiplier
+        self.backoff_factor = backoff_factor
+        self.speedup_factor = speedup_factor
+        self.successes_to_speedup = successes_to_speedup
+        self.multiplier = 1.0
+        self.throttle_seconds = 0.0
+        self.blocks = 0
+        self._consecutive_successes = 0
+        self._lock = threading.Lock()
+
+    def base_delay(self) -> float:
+        """Pausa base (segundos) antes de aplicar o fator adaptativo."""
+        return 0.0
+
+    def next_delay(self) -> float:
+        """
+        Calcula a próxima pausa.
+
+        Returns:
+            Tempo de pausa em segundos
+        """
+        return self.base_delay() * self.multiplier
+
+    def throttle(self) -> float:
+        """
+        Executa a pausa anti-bloqueio e contabiliza o tempo gasto.
+
+        Returns:
+            Tempo efetivamente pausado (segundos)
+        """
+        delay = self.next_delay()
+        if delay > 0:
+            time.sleep(delay)
+        with self._lock:
+            self.throttle_seconds += delay
+        return delay
+
+    async def throttle_async(self) -> float:
+        """Mesmo que throttle, sem bloquear o laço de eventos (motor CDP)."""
+        delay = self.next_delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        with self._lock:
+            self.throttle_seconds += delay
+        return delay
+
+    def on_success(self):
+        """Registra uma ação bem-sucedida (acelera após vários sucessos seguidos)."""
+        with self._lock:
+            self._consecutive_successes += 1
+            if self._consecutive_successes >= self.successes_to_speedup:
+                self._consecutive_successes = 0
+                self.multiplier = max(self.min_multiplier, self.multiplier * self.speedup_factor)
+
+    def on_block(self):
+        """Registra um bloqueio detectado (desacelera imediatamente)."""
+        with self._lock:
+            self.blocks += 1
+            self._consecutive_successes = 0
+            self.multiplier = min(self.max_multiplier, self.multiplier * self.backoff_factor)
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Retorna as estatísticas da política.
+
+        Returns:
+            Dicionário com tempo pausado, fator atual e bloqueios
+        """
+        return {
+            'tempo_throttle': round(self.throttle_seconds, 2),
+            'fator_ritmo': round(self.multiplier, 2),
+            'bloqueios': self.blocks
+        }
+
+
+class FixedPacing(PacingPolicy):
+    """Pausa sempre do mesmo tamanho."""
+
+    def __init__(self, delay: float = 2.0, **kwargs):
+        """
+        Args:
+            delay: Pausa base (segundos)
+        """
+        super().__init__(**kwargs)
+        self.delay = delay
+
+    def base_delay(self) -> float:
+        return self.delay
+
+
+class JitterPacing(PacingPolicy):
+    """Pausa aleatória dentro de um intervalo (comportamento original do scraper)."""
+
+    def __init__(self, min_delay: float = 1.0, max_delay: float = 3.0, **kwargs):
+        """
+        Args:
+            min_delay: Menor pausa base (segundos)
+            max_delay: Maior pausa base (segundos)
+        """
+        super().__init__(**kwargs)
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+
+    def base_delay(self) -> float:
+        return random.uniform(self.min_delay, self.max_delay)
+
+
+class TokenBucketPacing(PacingPolicy):
+    """
+    Limita a taxa de ações por sessão com um balde de fichas.
+
+    Enquanto houver fichas, as ações seguem sem pausa; quando o balde esvazia,
+    espera-se o tempo necessário para a próxima ficha. O fator adaptativo
+    reduz a taxa de reposição.
+    """
+
+    def __init__(self, rate: float = 0.5, capacity: int = 5, **kwargs):
+        """
+        Args:
+            rate: Fichas repostas por segundo (ações por segundo em regime)
+            capacity: Máximo de fichas acumuladas (rajada permitida)
+        """
+        super().__init__(**kwargs)
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last_refill = time.monotonic()
+
+    def next_delay(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            effective_rate = self.rate / self.multiplier
+            self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * effective_rate)
+            self._last_refill = now
+            # Consome a ficha agora; se faltar, o saldo negativo é a espera
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / effective_rate
+
+
+class AdaptiveConcurrency:
+    """
+    Limite adaptativo de ações simultâneas (ex: abas de detalhes de um navegador).
+
+    A cada successes_to_adjust sucessos o limite é revisto: cresce uma unidade
+    se a latência média continua perto da melhor já observada, e diminui uma
+    unidade se passou de latency_tolerance vezes a melhor (as abas estão
+    disputando o mesmo navegador e cada uma ficou mais lenta). Um bloqueio
+    corta o limite pela metade na hora. No limite mínimo, a latência atual
+    vira a referência, então uma rede mais lenta não trava o limite em 1.
+    """
+
+    def __init__(
+        self,
+        max_limit: int = 4,
+        initial: int = 1,
+        min_limit: int = 1,
+        successes_to_adjust: int = 5,
+        latency_tolerance: float = 1.5,
+        smoothing: float = 0.3
+    ):
+        """
+        Args:
+            max_limit: Maior número de ações simultâneas
+            initial: Limite inicial
+            min_limit: Menor limite
+            successes_to_adjust: Sucessos entre duas revisões do limite
+            latency_tolerance: Quanto a latência média pode passar da melhor
+            smoothing: Peso de cada amostra na média móvel exponencial da latência
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(max(initial, self.min_limit), self.max_limit)
+        self.successes_to_adjust = successes_to_adjust
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+        self.latency = None
+        self.best_latency = None
+        self.blocks = 0
+        self._samples = 0
+        self._lock = threading.Lock()
+
+    def on_success(self, latency: float) -> int:
+        """
+        Registra uma ação concluída e a sua duração.
+
+        Returns:
+            O limite (possivelmente ajustado)
+        """
+        with self._lock:
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += self.smoothing * (latency - self.latency)
+            if self.best_latency is None or self.limit == self.min_limit:
+                self.best_latency = self.latency
+            else:
+                self.best_latency = min(self.best_latency, self.latency)
+
+            self._samples += 1
+            if self._samples >= self.successes_to_adjust:
+                self._samples = 0
+                previous = self.limit
+                if self.latency > self.best_latency * self.latency_tolerance:
+                    self.limit = max(self.min_limit, self.limit - 1)
+                else:
+                    self.limit = min(self.max_limit, self.limit + 1)
+                if self.limit != previous:
+                    # A próxima revisão mede só o novo limite
+                    self.latency = None
+            return self.limit
+
+    def on_block(self) -> int:
+        """Registra um bloqueio (o limite cai pela metade)."""
+        with self._lock:
+            self.blocks += 1
+            self._samples = 0
+            self.latency = None
+            self.limit = max(self.min_limit, self.limit // 2)
+            return self.limit
+
+    def get_stats(self) -> Dict[str, float]:
+        """Limite atual, limite máximo e latências médias (segundos)."""
+        return {
+            'limite': self.limit,
+            'limite_max': self.max_limit,
+            'latencia_media': round(self.latency or 0.0, 3),
+            'melhor_latencia': round(self.best_latency or 0.0, 3),
+            'bloqueios': self.blocks
+        }
+
+
+PACING_POLICIES = {
+    'fixo': FixedPacing,
+    'aleatorio': JitterPacing,
+    'token_bucket': TokenBucketPacing
+}
+
+
+def create_pacing(name: str = 'aleatorio', **kwargs) -> PacingPolicy:
+    """
+    Cria uma política de ritmo pelo nome.
+
+    Args:
+        name: 'fixo', 'aleatorio' ou 'token_bucket'
+        **kwargs: Parâmetros repassados ao construtor da política
+
+    Returns:
+        Instância da política escolhida
+    """
+    if name not in PACING_POLICIES:
+        raise ValueError(f"Política de ritmo desconhecida: {name} (opções: {', '.join(PACING_POLICIES)})")
+    return PACING_POLICIES[name](**kwargs)
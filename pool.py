@@ -0,0 +1,288 @@
+"""
+Módulo com o pool de workers para executar buscas em paralelo.
+
+Cada worker possui o seu próprio GoogleMapsScraper (um navegador) e consome
+pares (nicho, cidade) de uma fila compartilhada. Os resultados voltam por uma
+única fila thread-safe e são processados apenas pela thread que chamou run(),
+que é a única responsável por gravar os arquivos de saída.
+
+Um job interrompido por CAPTCHA/bloqueio (SessionBlockedError) volta para o
+fim da fila, já com uma sessão nova no worker, em vez de ser concluído sem
+resultados. Um job que falhou por outro erro volta para a fila depois da
+espera da política de retry (backoff exponencial com jitter), sem ocupar o
+worker, que segue com os outros jobs. Esgotadas as tentativas, o erro é
+reportado como RetriesExhaustedError.
+"""
+import heapq
+import itertools
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from retry import JOB_RETRY, RetriesExhaustedError, RetryPolicy
+from scraper import GoogleMapsScraper, SessionBlockedError
+
+# Job na fila: (nicho, cidade, tentativas após bloqueio, tentativas após erro)
+_Job = Tuple[str, Union[str, Dict], int, int]
+
+
+class ScrapingPool:
+    """Pool de N navegadores que processam pares (nicho, cidade) em paralelo."""
+
+    def __init__(
+        self,
+        num_workers: int = 1,
+        scraper_factory: Optional[Callable[[], GoogleMapsScraper]] = None,
+        pause_between_jobs: float = 0,
+        max_block_retries: int = 3,
+        retry_policy: Optional[RetryPolicy] = None
+    ):
+        """
+        Inicializa o pool.
+
+        Args:
+            num_workers: Número de navegadores (workers) simultâneos
+            scraper_factory: Função que cria um novo GoogleMapsScraper para cada worker
+            pause_between_jobs: Pausa fixa extra (segundos) de cada worker entre
+                duas buscas; o ritmo normal é controlado pela política de cada scraper
+            max_block_retries: Vezes que um job bloqueado volta para a fila antes
+                de ser reportado como erro
+            retry_policy: Tentativas e espera entre elas para jobs que falharam
+                (padrão: retry.JOB_RETRY)
+        """
+        self.num_workers = max(1, num_workers)
+        self.scraper_factory = scraper_factory or GoogleMapsScraper
+        self.pause_between_jobs = pause_between_jobs
+        self.max_block_retries = max_block_retries
+        self.retry_policy = retry_policy or JOB_RETRY
+        self.requeued = 0
+        self.retried = 0
+        self.scrapers: List[GoogleMapsScraper] = []
+        self._scrapers_lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    @property
+    def is_running(self) -> bool:
+        """Indica se o pool ainda não recebeu pedido de parada."""
+        return not self._stop_event.is_set()
+
+    def stop(self):
+        """Pede para os workers pararem após a busca atual."""
+        self._stop_event.set()
+
+    def _next_job(self, jobs: "queue.Queue", delayed: List, delayed_lock: threading.Lock) -> Optional[_Job]:
+        """
+        Próximo job: um retry cuja espera acabou, senão o próximo da fila.
+
+        Se só restam retries aguardando, espera o primeiro (ou o pedido de parada).
+
+        Returns:
+            O job, ou None quando não há mais nada a fazer
+        """
+        while not self._stop_event.is_set():
+            with delayed_lock:
+                if delayed and delayed[0][0] <= time.monotonic():
+                    return heapq.heappop(delayed)[2]
+                next_due = delayed[0][0] if delayed else None
+            try:
+                return jobs.get_nowait()
+            except queue.Empty:
+                pass
+            if next_due is None:
+                return None
+            self._stop_event.wait(min(max(next_due - time.monotonic(), 0), 1.0))
+        return None
+
+    def _worker(
+        self,
+        jobs: "queue.Queue",
+        delayed: List,
+        delayed_lock: threading.Lock,
+        sequence: Iterable[int],
+        results: "queue.Queue",
+        task: Callable[[GoogleMapsScraper, str, Union[str, Dict]], object],
+        on_job_start: Optional[Callable[[str, str], None]] = None
+    ):
+        """Loop de um worker: pega jobs da fila até ela esvaziar ou o pool parar."""
+        scraper = None
+        try:
+            while not self._stop_event.is_set():
+                job = self._next_job(jobs, delayed, delayed_lock)
+                if job is None:
+                    break
+                nicho, cidade, blocks, failures = job
+
+                if scraper is None:
+                    scraper = self.scraper_factory()
+                    with self._scrapers_lock:
+                        self.scrapers.append(scraper)
+
+                try:
+                    if on_job_start:
+                        on_job_start(nicho, cidade)
+                    records = task(scraper, nicho, cidade)
+                    results.put((nicho, cidade, records, None))
+                except SessionBlockedError as e:
+                    if blocks >= self.max_block_retries:
+                        results.put((nicho, cidade, [], RetriesExhaustedError(blocks + 1, e)))
+                    elif not self._stop_event.is_set():
+                        # Volta para a fila; se o pool parou, o job fica em aberto para a retomada
+                        with self._scrapers_lock:
+                            self.requeued += 1
+                        scraper.metrics.incr('jobs_reenfileirados', motivo=e.state)
+                        print(f"🔁 Job reenfileirado após {e.state} ({blocks + 1}/{self.max_block_retries}): {e.query}")
+                        jobs.put((nicho, cidade, blocks + 1, failures))
+                except Exception as e:
+                    attempt = failures + 1
+                    if not self.retry_policy.can_retry(attempt):
+                        results.put((nicho, cidade, [], RetriesExhaustedError(attempt, e)))
+                    elif self._stop_event.is_set():
+                        results.put((nicho, cidade, [], e))
+                    else:
+                        # Agenda o retry sem prender o worker durante a espera
+                        delay = self.retry_policy.delay(attempt)
+                        with self._scrapers_lock:
+                            self.retried += 1
+                        scraper.metrics.incr('retentativas', nivel='job')
+                        nome = cidade['nome'] if isinstance(cidade, dict) else cidade
+                        print(f"↻ {nicho} em {nome}: {e} — nova tentativa em {delay:.0f}s "
+                              f"({attempt + 1}/{self.retry_policy.max_attempts})")
+                        with delayed_lock:
+                            heapq.heappush(delayed, (time.monotonic() + delay, next(sequence),
+                                                     (nicho, cidade, blocks, attempt)))
+
+                # Pausa fixa opcional entre buscas
+                if self.pause_between_jobs and not self._stop_event.is_set():
+                    time.sleep(self.pause_between_jobs)
+        finally:
+            if scraper:
+                try:
+                    scraper.close()
+                except Exception:
+                    pass
+
+    def run(
+        self,
+        pairs: Iterable[Tuple[str, Union[str, Dict]]],
+        on_job_done: Callable[[str, Union[str, Dict], List[Dict[str, str]], Optional[Exception]], None],
+        on_job_start: Optional[Callable[[str, Union[str, Dict]], None]] = None,
+        task: Optional[Callable[[GoogleMapsScraper, str, Union[str, Dict]], object]] = None
+    ) -> int:
+        """
+        Processa todos os pares e bloqueia até terminar ou ser parado.
+
+        on_job_done é chamado sempre na thread que chamou run(), um job por
+        vez, então pode gravar arquivos sem precisar de lock. on_job_start,
+        ao contrário, é chamado na thread de cada worker (também a cada nova
+        tentativa do job).
+
+        Args:
+            pairs: Pares (nicho, cidade) a processar; cidade pode ser o nome ou
+                o município do IBGE ({'id', 'nome', 'uf'}), como em scrape_nicho_cidade
+            on_job_done: Callback (nicho, cidade, resultados, erro) de cada job;
+                erro é RetriesExhaustedError quando as tentativas acabaram
+            on_job_start: Callback (nicho, cidade) chamado quando um worker
+                começa um job; precisa ser thread-safe
+            task: Função (scraper, nicho, cidade) executada em cada job; o
+                retorno é repassado como resultados (padrão: scrape_nicho_cidade)
+
+        Returns:
+            Número de jobs concluídos
+        """
+        task = task or (lambda scraper, nicho, cidade: scraper.scrape_nicho_cidade(nicho, cidade))
+        jobs = queue.Queue()
+        for nicho, cidade in pairs:
+            jobs.put((nicho, cidade, 0, 0))
+        total = jobs.qsize()
+
+        # Retries aguardando a espera: heap de (horário, sequência, job)
+        delayed = []
+        delayed_lock = threading.Lock()
+        sequence = itertools.count()
+
+        results = queue.Queue()
+        threads = [
+            threading.Thread(
+                target=self._worker,
+                args=(jobs, delayed, delayed_lock, sequence, results, task, on_job_start),
+                daemon=True
+            )
+            for _ in range(min(self.num_workers, total))
+        ]
+        for thread in threads:
+            thread.start()
+
+        done = 0
+        while done < total:
+            try:
+                nicho, cidade, records, error = results.get(timeout=0.5)
+            except queue.Empty:
+                # Todos os workers terminaram (fila vazia ou pool parado)
+                if not any(thread.is_alive() for thread in threads) and results.empty():
+                    break
+                continue
+            done += 1
+            on_job_done(nicho, cidade, records, error)
+
+        for thread in threads:
+            thread.join()
+
+        return done
+
+    def close(self):
+        """Para o pool e fecha todos os navegadores abertos."""
+        self.stop()
+        with self._scrapers_lock:
+            scrapers = list(self.scrapers)
+        for scraper in scrapers:
+            try:
+                scraper.close()
+            except Exception:
+                pass
+
+    def get_session_stats(self) -> Dict[str, float]:
+        """
+        Soma as estatísticas de sessão de todos os workers.
+
+        Returns:
+            Dicionário no mesmo formato de GoogleMapsScraper.get_session_stats
+        """
+        stats = {
+            'buscas': 0,
+            'inicializacoes': 0,
+            'reinicios': {},
+            'tempo_medio_inicializacao': 0.0,
+            'tempo_economizado': 0.0,
+            'tempo_espera': 0.0,
+            'tempo_throttle': 0.0,
+            'bytes_transferidos': 0,
+            'estados_pagina': {},
+            'bloqueios': 0,
+            'taxa_bloqueio': 0.0,
+            'jobs_reenfileirados': self.requeued,
+            'retentativas': self.retried
+        }
+        with self._scrapers_lock:
+            scrapers = list(self.scrapers)
+        for scraper in scrapers:
+            worker_stats = scraper.get_session_stats()
+            stats['buscas'] += worker_stats['buscas']
+            stats['inicializacoes'] += worker_stats['inicializacoes']
+            stats['bytes_transferidos'] += worker_stats['bytes_transferidos']
+            stats['bloqueios'] += worker_stats['bloqueios']
+            for key in ('tempo_economizado', 'tempo_espera', 'tempo_throttle'):
+                stats[key] += worker_stats[key]
+            for reason, count in worker_stats['reinicios'].items():
+                stats['reinicios'][reason] = stats['reinicios'].get(reason, 0) + count
+            for state, count in worker_stats['estados_pagina'].items():
+                stats['estados_pagina'][state] = stats['estados_pagina'].get(state, 0) + count
+        if scrapers:
+            stats['tempo_medio_inicializacao'] = round(
+                sum(s.get_session_stats()['tempo_medio_inicializacao'] for s in scrapers) / len(scrapers), 2
+            )
+        for key in ('tempo_economizado', 'tempo_espera', 'tempo_throttle'):
+            stats[key] = round(stats[key], 2)
+        if stats['buscas']:
+            stats['taxa_bloqueio'] = round(stats['bloqueios'] / stats['buscas'], 3)
+        return stats
@@ -0,0 +1,463 @@
+"""
+Módulo com o arquivo de resultados incremental da coleta.
+
+Cada registro é acrescentado em uma linha JSON (JSONL) assim que chega, sem
+reescrever o que já foi salvo. A gravação em disco (fsync) é feita em lotes,
+a cada N registros ou T segundos. A planilha .xlsx só é montada a partir
+deste arquivo ao final da coleta ou na exportação.
+
+Para exportar e retomar coletas grandes, os registros também ficam em um
+ResultStore: colunas tipadas (nicho/cidade/UF categóricos, números inteiros e
+decimais anuláveis, ausente em vez de 'Não informado'), acrescentadas em
+blocos, sem copiar o que já existe. Com o pyarrow instalado, o store é salvo
+ao lado do JSONL em Parquet (<saída>.parquet) e a próxima execução só lê do
+JSONL as linhas gravadas depois dele; as exportações aceitam também .parquet
+e .arrow/.feather.
+"""
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+from normalization import NOT_INFORMED, normalize_dataframe
+
+# Colunas exportadas, na ordem da planilha, com o título de cada uma
+EXPORT_COLUMNS = ['nicho', 'cidade', 'uf', 'ibge_id', 'nome', 'endereco', 'telefone', 'telefone_e164', 'avaliacao', 'num_avaliacoes']
+EXPORT_LABELS = ['Nicho', 'Cidade', 'UF', 'Código IBGE', 'Nome da Empresa', 'Endereço', 'Telefone', 'Telefone (E.164)', 'Avaliação', 'Nº de Avaliações']
+
+# Tipos das colunas na forma compacta (ResultStore, Parquet e Arrow)
+COMPACT_DTYPES = {
+    'nicho': 'category',
+    'cidade': 'category',
+    'uf': 'category',
+    'ibge_id': 'Int64',
+    'nome': 'string',
+    'endereco': 'string',
+    'telefone': 'string',
+    'telefone_e164': 'string',
+    'avaliacao': 'Float64',
+    'num_avaliacoes': 'Int64',
+    'url': 'string',
+    'chave_empresa': 'string'
+}
+
+# Campos acrescentados por normalization.normalize_record
+NORMALIZED_FIELDS = frozenset(('telefone_e164', 'avaliacao_valor', 'num_avaliacoes_valor'))
+
+# Formatos colunares (exigem o pyarrow)
+COLUMNAR_EXTENSIONS = ('.parquet', '.arrow', '.feather')
+
+# Chave dos metadados do Parquet com o tamanho do JSONL coberto pelo snapshot
+SNAPSHOT_OFFSET_KEY = b'jsonl_bytes'
+
+
+def compact_dataframe(records):
+    """
+    Converte registros para a forma compacta (colunas de COMPACT_DTYPES).
+
+    Registros que ainda não passaram por normalize_record (ex: coletas
+    antigas) passam por normalize_dataframe: endereço/telefone são
+    reclassificados e avaliação e número de avaliações viram números.
+    'Não informado' vira ausente (<NA>).
+
+    Args:
+        records: Registros da coleta (lista de dicionários ou DataFrame)
+
+    Returns:
+        pandas.DataFrame tipado
+    """
+    import pandas as pd
+
+    if isinstance(records, pd.DataFrame):
+        df = normalize_dataframe(records)
+    else:
+        records = list(records)
+        df = pd.DataFrame(records)
+        if not records or not all(NORMALIZED_FIELDS <= record.keys() for record in records):
+            df = normalize_dataframe(df)
+    df['avaliacao'] = df['avaliacao_valor']
+    df['num_avaliacoes'] = df['num_avaliacoes_valor']
+    compact = pd.DataFrame(index=df.index)
+    for col, dtype in COMPACT_DTYPES.items():
+        values = df[col] if col in df.columns else pd.Series(None, index=df.index, dtype=object)
+        if dtype == 'Int64':
+            values = pd.to_numeric(values, errors='coerce').round()
+        elif dtype != 'Float64':
+            values = values.where(values.notna() & (values != NOT_INFORMED), None)
+        compact[col] = values.astype(dtype)
+    return compact.reset_index(drop=True)
+
+
+def records_to_dataframe(records, tags_lookup: Optional[Callable[[str], str]] = None):
+    """
+    Monta o DataFrame de exportação (colunas ordenadas e renomeadas).
+
+    A avaliação volta para o formato da página ('4,6') e o telefone E.164
+    fica como texto, para a planilha não tratar '+55...' como número.
+
+    Args:
+        records: Registros da coleta, ou um DataFrame já compacto (compact_dataframe)
+        tags_lookup: Se informado, acrescenta a coluna 'Buscas' com o texto
+            retornado para a 'chave_empresa' de cada registro
+
+    Returns:
+        pandas.DataFrame com as colunas de EXPORT_LABELS
+    """
+    import pandas as pd
+
+    df = _with_tags(_as_compact(records), tags_lookup).copy()
+    # Planilhas mostram 'Não informado' nos campos de texto ausentes
+    for col in ('nicho', 'cidade', 'uf', 'nome', 'endereco', 'telefone'):
+        df[col] = df[col].astype(object).where(df[col].notna(), NOT_INFORMED)
+    df['avaliacao'] = [f"{valor:.1f}".replace('.', ',') if pd.notna(valor) else NOT_INFORMED
+                       for valor in df['avaliacao']]
+    df['telefone_e164'] = df['telefone_e164'].astype(object).where(df['telefone_e164'].notna(), '')
+    columns, labels = EXPORT_COLUMNS, EXPORT_LABELS
+    if tags_lookup:
+        columns, labels = columns + ['buscas'], labels + ['Buscas']
+    df = df[columns]
+    df.columns = labels
+    return df
+
+
+def _as_compact(records):
+    import pandas as pd
+
+    if isinstance(records, pd.DataFrame) and list(records.columns) == list(COMPACT_DTYPES):
+        return records
+    return compact_dataframe(records)
+
+
+def _with_tags(df, tags_lookup: Optional[Callable[[str], str]]):
+    if not tags_lookup:
+        return df
+    df = df.copy()
+    df['buscas'] = [tags_lookup(chave) if isinstance(chave, str) else '' for chave in df['chave_empresa']]
+    return df
+
+
+def has_pyarrow() -> bool:
+    """Indica se o pyarrow (Parquet/Arrow) está instalado."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _require_pyarrow():
+    if not has_pyarrow():
+        raise RuntimeError("Exportar em Parquet/Arrow requer o pacote pyarrow (pip install pyarrow)")
+
+
+def export_records(records, file_path: str, tags_lookup: Optional[Callable[[str], str]] = None) -> int:
+    """
+    Exporta registros conforme a extensão: Excel (.xlsx), CSV, Parquet
+    (.parquet) ou Arrow IPC (.arrow/.feather).
+
+    Planilhas usam os títulos de EXPORT_LABELS e 'Não informado'; os formatos
+    colunares guardam a forma compacta, com os nomes dos campos e tipos.
+
+    Args:
+        records: Registros da coleta, ou um DataFrame já compacto
+        file_path: Caminho do arquivo de saída
+        tags_lookup: Ver records_to_dataframe
+
+    Returns:
+        Número de registros exportados
+    """
+    if file_path.endswith(COLUMNAR_EXTENSIONS):
+        _require_pyarrow()
+        df = _with_tags(_as_compact(records), tags_lookup)
+        if file_path.endswith('.parquet'):
+            df.to_parquet(file_path, index=False)
+        else:
+            df.to_feather(file_path)
+        return len(df)
+
+    df = records_to_dataframe(records, tags_lookup)
+    if file_path.endswith('.xlsx'):
+        _write_excel(df, file_path)
+    else:
+        df.to_csv(file_path, index=False, encoding='utf-8-sig')
+    return len(df)
+
+
+def _write_excel(df, file_path: str):
+    """Grava a planilha com a coluna do telefone E.164 no formato texto."""
+    import pandas as pd
+
+    with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False)
+        sheet = next(iter(writer.sheets.values()))
+        column = df.columns.get_loc(EXPORT_LABELS[EXPORT_COLUMNS.index('telefone_e164')]) + 1
+        for (cell,) in sheet.iter_rows(min_row=2, min_col=column, max_col=column):
+            cell.number_format = '@'
+
+
+class ResultStore:
+    """Resultados em colunas tipadas, guardados em blocos (acréscimo sem copiar o que já existe)."""
+
+    # Registros acumulados antes de virarem um bloco tipado (conversão vetorizada)
+    BLOCK_ROWS = 5000
+    # Blocos acumulados antes de juntá-los em um só
+    MAX_CHUNKS = 64
+
+    def __init__(self, df=None):
+        """
+        Args:
+            df: DataFrame compacto inicial (ex: lido do Parquet)
+        """
+        self._chunks = [df] if df is not None and len(df) else []
+        self._pending: List[Dict] = []
+        self._rows = sum(len(chunk) for chunk in self._chunks)
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def append(self, records: List[Dict]):
+        """Acrescenta registros (convertidos em blocos de BLOCK_ROWS)."""
+        self._pending.extend(records)
+        self._rows += len(records)
+        if len(self._pending) >= self.BLOCK_ROWS:
+            self._compact_pending()
+
+    def _compact_pending(self):
+        if not self._pending:
+            return
+        self._chunks.append(compact_dataframe(self._pending))
+        self._pending = []
+        if len(self._chunks) > self.MAX_CHUNKS:
+            self._consolidate()
+
+    def _consolidate(self):
+        import pandas as pd
+
+        self._compact_pending()
+        if len(self._chunks) <= 1:
+            return
+        df = pd.concat(self._chunks, ignore_index=True)
+        # Categorias diferentes entre blocos voltam a ser categóricas depois do concat
+        for col, dtype in COMPACT_DTYPES.items():
+            if dtype == 'category' and df[col].dtype != 'category':
+                df[col] = df[col].astype('category')
+        self._chunks = [df]
+
+    def to_dataframe(self):
+        """
+        Todos os registros em um único DataFrame compacto (não altere o retorno).
+
+        Returns:
+            pandas.DataFrame com as colunas de COMPACT_DTYPES
+        """
+        self._consolidate()
+        return self._chunks[0] if self._chunks else compact_dataframe([])
+
+
+class ResultsSink:
+    """Arquivo JSONL só de acréscimo, com fsync em lotes."""
+
+    def __init__(self, path: str, flush_every: int = 50, flush_interval: float = 5.0):
+        """
+        Abre (ou cria) o arquivo de resultados.
+
+        Args:
+            path: Caminho do arquivo .jsonl
+            flush_every: Registros acumulados que disparam um fsync
+            flush_interval: Segundos desde o último fsync que disparam outro
+        """
+        self.path = path
+        self.snapshot_path = os.path.splitext(path)[0] + '.parquet'
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        # Forma compacta, carregada na primeira vez que é pedida (dataframe())
+        self._store: Optional[ResultStore] = None
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        if os.path.exists(path) and os.path.getsize(path) and not self._ends_with_newline():
+            # Registro cortado por uma gravação interrompida: não tem como ser lido, é descartado
+            self._drop_partial_line()
+        # Registros já existentes (ao continuar uma coleta)
+        self.count = sum(1 for _ in self._iter_lines()) if os.path.exists(path) else 0
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def _drop_partial_line(self):
+        """Corta o arquivo logo depois do último '\\n'."""
+        with open(self.path, 'rb+') as f:
+            end = f.seek(0, os.SEEK_END)
+            while end > 0:
+                start = max(end - 65536, 0)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b'\n')
+                if newline >= 0:
+                    f.truncate(start + newline + 1)
+                    return
+                end = start
+            f.truncate(0)
+
+    def _iter_lines(self) -> Iterator[str]:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield line
+
+    def append(self, records: List[Dict]):
+        """
+        Acrescenta registros ao arquivo.
+
+        Args:
+            records: Registros a gravar
+        """
+        if not records:
+            return
+        with self._lock:
+            for record in records:
+                self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            if self._store is not None:
+                self._store.append(records)
+            self.count += len(records)
+            self._pending += len(records)
+            if (self._pending >= self.flush_every
+                    or time.monotonic() - self._last_sync >= self.flush_interval):
+                self._sync()
+
+    def _sync(self):
+        """Grava o buffer no disco (chamado com o lock adquirido)."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def flush(self):
+        """Força a gravação em disco dos registros pendentes."""
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+
+    def close(self):
+        """Grava o que falta, atualiza o Parquet (com o pyarrow instalado) e fecha o arquivo."""
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
+            if self.count and has_pyarrow():
+                if self._store is None:
+                    self._store = self._load_store()
+                self._save_snapshot()
+
+    def dataframe(self):
+        """
+        Todos os registros na forma compacta (ver ResultStore).
+
+        Na primeira chamada lê o Parquet salvo pela execução anterior (se
+        houver) e só as linhas do JSONL gravadas depois dele; as seguintes
+        reaproveitam o store, atualizado a cada append.
+
+        Returns:
+            pandas.DataFrame com as colunas de COMPACT_DTYPES
+        """
+        with self._lock:
+            if self._store is None:
+                if not self._file.closed:
+                    self._sync()
+                self._store = self._load_store()
+            return self._store.to_dataframe()
+
+    def _load_store(self) -> ResultStore:
+        """Monta o store a partir do Parquet + restante do JSONL (chamado com o lock adquirido)."""
+        snapshot, offset = self._read_snapshot()
+        store = ResultStore(snapshot)
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            records = []
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # Linha incompleta de uma gravação interrompida
+                    continue
+        store.append(records)
+        return store
+
+    def _read_snapshot(self):
+        """Lê o Parquet, se existir e ainda corresponder ao JSONL; retorna (DataFrame ou None, bytes cobertos)."""
+        if not os.path.exists(self.snapshot_path):
+            return None, 0
+        try:
+            import pyarrow.parquet as pq
+            table = pq.read_table(self.snapshot_path)
+            offset = int((table.schema.metadata or {}).get(SNAPSHOT_OFFSET_KEY, -1))
+            df = table.to_pandas()
+        except (ImportError, OSError, ValueError) as e:
+            print(f"⚠️ Ignorando {self.snapshot_path}: {e}")
+            return None, 0
+        if not 0 <= offset <= os.path.getsize(self.path) or list(df.columns) != list(COMPACT_DTYPES):
+            # Parquet de outro arquivo ou de uma versão anterior: relê tudo do JSONL
+            return None, 0
+        return df, offset
+
+    def _save_snapshot(self):
+        """Grava o store em Parquet, marcando até que byte do JSONL ele cobre (chamado com o lock adquirido)."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(self._store.to_dataframe(), preserve_index=False)
+        # Offset nos metadados do esquema do Parquet (df.attrs depende da versão do pandas)
+        metadata = dict(table.schema.metadata or {})
+        metadata[SNAPSHOT_OFFSET_KEY] = str(os.path.getsize(self.path)).encode()
+        table = table.replace_schema_metadata(metadata)
+        tmp_path = self.snapshot_path + '.tmp'
+        try:
+            pq.write_table(table, tmp_path)
+            os.replace(tmp_path, self.snapshot_path)
+        except (OSError, ValueError, pa.ArrowException) as e:
+            print(f"Erro ao gravar {self.snapshot_path}: {e}")
+
+    def read_all(self) -> Iterator[Dict]:
+        """
+        Lê todos os registros gravados até agora.
+
+        Returns:
+            Iterador de registros, na ordem em que foram gravados
+        """
+        self.flush()
+        for line in self._iter_lines():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # Linha incompleta de uma gravação interrompida
+                continue
+
+    def export(self, file_path: str, tags_lookup: Optional[Callable[[str], str]] = None) -> int:
+        """
+        Exporta todos os registros do arquivo (ver export_records).
+
+        Args:
+            file_path: Caminho do arquivo de saída (.xlsx, .csv, .parquet, .arrow ou .feather)
+            tags_lookup: Ver records_to_dataframe
+
+        Returns:
+            Número de registros exportados
+        """
+        return export_records(self.dataframe(), file_path, tags_lookup)
+
+    @staticmethod
+    def path_for(save_file: str) -> str:
+        """
+        Caminho do arquivo JSONL correspondente a uma planilha de resultados.
+
+        Args:
+            save_file: Caminho da planilha (ex: output/resultados_X.xlsx)
+        """
+        return os.path.splitext(save_file)[0] + '.jsonl'
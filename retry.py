@@ -0,0 +1,67 @@
+"""
+Módulo com as políticas de nova tentativa (retry) da coleta.
+
+Erros passageiros (timeout, navegador que caiu, página que não abriu) não
+devem perder dados. Há dois níveis:
+
+- job: um par (nicho, cidade) que falhou volta para a fila do pool depois de
+  uma espera crescente; esgotadas as tentativas, vai para a lista de
+  descartados da tabela de jobs (JobStore), que pode ser reprocessada sozinha
+- resultado: um lugar que não abriu é tentado de novo na hora; esgotadas as
+  tentativas, a URL vai para a lista de lugares descartados do job
+
+A espera é exponencial (base_delay, 2x, 4x...) limitada a max_delay, com uma
+parte aleatória (jitter) para os workers não tentarem todos ao mesmo tempo.
+"""
+import random
+
+
+class RetriesExhaustedError(Exception):
+    """Todas as tentativas falharam; last_error é o erro da última."""
+
+    def __init__(self, attempts: int, last_error: Exception):
+        super().__init__(f"{attempts} tentativa(s) sem sucesso: {last_error}")
+        self.attempts = attempts
+        self.last_error = last_error
+
+
+class RetryPolicy:
+    """Número máximo de tentativas e espera exponencial com jitter entre elas."""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 30.0, max_delay: float = 600.0,
+                 jitter: float = 0.5):
+        """
+        Inicializa a política.
+
+        Args:
+            max_attempts: Total de tentativas, contando a primeira (1 = sem retry)
+            base_delay: Espera (segundos) antes da segunda tentativa
+            max_delay: Maior espera entre duas tentativas
+            jitter: Fração da espera sorteada (0 = espera fixa, 1 = entre 0 e a espera)
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = min(max(jitter, 0.0), 1.0)
+
+    def can_retry(self, attempt: int) -> bool:
+        """Indica se ainda há tentativas depois da tentativa número attempt (1, 2...)."""
+        return attempt < self.max_attempts
+
+    def delay(self, attempt: int) -> float:
+        """
+        Espera antes da próxima tentativa.
+
+        Args:
+            attempt: Número da tentativa que acabou de falhar (1, 2...)
+
+        Returns:
+            Espera em segundos
+        """
+        delay = min(self.base_delay * 2 ** (attempt - 1), self.max_delay)
+        return delay * (1 - self.jitter) + random.uniform(0, delay * self.jitter)
+
+
+# Padrões: jobs esperam mais (a sessão pode estar sendo desacelerada), lugares são tentados logo
+JOB_RETRY = RetryPolicy(max_attempts=3, base_delay=30.0, max_delay=600.0)
+RESULT_RETRY = RetryPolicy(max_attempts=2, base_delay=2.0, max_delay=10.0)
@@ -2,32 +2,302 @@
 Módulo para automação de coleta de dados do Google Maps usando Selenium.
 """
 import time
-import random
-import re
-from typing import List, Dict, Optional
+import json
+import os
+import threading
+from typing import Callable, List, Dict, Optional, Union
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException, StaleElementReferenceException, WebDriverException
+
+from pacing import PacingPolicy, JitterPacing
+from dedup_index import DedupIndex, place_key
+from metrics import Metrics, timed
+from normalization import classify_info_texts, normalize_record
+from retry import RESULT_RETRY, RetryPolicy
+import maps_parser
+
+
+class SessionBlockedError(Exception):
+    """O Google bloqueou a sessão (CAPTCHA ou página de bloqueio) durante a busca."""
+    
+    def __init__(self, state: str, query: str):
+        super().__init__(f"Sessão bloqueada ({state}) em: {query}")
+        self.state = state
+        self.query = query
 
 
 class GoogleMapsScraper:
     """Classe para automatizar a coleta de dados do Google Maps."""
     
-    def __init__(self, headless: bool = False, wait_time: int = 10):
+    # Página inicial (o benchmark offline troca por um servidor local)
+    MAPS_URL = "https://www.google.com/maps"
+    
+    # Trechos que indicam que o Google bloqueou ou interrompeu a sessão
+    BLOCK_MARKERS = [
+        '/sorry/',
+        'unusual traffic',
+        'tráfego incomum',
+    ]
+    
+    # Estados da página depois de uma busca
+    PAGE_OK = 'ok'
+    PAGE_EMPTY = 'vazio'
+    PAGE_CONSENT = 'consentimento'
+    PAGE_CAPTCHA = 'captcha'
+    PAGE_BLOCKED = 'bloqueado'
+    PAGE_STATES = (PAGE_OK, PAGE_EMPTY, PAGE_CONSENT, PAGE_CAPTCHA, PAGE_BLOCKED)
+    
+    # Tela de cookies/consentimento ("Antes de continuar")
+    CONSENT_MARKERS = [
+        'consent.google.',
+        'antes de continuar',
+        'before you continue',
+    ]
+    
+    # Busca sem resultados de verdade (não é bloqueio)
+    NO_RESULTS_MARKERS = [
+        'o google maps não encontrou',
+        "google maps can't find",
+        'nenhum resultado',
+    ]
+    
+    # Pausa após um bloqueio, dobrada a cada bloqueio seguido (segundos)
+    MAX_BLOCK_COOLDOWN = 900
+    
+    # Lê em um único comando o que é preciso para classificar a página
+    PAGE_STATE_JS = """
+        const [feedSelector, detailSelector, resultSelector] = arguments;
+        return {
+            url: location.href,
+            text: document.body ? document.body.innerText.slice(0, 3000) : '',
+            feed: !!document.querySelector(feedSelector),
+            detail: !!document.querySelector(detailSelector),
+            results: document.querySelectorAll(resultSelector).length,
+            captcha: !!document.querySelector(
+                'iframe[src*="recaptcha"], #captcha-form, form#captcha, .g-recaptcha, #recaptcha'),
+            consent: !!document.querySelector('form[action*="consent"]')
+        };
+    """
+    
+    # Clica em "Aceitar tudo" na tela de consentimento
+    ACCEPT_CONSENT_JS = """
+        const labels = ['aceitar tudo', 'accept all', 'concordo', 'i agree'];
+        for (const button of document.querySelectorAll('button, input[type="submit"]')) {
+            const text = (button.innerText || button.value || '').trim().toLowerCase();
+            if (labels.includes(text)) { button.click(); return true; }
+        }
+        return false;
+    """
+    
+    # Seletores usados nas esperas por condição
+    FEED_SELECTOR = "div[role='feed']"
+    RESULT_LINK_SELECTOR = "a.hfpxzc"
+    DETAIL_TITLE_SELECTOR = "h1.DUwDvf"
+    
+    # Requisições bloqueadas no perfil leve (imagens, mídia, fontes e blocos do mapa)
+    LEAN_BLOCKED_URLS = [
+        '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+        '*.mp4', '*.webm', '*.woff', '*.woff2', '*.ttf', '*.otf',
+        '*/maps/vt*', '*/maps/vt/*', '*/kh/v=*', '*khms*.google.com/*',
+        '*googleusercontent.com/p/*', '*streetviewpixels-pa.googleapis.com/*',
+        '*fonts.gstatic.com/*'
+    ]
+    
+    # User-agent de um Chrome comum (o mesmo nos dois motores)
+    USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+    
+    # Tamanho da janela no perfil leve (a lista e o painel continuam visíveis)
+    LEAN_WINDOW_SIZE = (1024, 768)
+    
+    # Formas de abrir o detalhe de cada resultado
+    DETAIL_MODES = ('url', 'clique')
+    
+    # Coleta os links visíveis da lista e rola até o fim em um único comando
+    HARVEST_FEED_JS = """
+        const feed = document.querySelector(arguments[0]);
+        const links = Array.from(document.querySelectorAll(arguments[1])).map(a => [a, a.href]);
+        const text = feed ? feed.innerText.slice(-300).toLowerCase() : '';
+        const reachedEnd = !!document.querySelector('span.HlvSq')
+            || text.includes('final da lista') || text.includes('end of the list');
+        if (feed) { feed.scrollTop = feed.scrollHeight; }
+        return {links: links, end: reachedEnd, hasFeed: !!feed};
+    """
+    
+    # Seletores do painel de detalhes, em ordem de prioridade
+    NAME_SELECTORS = [
+        "h1.DUwDvf.lfPIob",
+        "h1[data-attrid='title']",
+        "h1.DUwDvf",
+        "h1.qrShPb",
+        "h1.x3AX1-LfntMc-header-title-title"
+    ]
+    INFO_SELECTORS = [
+        "div.Io6YTe.fontBodyMedium.kR99db.fdkmkc",
+        "div.Io6YTe.fontBodyMedium",
+        "button[data-item-id='address']",
+        "div[data-item-id='address']"
+    ]
+    RATING_SELECTORS = [
+        "div.F7nice span[aria-hidden='true']",
+        "div.F7nice span[aria-hidden=\"true\"]",
+        "div[class*='F7nice'] span[aria-hidden='true']",
+        "span[aria-hidden='true']"
+    ]
+    REVIEW_COUNT_SELECTORS = [
+        "span[aria-label*='avaliações']",
+        "span[aria-label*='avaliação']",
+        "div.F7nice span[aria-label*='avaliações']",
+        "div.F7nice span[aria-label*='avaliação']"
+    ]
+    
+    # Lê o painel de detalhes inteiro em um único comando.
+    # Só considera texto de elementos visíveis, como o .text do Selenium.
+    EXTRACT_DETAIL_JS = """
+        const [nameSelectors, infoSelectors, ratingSelectors, reviewSelectors] = arguments;
+        const visibleText = el => el.getClientRects().length ? (el.innerText || '').trim() : '';
+        const all = sel => Array.from(document.querySelectorAll(sel));
+        const result = {nome: null, info_texts: [], avaliacao: null, num_avaliacoes: null};
+        
+        for (const sel of nameSelectors) {
+            const el = document.querySelector(sel);
+            const text = el ? visibleText(el) : '';
+            if (text) { result.nome = text; break; }
+        }
+        
+        for (const sel of infoSelectors) {
+            for (const el of all(sel)) {
+                const text = visibleText(el);
+                if (text && !result.info_texts.includes(text)) { result.info_texts.push(text); }
+            }
+        }
+        
+        ratings: for (const sel of ratingSelectors) {
+            for (const el of all(sel)) {
+                const text = visibleText(el);
+                if (text && /^\\d+[,.]?\\d*$/.test(text)) {
+                    result.avaliacao = text.replace('.', ',');
+                    break ratings;
+                }
+            }
+        }
+        
+        reviews: for (const sel of reviewSelectors) {
+            for (const el of all(sel)) {
+                const match = (el.getAttribute('aria-label') || '').match(/(\\d+)/);
+                if (match) { result.num_avaliacoes = match[1]; break reviews; }
+            }
+        }
+        
+        // Sem aria-label: procura o número entre parênteses, ex: "(57)"
+        if (!result.num_avaliacoes) {
+            for (const el of all('div.F7nice span')) {
+                const match = visibleText(el).match(/\\((\\d+)\\)/);
+                if (match) { result.num_avaliacoes = match[1]; break; }
+            }
+        }
+        
+        return result;
+    """
+    
+    def __init__(
+        self,
+        headless: bool = False,
+        wait_time: int = 10,
+        max_searches_per_session: int = 0,
+        pacing: Optional[PacingPolicy] = None,
+        max_results: int = 120,
+        max_idle_scrolls: int = 3,
+        detail_mode: str = 'url',
+        capture_network: bool = False,
+        capture_dir: Optional[str] = None,
+        lean_profile: bool = False,
+        log_transfer: bool = False,
+        dedup_index: Optional[DedupIndex] = None,
+        metrics: Optional[Metrics] = None,
+        block_cooldown: float = 60.0,
+        result_retry: Optional[RetryPolicy] = None
+    ):
         """
         Inicializa o scraper.
         
         Args:
             headless: Se True, executa o navegador em modo headless
             wait_time: Tempo máximo de espera para elementos (segundos)
+            max_searches_per_session: Número de buscas após o qual o navegador
+                é reiniciado (0 = nunca reinicia por contagem)
+            pacing: Política de pausas anti-bloqueio (padrão: pausa aleatória)
+            max_results: Máximo de resultados coletados por busca (0 = sem limite)
+            max_idle_scrolls: Rolagens seguidas sem itens novos antes de desistir
+            detail_mode: 'url' abre a página de cada lugar pelo link;
+                'clique' clica em cada resultado da lista
+            capture_network: Se True, lê os lugares das respostas de rede do
+                Maps (log de performance do Chrome) em vez de abrir cada resultado;
+                se nenhuma resposta for reconhecida, usa o detail_mode
+            capture_dir: Pasta onde salvar as respostas capturadas (para
+                desenvolver o parser offline); None não salva
+            lean_profile: Se True, bloqueia imagens, mídia, fontes e blocos do
+                mapa e usa uma janela pequena
+            log_transfer: Se True, mede e imprime os bytes transferidos por busca
+            dedup_index: Índice de empresas já coletadas; lugares conhecidos não
+                são abertos de novo, só ganham a marcação da busca atual (os
+                lugares novos entram no índice quando o BatchRunner os grava)
+            metrics: Métricas da coleta (compartilhadas entre os workers do pool);
+                padrão: um Metrics só deste scraper
+            block_cooldown: Pausa (segundos) após um CAPTCHA/bloqueio antes de
+                abrir uma sessão nova; dobra a cada bloqueio seguido
+            result_retry: Tentativas e espera entre elas para abrir cada lugar
+                (padrão: retry.RESULT_RETRY)
         """
+        if detail_mode not in self.DETAIL_MODES:
+            raise ValueError(f"Modo de detalhes desconhecido: {detail_mode} (opções: {', '.join(self.DETAIL_MODES)})")
+        
         self.wait_time = wait_time
         self.driver = None
         self.headless = headless
+        self.max_searches_per_session = max_searches_per_session
+        self.pacing = pacing or JitterPacing()
+        self.max_results = max_results
+        self.max_idle_scrolls = max_idle_scrolls
+        self.detail_mode = detail_mode
+        self.capture_network = capture_network
+        self.capture_dir = capture_dir
+        self._captured_files = 0
+        self.lean_profile = lean_profile
+        self.log_transfer = log_transfer
+        self.dedup_index = dedup_index
+        self.metrics = metrics or Metrics()
+        self.block_cooldown = block_cooldown
+        self.result_retry = result_retry or RESULT_RETRY
+        
+        # URLs de lugares que falharam em todas as tentativas (ver take_failed_places)
+        self.failed_places = []
+        
+        # Estado da página após cada busca (ok, vazio, consentimento, captcha, bloqueado)
+        self.page_states = {}
+        self.consecutive_blocks = 0
+        
+        # Sinalizado por close(): interrompe a pausa após bloqueio
+        self._closed = threading.Event()
+        
+        # Bytes recebidos pela rede (medidos só com log_transfer)
+        self.search_bytes = 0
+        self.total_bytes = 0
+        
+        # Tempo gasto esperando a página (separado das pausas anti-bloqueio)
+        self.wait_seconds = 0.0
+        
+        # Estatísticas da sessão longa
+        self.searches_in_session = 0
+        self.total_searches = 0
+        self.session_starts = 0
+        self.session_start_seconds = 0.0
+        self.restart_reasons = {}
         
+    @timed('inicio_navegador')
     def _init_driver(self):
         """Inicializa o driver do Selenium."""
         options = webdriver.ChromeOptions()
@@ -38,11 +308,26 @@ class GoogleMapsScraper:
         options.add_argument('--disable-blink-features=AutomationControlled')
         options.add_experimental_option("excludeSwitches", ["enable-automation"])
         options.add_experimental_option('useAutomationExtension', False)
-        options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+        if self.lean_profile:
+            # Sem imagens e sem maximizar: o renderizador só desenha a lista e o painel
+            options.add_experimental_option('prefs', {
+                'profile.managed_default_content_settings.images': 2,
+                'profile.managed_default_content_settings.media_stream': 2
+            })
+            options.add_argument('--blink-settings=imagesEnabled=false')
+            options.add_argument('--window-size={},{}'.format(*self.LEAN_WINDOW_SIZE))
+        if self.capture_network or self.log_transfer:
+            # Registra os eventos de rede para ler as respostas do Maps e medir o tráfego
+            options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        options.add_argument(f'user-agent={self.USER_AGENT}')
         
         try:
             self.driver = webdriver.Chrome(options=options)
-            self.driver.maximize_window()
+            if self.lean_profile:
+                self.driver.execute_cdp_cmd('Network.enable', {})
+                self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.LEAN_BLOCKED_URLS})
+            else:
+                self.driver.maximize_window()
             self.wait = WebDriverWait(self.driver, self.wait_time)
         except Exception as e:
             raise Exception(f"Erro ao inicializar o driver: {e}")
@@ -52,9 +337,337 @@ class GoogleMapsScraper:
         if not self.driver:
             self._init_driver()
         
-        self.driver.get("https://www.google.com/maps")
-        time.sleep(random.uniform(2, 4))
+        with self.metrics.timer('carregamento_pagina', pagina='inicial'):
+            self.driver.get(self.MAPS_URL)
+            self._wait_for(EC.presence_of_element_located((By.ID, "searchboxinput")))
+    
+    def _wait_for(self, condition: Callable, timeout: Optional[float] = None):
+        """
+        Espera até a condição ser verdadeira, contabilizando o tempo de espera.
+        
+        Args:
+            condition: Condição no formato aceito por WebDriverWait.until
+            timeout: Tempo máximo (segundos); padrão é wait_time
+            
+        Returns:
+            O valor retornado pela condição
+            
+        Raises:
+            TimeoutException: Se a condição não for satisfeita no prazo
+        """
+        inicio = time.monotonic()
+        try:
+            return WebDriverWait(self.driver, timeout or self.wait_time, poll_frequency=0.1).until(condition)
+        except TimeoutException:
+            self.metrics.incr('timeouts')
+            raise
+        finally:
+            self.wait_seconds += time.monotonic() - inicio
+    
+    def _results_loaded(self, previous_url: str) -> Callable:
+        """
+        Condição: a URL mudou e a lista de resultados (ou um detalhe único) apareceu.
+        
+        Args:
+            previous_url: URL antes da busca (evita aceitar a lista da busca anterior)
+        """
+        def condition(driver):
+            if driver.current_url == previous_url:
+                return False
+            return bool(
+                driver.find_elements(By.CSS_SELECTOR, self.FEED_SELECTOR)
+                or driver.find_elements(By.CSS_SELECTOR, self.DETAIL_TITLE_SELECTOR)
+            )
+        return condition
+    
+    def _detail_loaded(self, previous_name: Optional[str]) -> Callable:
+        """
+        Condição: o título do painel de detalhes existe e mudou para outro negócio.
+        
+        Args:
+            previous_name: Nome exibido antes do clique (None aceita qualquer nome)
+        """
+        def condition(driver):
+            for element in driver.find_elements(By.CSS_SELECTOR, self.DETAIL_TITLE_SELECTOR):
+                text = element.text.strip()
+                if text and text != previous_name:
+                    return text
+            return False
+        return condition
+    
+    def _start_session(self):
+        """Abre o navegador e o Google Maps, medindo o custo da inicialização."""
+        self._closed.clear()
+        inicio = time.monotonic()
+        self.open_maps()
+        self.session_start_seconds += time.monotonic() - inicio
+        self.session_starts += 1
+        self.searches_in_session = 0
+    
+    def is_alive(self) -> bool:
+        """
+        Verifica se o navegador ainda responde.
+        
+        Returns:
+            True se o driver existe e responde a comandos
+        """
+        if not self.driver:
+            return False
+        try:
+            _ = self.driver.window_handles
+            _ = self.driver.current_url
+            return True
+        except WebDriverException:
+            return False
+    
+    def detect_page_state(self) -> str:
+        """
+        Classifica a página atual.
+        
+        Returns:
+            PAGE_CAPTCHA ou PAGE_BLOCKED (interstitial do Google), PAGE_CONSENT
+            (tela de cookies), PAGE_OK (lista ou detalhe de um lugar) ou
+            PAGE_EMPTY (nenhum resultado)
+        """
+        try:
+            # Lê só a URL, marcadores e o início do texto visível (sem baixar o page_source inteiro)
+            page = self.driver.execute_script(
+                self.PAGE_STATE_JS, self.FEED_SELECTOR, self.DETAIL_TITLE_SELECTOR, self.RESULT_LINK_SELECTOR
+            ) or {}
+        except WebDriverException:
+            return self.PAGE_EMPTY
+        return self.classify_page_state(page)
+    
+    @classmethod
+    def classify_page_state(cls, page: Dict) -> str:
+        """
+        Classifica a página a partir do retorno de PAGE_STATE_JS.
+        
+        Args:
+            page: Dicionário com url, text, feed, detail, results, captcha e consent
+            
+        Returns:
+            Um dos PAGE_STATES (ver detect_page_state)
+        """
+        texto = (page.get('url', '') + ' ' + page.get('text', '')).lower()
+        if page.get('captcha'):
+            return cls.PAGE_CAPTCHA
+        if any(marker in texto for marker in cls.BLOCK_MARKERS):
+            return cls.PAGE_BLOCKED
+        if page.get('consent') or any(marker in texto for marker in cls.CONSENT_MARKERS):
+            return cls.PAGE_CONSENT
+        if page.get('results') or page.get('detail'):
+            return cls.PAGE_OK
+        if page.get('feed') and not any(marker in texto for marker in cls.NO_RESULTS_MARKERS):
+            return cls.PAGE_OK
+        return cls.PAGE_EMPTY
     
+    def is_blocked(self) -> bool:
+        """
+        Verifica se a página atual indica bloqueio do Google.
+        
+        Returns:
+            True se a página é um CAPTCHA ou a página de bloqueio
+        """
+        blocked = self.detect_page_state() in (self.PAGE_CAPTCHA, self.PAGE_BLOCKED)
+        if blocked:
+            self.metrics.incr('bloqueios_suspeitos')
+        return blocked
+    
+    def _record_page_state(self, state: str):
+        self.page_states[state] = self.page_states.get(state, 0) + 1
+        self.metrics.incr('estado_pagina', estado=state)
+    
+    def _accept_consent(self) -> bool:
+        """Tenta passar pela tela de consentimento e voltar ao Maps."""
+        try:
+            if not self.driver.execute_script(self.ACCEPT_CONSENT_JS):
+                return False
+            self._wait_for(EC.presence_of_element_located((By.ID, "searchboxinput")))
+            return True
+        except (TimeoutException, WebDriverException):
+            return False
+    
+    def _handle_block(self, state: str, query: str):
+        """
+        Reage a um CAPTCHA/bloqueio: desacelera, espera e abre uma sessão nova.
+        
+        A sessão nova usa um perfil novo (o chromedriver cria um perfil
+        temporário a cada inicialização, sem os cookies da sessão bloqueada).
+        
+        Raises:
+            SessionBlockedError: Sempre, para o job voltar para a fila em vez
+                de ser marcado como concluído
+        """
+        self.consecutive_blocks += 1
+        self.pacing.on_block()
+        cooldown = min(self.block_cooldown * 2 ** (self.consecutive_blocks - 1), self.MAX_BLOCK_COOLDOWN)
+        print(f"🚫 Página de {state} em: {query} — aguardando {cooldown:.0f}s antes de abrir uma sessão nova")
+        
+        # Só fecha o navegador: close() sinalizaria _closed e encerraria a pausa na hora
+        try:
+            self._quit_driver()
+        except Exception:
+            self.driver = None
+        if not self._closed.wait(cooldown):
+            self.restart_session(state)
+        raise SessionBlockedError(state, query)
+    
+    def _check_page_state(self, query: str) -> bool:
+        """
+        Confere a página depois da busca.
+        
+        Returns:
+            True se há resultados para coletar; False se a busca veio vazia
+            
+        Raises:
+            SessionBlockedError: Se a página é um CAPTCHA, um bloqueio ou uma
+                tela de consentimento que não pôde ser aceita
+        """
+        state = self.detect_page_state()
+        if state == self.PAGE_CONSENT:
+            self._record_page_state(state)
+            if not self._accept_consent():
+                self._handle_block(state, query)
+            # Consentimento aceito: repete a busca na sessão atual
+            self.search(query)
+            state = self.detect_page_state()
+            if state == self.PAGE_CONSENT:
+                self._handle_block(state, query)
+        
+        self._record_page_state(state)
+        if state in (self.PAGE_CAPTCHA, self.PAGE_BLOCKED):
+            self._handle_block(state, query)
+        self.consecutive_blocks = 0
+        return state == self.PAGE_OK
+    
+    def restart_session(self, reason: str):
+        """
+        Fecha e reabre o navegador.
+        
+        Args:
+            reason: Motivo do reinício (ex: 'falha', 'bloqueio', 'limite')
+        """
+        print(f"🔄 Reiniciando navegador ({reason})")
+        self.restart_reasons[reason] = self.restart_reasons.get(reason, 0) + 1
+        self.metrics.incr('reinicios', motivo=reason)
+        try:
+            self._quit_driver()
+        except Exception:
+            self.driver = None
+        self._start_session()
+    
+    def ensure_session(self):
+        """
+        Garante uma sessão utilizável antes de uma nova busca.
+        
+        Reaproveita o navegador aberto e só reinicia após uma falha,
+        um bloqueio detectado ou ao atingir max_searches_per_session.
+        """
+        if not self.driver:
+            self._start_session()
+        elif not self.is_alive():
+            self.restart_session('falha')
+        elif self.is_blocked():
+            self.pacing.on_block()
+            self.restart_session('bloqueio')
+        elif self.max_searches_per_session and self.searches_in_session >= self.max_searches_per_session:
+            self.restart_session('limite')
+    
+    def get_session_stats(self) -> Dict[str, float]:
+        """
+        Retorna estatísticas de reaproveitamento do navegador.
+        
+        O tempo economizado é estimado pelo custo médio de inicialização
+        multiplicado pelo número de inicializações evitadas em relação a
+        abrir um navegador por busca.
+        
+        Returns:
+            Dicionário com buscas, inicializações, tempo médio de
+            inicialização e tempo economizado (segundos)
+        """
+        media = self.session_start_seconds / self.session_starts if self.session_starts else 0.0
+        evitadas = max(self.total_searches - self.session_starts, 0)
+        bloqueios = sum(self.page_states.get(state, 0) for state in (self.PAGE_CAPTCHA, self.PAGE_BLOCKED))
+        return {
+            'buscas': self.total_searches,
+            'inicializacoes': self.session_starts,
+            'reinicios': dict(self.restart_reasons),
+            'tempo_medio_inicializacao': round(media, 2),
+            'tempo_economizado': round(media * evitadas, 2),
+            'tempo_espera': round(self.wait_seconds, 2),
+            'tempo_throttle': self.pacing.get_stats()['tempo_throttle'],
+            'bytes_transferidos': self.total_bytes,
+            'estados_pagina': dict(self.page_states),
+            'bloqueios': bloqueios,
+            'taxa_bloqueio': round(bloqueios / self.total_searches, 3) if self.total_searches else 0.0
+        }
+    
+    def _read_performance_log(self) -> List[Dict]:
+        """
+        Lê (e esvazia) o log de performance do Chrome.
+        
+        Os bytes das requisições concluídas são somados em search_bytes,
+        já que cada mensagem só pode ser lida uma vez.
+        
+        Returns:
+            Lista de mensagens do DevTools (dicionários com 'method' e 'params')
+        """
+        try:
+            entries = self.driver.get_log('performance')
+        except WebDriverException:
+            return []
+        messages = []
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            if message.get('method') == 'Network.loadingFinished':
+                self.search_bytes += int(message.get('params', {}).get('encodedDataLength', 0))
+            messages.append(message)
+        return messages
+    
+    def _save_captured_response(self, body: str):
+        """Salva uma resposta capturada em capture_dir para uso offline."""
+        os.makedirs(self.capture_dir, exist_ok=True)
+        self._captured_files += 1
+        path = os.path.join(self.capture_dir, f"resposta_{int(time.time())}_{self._captured_files}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(body)
+    
+    def get_captured_responses(self) -> List[str]:
+        """
+        Obtém o corpo das respostas de lugares recebidas desde a última leitura.
+        
+        Returns:
+            Corpos das respostas na ordem em que chegaram
+        """
+        request_ids = []
+        for message in self._read_performance_log():
+            if message.get('method') != 'Network.responseReceived':
+                continue
+            params = message.get('params', {})
+            url = params.get('response', {}).get('url', '')
+            if maps_parser.is_place_response(url):
+                request_ids.append((params.get('requestId'), url))
+        
+        bodies = []
+        for request_id, url in request_ids:
+            try:
+                response = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+            except WebDriverException:
+                # Resposta já descartada pelo navegador
+                continue
+            body = response.get('body', '')
+            if not body or response.get('base64Encoded'):
+                continue
+            bodies.append(body)
+            if self.capture_dir:
+                self._save_captured_response(body)
+        return bodies
+    
+    @timed('busca')
     def search(self, query: str) -> bool:
         """
         Realiza uma busca no Google Maps.
@@ -67,23 +680,25 @@ class GoogleMapsScraper:
         """
         try:
             # Localiza o campo de busca
-            search_box = self.wait.until(
+            search_box = self._wait_for(
                 EC.presence_of_element_located((By.ID, "searchboxinput"))
             )
             
-            # Limpa o campo
-            search_box.clear()
-            time.sleep(random.uniform(0.5, 1))
+            # Pausa anti-bloqueio antes de cada busca
+            self.pacing.throttle()
             
-            # Digita a query
-            search_box.send_keys(query)
-            time.sleep(random.uniform(0.5, 1))
+            previous_url = self.driver.current_url
             
-            # Pressiona Enter
+            # Limpa o campo, digita a query e pressiona Enter
+            search_box.clear()
+            search_box.send_keys(query)
             search_box.send_keys(Keys.RETURN)
             
-            # Aguarda o carregamento dos resultados
-            time.sleep(random.uniform(3, 5))
+            # Aguarda o carregamento dos resultados (termina assim que aparecerem)
+            try:
+                self._wait_for(self._results_loaded(previous_url))
+            except TimeoutException:
+                print(f"⚠️ Resultados não carregaram a tempo para: {query}")
             
             return True
             
@@ -94,30 +709,239 @@ class GoogleMapsScraper:
             print(f"Erro ao realizar busca '{query}': {e}")
             return False
     
-    def get_results_links(self) -> List:
+    @timed('coleta_lista')
+    def _harvest_feed(self, max_results: Optional[int] = None, max_idle_scrolls: Optional[int] = None) -> List:
         """
-        Obtém todos os links de resultados da pesquisa.
+        Rola a lista de resultados e coleta os links novos a cada rolagem.
+        
+        A lista lateral do Maps carrega sob demanda, então ela é rolada aos
+        poucos e os links novos são coletados a cada rolagem, sem repetir
+        lugares (deduplicação pela URL). Para ao encontrar o marcador de fim
+        da lista, ao atingir max_results ou após max_idle_scrolls rolagens
+        seguidas sem itens novos.
         
+        Args:
+            max_results: Máximo de links (padrão: self.max_results; 0 = sem limite)
+            max_idle_scrolls: Rolagens sem novidade (padrão: self.max_idle_scrolls)
+            
         Returns:
-            Lista de elementos <a> com classe 'hfpxzc'
+            Lista de pares (elemento <a>, URL do lugar)
         """
+        if max_results is None:
+            max_results = self.max_results
+        if max_idle_scrolls is None:
+            max_idle_scrolls = self.max_idle_scrolls
+        
+        # Aguarda o primeiro resultado aparecer (busca sem resultados cai no timeout)
         try:
-            # Aguarda um pouco para os resultados carregarem
-            time.sleep(random.uniform(2, 3))
+            self._wait_for(EC.presence_of_element_located((By.CSS_SELECTOR, self.RESULT_LINK_SELECTOR)))
+        except TimeoutException:
+            return []
+        
+        results = []
+        seen_urls = set()
+        idle_scrolls = 0
+        
+        while True:
+            harvest = self.driver.execute_script(
+                self.HARVEST_FEED_JS, self.FEED_SELECTOR, self.RESULT_LINK_SELECTOR
+            )
+            
+            novos = 0
+            for element, url in harvest['links']:
+                if url in seen_urls:
+                    continue
+                seen_urls.add(url)
+                results.append((element, url))
+                novos += 1
             
-            # Procura pelos elementos de resultado
-            results = self.driver.find_elements(By.CSS_SELECTOR, "a.hfpxzc")
+            if max_results and len(results) >= max_results:
+                return results[:max_results]
             
-            return results
+            # Sem lista rolável (resultado único) ou fim da lista: não há mais o que carregar
+            if harvest['end'] or not harvest['hasFeed']:
+                break
             
+            idle_scrolls = 0 if novos else idle_scrolls + 1
+            if idle_scrolls >= max_idle_scrolls:
+                break
+            
+            # Espera a rolagem carregar mais itens (ou desiste após alguns segundos)
+            try:
+                self._wait_for(
+                    lambda driver: len(driver.find_elements(By.CSS_SELECTOR, self.RESULT_LINK_SELECTOR)) > len(harvest['links']),
+                    timeout=3
+                )
+            except TimeoutException:
+                pass
+        
+        return results
+    
+    def get_results_links(self, max_results: Optional[int] = None, max_idle_scrolls: Optional[int] = None) -> List:
+        """
+        Obtém todos os links de resultados da pesquisa.
+        
+        Args:
+            max_results: Máximo de links (padrão: self.max_results; 0 = sem limite)
+            max_idle_scrolls: Rolagens sem novidade (padrão: self.max_idle_scrolls)
+            
+        Returns:
+            Lista de elementos <a> com classe 'hfpxzc'
+        """
+        try:
+            return [element for element, _ in self._harvest_feed(max_results, max_idle_scrolls)]
         except Exception as e:
             print(f"Erro ao obter links de resultados: {e}")
             return []
     
-    def extract_business_data(self) -> Optional[Dict[str, str]]:
+    def get_results_urls(self, max_results: Optional[int] = None, max_idle_scrolls: Optional[int] = None) -> List[str]:
+        """
+        Obtém as URLs (/maps/place/...) de todos os resultados da pesquisa.
+        
+        Diferente dos elementos, as URLs continuam válidas depois que a
+        página muda, então podem ser visitadas depois, em outra aba ou
+        sessão, ou guardadas para uma nova tentativa.
+        
+        Args:
+            max_results: Máximo de URLs (padrão: self.max_results; 0 = sem limite)
+            max_idle_scrolls: Rolagens sem novidade (padrão: self.max_idle_scrolls)
+            
+        Returns:
+            Lista de URLs dos lugares, sem repetição
+        """
+        try:
+            return [url for _, url in self._harvest_feed(max_results, max_idle_scrolls)]
+        except Exception as e:
+            print(f"Erro ao obter URLs de resultados: {e}")
+            return []
+    
+    def scrape_place(self, url: str) -> Optional[Dict[str, str]]:
+        """
+        Abre a página de um lugar pela URL e extrai os dados do negócio.
+        
+        Args:
+            url: URL do lugar (obtida por get_results_urls)
+            
+        Returns:
+            Dicionário no formato de extract_business_data com a chave 'url',
+            ou None se houver erro
+        """
+        try:
+            with self.metrics.timer('carregamento_pagina', pagina='lugar'):
+                self.driver.get(url)
+        except WebDriverException as e:
+            print(f"Erro ao abrir {url}: {e}")
+            return None
+        
+        # Página nova: qualquer título que aparecer já é do lugar certo
+        data = self.extract_business_data()
+        if data:
+            data['url'] = url
+        return data
+    
+    def scrape_places(self, urls: List[str], nicho: str, cidade: Union[str, Dict]) -> List[Dict[str, str]]:
+        """
+        Extrai os dados de uma lista de lugares já coletada.
+        
+        Pode ser chamado separadamente da busca, por exemplo para tentar de
+        novo só as URLs que falharam.
+        
+        Args:
+            urls: URLs dos lugares
+            nicho: Nicho associado aos registros
+            cidade: Cidade associada aos registros (nome ou município do IBGE)
+            
+        Returns:
+            Lista de dicionários com os dados coletados
+        """
+        return self._scrape_places(urls, self.job_tags(nicho, cidade))
+    
+    def _already_scraped(self, url: str, tags: Dict) -> bool:
+        """Consulta o índice antes da extração; se o lugar é conhecido, só marca a busca."""
+        if self.dedup_index and self.dedup_index.tag_if_known(place_key(url), tags):
+            self.metrics.incr('ja_coletados')
+            print("    ↷ Já coletado em outra busca")
+            return True
+        return False
+    
+    def _is_new_place(self, record: Dict, tags: Dict) -> bool:
+        """Consulta o índice com o lugar extraído (False se já foi gravado pelo conteúdo)."""
+        if self.dedup_index and self.dedup_index.tag_record_if_known(record, tags):
+            self.metrics.incr('ja_coletados')
+            print(f"    ↷ {record['nome']} já coletado em outra busca")
+            return False
+        return True
+    
+    def _scrape_places(self, urls: List[str], tags: Dict) -> List[Dict[str, str]]:
+        """Abre cada URL e grava os campos de identificação (job_tags) nos registros."""
+        results_data = []
+        
+        for idx, url in enumerate(urls, 1):
+            print(f"  [{idx}/{len(urls)}] Processando resultado...")
+            
+            if self._already_scraped(url, tags):
+                continue
+            
+            business_data = self._scrape_place_with_retry(url)
+            
+            if business_data:
+                business_data.update(tags)
+                if self._is_new_place(business_data, tags):
+                    results_data.append(business_data)
+                    print(f"    ✓ {business_data['nome']}")
+                self.pacing.on_success()
+            else:
+                print(f"    ✗ Erro ao processar resultado {idx}")
+            
+            # Pausa anti-bloqueio entre resultados
+            self.pacing.throttle()
+        
+        return results_data
+    
+    def _scrape_place_with_retry(self, url: str) -> Optional[Dict[str, str]]:
+        """scrape_place com as novas tentativas de result_retry; se todas falham, descarta a URL."""
+        attempt = 1
+        while True:
+            data = self.scrape_place(url)
+            if data:
+                return data
+            if not self.result_retry.can_retry(attempt) or self._closed.is_set():
+                break
+            delay = self.result_retry.delay(attempt)
+            self.metrics.incr('retentativas', nivel='resultado')
+            print(f"    ↻ Nova tentativa em {delay:.1f}s ({attempt + 1}/{self.result_retry.max_attempts})")
+            if self._closed.wait(delay):
+                break
+            attempt += 1
+        self._discard_place(url)
+        return None
+    
+    def _discard_place(self, url: str):
+        self.failed_places.append(url)
+        self.metrics.incr('descartados', nivel='resultado')
+    
+    def take_failed_places(self) -> List[str]:
+        """
+        Retorna e esvazia a lista de lugares descartados desde a última chamada.
+        
+        As URLs podem ser extraídas de novo depois com scrape_places.
+        """
+        failed, self.failed_places = self.failed_places, []
+        return failed
+    
+    @timed('extracao')
+    def extract_business_data(self, previous_name: Optional[str] = None) -> Optional[Dict[str, str]]:
         """
         Extrai dados do negócio da página de detalhes.
         
+        Todo o painel é lido por um único execute_script (EXTRACT_DETAIL_JS),
+        que percorre os seletores na mesma ordem de prioridade de antes; aqui
+        só se classifica os textos de informação em endereço e telefone.
+        
+        Args:
+            previous_name: Nome do negócio exibido antes do clique; a extração
+                espera o painel mudar para outro negócio
+            
         Returns:
             Dicionário com nome, endereço, telefone, avaliação e número de avaliações, ou None se houver erro
         """
@@ -130,162 +954,186 @@ class GoogleMapsScraper:
                 'num_avaliacoes': 'Não informado'
             }
             
-            # Aguarda o painel lateral carregar
-            time.sleep(random.uniform(2, 3))
-            
-            # Extrai o nome - várias estratégias
-            nome_selectors = [
-                "h1.DUwDvf.lfPIob",
-                "h1[data-attrid='title']",
-                "h1.DUwDvf",
-                "h1.qrShPb",
-                "h1.x3AX1-LfntMc-header-title-title"
-            ]
-            
-            for selector in nome_selectors:
-                try:
-                    nome_element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    nome_text = nome_element.text.strip()
-                    if nome_text:
-                        data['nome'] = nome_text
-                        break
-                except:
-                    continue
+            # Aguarda o painel lateral carregar o novo negócio
+            try:
+                self._wait_for(self._detail_loaded(previous_name))
+            except TimeoutException:
+                print("    ⚠️ Painel de detalhes não atualizou a tempo")
             
-            # Extrai endereço e telefone
-            # Estratégia 1: Buscar por classes específicas
-            info_selectors = [
-                "div.Io6YTe.fontBodyMedium.kR99db.fdkmkc",
-                "div.Io6YTe.fontBodyMedium",
-                "button[data-item-id='address']",
-                "div[data-item-id='address']"
-            ]
-            
-            info_texts = []
-            for selector in info_selectors:
-                try:
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    for element in elements:
-                        text = element.text.strip()
-                        if text and text not in info_texts:
-                            info_texts.append(text)
-                except:
-                    continue
+            panel = self.driver.execute_script(
+                self.EXTRACT_DETAIL_JS,
+                self.NAME_SELECTORS,
+                self.INFO_SELECTORS,
+                self.RATING_SELECTORS,
+                self.REVIEW_COUNT_SELECTORS
+            ) or {}
             
-            # Processa os textos coletados
-            for text in info_texts:
-                # Verifica se é telefone (padrões: (XX) XXXX-XXXX, (XX) XXXXX-XXXX, etc.)
-                phone_pattern = r'\(?\d{2}\)?\s?\d{4,5}[-.\s]?\d{4}'
-                if re.search(phone_pattern, text) and len(text) <= 20:
-                    if data['telefone'] == 'Não informado':
-                        data['telefone'] = text
-                # Verifica se é endereço (contém palavras comuns ou padrões de endereço)
-                elif any(word in text.lower() for word in [
-                    'rua', 'av', 'avenida', 'estrada', 'rodovia', 'praça', 
-                    'bairro', 'centro', 'distrito', 'vila', 'jardim',
-                    '- pr', '- sp', '- mg', '- rj', '- sc', '- rs', '- ba',
-                    '- go', '- pe', '- ce', '- df', '- es', '- mt', '- ms',
-                    '- pa', '- pb', '- al', '- se', '- to', '- pi', '- ma',
-                    '- rn', '- ap', '- ac', '- rr', '- ro', '- am'
-                ]) or re.search(r'\d{5}-?\d{3}', text):  # CEP
-                    if data['endereco'] == 'Não informado':
-                        data['endereco'] = text
-            
-            # Extrai avaliação e número de avaliações
-            # Busca pelo div com classe F7nice que contém as avaliações
-            rating_selectors = [
-                "div.F7nice span[aria-hidden='true']",
-                "div.F7nice span[aria-hidden=\"true\"]",
-                "div[class*='F7nice'] span[aria-hidden='true']",
-                "span[aria-hidden='true']"
-            ]
-            
-            for selector in rating_selectors:
-                try:
-                    rating_elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    for element in rating_elements:
-                        rating_text = element.text.strip()
-                        # Verifica se é um número válido (formato: 4,8 ou 4.8)
-                        if rating_text and re.match(r'^\d+[,.]?\d*$', rating_text):
-                            # Normaliza para usar vírgula
-                            rating_text = rating_text.replace('.', ',')
-                            if data['avaliacao'] == 'Não informado':
-                                data['avaliacao'] = rating_text
-                                break
-                    if data['avaliacao'] != 'Não informado':
-                        break
-                except:
-                    continue
+            if panel.get('nome'):
+                data['nome'] = panel['nome']
+            if panel.get('avaliacao'):
+                data['avaliacao'] = panel['avaliacao']
+            if panel.get('num_avaliacoes'):
+                data['num_avaliacoes'] = panel['num_avaliacoes']
             
-            # Extrai número de avaliações
-            num_reviews_selectors = [
-                "span[aria-label*='avaliações']",
-                "span[aria-label*='avaliação']",
-                "div.F7nice span[aria-label*='avaliações']",
-                "div.F7nice span[aria-label*='avaliação']"
-            ]
-            
-            for selector in num_reviews_selectors:
-                try:
-                    review_elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    for element in review_elements:
-                        aria_label = element.get_attribute('aria-label')
-                        if aria_label:
-                            # Extrai o número de avaliações do aria-label (ex: "57 avaliações")
-                            match = re.search(r'(\d+)', aria_label)
-                            if match:
-                                if data['num_avaliacoes'] == 'Não informado':
-                                    data['num_avaliacoes'] = match.group(1)
-                                    break
-                    if data['num_avaliacoes'] != 'Não informado':
-                        break
-                except:
-                    continue
+            self._classify_info_texts(panel.get('info_texts') or [], data)
+            
+            for campo, valor in data.items():
+                if valor == 'Não informado':
+                    self.metrics.incr('campos_nao_informados', campo=campo)
             
-            # Se não encontrou pelo aria-label, tenta extrair do texto dentro do span
-            if data['num_avaliacoes'] == 'Não informado':
-                try:
-                    # Busca por padrão (57) dentro de spans
-                    all_spans = self.driver.find_elements(By.CSS_SELECTOR, "div.F7nice span")
-                    for span in all_spans:
-                        text = span.text.strip()
-                        # Procura por padrão (número) entre parênteses
-                        match = re.search(r'\((\d+)\)', text)
-                        if match:
-                            if data['num_avaliacoes'] == 'Não informado':
-                                data['num_avaliacoes'] = match.group(1)
-                                break
-                except:
-                    pass
-            
-            return data
+            return normalize_record(data)
             
         except Exception as e:
+            if isinstance(e, StaleElementReferenceException):
+                self.metrics.incr('elementos_obsoletos')
             print(f"Erro ao extrair dados do negócio: {e}")
             return None
     
-    def scrape_nicho_cidade(self, nicho: str, cidade: str) -> List[Dict[str, str]]:
+    def _classify_info_texts(self, info_texts: List[str], data: Dict[str, str]):
+        """
+        Preenche endereço e telefone a partir dos textos de informação do painel.
+        
+        A classificação usa os padrões pré-compilados de normalization.
+        
+        Args:
+            info_texts: Textos na ordem em que aparecem no painel
+            data: Registro a preencher (só campos ainda 'Não informado')
+        """
+        endereco, telefone = classify_info_texts(info_texts)
+        if endereco and data['endereco'] == 'Não informado':
+            data['endereco'] = endereco
+        if telefone and data['telefone'] == 'Não informado':
+            data['telefone'] = telefone
+    
+    @staticmethod
+    def job_tags(nicho: str, cidade: Union[str, Dict]) -> Dict:
+        """
+        Campos de identificação da busca gravados em cada registro.
+        
+        Args:
+            nicho: Nicho de mercado
+            cidade: Nome da cidade ou município do IBGE ({'id', 'nome', 'uf'})
+            
+        Returns:
+            Dicionário com nicho, cidade, uf e ibge_id
+        """
+        if isinstance(cidade, dict):
+            return {
+                'nicho': nicho,
+                'cidade': cidade['nome'],
+                'uf': cidade.get('uf') or '',
+                'ibge_id': cidade.get('id')
+            }
+        return {'nicho': nicho, 'cidade': cidade, 'uf': '', 'ibge_id': None}
+    
+    @staticmethod
+    def build_query(nicho: str, cidade: str, uf: str = '') -> str:
+        """
+        Monta o termo de busca, qualificado pela UF quando conhecida.
+        
+        Há vários municípios com o mesmo nome (ex: "Santa Maria"), então a
+        UF evita buscar a cidade errada.
+        """
+        if uf:
+            return f"{nicho} em {cidade} - {uf}"
+        return f"{nicho} em {cidade}"
+    
+    def scrape_nicho_cidade(self, nicho: str, cidade: Union[str, Dict]) -> List[Dict[str, str]]:
         """
         Realiza scraping de um nicho em uma cidade específica.
         
         Args:
             nicho: Nicho de mercado (ex: "auto peças")
-            cidade: Nome da cidade (ex: "Cambé")
+            cidade: Nome da cidade (ex: "Cambé") ou município do IBGE
+                ({'id': 4103701, 'nome': 'Cambé', 'uf': 'PR'})
             
         Returns:
             Lista de dicionários com os dados coletados
         """
-        results_data = []
-        query = f"{nicho} em {cidade}"
+        tags = self.job_tags(nicho, cidade)
+        query = self.build_query(nicho, tags['cidade'], tags['uf'])
         
         print(f"🔍 Buscando: {query}")
         
-        # Realiza a busca
-        if not self.search(query):
+        # Reaproveita o navegador (reinicia apenas se necessário)
+        self.ensure_session()
+        self.searches_in_session += 1
+        self.total_searches += 1
+        
+        # Descarta eventos de rede das buscas anteriores
+        if self.capture_network or self.log_transfer:
+            self._read_performance_log()
+            self.search_bytes = 0
+        
+        try:
+            with self.metrics.timer('consulta'):
+                records = self._scrape_query(query, tags)
+            self.metrics.incr('consultas')
+            self.metrics.incr('registros', len(records))
+            return records
+        finally:
+            if self.log_transfer:
+                self._log_search_transfer(query)
+    
+    def _log_search_transfer(self, query: str):
+        """Soma e imprime os bytes recebidos durante a busca."""
+        if not self.is_alive():
+            return
+        self._read_performance_log()
+        self.total_bytes += self.search_bytes
+        print(f"📶 {self.search_bytes / 1024:.0f} KB transferidos em: {query}")
+    
+    def _scrape_query(self, query: str, tags: Dict) -> List[Dict[str, str]]:
+        """
+        Busca a query e coleta os resultados conforme o modo configurado.
+        
+        Args:
+            query: Termo de busca já montado
+            tags: Campos de identificação gravados em cada registro (job_tags)
+            
+        Returns:
+            Lista de dicionários com os dados coletados
+        """
+        results_data = []
+        
+        # Realiza a busca e confere se o Google respondeu com resultados, vazio ou bloqueio
+        searched = self.search(query)
+        if not self._check_page_state(query) or not searched:
+            print(f"⚠️ Nenhum resultado encontrado para: {query}")
             return results_data
         
-        # Obtém todos os links de resultados
-        results_links = self.get_results_links()
+        # Modo captura: a rolagem da lista dispara as respostas com os lugares
+        results_urls = None
+        if self.capture_network:
+            results_urls = self.get_results_urls()
+            responses = self.get_captured_responses()
+            self.metrics.incr('respostas_capturadas', len(responses))
+            records = maps_parser.parse_responses(responses)
+            if records:
+                print(f"📊 {len(records)} resultados lidos das respostas de rede")
+                for record in records:
+                    normalize_record(record)
+                    record.update(tags)
+                self.pacing.on_success()
+                return [record for record in records if self._is_new_place(record, tags)]
+            print("⚠️ Nenhuma resposta de rede reconhecida, abrindo os resultados")
+        
+        # Modo URL: coleta os endereços dos lugares e abre cada um diretamente
+        if self.detail_mode == 'url':
+            if results_urls is None:
+                results_urls = self.get_results_urls()
+            if not results_urls:
+                print(f"⚠️ Nenhum resultado encontrado para: {query}")
+                return results_data
+            print(f"📊 Encontrados {len(results_urls)} resultados")
+            return self._scrape_places(results_urls, tags)
+        
+        # Modo clique: obtém os elementos (com a URL de cada um) e clica em cada um na lista
+        try:
+            results_links = self._harvest_feed()
+        except Exception as e:
+            print(f"Erro ao obter links de resultados: {e}")
+            results_links = []
         
         if not results_links:
             print(f"⚠️ Nenhum resultado encontrado para: {query}")
@@ -293,45 +1141,89 @@ class GoogleMapsScraper:
         
         print(f"📊 Encontrados {len(results_links)} resultados")
         
+        # Nome exibido no painel antes de cada clique (para detectar a troca)
+        previous_name = None
+        
         # Itera sobre cada resultado
-        for idx, link in enumerate(results_links, 1):
+        for idx, (link, url) in enumerate(results_links, 1):
             try:
                 print(f"  [{idx}/{len(results_links)}] Processando resultado...")
                 
-                # Scroll para o elemento ficar visível
-                self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", link)
-                time.sleep(random.uniform(1, 2))
-                
-                # Clica no resultado
-                try:
-                    link.click()
-                except ElementClickInterceptedException:
-                    # Tenta com JavaScript
-                    self.driver.execute_script("arguments[0].click();", link)
+                if self._already_scraped(url, tags):
+                    continue
                 
-                time.sleep(random.uniform(2, 3))
+                with self.metrics.timer('clique'):
+                    # Scroll para o elemento ficar visível
+                    self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", link)
+                    
+                    # Clica no resultado
+                    try:
+                        link.click()
+                    except ElementClickInterceptedException:
+                        # Tenta com JavaScript
+                        self.driver.execute_script("arguments[0].click();", link)
                 
-                # Extrai os dados
-                business_data = self.extract_business_data()
+                # Extrai os dados (espera o painel trocar de negócio)
+                business_data = self.extract_business_data(previous_name)
                 
                 if business_data:
-                    business_data['nicho'] = nicho
-                    business_data['cidade'] = cidade
-                    results_data.append(business_data)
-                    print(f"    ✓ {business_data['nome']}")
+                    business_data['url'] = url
+                    business_data.update(tags)
+                    previous_name = business_data['nome']
+                    if self._is_new_place(business_data, tags):
+                        results_data.append(business_data)
+                        print(f"    ✓ {business_data['nome']}")
+                    self.pacing.on_success()
+                else:
+                    # Clicar de novo no mesmo item raramente resolve: fica para scrape_places
+                    self._discard_place(url)
                 
-                # Pausa aleatória entre requisições
-                time.sleep(random.uniform(2, 4))
+                # Pausa anti-bloqueio entre resultados
+                self.pacing.throttle()
                 
             except Exception as e:
+                if isinstance(e, StaleElementReferenceException):
+                    self.metrics.incr('elementos_obsoletos')
                 print(f"    ✗ Erro ao processar resultado {idx}: {e}")
+                self._discard_place(url)
                 continue
         
         return results_data
     
-    def close(self):
-        """Fecha o navegador."""
+    def _quit_driver(self):
         if self.driver:
             self.driver.quit()
             self.driver = None
+    
+    def close(self):
+        """Fecha o navegador (e interrompe uma pausa após bloqueio em andamento)."""
+        self._closed.set()
+        self._quit_driver()
+
 
+# Motores de coleta: Selenium (chromedriver) ou DevTools direto (cdp_engine)
+SCRAPER_ENGINES = ('selenium', 'cdp')
+
+
+def create_scraper(engine: str = 'selenium', **kwargs):
+    """
+    Cria um scraper do motor escolhido.
+    
+    Args:
+        engine: 'selenium' (GoogleMapsScraper) ou 'cdp' (cdp_engine.CDPMapsScraper)
+        **kwargs: Parâmetros do construtor do GoogleMapsScraper; detail_tabs
+            (abas de detalhes simultâneas) só existe no motor CDP
+        
+    Returns:
+        Scraper com a interface do GoogleMapsScraper
+    """
+    if engine not in SCRAPER_ENGINES:
+        raise ValueError(f"Motor desconhecido: {engine} (opções: {', '.join(SCRAPER_ENGINES)})")
+    if engine == 'cdp':
+        # Importado só quando usado (o motor CDP depende deste módulo)
+        from cdp_engine import CDPMapsScraper
+        return CDPMapsScraper(**kwargs)
+    if kwargs.pop('detail_tabs', 1) > 1:
+        # O WebDriver executa um comando por vez: várias abas não abririam lugares em paralelo
+        print("⚠️ Várias abas de detalhes exigem o motor cdp; usando uma aba")
+    return GoogleMapsScraper(**kwargs)
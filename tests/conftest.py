@@ -0,0 +1,9 @@
+"""Configuração comum dos testes: os módulos do projeto ficam na raiz do repositório."""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, 'tests', 'fixtures')
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -0,0 +1,78 @@
+"""Testes do BatchRunner com o índice de deduplicação (sem navegador)."""
+import json
+
+import pytest
+
+from batch import BatchRunner
+from dedup_index import DedupIndex
+from job_store import JobStore, DONE
+from pacing import FixedPacing
+from pool import ScrapingPool
+from results_sink import ResultsSink
+from retry import RetryPolicy
+from scraper import GoogleMapsScraper
+
+CAMBE = {'id': 4103701, 'nome': 'Cambé', 'uf': 'PR'}
+URLS = [
+    'https://www.google.com/maps/place/Oficina+A/data=!4m7!3m6!1s0x94eb4:0x1a!19sChIJoficinaA',
+    'https://www.google.com/maps/place/Oficina+B/data=!4m7!3m6!1s0x94eb4:0x1b!19sChIJoficinaB',
+]
+
+
+class FlakyScraper(GoogleMapsScraper):
+    """Extrai os lugares da lista fixa; na primeira busca cai depois de extrair."""
+
+    attempts = 0
+
+    def scrape_nicho_cidade(self, nicho, cidade):
+        FlakyScraper.attempts += 1
+        records = self._scrape_places(URLS, self.job_tags(nicho, cidade))
+        if FlakyScraper.attempts == 1:
+            raise RuntimeError('navegador caiu no meio do job')
+        return records
+
+    def scrape_place(self, url):
+        nome = 'Oficina A' if url == URLS[0] else 'Oficina B'
+        return {'nome': nome, 'telefone': '(43) 3251-0000', 'endereco': f'Rua {nome[-1]}, 1 - Cambé - PR',
+                'url': url}
+
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_retried_job_after_partial_extraction_keeps_every_record(tmp_path):
+    FlakyScraper.attempts = 0
+    dedup_index = DedupIndex(str(tmp_path / 'resultados.dedup.sqlite'))
+    job_store = JobStore(str(tmp_path / 'resultados.jobs.sqlite'))
+    sink = ResultsSink(str(tmp_path / 'resultados.jsonl'))
+    pool = ScrapingPool(
+        scraper_factory=lambda: FlakyScraper(headless=True, pacing=FixedPacing(0), dedup_index=dedup_index),
+        retry_policy=RetryPolicy(max_attempts=2, base_delay=0, jitter=0)
+    )
+    runner = BatchRunner(pool, job_store, sink, dedup_index=dedup_index)
+
+    runner.run(runner.pending_pairs(['oficina'], [CAMBE]))
+    runner.close()
+
+    assert FlakyScraper.attempts == 2
+    assert [record['nome'] for record in read_jsonl(sink.path)] == ['Oficina A', 'Oficina B']
+    assert job_store.summary() == {DONE: 1}
+    assert dedup_index.tag_if_known('pid:ChIJoficinaA', GoogleMapsScraper.job_tags('oficina', CAMBE))
+
+
+def test_commit_rolls_back_keys_when_persist_fails(tmp_path):
+    dedup_index = DedupIndex(str(tmp_path / 'dedup.sqlite'))
+    record = {'nome': 'Oficina A', 'url': URLS[0], 'nicho': 'oficina', 'cidade': 'Cambé', 'uf': 'PR'}
+
+    def persist(records):
+        raise OSError('disco cheio')
+
+    with pytest.raises(OSError):
+        dedup_index.commit([dict(record)], persist)
+    assert not dedup_index.tag_if_known('pid:ChIJoficinaA', {'nicho': 'oficina', 'cidade': 'Cambé'})
+
+    saved = []
+    assert dedup_index.commit([dict(record), dict(record, url=URLS[0] + '?hl=pt')], saved.extend) == saved
+    assert len(saved) == 1
@@ -0,0 +1,199 @@
+"""Testes do motor CDP sem o Chrome (abas e conexão simuladas)."""
+import asyncio
+import base64
+import hashlib
+import os
+import re
+import struct
+from unittest import mock
+
+import pytest
+
+from cdp_engine import AsyncMapsScraper, _WebSocket, _apply_mask
+from dedup_index import DedupIndex
+from pacing import FixedPacing
+from scraper import GoogleMapsScraper, SessionBlockedError
+
+URLS = [
+    'https://www.google.com/maps/place/Oficina+A/data=!4m7!3m6!1s0x94eb4:0x1a!19sChIJoficinaA',
+    'https://www.google.com/maps/place/Oficina+B/data=!4m7!3m6!1s0x94eb4:0x1b!19sChIJoficinaB',
+]
+TAGS = {'nicho': 'oficina', 'cidade': 'Cambé', 'uf': 'PR', 'ibge_id': 4103701}
+
+
+def make_tab_scraper(dedup_index, blocked_url=None):
+    scraper = AsyncMapsScraper(pacing=FixedPacing(0), dedup_index=dedup_index, block_cooldown=0, detail_tabs=2)
+    scraper.tab_limit.limit = 2
+
+    async def scrape_place_in_tab(url, tab):
+        if url == blocked_url:
+            await asyncio.sleep(0.05)
+            return None, 0.05, GoogleMapsScraper.PAGE_CAPTCHA
+        return {'nome': url.split('/')[5].replace('+', ' '), 'url': url}, 0.01, GoogleMapsScraper.PAGE_OK
+
+    scraper._scrape_place_in_tab = scrape_place_in_tab
+    scraper._open_detail_tab = mock.AsyncMock(side_effect=lambda: mock.Mock(name='aba'))
+    scraper._close_browser = mock.AsyncMock()
+    scraper.restart_session = mock.AsyncMock()
+    return scraper
+
+
+def test_block_in_one_tab_does_not_mark_places_of_other_tabs(tmp_path):
+    dedup_index = DedupIndex(str(tmp_path / 'dedup.sqlite'))
+
+    blocked = make_tab_scraper(dedup_index, blocked_url=URLS[1])
+    with pytest.raises(SessionBlockedError):
+        asyncio.run(blocked._scrape_places_in_tabs(URLS, dict(TAGS)))
+    assert not dedup_index.tag_if_known('pid:ChIJoficinaA', TAGS)
+
+    # Job refeito depois do bloqueio: o lugar da aba que terminou volta a ser extraído
+    records = asyncio.run(make_tab_scraper(dedup_index)._scrape_places_in_tabs(URLS, dict(TAGS)))
+    assert [record['nome'] for record in records] == ['Oficina A', 'Oficina B']
+
+
+# --- _WebSocket contra um servidor websocket local (RFC 6455 escrito à parte) ---
+
+RFC_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+def server_frame(opcode, payload, fin=True):
+    """Quadro do servidor (sem máscara)."""
+    header = bytearray([(0x80 if fin else 0) | opcode])
+    if len(payload) < 126:
+        header.append(len(payload))
+    elif len(payload) < 2 ** 16:
+        header.append(126)
+        header += struct.pack('!H', len(payload))
+    else:
+        header.append(127)
+        header += struct.pack('!Q', len(payload))
+    return bytes(header) + payload
+
+
+async def read_client_frame(reader):
+    """Lê um quadro do cliente; retorna (fin, opcode, payload desmascarado)."""
+    first, second = await reader.readexactly(2)
+    assert second & 0x80, 'quadro do cliente sem máscara'
+    length = second & 0x7F
+    if length == 126:
+        length, = struct.unpack('!H', await reader.readexactly(2))
+    elif length == 127:
+        length, = struct.unpack('!Q', await reader.readexactly(8))
+    mask = await reader.readexactly(4)
+    payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(await reader.readexactly(length)))
+    return bool(first & 0x80), first & 0x0F, payload
+
+
+def run_with_server(session, client, accept=None):
+    """Sobe o servidor local, faz o handshake e executa session (servidor) e client (cliente)."""
+    async def main():
+        requests = []
+
+        async def handle(reader, writer):
+            request = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1')
+            requests.append(request)
+            key = re.search(r'Sec-WebSocket-Key: (\S+)', request).group(1)
+            digest = base64.b64encode(hashlib.sha1((key + RFC_GUID).encode()).digest()).decode()
+            writer.write(
+                f"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {accept or digest}\r\n\r\n".encode()
+            )
+            await writer.drain()
+            try:
+                await session(reader, writer)
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await client(f"ws://127.0.0.1:{port}/devtools/browser/abc?x=1"), requests
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    return asyncio.run(main())
+
+
+async def echo(reader, writer):
+    while True:
+        fin, opcode, payload = await read_client_frame(reader)
+        if opcode == 0x8:
+            writer.write(server_frame(0x8, payload))
+            await writer.drain()
+            return
+        writer.write(server_frame(opcode, payload))
+        await writer.drain()
+
+
+@pytest.mark.parametrize('size', [0, 1, 3, 4, 5, 125, 126, 65535, 65536, 200003])
+def test_apply_mask_matches_bytewise_xor_and_round_trips(size):
+    data = os.urandom(size)
+    mask = os.urandom(4)
+    masked = _apply_mask(data, mask)
+    assert masked == bytes(byte ^ mask[i % 4] for i, byte in enumerate(data))
+    assert _apply_mask(masked, mask) == data
+
+
+@pytest.mark.parametrize('size', [5, 125, 126, 65535, 65536, 300000])
+def test_websocket_echoes_messages_across_length_encodings(size):
+    text = 'x' * size
+
+    async def client(url):
+        websocket = await _WebSocket.connect(url)
+        await websocket.send(text)
+        reply = await websocket.recv()
+        await websocket.close()
+        return reply
+
+    reply, requests = run_with_server(echo, client)
+    assert reply == text
+    assert requests[0].startswith('GET /devtools/browser/abc?x=1 HTTP/1.1\r\n')
+    assert 'Sec-WebSocket-Version: 13' in requests[0]
+
+
+def test_websocket_answers_ping_and_joins_continuation_frames():
+    received = []
+
+    async def session(reader, writer):
+        writer.write(server_frame(0x9, b'batida'))
+        writer.write(server_frame(0xA, b'pong solto'))
+        writer.write(server_frame(0x1, '{"id": 1, '.encode(), fin=False))
+        writer.write(server_frame(0x0, '"result": "ção"}'.encode()))
+        await writer.drain()
+        received.append(await read_client_frame(reader))
+        writer.write(server_frame(0x1, b'fim'))
+        await writer.drain()
+
+    async def client(url):
+        websocket = await _WebSocket.connect(url)
+        message = await websocket.recv()
+        assert await websocket.recv() == 'fim'
+        await websocket.close()
+        return message
+
+    message, _ = run_with_server(session, client)
+    assert message == '{"id": 1, "result": "ção"}'
+    assert received == [(True, 0xA, b'batida')]
+
+
+def test_websocket_close_frame_and_bad_handshake_raise_connection_error():
+    async def close_now(reader, writer):
+        writer.write(server_frame(0x8, struct.pack('!H', 1001)))
+        await writer.drain()
+
+    async def client(url):
+        websocket = await _WebSocket.connect(url)
+        try:
+            with pytest.raises(ConnectionError):
+                await websocket.recv()
+        finally:
+            await websocket.close()
+
+    run_with_server(close_now, client)
+
+    async def connect_only(url):
+        with pytest.raises(ConnectionError, match='Handshake'):
+            await _WebSocket.connect(url)
+
+    run_with_server(echo, connect_only, accept='chave-errada')
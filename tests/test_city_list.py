@@ -0,0 +1,46 @@
+"""Testes do modelo da lista de cidades selecionadas (CitySelection, sem tela)."""
+from city_list import CitySelection
+
+BONITO_MS = {'id': 5002209, 'nome': 'Bonito', 'uf': 'MS'}
+BONITO_PE = {'id': 2602001, 'nome': 'Bonito', 'uf': 'PE'}
+CAMBE = {'id': 4103701, 'nome': 'Cambé', 'uf': 'PR'}
+DIGITADA = {'nome': 'Cidade Digitada'}
+
+
+def test_same_name_in_different_states_are_different_cities():
+    cidades = CitySelection()
+    assert cidades.add_many([BONITO_MS, BONITO_PE, CAMBE]) == 3
+    assert [CitySelection.label_for(m) for m in cidades] == ['Bonito - MS', 'Bonito - PE', 'Cambé - PR']
+    assert 5002209 in cidades and 2602001 in cidades
+
+
+def test_add_many_ignores_repeated_ibge_id_and_keeps_order():
+    cidades = CitySelection()
+    cidades.add_many([CAMBE, BONITO_MS])
+    assert cidades.add_many([dict(CAMBE), BONITO_PE, dict(BONITO_PE)]) == 1
+    assert cidades.keys() == [4103701, 5002209, 2602001]
+    assert cidades.at(2) is BONITO_PE
+
+
+def test_city_without_ibge_id_is_keyed_by_name():
+    cidades = CitySelection()
+    cidades.add_many([DIGITADA, dict(DIGITADA), CAMBE])
+    assert len(cidades) == 2
+    assert cidades.keys() == ['Cidade Digitada', 4103701]
+    assert CitySelection.label_for(DIGITADA) == 'Cidade Digitada'
+
+
+def test_removals_invalidate_cached_keys():
+    cidades = CitySelection()
+    cidades.add_many([BONITO_MS, BONITO_PE, CAMBE, DIGITADA])
+    assert cidades.keys()[0] == 5002209
+
+    assert cidades.remove_keys([5002209, 9999999]) == 1
+    assert cidades.keys() == [2602001, 4103701, 'Cidade Digitada']
+    assert cidades.remove_where(lambda m: m.get('uf') == 'PR') == 1
+    assert cidades.keys() == [2602001, 'Cidade Digitada']
+
+    cidades.replace([CAMBE])
+    assert cidades.keys() == [4103701]
+    cidades.clear()
+    assert len(cidades) == 0 and cidades.keys() == []
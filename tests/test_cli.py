@@ -0,0 +1,108 @@
+"""Testes da coleta pela linha de comando (validação e uma execução com scraper falso)."""
+import json
+import os
+from unittest import mock
+
+import pytest
+
+import cli
+from scraper import GoogleMapsScraper
+
+MUNICIPIOS_PR = [{'id': 4103701, 'nome': 'Cambé', 'uf': 'PR'}, {'id': 4113700, 'nome': 'Londrina', 'uf': 'PR'}]
+
+
+class FixedScraper(GoogleMapsScraper):
+    """Devolve uma empresa por busca sem abrir o navegador."""
+
+    searches = []
+
+    def scrape_nicho_cidade(self, nicho, cidade):
+        FixedScraper.searches.append((nicho, cidade['nome']))
+        record = {'nome': f"{nicho} {cidade['nome']}", 'telefone': '(43) 3251-0000',
+                  'endereco': f"Rua A, 1 - {cidade['nome']} - PR",
+                  'url': f"https://www.google.com/maps/place/X/data=!19sChIJ{cidade['id']}"}
+        record.update(self.job_tags(nicho, cidade))
+        return [record]
+
+
+def fake_create_scraper(engine, detail_tabs=1, **kwargs):
+    return FixedScraper(**kwargs)
+
+
+@pytest.fixture
+def run_cli(tmp_path):
+    FixedScraper.searches = []
+    saida = str(tmp_path / 'coleta.jsonl')
+
+    def run(*argv):
+        with mock.patch('cli.create_scraper', fake_create_scraper), \
+                mock.patch('cli.IBGEAPI.get_municipios_por_estado', return_value=MUNICIPIOS_PR), \
+                mock.patch('cli.signal.signal'):
+            return cli.main(['--saida', saida, '--ritmo', 'fixo', *argv])
+
+    run.saida = saida
+    return run
+
+
+def usage_error(capsys, *argv):
+    with pytest.raises(SystemExit) as exc:
+        cli.main(list(argv))
+    assert exc.value.code == cli.EXIT_USAGE
+    return capsys.readouterr().err
+
+
+def test_requires_nicho_and_cidade(capsys):
+    assert 'pelo menos um nicho' in usage_error(capsys, '--uf', 'PR')
+    assert 'informe --uf' in usage_error(capsys, '--nicho', 'oficina')
+
+
+def test_tabs_require_cdp_engine(capsys):
+    assert '--abas exige --motor cdp' in usage_error(capsys, '--nicho', 'oficina', '--uf', 'PR', '--abas', '2')
+
+
+def test_split_uf_accepts_common_separators():
+    assert cli._split_uf('Cambé - PR') == ('Cambé', 'PR')
+    assert cli._split_uf('Cambé/pr') == ('Cambé', 'PR')
+    assert cli._split_uf('Cambé') == ('Cambé', '')
+
+
+def test_list_file_accepts_json_or_one_item_per_line(tmp_path):
+    json_file = tmp_path / 'nichos.json'
+    json_file.write_text(json.dumps(['Oficina', ' ', 'Auto Peças']), encoding='utf-8')
+    text_file = tmp_path / 'nichos.txt'
+    text_file.write_text('Oficina\n\nAuto Peças\n', encoding='utf-8')
+    assert cli._read_list_file(str(json_file)) == cli._read_list_file(str(text_file)) == ['Oficina', 'Auto Peças']
+
+
+def test_collects_every_pair_and_keeps_files_next_to_output(run_cli, tmp_path):
+    code = run_cli('--nicho', 'oficina', '--nicho', 'oficina', '--uf', 'PR', '--exportar', str(tmp_path / 'coleta.csv'))
+    assert code == cli.EXIT_OK
+    assert sorted(FixedScraper.searches) == [('oficina', 'Cambé'), ('oficina', 'Londrina')]
+    with open(run_cli.saida, encoding='utf-8') as f:
+        assert sorted(json.loads(line)['cidade'] for line in f) == ['Cambé', 'Londrina']
+    for nome in ('coleta.dedup.sqlite', 'coleta.jobs.sqlite', 'coleta.metricas.json', 'coleta.csv'):
+        assert os.path.exists(tmp_path / nome)
+
+
+def test_existing_output_requires_continuar(run_cli, tmp_path, capsys):
+    assert run_cli('--nicho', 'oficina', '--cidade', 'Cambé - PR') == cli.EXIT_OK
+    with pytest.raises(SystemExit):
+        run_cli('--nicho', 'oficina', '--cidade', 'Londrina - PR')
+    assert 'use --continuar' in capsys.readouterr().err
+
+    # Com --continuar a coleta segue no mesmo arquivo
+    FixedScraper.searches = []
+    assert run_cli('--nicho', 'oficina', '--cidade', 'Londrina - PR', '--continuar') == cli.EXIT_OK
+    assert FixedScraper.searches == [('oficina', 'Londrina')]
+    with open(run_cli.saida, encoding='utf-8') as f:
+        assert len(f.readlines()) == 2
+
+
+def test_dedup_file_option_and_sem_dedup(run_cli, tmp_path):
+    dedup_path = tmp_path / 'campanha.sqlite'
+    assert run_cli('--nicho', 'oficina', '--cidade', 'Cambé - PR', '--dedup-arquivo', str(dedup_path)) == cli.EXIT_OK
+    assert dedup_path.exists() and not (tmp_path / 'coleta.dedup.sqlite').exists()
+
+    os.remove(run_cli.saida)
+    assert run_cli('--nicho', 'oficina', '--cidade', 'Cambé - PR', '--sem-dedup') == cli.EXIT_OK
+    assert not (tmp_path / 'coleta.dedup.sqlite').exists()
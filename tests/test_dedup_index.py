@@ -0,0 +1,68 @@
+"""Testes das chaves e do índice de empresas já coletadas (DedupIndex)."""
+import pytest
+
+from dedup_index import DedupIndex, content_key, place_key
+
+BASE = 'https://www.google.com/maps/place/Moto+Pe%C3%A7as+Camb%C3%A9/data=!4m7!3m6!1s0x94eb4:0x1a!8m2!3d-23.2!4d-51.2'
+URL_PID = BASE + '!16s%2Fg%2F11b!19sChIJmotopecas?authuser=0&hl=pt-BR'
+URL_FTID = BASE + '?hl=pt-BR'
+CAMBE = {'nicho': 'auto peças', 'cidade': 'Cambé', 'uf': 'PR'}
+LONDRINA = {'nicho': 'auto peças', 'cidade': 'Londrina', 'uf': 'PR'}
+
+
+@pytest.fixture
+def index(tmp_path):
+    dedup_index = DedupIndex(str(tmp_path / 'dedup.sqlite'))
+    yield dedup_index
+    dedup_index.close()
+
+
+def empresa(url=None, place_id=None, nome='Moto Peças Cambé', telefone='(43) 3254-5910',
+            endereco='R. Belo Horizonte, 727 - Centro, Cambé - PR'):
+    return {'nome': nome, 'url': url, 'place_id': place_id, 'telefone': telefone, 'endereco': endereco}
+
+
+def test_place_key_prefers_place_id_then_feature_id_then_url():
+    assert place_key(URL_PID, place_id='ChIJdaRede') == 'pid:ChIJdaRede'
+    assert place_key(URL_PID) == 'pid:ChIJmotopecas'
+    assert place_key(URL_FTID) == 'ftid:0x94eb4:0x1a'
+    assert place_key('https://www.google.com/maps/place/X/@-23,-51,17z?hl=pt') == \
+        'url:https://www.google.com/maps/place/X/@-23,-51,17z'
+    assert place_key() is None
+
+
+def test_content_key_normalizes_accents_punctuation_and_phone():
+    a = content_key(empresa())
+    b = content_key(empresa(nome='MOTO PECAS  CAMBE', telefone='43 3254 5910',
+                            endereco='r belo horizonte 727 centro cambe pr'))
+    assert a == b == '4332545910|moto pecas cambe|r belo horizonte 727 centro cambe pr'
+    assert content_key(empresa(nome='Não informado')) is None
+
+
+def test_place_key_wins_over_content(index):
+    assert index.add(empresa(URL_PID), CAMBE)
+    # Mesmo place id com telefone diferente: é a mesma empresa
+    assert not index.add(empresa(URL_PID, telefone='(43) 3254-0000'), LONDRINA)
+    # Place id desconhecido: o conteúdo decide
+    assert not index.add(empresa(place_id='ChIJnovo'), LONDRINA)
+    assert index.add(empresa(place_id='ChIJoutra', nome='Oficina do Zé'), LONDRINA)
+
+
+def test_content_key_matches_other_url_and_stores_alias(index):
+    primeiro = empresa(URL_PID)
+    assert index.add(primeiro, CAMBE)
+    outro = empresa('https://www.google.com/maps/place/Moto+Pecas/@-23.2,-51.2,17z')
+    assert not index.add(outro, LONDRINA)
+    assert outro['chave_empresa'] == primeiro['chave_empresa'] == 'pid:ChIJmotopecas'
+    # A URL nova virou apelido: a próxima busca já pula o lugar sem extrair
+    assert index.tag_if_known(place_key(outro['url']), CAMBE)
+    assert index.tags_for('pid:ChIJmotopecas') == [CAMBE, LONDRINA]
+    assert index.tags_label('pid:ChIJmotopecas') == 'auto peças em Cambé - PR; auto peças em Londrina - PR'
+
+
+def test_record_without_url_uses_content_key(index):
+    registro = empresa()
+    assert index.add(registro, CAMBE)
+    assert registro['chave_empresa'].startswith('conteudo:')
+    assert index.tag_record_if_known(empresa(), LONDRINA)
+    assert not index.tag_record_if_known(empresa(nome='Outra Loja'), LONDRINA)
@@ -0,0 +1,267 @@
+"""Testes da fila distribuída (CampaignQueue) e do CampaignWorker, sem navegador."""
+import threading
+import time
+
+import pytest
+
+from distributed import CampaignQueue, CampaignWorker, CoordinatorServer, RemoteQueue, main
+from job_store import DEAD_LETTER, DONE, FAILED, PENDING, RUNNING
+from scraper import GoogleMapsScraper, SessionBlockedError
+
+CAMBE = {'id': 4103701, 'nome': 'Cambé', 'uf': 'PR'}
+LONDRINA = {'id': 4113700, 'nome': 'Londrina', 'uf': 'PR'}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'campanha.sqlite')
+
+
+@pytest.fixture
+def queue(path):
+    campaign_queue = CampaignQueue(path)
+    yield campaign_queue
+    campaign_queue.close()
+
+
+def job_row(queue, job_id):
+    row = queue._conn.execute(
+        "SELECT status, tentativas, falhas, bloqueios, token, disponivel_em, erro FROM jobs WHERE id = ?", (job_id,)
+    ).fetchone()
+    return dict(zip(('status', 'tentativas', 'falhas', 'bloqueios', 'token', 'disponivel_em', 'erro'), row))
+
+
+def place(nome, url=None, telefone='(43) 3254-0000', endereco='R. Exemplo, 100'):
+    return {'nome': nome, 'url': url, 'telefone': telefone, 'endereco': endereco}
+
+
+def test_add_jobs_is_idempotent(queue):
+    assert queue.add_jobs([('auto peças', CAMBE), ('auto peças', LONDRINA)]) == 2
+    assert queue.add_jobs([('auto peças', CAMBE)]) == 0
+    assert queue.summary()['jobs'] == {PENDING: 2}
+
+
+def test_lease_is_exclusive_across_connections(path, queue):
+    municipios = [{'id': i, 'nome': f'Cidade {i}', 'uf': 'PR'} for i in range(40)]
+    queue.add_jobs(('oficina', municipio) for municipio in municipios)
+    other = CampaignQueue(path)
+    leased = []
+    lock = threading.Lock()
+
+    def take(campaign_queue, worker):
+        while True:
+            job = campaign_queue.lease(worker)
+            if job is None:
+                return
+            with lock:
+                leased.append(job['id'])
+
+    threads = [threading.Thread(target=take, args=(campaign_queue, f'w{i}'))
+               for i, campaign_queue in enumerate([queue, other] * 3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    other.close()
+
+    assert sorted(leased) == list(range(1, 41))
+    assert queue.summary()['jobs'] == {RUNNING: 40}
+
+
+def test_expired_lease_is_reclaimed(queue):
+    queue.configure(lease_segundos=0.2, tentativas=2)
+    queue.add_jobs([('oficina', CAMBE)])
+    job = queue.lease('caiu')
+    assert queue.reclaim_expired() == 0
+
+    time.sleep(0.3)
+    assert queue.reclaim_expired() == 1
+    row = job_row(queue, job['id'])
+    assert row['status'] == FAILED and row['falhas'] == 1 and row['token'] is None
+    assert 'caiu' in row['erro']
+
+    # Segunda expiração esgota as tentativas
+    again = queue.lease('caiu de novo')
+    assert again['id'] == job['id'] and again['token'] != job['token']
+    time.sleep(0.3)
+    assert queue.lease('outro') is None
+    assert job_row(queue, job['id'])['status'] == DEAD_LETTER
+
+
+def test_heartbeat_extends_lease_and_reports_lost_tokens(queue):
+    queue.configure(lease_segundos=0.3)
+    queue.add_jobs([('oficina', CAMBE), ('oficina', LONDRINA)])
+    kept = queue.lease('w')
+    dropped = queue.lease('w')
+    for _ in range(3):
+        time.sleep(0.15)
+        assert queue.heartbeat('w', [kept['token']]) == []
+    assert queue.reclaim_expired() == 1
+    assert job_row(queue, kept['id'])['status'] == RUNNING
+    assert queue.heartbeat('w', [kept['token'], dropped['token']]) == [dropped['token']]
+
+
+def test_failure_backs_off_but_block_requeues_immediately(queue):
+    queue.configure(espera_tentativa=60, tentativas=2, tentativas_bloqueio=1)
+    queue.add_jobs([('oficina', CAMBE)])
+
+    job = queue.lease('w')
+    assert queue.fail(job['id'], job['token'], 'timeout') == FAILED
+    row = job_row(queue, job['id'])
+    # Espera de 60s com até 50% de jitter
+    assert row['disponivel_em'] >= time.time() + 25
+    assert queue.lease('w') is None
+    assert queue.has_open_jobs()
+
+    queue._conn.execute("UPDATE jobs SET disponivel_em = 0")
+    job = queue.lease('w')
+    assert queue.fail(job['id'], job['token'], 'captcha', blocked=True) == FAILED
+    row = job_row(queue, job['id'])
+    assert row['bloqueios'] == 1 and row['falhas'] == 1 and row['disponivel_em'] <= time.time()
+
+    job = queue.lease('w')
+    assert job is not None
+    assert queue.fail(job['id'], job['token'], 'captcha', blocked=True) == DEAD_LETTER
+    assert not queue.has_open_jobs()
+
+    assert queue.requeue_dead_letter() == 1
+    assert job_row(queue, job['id'])['status'] == PENDING
+
+
+def test_fail_with_stale_token_is_ignored(queue):
+    queue.add_jobs([('oficina', CAMBE)])
+    job = queue.lease('w')
+    assert queue.fail(job['id'], 'token-antigo', 'erro') == RUNNING
+    assert job_row(queue, job['id'])['falhas'] == 0
+
+
+def test_complete_with_stale_token_merges_but_keeps_new_lease(queue):
+    queue.configure(lease_segundos=0.2)
+    queue.add_jobs([('oficina', CAMBE)])
+    first = queue.lease('lento')
+    time.sleep(0.3)
+    queue.reclaim_expired()
+    queue.configure(lease_segundos=60)
+    second = queue.lease('rapido')
+
+    novos = queue.complete(first['id'], first['token'], [place('Oficina A', 'https://maps/place/a')], [], 'lento')
+    assert novos == 1
+    row = job_row(queue, first['id'])
+    assert row['status'] == RUNNING and row['token'] == second['token']
+
+    novos = queue.complete(second['id'], second['token'], [place('Oficina A', 'https://maps/place/a')], [], 'rapido')
+    assert novos == 0
+    assert job_row(queue, second['id'])['status'] == DONE
+    assert len(queue.records()) == 1
+
+
+def test_complete_after_reclaim_finishes_waiting_job(queue):
+    queue.configure(lease_segundos=0.2)
+    queue.add_jobs([('oficina', CAMBE)])
+    job = queue.lease('lento')
+    time.sleep(0.3)
+    queue.reclaim_expired()
+    queue.complete(job['id'], job['token'], [], ['https://maps/place/falhou'], 'lento')
+    assert job_row(queue, job['id'])['status'] == DONE
+    assert queue.summary()['lugares_descartados'] == 1
+
+
+def test_merge_dedups_by_place_alias_and_content(queue):
+    queue.add_jobs([('auto peças', CAMBE), ('oficina', CAMBE), ('oficina', LONDRINA)])
+    first, second, third = (queue.lease('w') for _ in range(3))
+
+    assert queue.complete(first['id'], first['token'], [
+        place('Auto Peças Silva', 'https://www.google.com/maps/place/x/data=!1s0x94eb:0x1a2b'),
+        place('Sem Link', None, telefone='(43) 9999-0000', endereco='Av. Brasil, 1'),
+    ], [], 'w') == 2
+    assert queue.complete(second['id'], second['token'], [
+        # Mesmo lugar (feature id) com outra URL
+        place('Auto Peças Silva', 'https://www.google.com/maps/place/y/data=!1s0x94eb:0x1a2b?hl=pt'),
+        # Mesmo conteúdo (telefone + nome + endereço), outra URL: vira apelido
+        place('SEM LINK', 'https://maps/place/sem-link', telefone='43 9999-0000', endereco='Av. Brasil 1'),
+    ], [], 'w') == 0
+    # A URL guardada como apelido também é reconhecida
+    assert queue.complete(third['id'], third['token'], [
+        place('Sem Link (filial)', 'https://maps/place/sem-link'),
+        place('Outra Empresa', 'https://maps/place/outra', telefone=''),
+    ], [], 'w') == 1
+
+    records = queue.records()
+    assert [record['nome'] for record in records] == ['Auto Peças Silva', 'Sem Link', 'Outra Empresa']
+    assert records[0]['chave_empresa'] == 'ftid:0x94eb:0x1a2b'
+    assert records[1]['chave_empresa'].startswith('conteudo:')
+    assert queue.tags_label(records[0]['chave_empresa']) == 'auto peças em Cambé - PR; oficina em Cambé - PR'
+    assert queue.tags_label(records[1]['chave_empresa']) == (
+        'auto peças em Cambé - PR; oficina em Cambé - PR; oficina em Londrina - PR'
+    )
+    assert queue.summary()['marcacoes'] == 6
+
+
+class SlowScraper:
+    """Scraper falso: cada busca demora `seconds` e devolve um lugar."""
+
+    build_query = staticmethod(GoogleMapsScraper.build_query)
+
+    def __init__(self, seconds: float, block_first: bool = False):
+        self.seconds = seconds
+        self.block_first = block_first
+        self.calls = 0
+
+    def take_failed_places(self):
+        return []
+
+    def scrape_nicho_cidade(self, nicho, municipio):
+        self.calls += 1
+        if self.block_first and self.calls == 1:
+            raise SessionBlockedError('captcha', nicho)
+        time.sleep(self.seconds)
+        return [place(f"{nicho} {municipio['nome']}", f"https://maps/place/{municipio['id']}")]
+
+    def close(self):
+        pass
+
+
+def test_worker_heartbeat_keeps_short_lease_alive(path, queue):
+    # Prazo de 0,6s e busca de 2s: sem heartbeats frequentes o job seria recuperado no meio
+    queue.configure(lease_segundos=0.6)
+    queue.add_jobs([('oficina', CAMBE)])
+    worker = CampaignWorker(CampaignQueue(path), lambda: SlowScraper(2.0), poll_interval=0.1)
+
+    reclaimed = []
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+    while thread.is_alive():
+        reclaimed.append(queue.reclaim_expired())
+        time.sleep(0.1)
+    worker.queue.close()
+
+    assert sum(reclaimed) == 0
+    assert worker.completed == 1
+    row = job_row(queue, 1)
+    assert row['status'] == DONE and row['tentativas'] == 1 and row['falhas'] == 0
+
+
+def test_worker_requeues_blocked_job_and_finishes_campaign(path, queue):
+    queue.add_jobs([('oficina', CAMBE), ('oficina', LONDRINA)])
+    worker = CampaignWorker(CampaignQueue(path), lambda: SlowScraper(0.0, block_first=True), poll_interval=0.1)
+    assert worker.run() == 2
+    worker.queue.close()
+    assert queue.summary()['jobs'] == {DONE: 2}
+    assert job_row(queue, 1)['bloqueios'] == 1
+
+
+def test_coordinator_refuses_network_address_without_key(queue):
+    with pytest.raises(ValueError):
+        CoordinatorServer(queue, host='0.0.0.0', port=0)
+    assert main(['servir', '--fila', queue.path, '--host', '0.0.0.0', '--porta', '0']) == 2
+
+
+def test_coordinator_listens_on_loopback_by_default(queue):
+    server = CoordinatorServer(queue, port=0)
+    server.start()
+    try:
+        assert server._httpd.server_address[0] == '127.0.0.1'
+        queue.add_jobs([('oficina', CAMBE)])
+        assert RemoteQueue(f"http://127.0.0.1:{server.port}").summary()['jobs'] == {PENDING: 1}
+    finally:
+        server.shutdown()
@@ -0,0 +1,49 @@
+"""Testes do canal de eventos entre a coleta e a interface (sem tela)."""
+import threading
+
+import events
+from events import Event, EventBus, coalesce
+
+
+def test_coalesce_keeps_last_of_each_kind_counts_and_sums():
+    batch = coalesce([
+        Event(events.JOB_STARTED, {'nicho': 'oficina', 'cidade': 'Cambé'}),
+        Event(events.RECORDS_FOUND, {'quantidade': 3}),
+        Event(events.JOB_DONE, {'atual': 1, 'total': 3}),
+        Event(events.ERROR, {'mensagem': 'timeout', 'fatal': False}),
+        Event(events.RECORDS_FOUND, {'quantidade': 2}),
+        Event(events.JOB_DONE, {'atual': 2, 'total': 3}),
+        Event(events.JOB_STARTED, {'nicho': 'oficina', 'cidade': 'Londrina'}),
+        Event(events.ERROR, {'mensagem': 'bloqueio', 'fatal': False}),
+    ])
+    assert batch.latest[events.JOB_DONE] == {'atual': 2, 'total': 3}
+    assert batch.latest[events.JOB_STARTED]['cidade'] == 'Londrina'
+    assert batch.counts == {events.JOB_STARTED: 2, events.RECORDS_FOUND: 2, events.JOB_DONE: 2, events.ERROR: 2}
+    assert batch.records == 5
+    # Todos os erros são mantidos, não só o último
+    assert [erro['mensagem'] for erro in batch.errors] == ['timeout', 'bloqueio']
+    # A ordem das chaves segue o último evento de cada tipo
+    assert list(batch.latest) == [events.RECORDS_FOUND, events.JOB_DONE, events.JOB_STARTED, events.ERROR]
+
+
+def test_last_of_returns_most_recent_among_kinds():
+    batch = coalesce([Event(events.FINISHED, {'texto': 'fim'}), Event(events.STATUS, {'texto': 'parando'})])
+    assert batch.last_of(events.STATUS, events.FINISHED) == Event(events.STATUS, {'texto': 'parando'})
+    assert batch.last_of(events.METRICS) is None
+    assert coalesce([]).last_of(events.STATUS) is None
+
+
+def test_bus_drains_events_from_many_threads_in_limited_batches():
+    bus = EventBus()
+    threads = [threading.Thread(target=lambda: [bus.post(events.RECORDS_FOUND, quantidade=1) for _ in range(100)])
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    first = bus.drain(max_events=300)
+    rest = bus.drain()
+    assert len(first) == 300 and len(rest) == 100
+    assert coalesce(first + rest).records == 400
+    assert bus.drain() == []
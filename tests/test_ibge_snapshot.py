@@ -0,0 +1,37 @@
+"""Testes do snapshot offline do IBGE (ibge_snapshot.json)."""
+import json
+from collections import Counter
+
+import pytest
+
+from ibge_api import IBGEAPI
+
+
+@pytest.fixture(scope='module')
+def snapshot():
+    with open(IBGEAPI.SNAPSHOT_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_snapshot_has_all_states(snapshot):
+    assert len(snapshot['estados']) == 27
+    assert {'id', 'sigla', 'nome'} == set(snapshot['estados'][0])
+
+
+def test_snapshot_has_all_municipalities(snapshot):
+    municipios = snapshot['municipios']
+    assert len(municipios) == 5571
+    assert len({municipio['id'] for municipio in municipios}) == len(municipios)
+    assert [municipio['nome'] for municipio in municipios] == sorted(municipio['nome'] for municipio in municipios)
+
+    siglas = {estado['sigla'] for estado in snapshot['estados']}
+    por_uf = Counter(municipio['uf'] for municipio in municipios)
+    assert set(por_uf) == siglas
+    assert por_uf['PR'] == 399 and por_uf['SP'] == 645 and por_uf['DF'] == 1
+
+
+def test_snapshot_municipality_matches_state_code(snapshot):
+    sigla_por_id = {estado['id']: estado['sigla'] for estado in snapshot['estados']}
+    for municipio in snapshot['municipios']:
+        assert sigla_por_id[municipio['id'] // 100000] == municipio['uf']
+    assert {'id': 4103701, 'nome': 'Cambé', 'uf': 'PR'} in snapshot['municipios']
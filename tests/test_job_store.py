@@ -0,0 +1,94 @@
+"""Testes da tabela de jobs (JobStore): status, retomada e listas de descartados."""
+import pytest
+
+from job_store import DEAD_LETTER, DONE, FAILED, PENDING, RUNNING, JobStore
+
+CAMBE = ('oficina', 'Cambé', 'PR')
+LONDRINA = ('oficina', 'Londrina', 'PR')
+# Mesmo nome em outra UF é outro job
+BONITO_MS = ('oficina', 'Bonito', 'MS')
+BONITO_PE = ('oficina', 'Bonito', 'PE')
+
+
+@pytest.fixture
+def store(tmp_path):
+    job_store = JobStore(str(tmp_path / 'jobs.sqlite'))
+    yield job_store
+    job_store.close()
+
+
+def job_row(store, key):
+    row = store._conn.execute(
+        "SELECT status, tentativas, resultados, erro FROM jobs WHERE nicho = ? AND cidade = ? AND uf = ?", key
+    ).fetchone()
+    return dict(zip(('status', 'tentativas', 'resultados', 'erro'), row))
+
+
+def test_status_transitions(store):
+    store.add_jobs([CAMBE, LONDRINA])
+    assert job_row(store, CAMBE) == {'status': PENDING, 'tentativas': 0, 'resultados': 0, 'erro': None}
+
+    store.mark_running(CAMBE)
+    assert job_row(store, CAMBE)['status'] == RUNNING
+    store.mark_failed(CAMBE, 'timeout')
+    assert job_row(store, CAMBE) == {'status': FAILED, 'tentativas': 1, 'resultados': 0, 'erro': 'timeout'}
+
+    store.mark_running(CAMBE)
+    assert job_row(store, CAMBE)['erro'] is None
+    store.mark_done(CAMBE, 12)
+    assert job_row(store, CAMBE) == {'status': DONE, 'tentativas': 2, 'resultados': 12, 'erro': None}
+
+    store.mark_running(LONDRINA)
+    store.mark_dead_letter(LONDRINA, '3 tentativa(s) sem sucesso')
+    assert store.summary() == {DONE: 1, DEAD_LETTER: 1}
+
+
+def test_add_jobs_keeps_existing_status(store):
+    store.add_jobs([CAMBE])
+    store.mark_running(CAMBE)
+    store.mark_done(CAMBE, 3)
+    store.add_jobs([CAMBE, LONDRINA])
+    assert store.summary() == {DONE: 1, PENDING: 1}
+
+
+def test_resume_skips_done_and_dead_letter_and_requeues_running(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite')
+    store = JobStore(path)
+    keys = [CAMBE, LONDRINA, BONITO_MS, BONITO_PE]
+    store.add_jobs(keys)
+    store.mark_running(CAMBE)
+    store.mark_done(CAMBE, 5)
+    store.mark_running(LONDRINA)
+    store.mark_dead_letter(LONDRINA, 'bloqueado')
+    store.mark_running(BONITO_MS)  # Coleta interrompida no meio deste job
+    store.close()
+
+    store = JobStore(path)
+    assert store.reset_running() == 1
+    assert store.pending_keys(keys) == [BONITO_MS, BONITO_PE]
+    assert store.done_keys() == {CAMBE}
+
+    assert store.requeue_dead_letter() == 1
+    assert job_row(store, LONDRINA)['tentativas'] == 0
+    assert store.pending_keys(keys) == [LONDRINA, BONITO_MS, BONITO_PE]
+    store.close()
+
+
+def test_failed_places_are_grouped_by_job_and_removable(store):
+    store.add_failed_places(CAMBE, ['url-1', 'url-2'])
+    store.add_failed_places(BONITO_PE, ['url-3'])
+    assert store.failed_places() == {CAMBE: ['url-1', 'url-2'], BONITO_PE: ['url-3']}
+
+    store.remove_failed_places(['url-1', 'url-3'])
+    assert store.failed_places() == {CAMBE: ['url-2']}
+
+
+def test_clear_removes_jobs_places_and_meta(store):
+    store.add_jobs([CAMBE])
+    store.add_failed_places(CAMBE, ['url-1'])
+    store.set_meta('arquivo_resultados', 'output/resultados_X.xlsx')
+    assert store.get_meta('arquivo_resultados') == 'output/resultados_X.xlsx'
+
+    store.clear()
+    assert store.summary() == {} and store.failed_places() == {}
+    assert store.get_meta('arquivo_resultados') is None
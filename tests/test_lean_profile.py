@@ -0,0 +1,90 @@
+"""Testes do perfil leve e da medição de tráfego nos dois motores (sem o Chrome)."""
+import asyncio
+import json
+from unittest import mock
+
+from cdp_engine import AsyncMapsScraper, ChromeBrowser
+from pacing import FixedPacing
+from scraper import GoogleMapsScraper
+
+
+def init_driver(**kwargs):
+    """Roda _init_driver com o webdriver.Chrome simulado; devolve o scraper e as opções usadas."""
+    scraper = GoogleMapsScraper(headless=True, pacing=FixedPacing(0), **kwargs)
+    with mock.patch('scraper.webdriver.Chrome') as chrome:
+        scraper._init_driver()
+    return scraper, chrome.call_args.kwargs['options']
+
+
+def performance_entry(method, **params):
+    return {'message': json.dumps({'message': {'method': method, 'params': params}})}
+
+
+def test_lean_profile_blocks_heavy_resources_and_uses_small_window():
+    scraper, options = init_driver(lean_profile=True)
+    assert '--window-size=1024,768' in options.arguments
+    assert '--blink-settings=imagesEnabled=false' in options.arguments
+    assert options.experimental_options['prefs']['profile.managed_default_content_settings.images'] == 2
+    scraper.driver.execute_cdp_cmd.assert_any_call('Network.setBlockedURLs',
+                                                   {'urls': GoogleMapsScraper.LEAN_BLOCKED_URLS})
+    scraper.driver.maximize_window.assert_not_called()
+
+
+def test_default_profile_maximizes_and_blocks_nothing():
+    scraper, options = init_driver()
+    assert not any(argument.startswith('--window-size') for argument in options.arguments)
+    assert 'prefs' not in options.experimental_options
+    scraper.driver.execute_cdp_cmd.assert_not_called()
+    scraper.driver.maximize_window.assert_called_once()
+
+
+def test_log_transfer_sums_finished_requests_from_performance_log():
+    scraper, options = init_driver(log_transfer=True)
+    assert options.to_capabilities()['goog:loggingPrefs'] == {'performance': 'ALL'}
+    scraper.driver.get_log.return_value = [
+        performance_entry('Network.loadingFinished', encodedDataLength=2048),
+        performance_entry('Network.responseReceived', requestId='1'),
+        {'message': 'corrompida'},
+        performance_entry('Network.loadingFinished', encodedDataLength=1024),
+    ]
+    scraper.is_alive = mock.Mock(return_value=True)
+    scraper._log_search_transfer('oficina em Cambé')
+    assert scraper.search_bytes == 3072
+    assert scraper.total_bytes == 3072
+
+
+def test_cdp_browser_arguments_follow_lean_profile():
+    lean = ChromeBrowser(headless=True, lean_profile=True, binary='chrome')._arguments()
+    assert '--window-size=1024,768' in lean
+    assert '--blink-settings=imagesEnabled=false' in lean
+    assert '--window-size=1920,1080' in ChromeBrowser(headless=True, binary='chrome')._arguments()
+
+
+def test_cdp_tab_blocks_urls_and_counts_bytes():
+    tab = mock.Mock()
+    tab.send = mock.AsyncMock()
+    scraper = AsyncMapsScraper(pacing=FixedPacing(0), lean_profile=True, log_transfer=True)
+    scraper.browser = mock.Mock()
+    scraper.browser.new_tab = mock.AsyncMock(return_value=tab)
+
+    assert asyncio.run(scraper._open_tab()) is tab
+    tab.send.assert_any_call('Network.enable')
+    tab.send.assert_any_call('Network.setBlockedURLs', urls=GoogleMapsScraper.LEAN_BLOCKED_URLS)
+
+    event, handler = tab.on.call_args.args
+    assert event == 'Network.loadingFinished'
+    handler({'encodedDataLength': 500})
+    handler({'requestId': 'sem tamanho'})
+    assert scraper.search_bytes == 500
+
+
+def test_cdp_tab_without_lean_profile_or_transfer_log_is_untouched():
+    tab = mock.Mock()
+    tab.send = mock.AsyncMock()
+    scraper = AsyncMapsScraper(pacing=FixedPacing(0))
+    scraper.browser = mock.Mock()
+    scraper.browser.new_tab = mock.AsyncMock(return_value=tab)
+
+    asyncio.run(scraper._open_tab())
+    tab.send.assert_not_called()
+    tab.on.assert_not_called()
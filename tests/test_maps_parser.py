@@ -0,0 +1,94 @@
+"""
+Testes do maps_parser com respostas de rede salvas (tests/fixtures/maps_responses).
+
+As respostas foram reduzidas e anonimizadas: só os índices lidos pelo parser
+estão preenchidos, com o mesmo aninhamento das respostas reais.
+"""
+import os
+
+import pytest
+
+import maps_parser
+from conftest import FIXTURES
+
+RESPONSES = os.path.join(FIXTURES, 'maps_responses')
+
+AUTO_PECAS = {
+    'nome': 'Auto Peças Exemplo',
+    'endereco': 'R. Exemplo, 100 - Centro, Cambé - PR, 86181-000',
+    'telefone': '(43) 3254-0000',
+    'avaliacao': '4,6',
+    'num_avaliacoes': '128',
+    'latitude': -23.2766,
+    'longitude': -51.2779,
+    'place_id': 'ChIJAAAAAAAAAAAAAAAAAAAAAA1'
+}
+
+OFICINA = {
+    'nome': 'Oficina Modelo',
+    'endereco': 'Av. Modelo, 2000, Jardim Teste, Cambé - PR',
+    'telefone': 'Não informado',
+    'avaliacao': '5,0',
+    'num_avaliacoes': '7',
+    'latitude': -23.28,
+    'longitude': -51.28,
+    'place_id': 'ChIJAAAAAAAAAAAAAAAAAAAAAA2'
+}
+
+SEM_DADOS = {
+    'nome': 'Peças Sem Dados',
+    'endereco': 'Não informado',
+    'telefone': 'Não informado',
+    'avaliacao': 'Não informado',
+    'num_avaliacoes': 'Não informado',
+    'latitude': None,
+    'longitude': None,
+    'place_id': None
+}
+
+
+def read(name: str) -> str:
+    with open(os.path.join(RESPONSES, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_search_response_with_xssi_prefix():
+    assert read('busca.json').startswith(maps_parser.XSSI_PREFIX)
+    assert maps_parser.parse_response(read('busca.json')) == [AUTO_PECAS, OFICINA, SEM_DADOS]
+
+
+def test_search_response_inside_envelope():
+    body = read('busca_envelope.json')
+    assert body.endswith('/*""*/')
+    assert maps_parser.parse_response(body) == [AUTO_PECAS, OFICINA, SEM_DADOS]
+
+
+def test_place_response():
+    assert maps_parser.parse_response(read('lugar.json')) == [AUTO_PECAS]
+
+
+@pytest.mark.parametrize('body', ['', 'not json', ")]}'", ")]}'\n{\"d\": 1}", '[]', '{"a": [1, 2]}'])
+def test_malformed_bodies_return_no_records(body):
+    assert maps_parser.parse_response(body) == []
+
+
+def test_truncated_response_returns_no_records():
+    assert maps_parser.load_response(read('truncada.json')) is None
+    assert maps_parser.parse_response(read('truncada.json')) == []
+
+
+def test_partial_place_blocks():
+    # Bloco sem nome é ignorado; bloco cortado depois do nome usa o que tiver e 'Não informado' no resto
+    records = maps_parser.parse_response(read('parcial.json'))
+    assert records == [dict(OFICINA, telefone='Não informado', place_id=None)]
+
+
+def test_parse_responses_skips_repeated_places():
+    bodies = [read('busca.json'), read('lugar.json'), read('busca_envelope.json'), 'lixo']
+    assert maps_parser.parse_responses(bodies) == [AUTO_PECAS, OFICINA, SEM_DADOS]
+
+
+def test_is_place_response():
+    assert maps_parser.is_place_response('https://www.google.com/search?tbm=map&authuser=0&q=auto')
+    assert maps_parser.is_place_response('https://www.google.com/maps/preview/place?authuser=0')
+    assert not maps_parser.is_place_response('https://www.google.com/maps/vt?pb=!1m5')
@@ -0,0 +1,35 @@
+"""Testes do endpoint HTTP de métricas."""
+import socket
+
+import requests
+
+from metrics import Metrics
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_exporter_binds_to_loopback_by_default():
+    metrics = Metrics()
+    metrics.incr('consultas')
+    metrics.start_exporter(port=free_port())
+    try:
+        host, port = metrics._httpd.server_address
+        assert host == '127.0.0.1'
+        response = requests.get(f"http://127.0.0.1:{port}/metrics", timeout=5)
+        assert response.status_code == 200
+        assert 'maps_scraper_consultas_total 1' in response.text
+    finally:
+        metrics.stop_exporter()
+
+
+def test_exporter_host_option():
+    metrics = Metrics()
+    metrics.start_exporter(port=free_port(), host='0.0.0.0')
+    try:
+        assert metrics._httpd.server_address[0] == '0.0.0.0'
+    finally:
+        metrics.stop_exporter()
@@ -0,0 +1,80 @@
+"""Testes da classificação e normalização dos campos (telefone, endereço, avaliações)."""
+import pandas as pd
+import pytest
+
+from normalization import (
+    NOT_INFORMED, classify_info_texts, normalize_dataframe, parse_rating, parse_review_count, phone_to_e164
+)
+
+ENDERECO = 'R. Belo Horizonte, 727 - Centro, Cambé - PR'
+
+PHONES = [
+    ('(43) 3254-5910', '+554332545910'),
+    ('(43) 99999-0000', '+5543999990000'),
+    ('043 99999-0000', '+5543999990000'),     # zero de discagem interurbana
+    ('(011) 3254-5910', '+551132545910'),
+    ('+55 43 99999-0000', '+5543999990000'),
+    ('55 43 3254 5910', '+554332545910'),
+    ('0800 723 0000', None),                  # 0800/0300 não têm E.164
+    ('0800-123-4567', None),
+    ('0300 789 1234', None),
+    ('(43) 8999-0000', '+554389990000'),
+    ('43 89999-0000', None),                  # celular de 11 dígitos sem o 9
+    ('+1 415 555 0101', None),                # número de outro país
+    ('4002-8922', None),                      # sem DDD
+    ('(43) 3254-591', None),
+    (NOT_INFORMED, None),
+    ('', None),
+]
+
+
+@pytest.mark.parametrize('text, expected', PHONES)
+def test_phone_to_e164(text, expected):
+    assert phone_to_e164(text) == expected
+
+
+def test_dataframe_phone_rules_match_phone_to_e164():
+    df = normalize_dataframe(pd.DataFrame({'telefone': [text or NOT_INFORMED for text, _ in PHONES]}))
+    assert [value if isinstance(value, str) else None for value in df['telefone_e164']] == [
+        expected for _, expected in PHONES]
+
+
+@pytest.mark.parametrize('texts, expected', [
+    ([ENDERECO, '(43) 3254-5910'], (ENDERECO, '(43) 3254-5910')),
+    (['(43) 3254-5910', ENDERECO], (ENDERECO, '(43) 3254-5910')),
+    (['oficinadojoao.com.br', ENDERECO, '0800 723 0000'], (ENDERECO, '0800 723 0000')),
+    # Site que começa com palavra de endereço não é endereço
+    (['parque.com.br', ENDERECO], (ENDERECO, None)),
+    (['https://www.vilaautopecas.com.br/contato'], (None, None)),
+    (['Aberto 24 horas', 'Fecha às 18:00', '86050-000'], ('86050-000', None)),
+    # Texto longo com números (horário, endereço) não é telefone
+    (['Seg a sex 08:00-18:00 4002-8922 ramal 12'], (None, None)),
+    (['(43) 3254-5910', '(43) 99999-0000'], (None, '(43) 3254-5910')),
+    ([], (None, None)),
+])
+def test_classify_info_texts(texts, expected):
+    assert classify_info_texts(texts) == expected
+
+
+def test_dataframe_drops_website_address_and_moves_phone_from_address():
+    df = normalize_dataframe(pd.DataFrame({
+        'endereco': ['parque.com.br', '(43) 3254-5910', ENDERECO],
+        'telefone': ['(43) 3254-5910', NOT_INFORMED, '0800 723 0000'],
+    }))
+    assert list(df['endereco']) == [NOT_INFORMED, NOT_INFORMED, ENDERECO]
+    assert list(df['telefone']) == ['(43) 3254-5910', '(43) 3254-5910', '0800 723 0000']
+    assert list(df['telefone_e164'].fillna('')) == ['+554332545910', '+554332545910', '']
+
+
+@pytest.mark.parametrize('text, expected', [('4,6', 4.6), ('5', 5.0), ('0,0', 0.0), ('7,2', None),
+                                            (NOT_INFORMED, None), ('sem nota', None)])
+def test_parse_rating(text, expected):
+    assert parse_rating(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [('57', 57), ('(1.234)', 1234), ('1,2 mil', 1200),
+                                            ('3 mil avaliações', 3000), (NOT_INFORMED, None), ('', None)])
+def test_parse_review_count_matches_dataframe(text, expected):
+    assert parse_review_count(text) == expected
+    valor = normalize_dataframe(pd.DataFrame({'num_avaliacoes': [text]}))['num_avaliacoes_valor'][0]
+    assert (None if valor is pd.NA else valor) == expected
@@ -0,0 +1,89 @@
+"""Testes das políticas de ritmo (pausas anti-bloqueio)."""
+import asyncio
+from unittest import mock
+
+import pytest
+
+from pacing import AdaptiveConcurrency, FixedPacing, JitterPacing, TokenBucketPacing, create_pacing
+
+
+def test_block_slows_down_up_to_max_multiplier():
+    pacing = FixedPacing(2.0, max_multiplier=8.0)
+    for expected in (2.0, 4.0, 8.0, 8.0):
+        pacing.on_block()
+        assert pacing.multiplier == expected
+    assert pacing.next_delay() == 16.0
+    assert pacing.get_stats()['bloqueios'] == 4
+
+
+def test_speeds_up_only_after_consecutive_successes():
+    pacing = FixedPacing(2.0, successes_to_speedup=3, speedup_factor=0.5, min_multiplier=0.5)
+    pacing.on_success()
+    pacing.on_success()
+    pacing.on_block()  # Zera a sequência de sucessos
+    pacing.on_success()
+    pacing.on_success()
+    assert pacing.multiplier == 2.0
+    pacing.on_success()
+    assert pacing.multiplier == 1.0
+    for _ in range(9):
+        pacing.on_success()
+    assert pacing.multiplier == 0.5
+
+
+def test_throttle_sleeps_and_accounts_time():
+    pacing = FixedPacing(0.5)
+    with mock.patch('pacing.time.sleep') as sleep:
+        assert pacing.throttle() == 0.5
+        assert pacing.throttle() == 0.5
+    assert [call.args[0] for call in sleep.call_args_list] == [0.5, 0.5]
+    assert pacing.get_stats()['tempo_throttle'] == 1.0
+
+    assert asyncio.run(FixedPacing(0.01).throttle_async()) == 0.01
+
+
+def test_jitter_stays_within_range_times_multiplier():
+    pacing = JitterPacing(1.0, 3.0)
+    pacing.on_block()
+    delays = [pacing.next_delay() for _ in range(200)]
+    assert all(2.0 <= delay <= 6.0 for delay in delays)
+
+
+def test_token_bucket_allows_burst_then_waits_for_refill():
+    now = [100.0]
+    with mock.patch('pacing.time.monotonic', side_effect=lambda: now[0]):
+        pacing = TokenBucketPacing(rate=0.5, capacity=3)
+        assert [pacing.next_delay() for _ in range(3)] == [0.0, 0.0, 0.0]
+        # Balde vazio: a próxima ficha leva 1 / 0,5 = 2s
+        assert pacing.next_delay() == pytest.approx(2.0)
+        now[0] += 10.0
+        assert pacing.next_delay() == 0.0
+        # Depois de um bloqueio a reposição fica mais lenta
+        pacing.on_block()
+        pacing._tokens = 0.0
+        assert pacing.next_delay() == pytest.approx(4.0)
+
+
+def test_create_pacing_by_name():
+    assert isinstance(create_pacing('token_bucket', rate=1.0), TokenBucketPacing)
+    assert create_pacing('fixo', delay=0.2).next_delay() == 0.2
+    with pytest.raises(ValueError):
+        create_pacing('turbo')
+
+
+def test_adaptive_concurrency_grows_while_latency_holds_and_backs_off():
+    tabs = AdaptiveConcurrency(max_limit=4, successes_to_adjust=2)
+    assert [tabs.on_success(1.0) for _ in range(4)] == [1, 2, 2, 3]
+    # Com 3 abas cada lugar ficou bem mais lento: volta para 2
+    assert [tabs.on_success(2.0) for _ in range(2)] == [3, 2]
+    assert tabs.on_block() == 1
+    assert tabs.get_stats()['bloqueios'] == 1
+    # No mínimo a latência atual vira a referência: rede lenta não trava em 1 aba
+    assert [tabs.on_success(3.0) for _ in range(2)] == [1, 2]
+
+
+def test_adaptive_concurrency_respects_bounds():
+    tabs = AdaptiveConcurrency(max_limit=2, initial=5, successes_to_adjust=1)
+    assert tabs.limit == 2
+    assert tabs.on_success(1.0) == 2
+    assert tabs.on_block() == 1 and tabs.on_block() == 1
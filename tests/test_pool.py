@@ -0,0 +1,91 @@
+"""Testes do ScrapingPool com scrapers falsos (sem navegador)."""
+import threading
+
+from metrics import Metrics
+from pool import ScrapingPool
+from retry import RetriesExhaustedError
+from scraper import GoogleMapsScraper, SessionBlockedError
+
+
+class FakeScraper:
+    """Só o que o pool usa de um scraper quando a tarefa é passada em task."""
+
+    def __init__(self):
+        self.metrics = Metrics()
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def run_pool(pairs, task, **kwargs):
+    done = []
+    pool = ScrapingPool(scraper_factory=FakeScraper, **kwargs)
+    pool.run(pairs, lambda nicho, cidade, records, error: done.append((cidade, records, error)), task=task)
+    return pool, done
+
+
+def test_blocked_job_goes_back_to_the_queue():
+    blocked = set()
+
+    def task(scraper, nicho, cidade):
+        if cidade not in blocked:
+            blocked.add(cidade)
+            raise SessionBlockedError(GoogleMapsScraper.PAGE_CAPTCHA, f"{nicho} em {cidade}")
+        return [{'nome': f'Oficina de {cidade}'}]
+
+    pool, done = run_pool([('oficina', 'Cambé'), ('oficina', 'Londrina')], task)
+    assert sorted(done) == [('Cambé', [{'nome': 'Oficina de Cambé'}], None),
+                            ('Londrina', [{'nome': 'Oficina de Londrina'}], None)]
+    assert pool.requeued == 2 and pool.retried == 0
+    assert pool.scrapers[0].metrics.get_counter('jobs_reenfileirados', motivo=GoogleMapsScraper.PAGE_CAPTCHA) == 2
+
+
+def test_job_blocked_too_many_times_is_reported_as_exhausted():
+    def task(scraper, nicho, cidade):
+        raise SessionBlockedError(GoogleMapsScraper.PAGE_BLOCKED, 'oficina em Cambé')
+
+    pool, done = run_pool([('oficina', 'Cambé')], task, max_block_retries=2)
+    [(_, records, error)] = done
+    assert isinstance(error, RetriesExhaustedError)
+    assert error.attempts == 3 and isinstance(error.last_error, SessionBlockedError)
+    assert records == [] and pool.requeued == 2
+
+
+def test_stopped_pool_leaves_blocked_job_open():
+    pool = ScrapingPool(scraper_factory=FakeScraper)
+    done = []
+
+    def task(scraper, nicho, cidade):
+        pool.stop()
+        raise SessionBlockedError(GoogleMapsScraper.PAGE_CAPTCHA, 'oficina em Cambé')
+
+    assert pool.run([('oficina', 'Cambé')], lambda *args: done.append(args), task=task) == 0
+    assert done == [] and pool.requeued == 0
+
+
+def test_workers_run_in_parallel_each_with_its_own_scraper():
+    barrier = threading.Barrier(3, timeout=5)
+    used = {}
+
+    def task(scraper, nicho, cidade):
+        used[cidade] = scraper
+        barrier.wait()  # Só passa com os três jobs em andamento ao mesmo tempo
+        return [{'nome': cidade}]
+
+    callback_threads = set()
+    pool = ScrapingPool(num_workers=3, scraper_factory=FakeScraper)
+    count = pool.run([('oficina', cidade) for cidade in ('Cambé', 'Londrina', 'Ibiporã')],
+                     lambda *args: callback_threads.add(threading.current_thread()), task=task)
+
+    assert count == 3
+    assert len(pool.scrapers) == 3 and len(set(map(id, used.values()))) == 3
+    # Os resultados são entregues na thread que chamou run()
+    assert callback_threads == {threading.current_thread()}
+    pool.close()
+    assert all(scraper.closed for scraper in pool.scrapers)
+
+
+def test_never_starts_more_workers_than_jobs():
+    pool, done = run_pool([('oficina', 'Cambé')], lambda scraper, nicho, cidade: [], num_workers=4)
+    assert len(done) == 1 and len(pool.scrapers) == 1
@@ -0,0 +1,59 @@
+"""Testes da rolagem da lista de resultados (_harvest_feed) com um driver simulado."""
+from unittest import mock
+
+from selenium.common.exceptions import TimeoutException
+
+from pacing import FixedPacing
+from scraper import GoogleMapsScraper
+
+
+def place_url(n):
+    return f'https://www.google.com/maps/place/Oficina+{n}/data=!19sChIJ{n}'
+
+
+def harvest(numbers, end=False, has_feed=True):
+    """Resposta do HARVEST_FEED_JS: links acumulados até a rolagem atual."""
+    return {'links': [(f'elemento-{n}', place_url(n)) for n in numbers], 'end': end, 'hasFeed': has_feed}
+
+
+def make_scraper(*harvests, max_results=0, first_result=True):
+    scraper = GoogleMapsScraper(headless=True, pacing=FixedPacing(0), max_results=max_results)
+    scraper.driver = mock.Mock()
+    scraper.driver.execute_script.side_effect = list(harvests)
+
+    def wait_for(condition, timeout=None):
+        # Primeira espera: algum resultado na tela; as seguintes: itens novos após rolar
+        if not first_result and timeout is None:
+            raise TimeoutException()
+
+    scraper._wait_for = mock.Mock(side_effect=wait_for)
+    return scraper
+
+
+def test_scrolls_until_end_marker_without_repeating_places():
+    scraper = make_scraper(harvest([1, 2, 3]), harvest([2, 3, 4, 5]), harvest([4, 5, 6], end=True))
+    assert scraper.get_results_urls() == [place_url(n) for n in range(1, 7)]
+    assert scraper.driver.execute_script.call_count == 3
+
+
+def test_stops_at_max_results():
+    scraper = make_scraper(harvest([1, 2, 3]), harvest([1, 2, 3, 4, 5]), max_results=4)
+    assert scraper.get_results_urls() == [place_url(n) for n in range(1, 5)]
+    assert scraper.driver.execute_script.call_count == 2
+
+
+def test_stops_after_idle_scrolls():
+    scraper = make_scraper(harvest([1, 2]), harvest([1, 2]), harvest([1, 2]), harvest([1, 2, 3]))
+    assert scraper.get_results_urls(max_idle_scrolls=2) == [place_url(1), place_url(2)]
+    assert scraper.driver.execute_script.call_count == 3
+
+
+def test_single_result_page_has_no_feed_to_scroll():
+    scraper = make_scraper(harvest([1], has_feed=False))
+    assert scraper.get_results_links() == ['elemento-1']
+
+
+def test_search_without_results_returns_empty_list():
+    scraper = make_scraper(first_result=False)
+    assert scraper.get_results_urls() == []
+    scraper.driver.execute_script.assert_not_called()
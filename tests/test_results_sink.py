@@ -0,0 +1,107 @@
+"""Testes do arquivo de resultados incremental (ResultsSink) e das exportações."""
+import json
+from unittest import mock
+
+import pytest
+
+from results_sink import SNAPSHOT_OFFSET_KEY, ResultsSink, export_records
+
+
+def record(nome, telefone='(43) 3254-0000', avaliacao='4,6', num_avaliacoes='(1.234)'):
+    return {'nicho': 'oficina', 'cidade': 'Cambé', 'uf': 'PR', 'ibge_id': 4103701, 'nome': nome,
+            'endereco': 'R. Exemplo, 100 - Cambé - PR', 'telefone': telefone,
+            'avaliacao': avaliacao, 'num_avaliacoes': num_avaliacoes, 'url': None}
+
+
+def test_fsync_runs_in_batches_of_flush_every(tmp_path):
+    sink = ResultsSink(str(tmp_path / 'resultados.jsonl'), flush_every=3, flush_interval=3600)
+    with mock.patch('results_sink.os.fsync') as fsync:
+        sink.append([record('Oficina A'), record('Oficina B')])
+        assert fsync.call_count == 0
+        sink.append([record('Oficina C')])
+        assert fsync.call_count == 1
+        sink.append([record('Oficina D')])
+        assert fsync.call_count == 1
+        sink.flush()
+        assert fsync.call_count == 2
+        sink.close()
+    assert sink.count == 4
+
+
+def test_fsync_also_runs_after_flush_interval(tmp_path):
+    sink = ResultsSink(str(tmp_path / 'resultados.jsonl'), flush_every=1000, flush_interval=0)
+    with mock.patch('results_sink.os.fsync') as fsync:
+        sink.append([record('Oficina A')])
+        sink.append([record('Oficina B')])
+        assert fsync.call_count == 2
+        sink.close()
+
+
+def test_truncated_last_line_is_dropped_on_reopen(tmp_path):
+    path = tmp_path / 'resultados.jsonl'
+    lines = [json.dumps(record(nome), ensure_ascii=False) for nome in ('Oficina A', 'Oficina B')]
+    # Gravação interrompida no meio do terceiro registro
+    path.write_text('\n'.join(lines) + '\n' + lines[0][:25], encoding='utf-8')
+
+    sink = ResultsSink(str(path))
+    assert sink.count == 2
+    sink.append([record('Oficina C')])
+    assert [item['nome'] for item in sink.read_all()] == ['Oficina A', 'Oficina B', 'Oficina C']
+    assert list(sink.dataframe()['nome']) == ['Oficina A', 'Oficina B', 'Oficina C']
+    sink.close()
+
+    # O registro novo começa em uma linha própria e a contagem continua certa ao reabrir
+    assert [json.loads(line)['nome'] for line in path.read_text(encoding='utf-8').splitlines()] == [
+        'Oficina A', 'Oficina B', 'Oficina C']
+    reopened = ResultsSink(str(path))
+    assert reopened.count == 3
+    reopened.close()
+
+
+def test_file_with_only_a_partial_line_starts_empty(tmp_path):
+    path = tmp_path / 'resultados.jsonl'
+    path.write_text('{"nome": "Ofi', encoding='utf-8')
+    sink = ResultsSink(str(path))
+    assert sink.count == 0
+    sink.append([record('Oficina A')])
+    assert [item['nome'] for item in sink.read_all()] == ['Oficina A']
+    sink.close()
+
+
+def test_parquet_snapshot_keeps_jsonl_offset_in_schema_metadata(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'resultados.jsonl')
+
+    sink = ResultsSink(path)
+    sink.append([record('Oficina A'), record('Oficina B')])
+    sink.close()
+    metadata = pq.read_schema(sink.snapshot_path).metadata
+    assert int(metadata[SNAPSHOT_OFFSET_KEY]) == (tmp_path / 'resultados.jsonl').stat().st_size
+
+    sink = ResultsSink(path)
+    snapshot, offset = sink._read_snapshot()
+    assert len(snapshot) == 2 and offset == int(metadata[SNAPSHOT_OFFSET_KEY])
+    sink.append([record('Oficina C')])
+    df = sink.dataframe()
+    sink.close()
+    assert list(df['nome']) == ['Oficina A', 'Oficina B', 'Oficina C']
+    assert df['cidade'].dtype == 'category'
+
+
+def test_spreadsheet_export_keeps_pt_br_rating_and_e164_as_text(tmp_path):
+    openpyxl = pytest.importorskip('openpyxl')
+    path = str(tmp_path / 'resultados.xlsx')
+    records = [record('Oficina A'), record('Oficina B', telefone='Não informado', avaliacao='Não informado')]
+
+    assert export_records(records, path) == 2
+    sheet = openpyxl.load_workbook(path).active
+    header = [cell.value for cell in sheet[1]]
+    avaliacao = header.index('Avaliação') + 1
+    e164 = header.index('Telefone (E.164)') + 1
+    assert [sheet.cell(row, avaliacao).value for row in (2, 3)] == ['4,6', 'Não informado']
+    assert sheet.cell(2, e164).value == '+554332540000'
+    assert sheet.cell(2, e164).number_format == '@'
+
+    csv_path = tmp_path / 'resultados.csv'
+    export_records(records, str(csv_path))
+    assert ',"4,6",1234' in csv_path.read_text(encoding='utf-8-sig')
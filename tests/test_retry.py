@@ -0,0 +1,99 @@
+"""Testes das políticas de nova tentativa (jobs no pool e lugares no scraper)."""
+import time
+from unittest import mock
+
+import pytest
+
+from metrics import Metrics
+from pacing import FixedPacing
+from pool import ScrapingPool
+from retry import RetriesExhaustedError, RetryPolicy
+from scraper import GoogleMapsScraper
+
+
+class FakeScraper:
+    """Só o que o pool usa de um scraper quando a tarefa é passada em task."""
+
+    def __init__(self):
+        self.metrics = Metrics()
+
+    def close(self):
+        pass
+
+
+def run_pool(pairs, task, **kwargs):
+    done = []
+    pool = ScrapingPool(scraper_factory=FakeScraper, **kwargs)
+    pool.run(pairs, lambda nicho, cidade, records, error: done.append((cidade, records, error)), task=task)
+    return pool, done
+
+
+def test_delay_doubles_up_to_max_delay_without_jitter():
+    policy = RetryPolicy(max_attempts=6, base_delay=30.0, max_delay=100.0, jitter=0)
+    assert [policy.delay(attempt) for attempt in range(1, 5)] == [30.0, 60.0, 100.0, 100.0]
+
+
+def test_jitter_keeps_delay_between_bounds():
+    policy = RetryPolicy(base_delay=10.0, jitter=0.5)
+    delays = [policy.delay(2) for _ in range(200)]
+    assert all(10.0 <= delay <= 20.0 for delay in delays)
+    assert max(delays) - min(delays) > 1.0
+
+
+def test_can_retry_counts_the_first_attempt():
+    assert [RetryPolicy(max_attempts=3).can_retry(attempt) for attempt in (1, 2, 3)] == [True, True, False]
+    assert not RetryPolicy(max_attempts=0).can_retry(1)
+
+
+def test_pool_gives_up_with_retries_exhausted_after_max_attempts():
+    calls = []
+
+    def task(scraper, nicho, cidade):
+        calls.append(cidade)
+        raise TimeoutError('página não abriu')
+
+    pool, done = run_pool([('oficina', 'Cambé')], task,
+                          retry_policy=RetryPolicy(max_attempts=3, base_delay=0.01, jitter=0))
+    [(cidade, records, error)] = done
+    assert isinstance(error, RetriesExhaustedError)
+    assert error.attempts == 3 and isinstance(error.last_error, TimeoutError)
+    assert records == [] and len(calls) == 3 and pool.retried == 2
+
+
+def test_failed_job_waits_in_heap_without_holding_the_worker():
+    failed_once = set()
+
+    def task(scraper, nicho, cidade):
+        if cidade == 'Cambé' and cidade not in failed_once:
+            failed_once.add(cidade)
+            raise ConnectionError('navegador caiu')
+        return [{'nome': cidade}]
+
+    inicio = time.monotonic()
+    _, done = run_pool([('oficina', 'Cambé'), ('oficina', 'Londrina'), ('oficina', 'Ibiporã')], task,
+                       retry_policy=RetryPolicy(max_attempts=2, base_delay=0.3, jitter=0))
+    # Um worker só: os outros jobs passam na frente enquanto o retry espera
+    assert [cidade for cidade, _, _ in done] == ['Londrina', 'Ibiporã', 'Cambé']
+    assert done[-1] == ('Cambé', [{'nome': 'Cambé'}], None)
+    assert time.monotonic() - inicio >= 0.3
+
+
+def test_place_is_discarded_after_result_retries():
+    scraper = GoogleMapsScraper(headless=True, pacing=FixedPacing(0),
+                                result_retry=RetryPolicy(max_attempts=2, base_delay=0, jitter=0))
+    url = 'https://www.google.com/maps/place/Oficina+A'
+    with mock.patch.object(scraper, 'scrape_place', return_value=None) as scrape_place:
+        assert scraper._scrape_place_with_retry(url) is None
+    assert scrape_place.call_count == 2
+    assert scraper.take_failed_places() == [url]
+    assert scraper.metrics.get_counter('retentativas', nivel='resultado') == 1
+
+
+@pytest.mark.parametrize('attempts', [1, 2])
+def test_place_retry_returns_first_success(attempts):
+    scraper = GoogleMapsScraper(headless=True, pacing=FixedPacing(0),
+                                result_retry=RetryPolicy(max_attempts=3, base_delay=0, jitter=0))
+    data = {'nome': 'Oficina A'}
+    with mock.patch.object(scraper, 'scrape_place', side_effect=[None] * (attempts - 1) + [data]):
+        assert scraper._scrape_place_with_retry('https://www.google.com/maps/place/Oficina+A') == data
+    assert scraper.take_failed_places() == []
@@ -0,0 +1,60 @@
+"""Testes da reação a CAPTCHA/bloqueio do GoogleMapsScraper (sem navegador)."""
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+from pacing import FixedPacing
+from scraper import GoogleMapsScraper, SessionBlockedError
+
+
+def make_scraper(block_cooldown: float) -> GoogleMapsScraper:
+    scraper = GoogleMapsScraper(headless=True, pacing=FixedPacing(0), block_cooldown=block_cooldown)
+    scraper.driver = mock.Mock(name='driver_bloqueado')
+    return scraper
+
+
+def test_block_waits_cooldown_and_starts_new_session():
+    scraper = make_scraper(block_cooldown=0.3)
+    blocked_driver = scraper.driver
+    new_driver = mock.Mock(name='driver_novo')
+
+    def start_session():
+        scraper.driver = new_driver
+
+    with mock.patch.object(scraper, '_start_session', side_effect=start_session) as start:
+        inicio = time.monotonic()
+        with pytest.raises(SessionBlockedError) as error:
+            scraper._handle_block(GoogleMapsScraper.PAGE_CAPTCHA, 'auto peças em Cambé - PR')
+        elapsed = time.monotonic() - inicio
+
+    assert error.value.state == GoogleMapsScraper.PAGE_CAPTCHA
+    assert elapsed >= 0.3
+    blocked_driver.quit.assert_called_once()
+    start.assert_called_once()
+    assert scraper.driver is new_driver
+    assert scraper.restart_reasons == {GoogleMapsScraper.PAGE_CAPTCHA: 1}
+    assert not scraper._closed.is_set()
+
+
+def test_cooldown_doubles_on_consecutive_blocks():
+    scraper = make_scraper(block_cooldown=0.1)
+    with mock.patch.object(scraper, '_start_session'), mock.patch.object(scraper._closed, 'wait',
+                                                                          return_value=False) as wait:
+        for _ in range(3):
+            with pytest.raises(SessionBlockedError):
+                scraper._handle_block(GoogleMapsScraper.PAGE_BLOCKED, 'q')
+    assert [call.args[0] for call in wait.call_args_list] == pytest.approx([0.1, 0.2, 0.4])
+
+
+def test_external_close_interrupts_cooldown_without_restart():
+    scraper = make_scraper(block_cooldown=30)
+    threading.Timer(0.2, scraper.close).start()
+    with mock.patch.object(scraper, '_start_session') as start:
+        inicio = time.monotonic()
+        with pytest.raises(SessionBlockedError):
+            scraper._handle_block(GoogleMapsScraper.PAGE_CAPTCHA, 'q')
+    assert time.monotonic() - inicio < 5
+    start.assert_not_called()
+    assert scraper.driver is None